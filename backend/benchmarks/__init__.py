@@ -0,0 +1,7 @@
+"""
+Performance benchmarks for the Customs Broker Portal backend.
+
+Benchmarks run standalone against a synthetic, full-scale tariff schedule
+rather than as part of the test suite, and write machine-readable results
+so builds can be compared.
+"""
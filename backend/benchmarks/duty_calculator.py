@@ -0,0 +1,410 @@
+"""
+Duty calculator benchmarks on a full-scale synthetic tariff.
+
+Seeds an empty database with a synthetic schedule (see
+``benchmarks.synthetic_tariff``) and times a randomized workload of leaf
+HS codes, FTA partner and non-partner origins, and exporters with
+anti-dumping measures against:
+
+- ``DutyCalculatorService`` on database lookups
+- ``DutyCalculatorService`` on the in-memory rate book
+- ``POST /api/duty/calculate``
+- ``GET /api/duty/breakdown``
+- ``POST /api/duty/calculate-comprehensive``
+
+Results (p50/p95/p99 latency and throughput per benchmark, with the dataset
+size and build details) are written as JSON for comparison across builds.
+
+Usage, from the backend directory:
+
+    python -m benchmarks.duty_calculator --output results.json
+    python -m benchmarks.duty_calculator --database-url postgresql+asyncpg://... --concurrency 8
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from benchmarks.synthetic_tariff import (
+    FTA_PARTNERS, NON_PARTNER_COUNTRIES, SyntheticSchedule, SyntheticTariffSpec,
+    generate_schedule, load_schedule
+)
+from config import get_settings
+from database import Base, get_async_session
+from services.best_rates import refresh_best_rates
+from services.duty_calculator import DutyCalculatorService, DutyCalculationInput
+from services.rate_book import RateBook
+
+RESULTS_FORMAT_VERSION = 1
+
+DEFAULT_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+PARTNER_COUNTRIES = tuple(country for _, _, countries in FTA_PARTNERS for country in countries)
+
+
+@dataclass(frozen=True)
+class DutyRequest:
+    """One calculation in the benchmark workload."""
+    hs_code: str
+    country_code: str
+    customs_value: Decimal
+    quantity: Decimal
+    exporter_name: Optional[str] = None
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> Optional[float]:
+    """
+    Get a percentile by linear interpolation between closest ranks.
+
+    Args:
+        sorted_values: Observations in ascending order
+        q: Percentile between 0 and 100
+
+    Returns:
+        The percentile, or None with no observations
+    """
+    if not sorted_values:
+        return None
+    rank = (len(sorted_values) - 1) * q / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+def summarize(latencies: Sequence[float], elapsed: float, errors: int = 0) -> Dict[str, Any]:
+    """
+    Summarize one benchmark run.
+
+    Args:
+        latencies: Per-call latencies in seconds
+        elapsed: Wall time of the run in seconds
+        errors: Calls that raised or returned an error status
+
+    Returns:
+        Call counts, latency percentiles in milliseconds and throughput
+    """
+    ordered = sorted(latency * 1000 for latency in latencies)
+
+    def rounded(value: Optional[float]) -> Optional[float]:
+        return round(value, 3) if value is not None else None
+
+    return {
+        "calls": len(ordered) + errors,
+        "errors": errors,
+        "mean_ms": rounded(sum(ordered) / len(ordered)) if ordered else None,
+        "min_ms": rounded(ordered[0]) if ordered else None,
+        "p50_ms": rounded(percentile(ordered, 50)),
+        "p95_ms": rounded(percentile(ordered, 95)),
+        "p99_ms": rounded(percentile(ordered, 99)),
+        "max_ms": rounded(ordered[-1]) if ordered else None,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_s": round(len(ordered) / elapsed, 2) if elapsed > 0 else None,
+    }
+
+
+def build_workload(schedule: SyntheticSchedule, size: int, seed: int) -> List[DutyRequest]:
+    """
+    Build a randomized calculation workload over a schedule.
+
+    About 70% of calculations are from FTA partners, 20% from other origins
+    and 10% name an exporter subject to an anti-dumping measure.
+
+    Args:
+        schedule: Schedule the workload runs against
+        size: Number of calculations
+        seed: Random seed
+
+    Returns:
+        Calculation requests
+    """
+    rng = random.Random(seed)
+    leaves = schedule.leaf_codes
+    dumping_targets = schedule.dumping_targets
+    workload = []
+    for _ in range(size):
+        customs_value = Decimal(rng.randint(10_000, 10_000_000)) / 100
+        quantity = Decimal(rng.randint(1, 500))
+        draw = rng.random()
+        if draw < 0.1 and dumping_targets:
+            hs_code, country_code, exporter_name = rng.choice(dumping_targets)
+            workload.append(DutyRequest(hs_code, country_code, customs_value, quantity, exporter_name))
+        elif draw < 0.3:
+            workload.append(DutyRequest(rng.choice(leaves), rng.choice(NON_PARTNER_COUNTRIES), customs_value, quantity))
+        else:
+            workload.append(DutyRequest(rng.choice(leaves), rng.choice(PARTNER_COUNTRIES), customs_value, quantity))
+    return workload
+
+
+async def run_benchmark(
+    workload: Sequence[DutyRequest],
+    call: Callable[[DutyRequest], Awaitable[bool]],
+    concurrency: int = 1,
+    warmup: int = 0
+) -> Dict[str, Any]:
+    """
+    Time a call for every request in a workload.
+
+    Args:
+        workload: Requests to run
+        call: Coroutine running one request, returning whether it succeeded
+        concurrency: Requests in flight at once
+        warmup: Leading requests run before timing starts
+
+    Returns:
+        Summary from ``summarize``
+    """
+    for request in workload[:warmup]:
+        await call(request)
+
+    timed = list(workload[warmup:])
+    latencies: List[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker() -> None:
+        nonlocal errors, next_index
+        while next_index < len(timed):
+            request = timed[next_index]
+            next_index += 1
+            start = time.perf_counter()
+            try:
+                succeeded = await call(request)
+            except Exception:
+                succeeded = False
+            if succeeded:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(concurrency, 1))))
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+
+def _calculation_input(request: DutyRequest, calculation_date: date) -> DutyCalculationInput:
+    return DutyCalculationInput(
+        hs_code=request.hs_code,
+        country_code=request.country_code,
+        customs_value=request.customs_value,
+        quantity=request.quantity,
+        calculation_date=calculation_date,
+        exporter_name=request.exporter_name
+    )
+
+
+def _build_info(label: Optional[str]) -> Dict[str, Any]:
+    """Describe the build and host the benchmarks ran on."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True, timeout=10
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    settings = get_settings()
+    return {
+        "label": label,
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "rate_book_enabled": settings.rate_book_enabled,
+        "best_rate_table_enabled": settings.best_rate_table_enabled,
+    }
+
+
+async def run_duty_benchmarks(
+    database_url: str = DEFAULT_DATABASE_URL,
+    spec: SyntheticTariffSpec = SyntheticTariffSpec(),
+    iterations: int = 1000,
+    warmup: int = 50,
+    concurrency: int = 1,
+    benchmarks: Optional[Sequence[str]] = None,
+    refresh_best_rate_table: bool = True,
+    label: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Seed a database with a synthetic schedule and run the duty benchmarks.
+
+    Args:
+        database_url: Async database URL; tables are created and must be empty
+        spec: Size and shape of the synthetic schedule
+        iterations: Timed calculations per benchmark
+        warmup: Untimed calculations run first per benchmark
+        concurrency: Calculations in flight at once
+        benchmarks: Names of the benchmarks to run, all by default
+        refresh_best_rate_table: Materialize best_rates after seeding
+        label: Free-form build label recorded in the results
+
+    Returns:
+        JSON-serializable results
+    """
+    # Imported here so the schedule generator can be used without the app
+    from httpx import AsyncClient
+    from main import app
+
+    engine_options: Dict[str, Any] = {"future": True}
+    if database_url.startswith("sqlite"):
+        engine_options.update(poolclass=StaticPool, connect_args={"check_same_thread": False})
+    engine = create_async_engine(database_url, **engine_options)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    try:
+        setup_start = time.perf_counter()
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        schedule = generate_schedule(spec)
+        async with session_factory() as session:
+            await load_schedule(session, schedule)
+            if refresh_best_rate_table:
+                await refresh_best_rates(session, on_date=schedule.as_of)
+            await session.commit()
+
+        async with session_factory() as session:
+            rate_book = await RateBook.load(session, version="benchmark")
+        setup_seconds = time.perf_counter() - setup_start
+
+        calculation_date = schedule.as_of
+        workload = build_workload(schedule, iterations + warmup, spec.seed)
+
+        async def service_database(request: DutyRequest) -> bool:
+            calculator = DutyCalculatorService(concurrent_lookups=False)
+            async with session_factory() as session:
+                await calculator.calculate_comprehensive_duty(session, _calculation_input(request, calculation_date))
+            return True
+
+        rate_book_calculator = DutyCalculatorService(rate_book=rate_book)
+
+        async def service_rate_book(request: DutyRequest) -> bool:
+            await rate_book_calculator.calculate_comprehensive_duty(None, _calculation_input(request, calculation_date))
+            return True
+
+        async def override_session():
+            async with session_factory() as session:
+                yield session
+
+        app.dependency_overrides[get_async_session] = override_session
+        client = AsyncClient(app=app, base_url="http://benchmark")
+
+        async def api_calculate(request: DutyRequest) -> bool:
+            payload = {
+                "hs_code": request.hs_code,
+                "country_code": request.country_code,
+                "customs_value": str(request.customs_value),
+                "quantity": str(request.quantity),
+                "calculation_date": calculation_date.isoformat(),
+            }
+            if request.exporter_name:
+                payload["exporter_name"] = request.exporter_name
+            response = await client.post("/api/duty/calculate", json=payload)
+            return response.status_code == 200
+
+        async def api_breakdown(request: DutyRequest) -> bool:
+            params = {
+                "hs_code": request.hs_code,
+                "country_code": request.country_code,
+                "customs_value": str(request.customs_value),
+                "quantity": str(request.quantity),
+                "calculation_date": calculation_date.isoformat(),
+            }
+            if request.exporter_name:
+                params["exporter_name"] = request.exporter_name
+            response = await client.get("/api/duty/breakdown", params=params)
+            return response.status_code == 200
+
+        async def api_calculate_comprehensive(request: DutyRequest) -> bool:
+            response = await client.post("/api/duty/calculate-comprehensive", params={
+                "hs_code": request.hs_code,
+                "country_of_origin": request.country_code,
+                "customs_value": str(request.customs_value),
+            })
+            return response.status_code == 200
+
+        available = {
+            "service_database": service_database,
+            "service_rate_book": service_rate_book,
+            "api_calculate": api_calculate,
+            "api_breakdown": api_breakdown,
+            "api_calculate_comprehensive": api_calculate_comprehensive,
+        }
+        unknown = set(benchmarks or ()) - set(available)
+        if unknown:
+            raise ValueError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+        results: Dict[str, Any] = {}
+        try:
+            for name in benchmarks or available:
+                results[name] = await run_benchmark(workload, available[name], concurrency, warmup)
+        finally:
+            await client.aclose()
+            app.dependency_overrides.pop(get_async_session, None)
+    finally:
+        await engine.dispose()
+
+    return {
+        "format_version": RESULTS_FORMAT_VERSION,
+        "timestamp": datetime.utcnow().isoformat(),
+        "build": _build_info(label),
+        "dataset": {
+            "spec": asdict(spec),
+            "rows": schedule.counts(),
+            "leaf_codes": len(schedule.leaf_codes),
+            "as_of": schedule.as_of.isoformat(),
+        },
+        "config": {
+            "database": engine.url.get_backend_name(),
+            "iterations": iterations,
+            "warmup": warmup,
+            "concurrency": concurrency,
+            "setup_s": round(setup_seconds, 3),
+        },
+        "results": results,
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Run the benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark duty calculations on a full-scale synthetic tariff")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL, help="Async URL of an empty database")
+    parser.add_argument("--iterations", type=int, default=1000, help="Timed calculations per benchmark")
+    parser.add_argument("--warmup", type=int, default=50, help="Untimed calculations per benchmark")
+    parser.add_argument("--concurrency", type=int, default=1, help="Calculations in flight at once")
+    parser.add_argument("--benchmark", action="append", dest="benchmarks", help="Benchmark to run (repeatable)")
+    parser.add_argument("--seed", type=int, default=SyntheticTariffSpec.seed, help="Schedule and workload seed")
+    parser.add_argument("--no-best-rates", action="store_true", help="Leave the best_rates table empty")
+    parser.add_argument("--label", help="Build label recorded in the results")
+    parser.add_argument("--output", help="Write results to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run_duty_benchmarks(
+        database_url=args.database_url,
+        spec=SyntheticTariffSpec(seed=args.seed),
+        iterations=args.iterations,
+        warmup=args.warmup,
+        concurrency=args.concurrency,
+        benchmarks=args.benchmarks,
+        refresh_best_rate_table=not args.no_best_rates,
+        label=args.label
+    ))
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+"""
+Synthetic full-scale tariff schedule for benchmarks.
+
+Generates a deterministic schedule shaped like Schedule 3 of the Customs
+Tariff: about 15,000 tariff codes across chapters, headings, subheadings,
+8-digit tariff items and 10-digit statistical codes, with general rates
+recorded at the levels real rates are (so most statistical codes resolve
+through the HS prefix fallback), about 100,000 FTA rates including staged
+reductions, thousands of TCOs and anti-dumping measures, and GST
+provisions.
+
+Rows are plain dictionaries so a schedule can be inspected without a
+database and bulk-inserted with ``load_schedule``.
+"""
+
+import random
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.tariff import TariffCode
+from models.duty import DutyRate
+from models.fta import FtaRate
+from models.tco import Tco
+from models.dumping import DumpingDuty, normalize_exporter_name
+from models.gst import GstProvision
+from models.hierarchy import TradeAgreement
+
+# Trade agreements and the partner countries they cover
+FTA_PARTNERS: Tuple[Tuple[str, str, Tuple[str, ...]], ...] = (
+    ("AUSFTA", "Australia-United States Free Trade Agreement", ("USA",)),
+    ("SAFTA", "Singapore-Australia Free Trade Agreement", ("SGP",)),
+    ("TAFTA", "Thailand-Australia Free Trade Agreement", ("THA",)),
+    ("ChAFTA", "China-Australia Free Trade Agreement", ("CHN",)),
+    ("KAFTA", "Korea-Australia Free Trade Agreement", ("KOR",)),
+    ("JAEPA", "Japan-Australia Economic Partnership Agreement", ("JPN",)),
+    ("MAFTA", "Malaysia-Australia Free Trade Agreement", ("MYS",)),
+    ("ANZCERTA", "Australia New Zealand Closer Economic Relations Trade Agreement", ("NZL",)),
+    ("IA-CEPA", "Indonesia-Australia Comprehensive Economic Partnership Agreement", ("IDN",)),
+    ("A-UKFTA", "Australia-United Kingdom Free Trade Agreement", ("GBR",)),
+    ("AI-ECTA", "Australia-India Economic Cooperation and Trade Agreement", ("IND",)),
+    ("CPTPP", "Comprehensive and Progressive Agreement for Trans-Pacific Partnership", ("CAN", "MEX", "VNM", "CHL")),
+)
+
+# Origins with no FTA rates, exercising the general rate path
+NON_PARTNER_COUNTRIES = ("DEU", "FRA", "ITA", "BRA", "ZAF")
+
+# Chapters that attract most anti-dumping measures (plastics, paper,
+# ceramics, steel, aluminium, machinery)
+DUMPING_CHAPTERS = ("39", "48", "69", "72", "73", "76", "84", "85")
+DUMPING_COUNTRIES = ("CHN", "KOR", "THA", "MYS", "IDN", "VNM", "IND")
+
+_EXPORTER_WORDS = (
+    "Golden", "Eastern", "Pacific", "United", "Great", "Sun", "Rising", "Delta",
+    "Harbour", "Northern", "Jade", "Summit", "Oriental", "Silver", "Lotus", "Dragon",
+)
+_EXPORTER_TRADES = ("Steel", "Metal", "Aluminium", "Paper", "Plastics", "Industries", "Ceramics", "Products")
+_EXPORTER_SUFFIXES = ("Co., Ltd.", "Co. Ltd", "Limited", "Corporation", "Sdn. Bhd.", "PT Tbk", "Pvt. Ltd.")
+
+_GST_EXEMPTIONS = (
+    ("Schedule 4 Item 1", "Returned goods"),
+    ("Schedule 4 Item 18", "Goods for diplomatic use"),
+    ("Schedule 4 Item 21", "Tourist concession"),
+    ("Division 38", "GST-free food"),
+    ("Division 38", "GST-free medical aids"),
+)
+
+
+@dataclass(frozen=True)
+class SyntheticTariffSpec:
+    """
+    Size and shape of a synthetic tariff schedule.
+
+    The defaults produce roughly 15,000 tariff codes and 100,000 FTA rates.
+
+    Attributes:
+        chapters: Number of 2-digit chapters
+        headings_per_chapter: 4-digit headings per chapter
+        subheadings_per_heading: 6-digit subheadings per heading
+        items_per_subheading: 8-digit tariff items per subheading
+        statistical_ratio: Share of tariff items split into statistical codes
+        statistical_per_item: 10-digit statistical codes per split item
+        general_rate_levels: Level a leaf code's general rate is recorded at,
+            with its weight; leaves rated above themselves resolve through the
+            HS prefix fallback
+        fta_coverage: Share of general-rated codes each partner has a rate for
+        fta_staged_ratio: Share of FTA rates still being phased down, each
+            adding a row per remaining staging step
+        tco_count: Number of TCOs
+        tco_current_ratio: Share of TCOs still current
+        dumping_count: Number of anti-dumping measures
+        dumping_exporter_ratio: Share of measures naming a specific exporter
+        gst_provision_count: Number of HS-specific GST provisions
+        seed: Random seed; equal specs generate identical schedules
+    """
+    chapters: int = 96
+    headings_per_chapter: int = 10
+    subheadings_per_heading: int = 3
+    items_per_subheading: int = 2
+    statistical_ratio: float = 0.5
+    statistical_per_item: int = 2
+    general_rate_levels: Tuple[Tuple[int, float], ...] = ((10, 0.10), (8, 0.70), (6, 0.15), (4, 0.05))
+    fta_coverage: float = 0.85
+    fta_staged_ratio: float = 0.10
+    tco_count: int = 3000
+    tco_current_ratio: float = 0.85
+    dumping_count: int = 2000
+    dumping_exporter_ratio: float = 0.6
+    gst_provision_count: int = 300
+    seed: int = 20240701
+
+
+@dataclass
+class SyntheticSchedule:
+    """Rows of a generated schedule, keyed by model, in insertion order."""
+    spec: SyntheticTariffSpec
+    as_of: date
+    tables: Dict[type, List[Dict[str, Any]]] = field(default_factory=dict)
+
+    @property
+    def leaf_codes(self) -> List[str]:
+        """Get the codes goods are declared under (codes with no children)."""
+        parents = {row["parent_code"] for row in self.tables[TariffCode]}
+        return [row["hs_code"] for row in self.tables[TariffCode] if row["hs_code"] not in parents]
+
+    @property
+    def dumping_targets(self) -> List[Tuple[str, str, str]]:
+        """Get the (HS code, country, exporter) of measures naming an exporter."""
+        return [
+            (row["hs_code"], row["country_code"], row["exporter_name"])
+            for row in self.tables[DumpingDuty]
+            if row["exporter_name"]
+        ]
+
+    def counts(self) -> Dict[str, int]:
+        """Get the number of rows per table."""
+        return {model.__tablename__: len(rows) for model, rows in self.tables.items()}
+
+
+def _chapter_numbers(count: int) -> List[str]:
+    """Get chapter numbers 01-97, skipping reserved chapter 77."""
+    return [f"{n:02d}" for n in range(1, 98) if n != 77][:count]
+
+
+def _weighted_level(rng: random.Random, levels: Sequence[Tuple[int, float]], code_length: int) -> int:
+    """Pick the level a leaf's general rate is recorded at."""
+    candidates = [(level, weight) for level, weight in levels if level <= code_length]
+    return rng.choices([level for level, _ in candidates], [weight for _, weight in candidates])[0]
+
+
+def _ad_valorem(rng: random.Random) -> Decimal:
+    """Pick a general rate with the real schedule's skew towards free and 5%."""
+    return Decimal(rng.choices(("0.00", "5.00", "10.00", "4.00", "7.00"), (0.45, 0.40, 0.05, 0.05, 0.05))[0])
+
+
+def generate_schedule(
+    spec: SyntheticTariffSpec = SyntheticTariffSpec(),
+    as_of: Optional[date] = None
+) -> SyntheticSchedule:
+    """
+    Generate a synthetic tariff schedule.
+
+    Args:
+        spec: Size and shape of the schedule
+        as_of: Date the schedule's validity dates are relative to, today by default
+
+    Returns:
+        SyntheticSchedule with rows for every rate table
+    """
+    rng = random.Random(spec.seed)
+    as_of = as_of or date.today()
+    schedule = SyntheticSchedule(spec=spec, as_of=as_of)
+
+    # Tariff hierarchy
+    tariff_codes: List[Dict[str, Any]] = []
+
+    def add_code(hs_code: str, parent_code: Optional[str], level: int) -> None:
+        tariff_codes.append({
+            "hs_code": hs_code,
+            "description": f"Synthetic goods {hs_code}",
+            "unit_description": "kg" if level >= 8 else None,
+            "parent_code": parent_code,
+            "level": level,
+            "is_active": True,
+        })
+
+    leaves: List[str] = []
+    for chapter in _chapter_numbers(spec.chapters):
+        add_code(chapter, None, 2)
+        for h in range(1, spec.headings_per_chapter + 1):
+            heading = f"{chapter}{h:02d}"
+            add_code(heading, chapter, 4)
+            for s in range(1, spec.subheadings_per_heading + 1):
+                subheading = f"{heading}{s * 10:02d}"
+                add_code(subheading, heading, 6)
+                for i in range(1, spec.items_per_subheading + 1):
+                    item = f"{subheading}{i * 10:02d}"
+                    add_code(item, subheading, 8)
+                    if rng.random() < spec.statistical_ratio:
+                        for n in range(1, spec.statistical_per_item + 1):
+                            statistical = f"{item}{n + 10:02d}"
+                            add_code(statistical, item, 10)
+                            leaves.append(statistical)
+                    else:
+                        leaves.append(item)
+    schedule.tables[TariffCode] = tariff_codes
+
+    # General rates, recorded at the level each leaf falls back to
+    rated_codes: Dict[str, Decimal] = {}
+    for leaf in leaves:
+        rated = leaf[:_weighted_level(rng, spec.general_rate_levels, len(leaf))]
+        if rated not in rated_codes:
+            rated_codes[rated] = _ad_valorem(rng)
+    schedule.tables[DutyRate] = [
+        {
+            "hs_code": hs_code,
+            "general_rate": rate,
+            "unit_type": "ad_valorem",
+            "rate_text": "Free" if not rate else f"{rate.normalize()}%",
+        }
+        for hs_code, rate in rated_codes.items()
+    ]
+
+    # Trade agreements and FTA rates on the same codes as general rates
+    schedule.tables[TradeAgreement] = [
+        {
+            "fta_code": fta_code,
+            "full_name": full_name,
+            "entry_force_date": date(2005, 1, 1) + timedelta(days=365 * index),
+            "status": "active",
+        }
+        for index, (fta_code, full_name, _) in enumerate(FTA_PARTNERS)
+    ]
+    fta_rates: List[Dict[str, Any]] = []
+    for fta_code, _, countries in FTA_PARTNERS:
+        for country_code in countries:
+            for hs_code, general_rate in rated_codes.items():
+                if rng.random() >= spec.fta_coverage:
+                    continue
+                base = {
+                    "hs_code": hs_code,
+                    "fta_code": fta_code,
+                    "country_code": country_code,
+                    "rate_type": "ad_valorem",
+                    "safeguard_applicable": False,
+                    "rule_of_origin": "CTH",
+                }
+                if not general_rate or rng.random() >= spec.fta_staged_ratio:
+                    fta_rates.append({
+                        **base,
+                        "preferential_rate": Decimal("0.00"),
+                        "staging_category": "A",
+                        "effective_date": as_of - timedelta(days=rng.randint(365, 3650)),
+                        "elimination_date": None,
+                    })
+                    continue
+                # Phased reduction: one row per remaining annual step
+                steps = rng.randint(2, 5)
+                elimination = date(as_of.year + steps - 1, 1, 1)
+                for step in range(steps):
+                    fta_rates.append({
+                        **base,
+                        "preferential_rate": (general_rate * (steps - 1 - step) / steps).quantize(Decimal("0.01")),
+                        "staging_category": f"B{steps}",
+                        "effective_date": date(as_of.year + step - 1, 1, 1),
+                        "elimination_date": elimination,
+                    })
+    schedule.tables[FtaRate] = fta_rates
+
+    # TCOs on tariff items
+    items = [row["hs_code"] for row in tariff_codes if row["level"] == 8]
+    tcos: List[Dict[str, Any]] = []
+    for number in range(spec.tco_count):
+        effective = as_of - timedelta(days=rng.randint(30, 3650))
+        current = rng.random() < spec.tco_current_ratio
+        tcos.append({
+            "tco_number": f"TC{number + 1000000:08d}",
+            "hs_code": rng.choice(items),
+            "description": f"Synthetic TCO {number} for goods having specific characteristics",
+            "applicant_name": "Synthetic Imports Pty Ltd",
+            "effective_date": effective,
+            "expiry_date": None if current else effective + timedelta(days=rng.randint(1, 1000)),
+            "is_current": current,
+        })
+    schedule.tables[Tco] = tcos
+
+    # Anti-dumping measures, concentrated in the usual chapters
+    dumping_codes = [
+        row["hs_code"] for row in tariff_codes
+        if row["level"] in (6, 8) and row["hs_code"][:2] in DUMPING_CHAPTERS
+    ] or items
+    dumping_duties: List[Dict[str, Any]] = []
+    for number in range(spec.dumping_count):
+        exporter_name = None
+        if rng.random() < spec.dumping_exporter_ratio:
+            exporter_name = (
+                f"{rng.choice(_EXPORTER_WORDS)} {rng.choice(_EXPORTER_WORDS)} "
+                f"{rng.choice(_EXPORTER_TRADES)} {rng.choice(_EXPORTER_SUFFIXES)}"
+            )
+        specific = rng.random() < 0.2
+        dumping_duties.append({
+            "hs_code": rng.choice(dumping_codes),
+            "country_code": rng.choice(DUMPING_COUNTRIES),
+            "exporter_name": exporter_name,
+            "exporter_key": normalize_exporter_name(exporter_name),
+            "duty_type": "countervailing" if rng.random() < 0.2 else "dumping",
+            "duty_rate": None if specific else Decimal(rng.randint(20, 4000)) / 100,
+            "duty_amount": Decimal(rng.randint(100, 50000)) / 100 if specific else None,
+            "unit": "tonne" if specific else None,
+            "effective_date": as_of - timedelta(days=rng.randint(30, 1800)),
+            "expiry_date": as_of + timedelta(days=rng.randint(-365, 1800)),
+            "case_number": f"ADC{number + 100:04d}",
+            "investigation_type": "continuation" if rng.random() < 0.3 else "original",
+            "is_active": True,
+        })
+    schedule.tables[DumpingDuty] = dumping_duties
+
+    # GST provisions by HS code, plus general provisions
+    gst_provisions: List[Dict[str, Any]] = []
+    for number in range(spec.gst_provision_count + len(_GST_EXEMPTIONS)):
+        schedule_reference, exemption_type = _GST_EXEMPTIONS[number % len(_GST_EXEMPTIONS)]
+        general = number < len(_GST_EXEMPTIONS)
+        gst_provisions.append({
+            "hs_code": None if general else rng.choice(tariff_codes)["hs_code"],
+            "schedule_reference": schedule_reference,
+            "exemption_type": exemption_type,
+            "description": f"Synthetic GST provision {number}",
+            "value_threshold": Decimal(rng.choice((1000, 5000, 10000))) if general else None,
+            "is_active": True,
+        })
+    schedule.tables[GstProvision] = gst_provisions
+
+    return schedule
+
+
+def _batches(rows: List[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+async def load_schedule(session: AsyncSession, schedule: SyntheticSchedule, batch_size: int = 5000) -> None:
+    """
+    Bulk-insert a generated schedule.
+
+    Rows are inserted with Core statements, bypassing ORM flush events, so
+    the best_rates table is not invalidated; refresh it afterwards if the
+    benchmark uses it. The caller commits.
+
+    Args:
+        session: Database session
+        schedule: Schedule to insert into empty tables
+        batch_size: Rows per INSERT statement
+    """
+    for model in (TariffCode, TradeAgreement, DutyRate, FtaRate, Tco, DumpingDuty, GstProvision):
+        for batch in _batches(schedule.tables.get(model, []), batch_size):
+            await session.execute(insert(model), batch)
@@ -83,6 +83,57 @@ class Settings(BaseSettings):
     redis_url: Optional[str] = Field(default=None, description="Redis URL for caching")
     cache_ttl: int = Field(default=300, description="Default cache TTL in seconds")
     
+    # Duty calculation settings
+    rate_book_enabled: bool = Field(default=True, description="Serve duty calculations from the in-memory rate book")
+    rate_book_refresh_interval: int = Field(default=60, description="Seconds between rate book data version checks")
+    concurrent_rate_lookups: bool = Field(
+        default=True,
+        description="Resolve duty rate components concurrently on separate pooled connections (not used with SQLite)"
+    )
+    best_rate_table_enabled: bool = Field(
+        default=True,
+        description="Resolve general, FTA and TCO rates from the materialized best_rates table when available"
+    )
+    gst_rules_enabled: bool = Field(
+        default=True,
+        description="Evaluate GST exemptions from rules compiled once per data version instead of querying provisions"
+    )
+    rate_context_cache_enabled: bool = Field(
+        default=True,
+        description="Memoize resolved rates per HS code, origin, date and exporter; fallback used only when the rate book is disabled or fails to load"
+    )
+    rate_context_cache_size: int = Field(default=10000, description="Maximum memoized rate contexts")
+    rate_context_cache_ttl: int = Field(default=300, description="Seconds a memoized rate context is served for")
+    concurrent_detail_queries: bool = Field(
+        default=True,
+        description="Load tariff detail rates, children and related codes concurrently on separate pooled connections (not used with SQLite)"
+    )
+    tariff_hierarchy_enabled: bool = Field(
+        default=True,
+        description="Serve tariff sections, chapters and trees from the in-memory hierarchy index"
+    )
+    tariff_typeahead_enabled: bool = Field(
+        default=True,
+        description="Serve typeahead suggestions from the in-memory HS code and description prefix index"
+    )
+    fuzzy_similarity_threshold: float = Field(
+        default=0.3,
+        description="Default minimum trigram similarity for fuzzy description searches"
+    )
+    fuzzy_index_max_matches: int = Field(
+        default=1000,
+        description="Most similar rows considered by a fuzzy search without pg_trgm"
+    )
+    schedule_export_batch_size: int = Field(
+        default=1000,
+        description="Tariff codes read from the server-side cursor and encoded together by the schedule export"
+    )
+    reference_etags_enabled: bool = Field(
+        default=True,
+        description="Tag tariff, export and duty GET responses with the reference data version and answer revalidations with 304"
+    )
+    reference_cache_max_age: int = Field(default=60, description="Seconds clients may reuse a tagged reference response")
+    
     # File upload settings
     max_file_size: int = Field(default=10 * 1024 * 1024, description="Maximum file upload size (10MB)")
     allowed_file_types: List[str] = Field(
@@ -197,6 +197,16 @@ async def close_database() -> None:
         raise
 
 
+def is_database_initialized() -> bool:
+    """
+    Check whether the database engine and session factory are ready.
+    
+    Returns:
+        bool: True if sessions can be created with get_db_session()
+    """
+    return async_session_factory is not None
+
+
 async def test_database_connection() -> bool:
     """
     Test the database connection.
@@ -395,6 +405,7 @@ __all__ = [
     "close_database",
     "get_async_session",
     "get_db_session",
+    "is_database_initialized",
     "test_database_connection",
     "execute_raw_sql",
     "get_database_info",
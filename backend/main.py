@@ -23,12 +23,21 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response
 
 from config import get_settings, get_cors_config, is_development, is_production
-from database import init_database, close_database, health_check
+from database import init_database, close_database, health_check, get_db_session, is_database_initialized
 from routes.tariff import router as tariff_router
 from routes.duty_calculator import router as duty_calculator_router
 from routes.news import router as news_router
 from routes.export import router as export_router
 from routes.rulings import router as rulings_router
+from models.data_version import install_data_version_triggers
+from services.exporter_keys import backfill_exporter_keys
+from services.rate_book import rate_book_cache
+from services.tariff_hierarchy import tariff_hierarchy_cache
+from services.tariff_typeahead import tariff_typeahead_cache
+from services.best_rates import schedule_best_rate_refresh
+from services.reference_etag import (
+    cache_control_header, etag_matches, get_reference_etag, is_conditional_path
+)
 # from routes.search import router as search_router  # Temporarily disabled due to AI dependency
 # from routes.ai import router as ai_router  # Temporarily disabled due to CFFI dependency issue
 
@@ -126,6 +135,36 @@ class LoggingMiddleware(BaseHTTPMiddleware):
             raise
 
 
+class ConditionalGetMiddleware(BaseHTTPMiddleware):
+    """Middleware tagging reference responses and answering revalidations with 304."""
+    
+    async def dispatch(self, request: Request, call_next):
+        """Return 304 Not Modified if the client's copy matches the reference data."""
+        if (
+            request.method not in ("GET", "HEAD")
+            or not is_conditional_path(request.url.path)
+            or "x-debug-timings" in request.headers
+            or not is_database_initialized()
+        ):
+            return await call_next(request)
+        
+        try:
+            async with get_db_session() as session:
+                etag = await get_reference_etag(session)
+        except Exception as e:
+            logger.warning("Reference data version unavailable", error=str(e))
+            return await call_next(request)
+        
+        headers = {"ETag": etag, "Cache-Control": cache_control_header()}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        
+        response = await call_next(request)
+        if response.status_code == 200:
+            response.headers.update(headers)
+        return response
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -141,6 +180,58 @@ async def lifespan(app: FastAPI):
         await init_database()
         logger.info("Database initialized successfully")
         
+        # Count writes to the reference tables, including raw SQL ones, so caches see them
+        if is_database_initialized():
+            try:
+                async with get_db_session() as session:
+                    await session.run_sync(
+                        lambda sync_session: install_data_version_triggers(sync_session.connection())
+                    )
+                    await session.commit()
+            except Exception as e:
+                logger.warning(f"Data version triggers could not be installed: {e}")
+        
+        # Key anti-dumping exporters written by raw SQL so exporter lookups find them
+        if is_database_initialized():
+            try:
+                async with get_db_session() as session:
+                    await backfill_exporter_keys(session)
+                    await session.commit()
+            except Exception as e:
+                logger.warning(f"Exporter key backfill failed: {e}")
+        
+        # Warm the duty rate book so the first calculation is served from memory
+        if get_settings().rate_book_enabled:
+            try:
+                async with get_db_session() as session:
+                    rate_book = await rate_book_cache.get(session)
+                logger.info(f"Rate book loaded (version {rate_book.version})")
+            except Exception as e:
+                logger.warning(f"Rate book warm-up failed, will load on first use: {e}")
+        
+        # Index the tariff hierarchy so navigation is served from memory
+        if get_settings().tariff_hierarchy_enabled:
+            try:
+                async with get_db_session() as session:
+                    hierarchy = await tariff_hierarchy_cache.get(session)
+                logger.info(f"Tariff hierarchy loaded (version {hierarchy.version})")
+            except Exception as e:
+                logger.warning(f"Tariff hierarchy warm-up failed, will load on first use: {e}")
+        
+        # Index codes and description words so typeahead is served from memory
+        if get_settings().tariff_typeahead_enabled:
+            try:
+                async with get_db_session() as session:
+                    typeahead = await tariff_typeahead_cache.get(session)
+                logger.info(f"Tariff typeahead index loaded (version {typeahead.version})")
+            except Exception as e:
+                logger.warning(f"Tariff typeahead warm-up failed, will load on first use: {e}")
+        
+        # Bring the materialized best rates up to date without delaying startup;
+        # they are only read when calculations are not served from the rate book
+        if get_settings().best_rate_table_enabled and not get_settings().rate_book_enabled:
+            schedule_best_rate_refresh()
+        
         # Add any other startup tasks here
         logger.info("Application startup completed")
         
@@ -246,6 +337,10 @@ def setup_middleware(app: FastAPI) -> None:
     """Configure application middleware."""
     settings = get_settings()
     
+    # Conditional GET for reference data, inside CORS so 304s carry CORS headers
+    if settings.reference_etags_enabled:
+        app.add_middleware(ConditionalGetMiddleware)
+    
     # CORS middleware
     app.add_middleware(
         CORSMiddleware,
@@ -399,10 +494,15 @@ def setup_routes(app: FastAPI) -> None:
             ],
             "duty_endpoints": [
                 "/api/duty/calculate - Comprehensive duty calculation with all components",
+                "/api/duty/calculate-batch - Duty calculation for all lines of a declaration",
+                "/api/duty/calculate-invoice - Streamed duty calculation for a CSV commercial invoice",
+                "/api/duty/scenarios - What-if matrix across customs values and origins",
                 "/api/duty/rates/{hs_code} - Get all duty rates for an HS code",
                 "/api/duty/breakdown - Detailed calculation breakdown with steps",
                 "/api/duty/fta-rates/{hs_code}/{country_code} - FTA preferential rates",
+                "/api/duty/fta-partners/{hs_code} - Best FTA rate from every partner country",
                 "/api/duty/tco-check/{hs_code} - TCO exemption verification",
+                "/api/duty/metrics - Per-step calculation latency histograms",
             ],
             "timestamp": datetime.utcnow().isoformat(),
         }
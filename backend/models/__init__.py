@@ -17,6 +17,8 @@ from .classification import ProductClassification
 from .conversation import Conversation, ConversationMessage
 from .news import NewsItem, SystemAlert, TradeSummary, NewsAnalytics
 from .rulings import TariffRuling, AntiDumpingDecision, RegulatoryUpdate, RulingStatistics
+from .best_rate import BestRate
+from .data_version import DataVersion
 
 # All models imported and ready for use
 # SQLAlchemy models don't need rebuild like Pydantic models
@@ -42,5 +44,7 @@ __all__ = [
     "TariffRuling",
     "AntiDumpingDecision",
     "RegulatoryUpdate",
-    "RulingStatistics"
+    "RulingStatistics",
+    "BestRate",
+    "DataVersion"
 ]
\ No newline at end of file
@@ -0,0 +1,100 @@
+"""
+Materialized best duty rate model for the Customs Broker Portal.
+"""
+
+from datetime import datetime, date
+from typing import Optional
+from decimal import Decimal
+
+from sqlalchemy import String, Integer, DECIMAL, DateTime, Date, Index, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from database import Base
+
+# Country code of the row that applies to origins without an FTA rate
+GENERAL_ORIGIN = "*"
+
+
+class BestRate(Base):
+    """
+    BestRate model holding the precomputed cheapest rate per HS code and origin.
+
+    Rows are derived from duty_rates, fta_rates and tcos (with HS prefix
+    fallback already applied) for every active tariff code and each FTA
+    partner country with a rate for it, plus one GENERAL_ORIGIN row per code
+    for all other origins. A row holds from computed_on until valid_until,
+    the next date on which one of its source rates starts or ends.
+
+    Attributes:
+        hs_code: Tariff code the row was computed for
+        country_code: ISO 3166-1 alpha-3 partner code, or GENERAL_ORIGIN
+        general_rate_id: duty_rates row supplying the general rate
+        general_rate: General ad valorem or specific rate
+        general_unit_type: Unit type of the general rate
+        fta_rate_id: fta_rates row supplying the preferential rate
+        fta_code: Trade agreement code of the preferential rate
+        fta_rate: Effective preferential rate
+        tco_id: tcos row granting an exemption, if any
+        tco_number: TCO number, if any
+        best_rate_type: Winning rate (tco_exemption, fta, general), or None
+            when the winner depends on value or quantity
+        best_rate: Winning ad valorem rate, where best_rate_type is set
+        computed_on: Date the row was computed for
+        valid_until: First date the row no longer holds (if any)
+        refreshed_at: Timestamp of the refresh that wrote the row
+    """
+
+    __tablename__ = "best_rates"
+
+    # Primary key
+    hs_code: Mapped[str] = mapped_column(String(10), primary_key=True)
+    country_code: Mapped[str] = mapped_column(String(3), primary_key=True)
+
+    # Source rates
+    general_rate_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    general_rate: Mapped[Optional[Decimal]] = mapped_column(DECIMAL(8, 4), nullable=True)
+    general_unit_type: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
+    fta_rate_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    fta_code: Mapped[Optional[str]] = mapped_column(String(10), nullable=True)
+    fta_rate: Mapped[Optional[Decimal]] = mapped_column(DECIMAL(8, 4), nullable=True)
+    tco_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    tco_number: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
+
+    # Outcome
+    best_rate_type: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
+    best_rate: Mapped[Optional[Decimal]] = mapped_column(DECIMAL(8, 4), nullable=True)
+
+    # Validity
+    computed_on: Mapped[date] = mapped_column(Date, nullable=False)
+    valid_until: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
+    refreshed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+
+    # Table constraints and indexes
+    __table_args__ = (
+        Index("ix_best_rates_valid_until", "valid_until", postgresql_where="valid_until IS NOT NULL"),
+    )
+
+    def __repr__(self) -> str:
+        """String representation of BestRate."""
+        return (
+            f"<BestRate(hs_code='{self.hs_code}', country_code='{self.country_code}', "
+            f"best_rate_type='{self.best_rate_type}', best_rate={self.best_rate})>"
+        )
+
+    def is_valid_on(self, on_date: date) -> bool:
+        """
+        Check if the row holds on a given date.
+
+        Args:
+            on_date: Date to check
+
+        Returns:
+            bool: True if no source rate starts or ends between computation and the date
+        """
+        if on_date < self.computed_on:
+            return False
+        return self.valid_until is None or on_date < self.valid_until
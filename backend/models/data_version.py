@@ -0,0 +1,135 @@
+"""
+Data version model for the Customs Broker Portal.
+"""
+
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import String, BigInteger, DateTime, event, func, inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Mapped, mapped_column
+
+from database import Base
+
+# Tables whose writes are counted
+TRACKED_TABLES = (
+    "tariff_sections",
+    "tariff_chapters",
+    "tariff_codes",
+    "trade_agreements",
+    "duty_rates",
+    "fta_rates",
+    "tcos",
+    "dumping_duties",
+    "gst_provisions",
+    "export_codes",
+)
+
+
+class DataVersion(Base):
+    """
+    DataVersion model counting writes to each reference table.
+
+    Database triggers bump a table's counter on every insert, update and
+    delete, whether made through the ORM or by raw SQL from the scrapers and
+    populate scripts, so the counter changes on in-place updates that leave
+    a table's row count, ids and timestamps as they were.
+
+    Attributes:
+        table_name: Tracked table
+        version: Write counter (per statement on PostgreSQL, per row on SQLite)
+        updated_at: Timestamp of the last write
+    """
+
+    __tablename__ = "data_versions"
+
+    table_name: Mapped[str] = mapped_column(String(63), primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+
+    def __repr__(self) -> str:
+        """String representation of DataVersion."""
+        return f"<DataVersion(table_name='{self.table_name}', version={self.version})>"
+
+
+_POSTGRESQL_BUMP_FUNCTION = """
+CREATE OR REPLACE FUNCTION bump_data_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO data_versions (table_name, version, updated_at)
+    VALUES (TG_TABLE_NAME, 1, NOW())
+    ON CONFLICT (table_name) DO UPDATE
+        SET version = data_versions.version + 1, updated_at = NOW();
+    RETURN NULL;
+END;
+$$ language 'plpgsql'
+"""
+
+
+def data_version_trigger_ddl(dialect_name: str, table_names: List[str]) -> List[str]:
+    """
+    Build the statements installing write-counting triggers on tables.
+
+    The statements are idempotent, so they can be run against a database
+    that already has some or all of the triggers.
+
+    Args:
+        dialect_name: SQLAlchemy dialect name (postgresql or sqlite)
+        table_names: Tracked tables to install triggers on
+
+    Returns:
+        DDL statements, empty for other dialects
+    """
+    if dialect_name == "postgresql":
+        statements = [_POSTGRESQL_BUMP_FUNCTION]
+        for table in table_names:
+            statements.append(f"DROP TRIGGER IF EXISTS bump_data_version_{table} ON {table}")
+            statements.append(
+                f"CREATE TRIGGER bump_data_version_{table} "
+                f"AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+                f"FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version()"
+            )
+        return statements
+
+    if dialect_name == "sqlite":
+        # SQLite has no statement-level triggers, so every row written bumps the counter
+        return [
+            f"CREATE TRIGGER IF NOT EXISTS bump_data_version_{table}_{operation.lower()} "
+            f"AFTER {operation} ON {table} "
+            f"BEGIN "
+            f"INSERT INTO data_versions (table_name, version, updated_at) "
+            f"VALUES ('{table}', 1, CURRENT_TIMESTAMP) "
+            f"ON CONFLICT (table_name) DO UPDATE "
+            f"SET version = version + 1, updated_at = CURRENT_TIMESTAMP; "
+            f"END"
+            for table in table_names
+            for operation in ("INSERT", "UPDATE", "DELETE")
+        ]
+
+    return []
+
+
+def install_data_version_triggers(connection: Connection) -> None:
+    """
+    Create the data_versions table and its triggers on existing tracked tables.
+
+    Args:
+        connection: Synchronous connection, committed by the caller
+    """
+    existing = set(inspect(connection).get_table_names())
+    if DataVersion.__tablename__ not in existing:
+        DataVersion.__table__.create(connection)
+
+    tables = [table for table in TRACKED_TABLES if table in existing]
+    for statement in data_version_trigger_ddl(connection.dialect.name, tables):
+        connection.execute(text(statement))
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _install_triggers_after_create(target, connection: Connection, **kw) -> None:
+    """Install the triggers once create_all has created the tracked tables."""
+    install_data_version_triggers(connection)
@@ -2,6 +2,8 @@
 Anti-dumping duties models for the Customs Broker Portal.
 """
 
+import re
+import unicodedata
 from datetime import datetime, date
 from typing import Optional
 from decimal import Decimal
@@ -10,11 +12,57 @@ from sqlalchemy import (
     String, Integer, DECIMAL, Boolean, DateTime, Date,
     CheckConstraint, Index, ForeignKey, func
 )
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 
 from database import Base
 from models.tariff import TariffCode
 
+# Company-form words dropped from the end of exporter names, so that
+# "Acme Steel Co., Ltd." and "ACME STEEL COMPANY LIMITED" share a key
+EXPORTER_LEGAL_SUFFIXES = frozenset({
+    "ag", "bhd", "bv", "co", "company", "corp", "corporation", "gmbh", "inc",
+    "incorporated", "jsc", "kg", "kk", "limited", "llc", "lp", "ltd", "nv",
+    "oy", "pjsc", "plc", "pt", "pte", "pty", "sa", "sae", "sarl", "sas",
+    "sdn", "spa", "srl", "tbk",
+})
+
+_EXPORTER_SEPARATORS = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_exporter_name(name: Optional[str]) -> Optional[str]:
+    """
+    Normalize an exporter name to its matching key.
+
+    Case-folds, strips accents and punctuation, expands "&" and drops trailing
+    legal-form words (Co., Ltd, Pty, GmbH, ...).
+
+    Args:
+        name: Exporter name as published or entered
+
+    Returns:
+        str: Space-separated key, or None if the name has no usable words
+    """
+    if not name:
+        return None
+
+    text = unicodedata.normalize("NFKD", name.casefold().replace("&", " and "))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    words = []
+    joining_initials = False
+    for word in _EXPORTER_SEPARATORS.sub(" ", text).split():
+        # Rejoin initialisms split on their dots, e.g. "S.A." -> "sa"
+        if len(word) == 1 and joining_initials:
+            words[-1] += word
+        else:
+            words.append(word)
+            joining_initials = len(word) == 1
+
+    # Keep at least one word, e.g. for an exporter called "Company"
+    while len(words) > 1 and words[-1] in EXPORTER_LEGAL_SUFFIXES:
+        words.pop()
+
+    return " ".join(words) or None
+
 
 class DumpingDuty(Base):
     """
@@ -29,6 +77,7 @@ class DumpingDuty(Base):
         hs_code: The HS code this duty applies to
         country_code: ISO 3166-1 alpha-3 country code
         exporter_name: Specific exporter if applicable
+        exporter_key: Normalized exporter name used for matching
         duty_type: Type of duty (dumping, countervailing, both)
         duty_rate: Percentage rate for ad valorem duties
         duty_amount: Specific duty amount for per-unit duties
@@ -56,6 +105,7 @@ class DumpingDuty(Base):
     )
     country_code: Mapped[str] = mapped_column(String(3), nullable=False, index=True)
     exporter_name: Mapped[Optional[str]] = mapped_column(String(200), nullable=True)
+    exporter_key: Mapped[Optional[str]] = mapped_column(String(200), nullable=True)
     duty_type: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
     duty_rate: Mapped[Optional[Decimal]] = mapped_column(DECIMAL(8, 4), nullable=True)
     duty_amount: Mapped[Optional[Decimal]] = mapped_column(DECIMAL(8, 2), nullable=True)
@@ -97,8 +147,23 @@ class DumpingDuty(Base):
         Index("ix_dumping_duties_hs_active_effective", "hs_code", "is_active", "effective_date"),
         Index("ix_dumping_duties_country_active", "country_code", "is_active"),
         Index("ix_dumping_duties_expiry", "expiry_date", postgresql_where="expiry_date IS NOT NULL"),
+        Index(
+            "ix_dumping_duties_exporter_key", "exporter_key", "country_code",
+            postgresql_where="exporter_key IS NOT NULL"
+        ),
+        Index(
+            "ix_dumping_duties_exporter_key_trgm", "exporter_key",
+            postgresql_using="gin",
+            postgresql_ops={"exporter_key": "gin_trgm_ops"}
+        ),
     )
     
+    @validates("exporter_name")
+    def _set_exporter_key(self, key: str, value: Optional[str]) -> Optional[str]:
+        """Keep exporter_key in step with exporter_name."""
+        self.exporter_key = normalize_exporter_name(value)
+        return value
+    
     def __repr__(self) -> str:
         """String representation of DumpingDuty."""
         return (
@@ -73,6 +73,11 @@ class ExportCode(Base):
         Index("ix_export_codes_ahecc", "ahecc_code"),
         Index("ix_export_codes_import", "corresponding_import_code"),
         Index("ix_export_codes_active", "is_active"),
+        Index(
+            "ix_export_codes_description_trgm", "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"}
+        ),
     )
     
     def __repr__(self) -> str:
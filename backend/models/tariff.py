@@ -170,6 +170,11 @@ class TariffCode(Base):
         Index("ix_tariff_codes_hierarchy", "parent_code", "level"),
         Index("ix_tariff_codes_section_chapter", "section_id", "chapter_id"),
         Index("ix_tariff_codes_active_level", "is_active", "level"),
+        Index(
+            "ix_tariff_codes_description_trgm", "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"}
+        ),
     )
     
     def __repr__(self) -> str:
@@ -83,6 +83,11 @@ class Tco(Base):
         Index("ix_tcos_hs_code_current", "hs_code", "is_current"),
         Index("ix_tcos_effective_expiry", "effective_date", "expiry_date"),
         Index("ix_tcos_tco_number", "tco_number"),
+        Index(
+            "ix_tcos_description_trgm", "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"}
+        ),
     )
     
     def __repr__(self) -> str:
@@ -11,6 +11,8 @@ from datetime import datetime, date, timedelta
 from decimal import Decimal
 from typing import List, Dict, Tuple
 
+from models.dumping import normalize_exporter_name
+
 def populate_dumping_duties():
     """Populate comprehensive anti-dumping duties dataset."""
     
@@ -303,6 +305,7 @@ def populate_dumping_duties():
                         hs_code,
                         country,
                         exporter_name,
+                        normalize_exporter_name(exporter_name),
                         investigation_type,
                         duty_rate,
                         None,  # duty_amount (using percentage rates)
@@ -340,6 +343,7 @@ def populate_dumping_duties():
                 hs_code,
                 country,
                 None,  # exporter_name
+                None,  # exporter_key
                 "dumping",
                 None,  # duty_rate
                 amount,  # duty_amount
@@ -361,10 +365,10 @@ def populate_dumping_duties():
         
         insert_sql = """
             INSERT INTO dumping_duties (
-                hs_code, country_code, exporter_name, duty_type,
+                hs_code, country_code, exporter_name, exporter_key, duty_type,
                 duty_rate, duty_amount, unit, effective_date, expiry_date,
                 case_number, investigation_type, notice_number, is_active, created_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """
         
         batch_size = 100
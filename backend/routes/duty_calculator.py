@@ -5,20 +5,37 @@ This module implements comprehensive duty calculation endpoints including
 general rates, FTA rates, anti-dumping duties, TCO exemptions, and GST calculations.
 """
 
+import csv
+import io
+import json
 import logging
 import time
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, FrozenSet, AsyncIterator
 from datetime import date
 from decimal import Decimal
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Path
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Header, Response, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_
 from sqlalchemy.orm import selectinload
 from sqlalchemy.exc import SQLAlchemyError
 
+from config import get_settings
 from database import get_async_session
-from services.duty_calculator import DutyCalculatorService, DutyComponent
+from services.duty_calculator import (
+    DutyCalculatorService, DutyCalculationInput, DutyCalculationResult, DutyComponent
+)
+from services.duty_scenarios import DutyScenarioService, DutyScenarioInput, cents_to_money
+from services.calculation_metrics import calculation_metrics
+from services.invoice_stream import InvoiceCsvReader, iter_chunks, iter_file, spool_body
+from services.rate_book import RateBook, get_rate_book
+from services.special_taxes import (
+    applicable_special_taxes, TOBACCO_EXCISE, FUEL_EXCISE, LUXURY_CAR_TAX,
+    WINE_EQUALISATION_TAX, ACMA_CHARGE, CONTAINER_DEPOSIT, QUARANTINE_CHARGE,
+    TCF_SCHEME, WINE_INDUSTRY_LEVY, DAIRY_INDUSTRY_LEVY, MARINE_SAFETY_LEVY
+)
 from models.duty import DutyRate
 from models.fta import FtaRate
 from models.dumping import DumpingDuty
@@ -26,10 +43,15 @@ from models.tco import Tco
 from models.hierarchy import TradeAgreement
 from models.tariff import TariffCode
 from schemas.duty_calculator import (
-    DutyCalculationRequest, DutyCalculationResponse, DutyComponentResponse,
+    DutyCalculationRequest, DutyCalculationResponse, DutyComponentResponse, StepTimingResponse,
     DutyBreakdownResponse, DutyRatesListResponse, DutyRateResponse,
     FtaRateResponse, TcoExemptionResponse, AntiDumpingDutyResponse,
-    FtaRateRequest, TcoCheckRequest, ErrorResponse
+    FtaRateRequest, TcoCheckRequest, ErrorResponse,
+    BatchDutyCalculationRequest, BatchDutyCalculationResponse, BatchDutyLineRequest,
+    BatchDutyLineResponse, BatchDutyTotalsResponse,
+    DutyScenarioRequest, DutyScenarioResponse, DutyScenarioOriginResponse,
+    DutyScenarioCheapestResponse, FtaPartnerRateResponse, FtaPartnerRatesResponse,
+    FtaRateProjectionYearResponse, FtaRateProjectionResponse, FtaRateProjectionsResponse
 )
 
 # Configure logging
@@ -42,6 +64,8 @@ router = APIRouter(prefix="/api/duty", tags=["Duty Calculator"])
 @router.post("/calculate", response_model=DutyCalculationResponse)
 async def calculate_duty(
     request: DutyCalculationRequest,
+    response: Response,
+    debug_timings: bool = Header(False, alias="X-Debug-Timings", description="Include per-step timings"),
     db: AsyncSession = Depends(get_async_session)
 ) -> DutyCalculationResponse:
     """
@@ -55,8 +79,13 @@ async def calculate_duty(
     - GST calculations
     - Best rate analysis and potential savings
     
+    With the ``X-Debug-Timings: true`` request header, the response also
+    carries the wall, CPU and database time and query count of each step, in
+    the body and as a Server-Timing header.
+    
     Args:
         request: Duty calculation request parameters
+        debug_timings: Include per-step timings in the response
         
     Returns:
         Comprehensive duty calculation result with all components
@@ -69,7 +98,7 @@ async def calculate_duty(
         logger.info(f"Calculating duty for HS code {request.hs_code}, country {request.country_code}")
         
         # Initialize duty calculator service
-        calculator = DutyCalculatorService()
+        calculator = DutyCalculatorService(rate_book=await get_rate_book(db))
         
         # Convert request to service input
         calculation_input = DutyCalculationInput(
@@ -86,30 +115,25 @@ async def calculate_duty(
         result = await calculator.calculate_comprehensive_duty(db, calculation_input)
         
         # Convert service result to response schema
-        response = DutyCalculationResponse(
-            hs_code=result.hs_code,
-            country_code=result.country_code,
-            customs_value=result.customs_value,
-            general_duty=_convert_duty_component(result.general_duty) if result.general_duty else None,
-            fta_duty=_convert_duty_component(result.fta_duty) if result.fta_duty else None,
-            anti_dumping_duty=_convert_duty_component(result.anti_dumping_duty) if result.anti_dumping_duty else None,
-            tco_exemption=_convert_duty_component(result.tco_exemption) if result.tco_exemption else None,
-            gst_component=_convert_duty_component(result.gst_component) if result.gst_component else None,
-            total_duty=result.total_duty,
-            duty_inclusive_value=result.duty_inclusive_value,
-            total_gst=result.total_gst,
-            total_amount=result.total_amount,
-            best_rate_type=result.best_rate_type,
-            potential_savings=result.potential_savings,
-            calculation_steps=result.calculation_steps,
-            compliance_notes=result.compliance_notes,
-            warnings=result.warnings
-        )
+        step_timings = None
+        if debug_timings and result.trace is not None:
+            step_timings = [
+                StepTimingResponse(
+                    step=timing.step,
+                    wall_ms=round(timing.wall_ms, 3),
+                    cpu_ms=round(timing.cpu_ms, 3),
+                    db_ms=round(timing.db_ms, 3),
+                    query_count=timing.query_count
+                )
+                for timing in result.trace.timings
+            ]
+            response.headers["Server-Timing"] = result.trace.server_timing()
+        calculation_response = _convert_calculation_result(result, step_timings=step_timings)
         
         execution_time = time.time() - start_time
         logger.info(f"Duty calculation completed in {execution_time:.3f}s")
         
-        return response
+        return calculation_response
         
     except ValueError as e:
         logger.error(f"Validation error in duty calculation: {e}")
@@ -131,6 +155,378 @@ async def calculate_duty(
         )
 
 
+@router.post("/calculate-batch", response_model=BatchDutyCalculationResponse)
+async def calculate_duty_batch(
+    request: BatchDutyCalculationRequest,
+    db: AsyncSession = Depends(get_async_session)
+) -> BatchDutyCalculationResponse:
+    """
+    Calculate duty for every tariff line of an import declaration.
+    
+    Rates for all lines are resolved together (from the rate book, or with
+    one query per rate table), then each line is calculated with the same
+    logic as the single-line endpoint.
+    
+    Args:
+        request: Declaration lines and shared calculation parameters
+        
+    Returns:
+        Per-line calculation results and declaration totals
+        
+    Raises:
+        HTTPException: 400 for validation errors, 500 for calculation errors
+    """
+    try:
+        start_time = time.time()
+        logger.info(f"Calculating duty for batch of {len(request.lines)} lines")
+        
+        calculator = DutyCalculatorService(rate_book=await get_rate_book(db))
+        calculation_date = request.calculation_date or date.today()
+        
+        calculation_inputs = [
+            DutyCalculationInput(
+                hs_code=line.hs_code,
+                country_code=line.country_code,
+                customs_value=line.customs_value,
+                quantity=line.quantity,
+                calculation_date=calculation_date,
+                exporter_name=line.exporter_name,
+                value_basis=request.value_basis
+            )
+            for line in request.lines
+        ]
+        
+        results = await calculator.calculate_batch(db, calculation_inputs)
+        
+        lines = [
+            _convert_calculation_result(result, BatchDutyLineResponse, line_number=index)
+            for index, result in enumerate(results, start=1)
+        ]
+        
+        totals = BatchDutyTotalsResponse(
+            line_count=len(results),
+            total_customs_value=sum((r.customs_value for r in results), Decimal('0.00')),
+            total_duty=sum((r.total_duty for r in results), Decimal('0.00')),
+            total_gst=sum((r.total_gst for r in results), Decimal('0.00')),
+            total_amount=sum((r.total_amount for r in results), Decimal('0.00')),
+            potential_savings=sum((r.potential_savings for r in results), Decimal('0.00'))
+        )
+        
+        execution_time = time.time() - start_time
+        logger.info(f"Batch duty calculation of {len(results)} lines completed in {execution_time:.3f}s")
+        
+        return BatchDutyCalculationResponse(
+            lines=lines,
+            totals=totals,
+            calculation_time_ms=round(execution_time * 1000, 2)
+        )
+        
+    except ValueError as e:
+        logger.error(f"Validation error in batch duty calculation: {e}")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid input parameters: {str(e)}"
+        )
+    except SQLAlchemyError as e:
+        logger.error(f"Database error in batch duty calculation: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Database error occurred during batch duty calculation"
+        )
+    except Exception as e:
+        logger.error(f"Unexpected error in batch duty calculation: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="An unexpected error occurred during batch duty calculation"
+        )
+
+
+# Columns of CSV invoice results
+INVOICE_RESULT_COLUMNS = (
+    "line_number", "hs_code", "country_code", "customs_value", "best_rate_type",
+    "total_duty", "duty_inclusive_value", "total_gst", "total_amount", "potential_savings", "error"
+)
+
+VALUE_BASES = ("FOB", "CIF", "CFR", "EXW", "DDP", "DDU")
+
+
+@router.post("/calculate-invoice")
+async def calculate_invoice(
+    request: Request,
+    output_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$", description="Result format: ndjson or csv"),
+    calculation_date: Optional[date] = Query(None, description="Date for rate validity (defaults to today)"),
+    value_basis: str = Query("CIF", description="Value basis for customs valuation"),
+    chunk_size: int = Query(500, ge=1, le=2000, description="Invoice lines calculated together"),
+    db: AsyncSession = Depends(get_async_session)
+) -> StreamingResponse:
+    """
+    Calculate duty for every line of a commercial invoice uploaded as CSV.
+    
+    The request body is the CSV itself, with a header row naming at least
+    the HS code, country of origin and customs value columns (quantity and
+    exporter are optional). The body is spooled to a temporary file before
+    the response starts, since the streaming response's disconnect listener
+    would otherwise consume body chunks meant for the parser. The spooled
+    CSV is then parsed incrementally and lines are calculated in chunks
+    through the batch calculator, with results streamed back as each chunk
+    completes, so memory use does not grow with the invoice size.
+    
+    NDJSON output has one object per line: a calculation result, or
+    ``{"line_number": ..., "error": ...}`` for a line that could not be
+    calculated, followed by a final ``{"summary": ...}`` with the totals.
+    CSV output has one row per line with an ``error`` column.
+    
+    Args:
+        request: Request whose body is the invoice CSV
+        output_format: Result format, ndjson or csv
+        calculation_date: Optional calculation date
+        value_basis: Value basis (default: CIF)
+        chunk_size: Invoice lines calculated together
+        
+    Returns:
+        Streamed per-line results
+        
+    Raises:
+        HTTPException: 400 if the CSV header or parameters are invalid
+    """
+    if value_basis.upper() not in VALUE_BASES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Value basis must be one of: {', '.join(VALUE_BASES)}"
+        )
+    
+    body = await spool_body(request.stream())
+    reader = InvoiceCsvReader(iter_file(body))
+    try:
+        await reader.read_header()
+    except ValueError as e:
+        body.close()
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    calculator = DutyCalculatorService(rate_book=await get_rate_book(db))
+    calculation_date = calculation_date or date.today()
+    value_basis = value_basis.upper()
+    
+    if output_format == "csv":
+        media_type = "text/csv"
+        format_result = _invoice_csv_result
+        format_error = _invoice_csv_error
+    else:
+        media_type = "application/x-ndjson"
+        format_result = _invoice_ndjson_result
+        format_error = _invoice_ndjson_error
+    
+    async def results() -> AsyncIterator[str]:
+        start_time = time.time()
+        line_count = error_count = 0
+        totals = dict.fromkeys(
+            ("total_customs_value", "total_duty", "total_gst", "total_amount", "potential_savings"),
+            Decimal('0.00')
+        )
+        
+        if output_format == "csv":
+            yield _csv_line(INVOICE_RESULT_COLUMNS)
+        
+        try:
+            async for chunk in iter_chunks(reader.rows(), chunk_size):
+                line_numbers, calculation_inputs = [], []
+                for line_number, fields in chunk:
+                    try:
+                        line = BatchDutyLineRequest(**{k: v for k, v in fields.items() if v is not None})
+                    except ValidationError as e:
+                        error_count += 1
+                        yield format_error(line_number, "; ".join(err["msg"] for err in e.errors()))
+                        continue
+                    line_numbers.append(line_number)
+                    calculation_inputs.append(DutyCalculationInput(
+                        hs_code=line.hs_code,
+                        country_code=line.country_code,
+                        customs_value=line.customs_value,
+                        quantity=line.quantity,
+                        calculation_date=calculation_date,
+                        exporter_name=line.exporter_name,
+                        value_basis=value_basis
+                    ))
+                
+                if not calculation_inputs:
+                    continue
+                
+                try:
+                    chunk_results = await calculator.calculate_batch(db, calculation_inputs)
+                except Exception as e:
+                    logger.error(f"Error calculating invoice lines {line_numbers[0]}-{line_numbers[-1]}: {e}")
+                    error_count += len(line_numbers)
+                    for line_number in line_numbers:
+                        yield format_error(line_number, "Calculation failed")
+                    continue
+                
+                for line_number, result in zip(line_numbers, chunk_results):
+                    line_count += 1
+                    totals["total_customs_value"] += result.customs_value
+                    totals["total_duty"] += result.total_duty
+                    totals["total_gst"] += result.total_gst
+                    totals["total_amount"] += result.total_amount
+                    totals["potential_savings"] += result.potential_savings
+                    yield format_result(line_number, result)
+        except ValueError as e:
+            # Malformed CSV past the header; results so far have been sent
+            error_count += 1
+            yield format_error(None, str(e))
+        finally:
+            body.close()
+        
+        execution_time = time.time() - start_time
+        logger.info(
+            f"Invoice calculation of {line_count} lines ({error_count} errors) completed in {execution_time:.3f}s"
+        )
+        
+        if output_format != "csv":
+            summary = BatchDutyTotalsResponse(line_count=line_count, **totals)
+            yield json.dumps({
+                "summary": {
+                    **summary.model_dump(mode="json"),
+                    "error_count": error_count,
+                    "calculation_time_ms": round(execution_time * 1000, 2)
+                }
+            }) + "\n"
+    
+    return StreamingResponse(results(), media_type=media_type)
+
+
+def _csv_line(values) -> str:
+    """Format one CSV row."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
+
+
+def _invoice_ndjson_result(line_number: int, result: DutyCalculationResult) -> str:
+    """Format an invoice line result as an NDJSON record."""
+    return _convert_calculation_result(result, BatchDutyLineResponse, line_number=line_number).model_dump_json() + "\n"
+
+
+def _invoice_ndjson_error(line_number: Optional[int], error: str) -> str:
+    """Format an invoice line error as an NDJSON record."""
+    return json.dumps({"line_number": line_number, "error": error}) + "\n"
+
+
+def _invoice_csv_result(line_number: int, result: DutyCalculationResult) -> str:
+    """Format an invoice line result as a CSV row."""
+    return _csv_line((
+        line_number, result.hs_code, result.country_code, result.customs_value, result.best_rate_type,
+        result.total_duty, result.duty_inclusive_value, result.total_gst, result.total_amount,
+        result.potential_savings, ""
+    ))
+
+
+def _invoice_csv_error(line_number: Optional[int], error: str) -> str:
+    """Format an invoice line error as a CSV row."""
+    return _csv_line((line_number if line_number is not None else "",) + ("",) * 9 + (error,))
+
+
+@router.post("/scenarios", response_model=DutyScenarioResponse)
+async def calculate_duty_scenarios(
+    request: DutyScenarioRequest,
+    db: AsyncSession = Depends(get_async_session)
+) -> DutyScenarioResponse:
+    """
+    Compare duty outcomes across customs values and countries of origin.
+    
+    Rates are resolved once per origin and the full matrix of general, FTA,
+    anti-dumping and GST amounts is computed in a single vectorized pass.
+    
+    Args:
+        request: HS code, candidate customs values and origin countries
+        
+    Returns:
+        Scenario matrix with one row per origin and one column per value
+        
+    Raises:
+        HTTPException: 400 for validation errors, 500 for calculation errors
+    """
+    try:
+        start_time = time.time()
+        logger.info(
+            f"Calculating duty scenarios for HS code {request.hs_code}: "
+            f"{len(request.customs_values)} values x {len(request.country_codes)} origins"
+        )
+        
+        scenario_service = DutyScenarioService(rate_book=await get_rate_book(db))
+        result = await scenario_service.calculate_scenarios(
+            db,
+            DutyScenarioInput(
+                hs_code=request.hs_code,
+                customs_values=request.customs_values,
+                country_codes=request.country_codes,
+                quantity=request.quantity,
+                exporter_name=request.exporter_name,
+                calculation_date=request.calculation_date
+            )
+        )
+        
+        origins = [
+            DutyScenarioOriginResponse(
+                country_code=country_code,
+                fta_code=result.fta_codes[row],
+                fta_rate=result.fta_rates[row],
+                anti_dumping_rate=result.dumping_rates[row],
+                fta_duty=(
+                    _to_money_list(result.fta_duty[row]) if result.fta_rates[row] is not None
+                    else [None] * len(result.customs_values)
+                ),
+                anti_dumping_duty=_to_money_list(result.anti_dumping_duty[row]),
+                total_duty=_to_money_list(result.total_duty[row]),
+                gst=_to_money_list(result.gst[row]),
+                total_amount=_to_money_list(result.total_amount[row]),
+                best_rate_type=list(result.best_rate_type[row])
+            )
+            for row, country_code in enumerate(result.country_codes)
+        ]
+        
+        cheapest = [
+            DutyScenarioCheapestResponse(
+                customs_value=entry["customs_value"],
+                country_code=entry["country_code"],
+                total_amount=entry["total_amount"]
+            )
+            for entry in scenario_service.cheapest_origins(result)
+        ]
+        
+        execution_time = time.time() - start_time
+        logger.info(f"Duty scenarios completed in {execution_time:.3f}s")
+        
+        return DutyScenarioResponse(
+            hs_code=result.hs_code,
+            customs_values=result.customs_values,
+            general_rate=result.general_rate,
+            general_basis=result.general_basis,
+            general_duty=_to_money_list(result.general_duty),
+            tco_number=result.tco_number,
+            origins=origins,
+            cheapest_origins=cheapest,
+            calculation_time_ms=round(execution_time * 1000, 2)
+        )
+        
+    except ValueError as e:
+        logger.error(f"Validation error in duty scenarios: {e}")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid input parameters: {str(e)}"
+        )
+    except SQLAlchemyError as e:
+        logger.error(f"Database error in duty scenarios: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Database error occurred during scenario calculation"
+        )
+    except Exception as e:
+        logger.error(f"Unexpected error in duty scenarios: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="An unexpected error occurred during scenario calculation"
+        )
+
+
 @router.get("/rates/{hs_code}", response_model=DutyRatesListResponse)
 async def get_duty_rates(
     hs_code: str = Path(..., description="HS code to get rates for"),
@@ -326,7 +722,7 @@ async def get_calculation_breakdown(
         logger.info(f"Getting calculation breakdown for {hs_code}, {country_code}")
         
         # Initialize duty calculator service
-        calculator = DutyCalculatorService()
+        calculator = DutyCalculatorService(rate_book=await get_rate_book(db))
         
         # Create calculation input
         calculation_input = DutyCalculationInput(
@@ -491,6 +887,215 @@ async def get_fta_rates(
         )
 
 
+@router.get("/fta-partners/{hs_code}", response_model=FtaPartnerRatesResponse)
+async def get_fta_partner_rates(
+    hs_code: str = Path(..., description="HS code"),
+    customs_value: Decimal = Query(Decimal('1000.00'), gt=0, description="Customs value in AUD used for ranking"),
+    quantity: Optional[Decimal] = Query(None, gt=0, description="Quantity for specific duty calculations"),
+    calculation_date: Optional[date] = Query(None, description="Date for rate validity"),
+    db: AsyncSession = Depends(get_async_session)
+) -> FtaPartnerRatesResponse:
+    """
+    Rank the best preferential rate from every FTA partner country.
+    
+    For each partner country with a rate in force for the HS code (or one
+    of its parent codes), returns the best rate and the duty it attracts on
+    the given customs value, cheapest first.
+    
+    Args:
+        hs_code: HS code to lookup
+        customs_value: Customs value used to compute landed duty
+        quantity: Optional quantity for specific general duties
+        calculation_date: Optional date for rate validity check
+        
+    Returns:
+        Partner countries ranked by landed duty
+        
+    Raises:
+        HTTPException: 404 if no partner rates found, 500 for database errors
+    """
+    try:
+        start_time = time.time()
+        logger.info(f"Ranking FTA partner rates for {hs_code}")
+        
+        clean_hs_code = ''.join(c for c in hs_code if c.isdigit())
+        calc_date = calculation_date or date.today()
+        
+        calculator = DutyCalculatorService(rate_book=await get_rate_book(db))
+        general_duty, options = await calculator.rank_fta_partners(
+            db,
+            DutyCalculationInput(
+                hs_code=clean_hs_code,
+                country_code="",
+                customs_value=customs_value,
+                quantity=quantity,
+                calculation_date=calc_date
+            )
+        )
+        
+        if not options:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No FTA partner rates found for HS code {clean_hs_code}"
+            )
+        
+        partners = [
+            FtaPartnerRateResponse(
+                rank=rank,
+                country_code=option.country_code,
+                fta_code=option.fta_rate.fta_code,
+                agreement_name=option.agreement_name,
+                hs_code=option.fta_rate.hs_code,
+                preferential_rate=option.fta_rate.preferential_rate,
+                effective_rate=option.fta_duty.rate,
+                staging_category=option.fta_rate.staging_category,
+                elimination_date=option.fta_rate.elimination_date,
+                duty_amount=option.fta_duty.amount,
+                savings_vs_general=option.savings_vs_general,
+                quota_applicable=option.fta_rate.is_quota_applicable,
+                rule_of_origin=(
+                    option.fta_rate.get_origin_requirements_summary()
+                    if option.fta_rate.rule_of_origin else None
+                )
+            )
+            for rank, option in enumerate(options, start=1)
+        ]
+        
+        execution_time = time.time() - start_time
+        logger.info(f"Ranked {len(partners)} FTA partners in {execution_time:.3f}s")
+        
+        return FtaPartnerRatesResponse(
+            hs_code=clean_hs_code,
+            customs_value=customs_value,
+            calculation_date=calc_date,
+            general_rate=general_duty.rate if general_duty else None,
+            general_duty=general_duty.amount if general_duty else None,
+            partners=partners
+        )
+        
+    except HTTPException:
+        raise
+    except SQLAlchemyError as e:
+        logger.error(f"Database error ranking FTA partner rates: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Database error occurred while retrieving FTA partner rates"
+        )
+    except Exception as e:
+        logger.error(f"Unexpected error ranking FTA partner rates: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="An unexpected error occurred"
+        )
+
+
+@router.get("/fta-projection/{hs_code}/{country_code}", response_model=FtaRateProjectionsResponse)
+async def get_fta_rate_projection(
+    hs_code: str = Path(..., description="HS code"),
+    country_code: str = Path(..., description="Country code"),
+    fta_code: Optional[str] = Query(None, description="Project only this trade agreement"),
+    start_year: Optional[int] = Query(None, ge=1900, le=2100, description="First year to project, the current year by default"),
+    years: Optional[int] = Query(None, ge=1, le=50, description="Years to project, until elimination by default"),
+    db: AsyncSession = Depends(get_async_session)
+) -> FtaRateProjectionsResponse:
+    """
+    Project staged FTA preferential rates year by year.
+    
+    For each trade agreement with rates for the HS code (or one of its parent
+    codes) and country, returns the rate projected on 1 January of each year
+    until the tariff is eliminated, applying the agreement's staging.
+    
+    Args:
+        hs_code: HS code to lookup
+        country_code: Country code for FTA rates
+        fta_code: Optional trade agreement to restrict the projection to
+        start_year: Optional first year to project
+        years: Optional number of years to project
+        
+    Returns:
+        Projected rates per trade agreement
+        
+    Raises:
+        HTTPException: 404 if no rates found, 500 for database errors
+    """
+    try:
+        start_time = time.time()
+        logger.info(f"Projecting FTA rates for {hs_code}, {country_code}")
+        
+        clean_hs_code = ''.join(c for c in hs_code if c.isdigit())
+        clean_country_code = country_code.upper()
+        first_year = start_year or date.today().year
+        
+        rate_book = await get_rate_book(db)
+        if rate_book is None:
+            rate_book = await RateBook.load(
+                db,
+                version="fta-projection",
+                hs_codes=[clean_hs_code],
+                country_codes=[clean_country_code]
+            )
+        
+        timelines = rate_book.get_fta_timelines(clean_hs_code, clean_country_code)
+        if fta_code:
+            timelines = {code: timeline for code, timeline in timelines.items() if code == fta_code.upper()}
+        
+        if not timelines:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No FTA rates found for HS code {clean_hs_code} and country {clean_country_code}"
+            )
+        
+        agreements = []
+        for code, timeline in timelines.items():
+            entries = [entry for _, _, entry in timeline.segments() if entry is not None]
+            projections = timeline.project(first_year, years)
+            agreements.append(
+                FtaRateProjectionResponse(
+                    fta_code=code,
+                    agreement_name=next((e.agreement_name for e in entries if e.agreement_name), None),
+                    hs_code=entries[0].hs_code if entries else clean_hs_code,
+                    elimination_date=timeline.elimination_date,
+                    years=[
+                        FtaRateProjectionYearResponse(
+                            year=projection.year,
+                            projection_date=projection.on_date,
+                            rate=projection.rate,
+                            staging_category=projection.entry.staging_category if projection.entry else None,
+                            eliminated=projection.eliminated
+                        )
+                        for projection in projections
+                    ]
+                )
+            )
+        
+        general_rate = rate_book.get_general_rate(clean_hs_code)
+        
+        execution_time = time.time() - start_time
+        logger.info(f"Projected {len(agreements)} FTA rates in {execution_time:.3f}s")
+        
+        return FtaRateProjectionsResponse(
+            hs_code=clean_hs_code,
+            country_code=clean_country_code,
+            general_rate=general_rate.general_rate if general_rate else None,
+            agreements=agreements
+        )
+        
+    except HTTPException:
+        raise
+    except SQLAlchemyError as e:
+        logger.error(f"Database error projecting FTA rates: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Database error occurred while projecting FTA rates"
+        )
+    except Exception as e:
+        logger.error(f"Unexpected error projecting FTA rates: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="An unexpected error occurred"
+        )
+
+
 @router.get("/tco-check/{hs_code}", response_model=List[TcoExemptionResponse])
 async def check_tco_exemptions(
     hs_code: str = Path(..., description="HS code"),
@@ -583,6 +1188,30 @@ async def check_tco_exemptions(
         )
 
 
+@router.get("/metrics", response_model=Dict[str, Any])
+async def get_calculation_metrics() -> Dict[str, Any]:
+    """
+    Get per-step latency histograms for duty calculations.
+    
+    Aggregates every duty calculation served by this worker process since
+    start-up: wall, CPU and database time histograms (with p50, p95 and p99
+    estimates) and query counts for each calculation step.
+    
+    Returns:
+        Calculation count, total latency and per-step metrics
+        
+    Raises:
+        HTTPException: 404 if metrics collection is disabled
+    """
+    if not get_settings().metrics_enabled:
+        raise HTTPException(
+            status_code=404,
+            detail="Metrics collection is disabled"
+        )
+    
+    return calculation_metrics.snapshot()
+
+
 @router.post("/calculate-comprehensive", response_model=dict)
 async def calculate_comprehensive_duties(
     hs_code: str,
@@ -606,7 +1235,7 @@ async def calculate_comprehensive_duties(
     """
     try:
         # Calculate customs duty using existing service
-        calculator = DutyCalculatorService()
+        calculator = DutyCalculatorService(rate_book=await get_rate_book(db))
         calculation_input = DutyCalculationInput(
             hs_code=hs_code,
             country_code=country_of_origin,
@@ -617,12 +1246,15 @@ async def calculate_comprehensive_duties(
         
         duty_result = await calculator.calculate_comprehensive_duty(db, calculation_input)
         
-        # Calculate additional taxes
-        lct_result = calculate_lct(hs_code, customs_value, vehicle_details)
-        wet_result = calculate_wet(hs_code, customs_value, alcohol_details)
-        tobacco_result = calculate_tobacco_excise(hs_code, tobacco_details)
-        fuel_result = calculate_fuel_excise(hs_code, fuel_details=tobacco_details)
-        other_levies = calculate_other_levies(hs_code, customs_value, product_details=tobacco_details)
+        # Calculate additional taxes, resolving which apply in one trie walk
+        special_taxes = applicable_special_taxes(hs_code)
+        lct_result = calculate_lct(hs_code, customs_value, vehicle_details, special_taxes)
+        wet_result = calculate_wet(hs_code, customs_value, alcohol_details, special_taxes)
+        tobacco_result = calculate_tobacco_excise(hs_code, tobacco_details, special_taxes)
+        fuel_result = calculate_fuel_excise(hs_code, fuel_details=tobacco_details, special_taxes=special_taxes)
+        other_levies = calculate_other_levies(
+            hs_code, customs_value, product_details=tobacco_details, special_taxes=special_taxes
+        )
         
         # Calculate GST on dutiable value
         dutiable_value = customs_value + duty_result.total_duty
@@ -667,7 +1299,11 @@ async def calculate_comprehensive_duties(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-def calculate_tobacco_excise(hs_code: str, tobacco_details: dict = None) -> dict:
+def calculate_tobacco_excise(
+    hs_code: str,
+    tobacco_details: dict = None,
+    special_taxes: Optional[FrozenSet[str]] = None
+) -> dict:
     """
     Calculate tobacco excise with full rate implementation.
     
@@ -677,10 +1313,10 @@ def calculate_tobacco_excise(hs_code: str, tobacco_details: dict = None) -> dict
     - Other tobacco: $2,495.60 per kg + 12.5% of value
     - Loose leaf tobacco: $49.91 per kg + 12.5% of value
     """
-    # Tobacco HS codes (Chapter 24)
-    tobacco_hs_codes = ['2401', '2402', '2403', '2404']
+    if special_taxes is None:
+        special_taxes = applicable_special_taxes(hs_code)
     
-    if not any(hs_code.startswith(code) for code in tobacco_hs_codes):
+    if TOBACCO_EXCISE not in special_taxes:
         return {'applicable': False, 'amount': 0, 'details': 'Not tobacco product'}
     
     if not tobacco_details:
@@ -818,7 +1454,11 @@ def calculate_tobacco_excise(hs_code: str, tobacco_details: dict = None) -> dict
     }
 
 
-def calculate_fuel_excise(hs_code: str, fuel_details: dict = None) -> dict:
+def calculate_fuel_excise(
+    hs_code: str,
+    fuel_details: dict = None,
+    special_taxes: Optional[FrozenSet[str]] = None
+) -> dict:
     """
     Calculate fuel excise for petroleum products.
     
@@ -831,10 +1471,10 @@ def calculate_fuel_excise(hs_code: str, fuel_details: dict = None) -> dict:
     - Fuel oil: 10.057 cents per litre
     - LPG: 14.6 cents per litre
     """
-    # Fuel HS codes (Chapter 27 - Mineral fuels, oils)
-    fuel_hs_codes = ['2710', '2711', '2712', '2713', '2714', '2715']
+    if special_taxes is None:
+        special_taxes = applicable_special_taxes(hs_code)
     
-    if not any(hs_code.startswith(code) for code in fuel_hs_codes):
+    if FUEL_EXCISE not in special_taxes:
         return {'applicable': False, 'amount': 0, 'details': 'Not petroleum fuel product'}
     
     if not fuel_details:
@@ -1026,7 +1666,12 @@ def calculate_fuel_excise(hs_code: str, fuel_details: dict = None) -> dict:
     }
 
 
-def calculate_other_levies(hs_code: str, customs_value: float, product_details: dict = None):
+def calculate_other_levies(
+    hs_code: str,
+    customs_value: float,
+    product_details: dict = None,
+    special_taxes: Optional[FrozenSet[str]] = None
+):
     """
     Calculate other applicable levies and charges.
     
@@ -1039,24 +1684,14 @@ def calculate_other_levies(hs_code: str, customs_value: float, product_details:
     """
     if not product_details:
         product_details = {}
+    if special_taxes is None:
+        special_taxes = applicable_special_taxes(hs_code)
     
     levies = []
     total_levies = 0
     
     # ACMA Charges (Australian Communications and Media Authority)
-    # Telecommunications equipment HS codes
-    telecom_hs_codes = [
-        '8517',  # Telephone sets, other apparatus for transmission/reception
-        '8518',  # Microphones, loudspeakers, headphones
-        '8519',  # Sound recording/reproducing apparatus
-        '8521',  # Video recording/reproducing apparatus
-        '8525',  # Transmission apparatus for radio-broadcasting/television
-        '8526',  # Radar apparatus, radio navigational aid apparatus
-        '8527',  # Reception apparatus for radio-broadcasting
-        '8528'   # Monitors, projectors, television receivers
-    ]
-    
-    if any(hs_code.startswith(code) for code in telecom_hs_codes):
+    if ACMA_CHARGE in special_taxes:
         # ACMA charges based on equipment type and value
         equipment_type = product_details.get('equipment_type', 'general_telecom')
         quantity = product_details.get('quantity', 1)
@@ -1089,19 +1724,7 @@ def calculate_other_levies(hs_code: str, customs_value: float, product_details:
         total_levies += acma_charge
     
     # Container Deposit Schemes (beverage containers)
-    beverage_hs_codes = [
-        '2201',  # Waters, including natural/artificial mineral waters
-        '2202',  # Waters with added sugar/sweetening matter
-        '2203',  # Beer made from malt
-        '2204',  # Wine of fresh grapes
-        '2205',  # Vermouth and other wine of fresh grapes
-        '2206',  # Other fermented beverages
-        '2207',  # Undenatured ethyl alcohol
-        '2208',  # Undenatured ethyl alcohol; spirits, liqueurs
-        '2209'   # Vinegar and substitutes for vinegar
-    ]
-    
-    if any(hs_code.startswith(code) for code in beverage_hs_codes):
+    if CONTAINER_DEPOSIT in special_taxes:
         container_type = product_details.get('container_type', 'bottle')
         container_size_ml = product_details.get('container_size_ml', 500)
         quantity = product_details.get('quantity', 100)
@@ -1134,34 +1757,7 @@ def calculate_other_levies(hs_code: str, customs_value: float, product_details:
             total_levies += container_deposit
     
     # Quarantine Charges (AQIS)
-    quarantine_hs_codes = [
-        '01',  # Live animals
-        '02',  # Meat and edible meat offal
-        '03',  # Fish and crustaceans
-        '04',  # Dairy produce
-        '05',  # Products of animal origin
-        '06',  # Live trees and other plants
-        '07',  # Edible vegetables
-        '08',  # Edible fruit and nuts
-        '09',  # Coffee, tea, mate and spices
-        '10',  # Cereals
-        '11',  # Products of the milling industry
-        '12',  # Oil seeds and oleaginous fruits
-        '13',  # Lac, gums, resins
-        '14',  # Vegetable plaiting materials
-        '15',  # Animal or vegetable fats and oils
-        '16',  # Preparations of meat, fish or crustaceans
-        '17',  # Sugars and sugar confectionery
-        '18',  # Cocoa and cocoa preparations
-        '19',  # Preparations of cereals, flour, starch or milk
-        '20',  # Preparations of vegetables, fruit, nuts
-        '21',  # Miscellaneous edible preparations
-        '22',  # Beverages, spirits and vinegar
-        '23',  # Residues and waste from the food industries
-        '24'   # Tobacco and manufactured tobacco substitutes
-    ]
-    
-    if any(hs_code.startswith(code) for code in quarantine_hs_codes):
+    if QUARANTINE_CHARGE in special_taxes:
         inspection_type = product_details.get('inspection_type', 'standard')
         risk_category = product_details.get('risk_category', 'medium')
         
@@ -1204,9 +1800,7 @@ def calculate_other_levies(hs_code: str, customs_value: float, product_details:
         total_levies += stevedoring_levy
     
     # Textile, Clothing and Footwear (TCF) Import Credit Scheme
-    tcf_hs_codes = ['50', '51', '52', '53', '54', '55', '56', '57', '58', '59', '60', '61', '62', '63', '64']
-    
-    if any(hs_code.startswith(code) for code in tcf_hs_codes):
+    if TCF_SCHEME in special_taxes:
         # TCF scheme provides credits rather than charges, but note for completeness
         levies.append({
             'type': 'TCF Scheme Note',
@@ -1220,7 +1814,7 @@ def calculate_other_levies(hs_code: str, customs_value: float, product_details:
         })
     
     # Wine Industry Levy (for wine imports)
-    if hs_code.startswith('2204'):  # Wine of fresh grapes
+    if WINE_INDUSTRY_LEVY in special_taxes:
         volume_litres = product_details.get('volume_litres', 0)
         if volume_litres > 0:
             wine_levy = volume_litres * 0.05  # 5 cents per litre
@@ -1236,7 +1830,7 @@ def calculate_other_levies(hs_code: str, customs_value: float, product_details:
             total_levies += wine_levy
     
     # Dairy Industry Levy (for dairy imports)
-    if hs_code.startswith('04'):  # Dairy produce
+    if DAIRY_INDUSTRY_LEVY in special_taxes:
         dairy_value = product_details.get('dairy_value', customs_value)
         dairy_levy = dairy_value * 0.001  # 0.1% of value
         
@@ -1251,9 +1845,7 @@ def calculate_other_levies(hs_code: str, customs_value: float, product_details:
         total_levies += dairy_levy
     
     # Marine Safety Levy (for vessels and marine equipment)
-    marine_hs_codes = ['8901', '8902', '8903', '8904', '8905', '8906', '8907', '8908']
-    
-    if any(hs_code.startswith(code) for code in marine_hs_codes):
+    if MARINE_SAFETY_LEVY in special_taxes:
         vessel_length = product_details.get('vessel_length_m', 10)
         marine_levy = vessel_length * 50  # $50 per metre
         
@@ -1284,15 +1876,21 @@ def calculate_other_levies(hs_code: str, customs_value: float, product_details:
     }
 
 
-def calculate_lct(hs_code: str, customs_value: float, vehicle_details: dict = None):
+def calculate_lct(
+    hs_code: str,
+    customs_value: float,
+    vehicle_details: dict = None,
+    special_taxes: Optional[FrozenSet[str]] = None
+):
     """Calculate Luxury Car Tax for vehicles over threshold"""
     LCT_THRESHOLD_2024_25 = 71849  # Updated annually
     LCT_RATE = 0.33
     
-    # Check if product is a motor vehicle subject to LCT
-    vehicle_hs_codes = ['8703', '8704', '8705']  # Passenger cars, commercial vehicles
+    if special_taxes is None:
+        special_taxes = applicable_special_taxes(hs_code)
     
-    if not any(hs_code.startswith(code) for code in vehicle_hs_codes):
+    # Check if product is a motor vehicle subject to LCT
+    if LUXURY_CAR_TAX not in special_taxes:
         return {'applicable': False, 'amount': 0, 'details': 'Not a motor vehicle'}
     
     if customs_value <= LCT_THRESHOLD_2024_25:
@@ -1315,14 +1913,19 @@ def calculate_lct(hs_code: str, customs_value: float, vehicle_details: dict = No
     }
 
 
-def calculate_wet(hs_code: str, customs_value: float, alcohol_details: dict = None):
+def calculate_wet(
+    hs_code: str,
+    customs_value: float,
+    alcohol_details: dict = None,
+    special_taxes: Optional[FrozenSet[str]] = None
+):
     """Calculate Wine Equalisation Tax"""
     WET_RATE = 0.29
     
-    # Wine HS codes (Chapter 22)
-    wine_hs_codes = ['2204', '2205', '2206']
+    if special_taxes is None:
+        special_taxes = applicable_special_taxes(hs_code)
     
-    if not any(hs_code.startswith(code) for code in wine_hs_codes):
+    if WINE_EQUALISATION_TAX not in special_taxes:
         return {'applicable': False, 'amount': 0, 'details': 'Not wine or alcoholic beverage'}
     
     wet_amount = customs_value * WET_RATE
@@ -1598,4 +2201,37 @@ def _convert_duty_component(component: DutyComponent) -> DutyComponentResponse:
         description=component.description,
         basis=component.basis,
         calculation_details=component.calculation_details
-    )
\ No newline at end of file
+    )
+
+
+def _convert_calculation_result(
+    result: DutyCalculationResult,
+    response_class: type = DutyCalculationResponse,
+    **extra: Any
+) -> DutyCalculationResponse:
+    """Convert service DutyCalculationResult to response schema."""
+    return response_class(
+        hs_code=result.hs_code,
+        country_code=result.country_code,
+        customs_value=result.customs_value,
+        general_duty=_convert_duty_component(result.general_duty) if result.general_duty else None,
+        fta_duty=_convert_duty_component(result.fta_duty) if result.fta_duty else None,
+        anti_dumping_duty=_convert_duty_component(result.anti_dumping_duty) if result.anti_dumping_duty else None,
+        tco_exemption=_convert_duty_component(result.tco_exemption) if result.tco_exemption else None,
+        gst_component=_convert_duty_component(result.gst_component) if result.gst_component else None,
+        total_duty=result.total_duty,
+        duty_inclusive_value=result.duty_inclusive_value,
+        total_gst=result.total_gst,
+        total_amount=result.total_amount,
+        best_rate_type=result.best_rate_type,
+        potential_savings=result.potential_savings,
+        calculation_steps=result.calculation_steps,
+        compliance_notes=result.compliance_notes,
+        warnings=result.warnings,
+        **extra
+    )
+
+
+def _to_money_list(amounts) -> List[Decimal]:
+    """Convert an array of amounts in cents to 2dp Decimals."""
+    return [cents_to_money(amount) for amount in amounts.tolist()]
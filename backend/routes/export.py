@@ -16,6 +16,7 @@ from models.export import ExportCode
 from models.tariff import TariffCode
 from models.fta import FtaRate, TradeAgreement
 from models.hierarchy import TariffSection, TariffChapter
+from services.fuzzy_search import FuzzySearch, EXPORT_DESCRIPTIONS
 
 router = APIRouter(prefix="/api/export", tags=["export"])
 
@@ -168,21 +169,29 @@ async def get_ahecc_tree(
 async def search_ahecc_codes(
     query: str = Query(..., min_length=2),
     limit: int = Query(50, ge=1, le=100),
+    fuzzy: bool = Query(False, description="Match descriptions by similarity, tolerating typos"),
+    similarity_threshold: Optional[float] = Query(None, ge=0.0, le=1.0, description="Minimum similarity when fuzzy"),
     db: AsyncSession = Depends(get_async_session)
 ):
-    """Search AHECC codes by description or code."""
+    """Search AHECC codes by description or code, most similar first when fuzzy."""
     try:
-        search_results = await db.execute(
-            select(ExportCode)
-            .where(
-                or_(
-                    ExportCode.description.ilike(f"%{query}%"),
-                    ExportCode.ahecc_code.ilike(f"%{query}%")
+        if fuzzy:
+            stmt, rank = await FuzzySearch(EXPORT_DESCRIPTIONS, query, similarity_threshold).apply(
+                db, select(ExportCode)
+            )
+            stmt = stmt.order_by(rank.desc(), ExportCode.ahecc_code)
+        else:
+            stmt = (
+                select(ExportCode)
+                .where(
+                    or_(
+                        ExportCode.description.ilike(f"%{query}%"),
+                        ExportCode.ahecc_code.ilike(f"%{query}%")
+                    )
                 )
+                .order_by(ExportCode.ahecc_code)
             )
-            .order_by(ExportCode.ahecc_code)
-            .limit(limit)
-        )
+        search_results = await db.execute(stmt.limit(limit))
         codes = search_results.scalars().all()
 
         results = []
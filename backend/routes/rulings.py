@@ -16,6 +16,8 @@ from models.tariff import TariffCode
 from models.dumping import DumpingDuty
 from models.tco import Tco
 from models.fta import FtaRate, TradeAgreement
+from services.fuzzy_search import FuzzySearch, TCO_DESCRIPTIONS
+from services.trigram import similarity
 
 router = APIRouter(prefix="/api/rulings", tags=["rulings"])
 
@@ -325,6 +327,7 @@ async def search_rulings(
     query: str = Query(..., min_length=3),
     ruling_type: str = Query("all"),  # all, tariff, dumping, regulatory
     limit: int = Query(20, ge=1, le=100),
+    fuzzy: bool = Query(False, description="Match TCO descriptions by similarity, tolerating typos"),
     db: AsyncSession = Depends(get_async_session)
 ):
     """Search through rulings and decisions."""
@@ -335,7 +338,7 @@ async def search_rulings(
         
         # Search TCOs if tariff rulings requested
         if ruling_type in ["all", "tariff"]:
-            tco_results = await search_tco_rulings(db, query, limit // 3)
+            tco_results = await search_tco_rulings(db, query, limit // 3, fuzzy=fuzzy)
             results.extend(tco_results)
             result_types["tariff"] = len(tco_results)
         
@@ -418,21 +421,25 @@ async def health_check():
         raise HTTPException(status_code=500, detail=f"Health check failed: {str(e)}")
 
 # Helper functions
-async def search_tco_rulings(db: AsyncSession, query: str, limit: int) -> List[Dict[str, Any]]:
-    """Search TCO rulings."""
+async def search_tco_rulings(db: AsyncSession, query: str, limit: int, fuzzy: bool = False) -> List[Dict[str, Any]]:
+    """Search TCO rulings, most similar descriptions first when fuzzy."""
     try:
-        tco_result = await db.execute(
-            select(Tco)
-            .where(
-                or_(
-                    Tco.description.ilike(f"%{query}%"),
-                    Tco.hs_code.ilike(f"%{query}%"),
-                    Tco.tco_number.ilike(f"%{query}%")
+        if fuzzy:
+            stmt, rank = await FuzzySearch(TCO_DESCRIPTIONS, query).apply(db, select(Tco))
+            stmt = stmt.order_by(rank.desc(), desc(Tco.gazette_date))
+        else:
+            stmt = (
+                select(Tco)
+                .where(
+                    or_(
+                        Tco.description.ilike(f"%{query}%"),
+                        Tco.hs_code.ilike(f"%{query}%"),
+                        Tco.tco_number.ilike(f"%{query}%")
+                    )
                 )
+                .order_by(desc(Tco.gazette_date))
             )
-            .order_by(desc(Tco.gazette_date))
-            .limit(limit)
-        )
+        tco_result = await db.execute(stmt.limit(limit))
         tcos = tco_result.scalars().all()
         
         results = []
@@ -446,7 +453,9 @@ async def search_tco_rulings(db: AsyncSession, query: str, limit: int) -> List[D
                 "decision_date": tco.gazette_date.isoformat(),
                 "status": "active" if tco.is_current else "inactive",
                 "summary": f"Tariff Concession Order for {tco.description}",
-                "relevance_score": calculate_relevance(query, tco.description)
+                "relevance_score": (
+                    similarity(query, tco.description) if fuzzy else calculate_relevance(query, tco.description)
+                )
             })
         
         return results
@@ -45,6 +45,9 @@ from schemas.search import (
     SearchSortBy
 )
 from schemas.common import PaginationMeta, PaginationParams, SuccessResponse
+from services.keyset_pagination import (
+    SortKey, fetch_keyset_page, count_matches, COUNT_EXACT, COUNT_NONE, COUNT_MODE_PATTERN
+)
 
 # Configure structured logging
 logger = structlog.get_logger(__name__)
@@ -390,12 +393,22 @@ async def search_products(
     search_term: str = Query(..., min_length=1, max_length=200, description="Search term for product descriptions"),
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(20, ge=1, le=100, description="Results per page"),
+    cursor: Optional[str] = Query(None, description="Cursor from pagination.next_cursor; replaces page"),
+    count: Optional[str] = Query(
+        None, regex=COUNT_MODE_PATTERN,
+        description="Total count: exact, estimate or none (default exact, or none with a cursor)"
+    ),
     sort_by: SearchSortBy = Query(SearchSortBy.RELEVANCE, description="Sort field"),
     min_confidence: Optional[float] = Query(None, ge=0.0, le=1.0, description="Minimum confidence filter"),
     verification_status: Optional[VerificationStatus] = Query(None, description="Filter by verification status"),
     db: AsyncSession = Depends(get_async_session)
 ) -> ProductSearchResponse:
-    """Full-text search across product descriptions and classifications."""
+    """
+    Full-text search across product descriptions and classifications.
+    
+    Pages are read from the previous page's last row when a cursor is given,
+    so infinite scrolling costs the same at any depth.
+    """
     try:
         start_time = time.time()
         offset = (page - 1) * limit
@@ -419,28 +432,34 @@ async def search_products(
         if conditions:
             base_query = base_query.where(and_(*conditions))
         
-        # Apply sorting
+        # Apply sorting, with the id as tie-breaker so pages are stable
+        confidence = func.coalesce(ProductClassification.confidence_score, 0)
         if sort_by == SearchSortBy.CONFIDENCE:
-            base_query = base_query.order_by(desc(ProductClassification.confidence_score))
+            sort_keys = [SortKey(confidence, True), SortKey(ProductClassification.id, True)]
         elif sort_by == SearchSortBy.DATE:
-            base_query = base_query.order_by(desc(ProductClassification.created_at))
+            sort_keys = [SortKey(ProductClassification.created_at, True), SortKey(ProductClassification.id, True)]
         elif sort_by == SearchSortBy.HS_CODE:
-            base_query = base_query.order_by(ProductClassification.hs_code)
+            sort_keys = [SortKey(ProductClassification.hs_code), SortKey(ProductClassification.id)]
         else:  # RELEVANCE
-            base_query = base_query.order_by(
-                func.length(ProductClassification.product_description),
-                desc(ProductClassification.confidence_score)
-            )
+            sort_keys = [
+                SortKey(func.length(ProductClassification.product_description)),
+                SortKey(confidence, True),
+                SortKey(ProductClassification.id)
+            ]
         
         # Get total count
-        count_query = select(func.count()).select_from(base_query.subquery())
-        count_result = await db.execute(count_query)
-        total_count = count_result.scalar()
-        
-        # Apply pagination and execute
-        search_query = base_query.offset(offset).limit(limit)
-        search_result = await db.execute(search_query)
-        classifications = search_result.scalars().all()
+        count_mode = count or (COUNT_NONE if cursor else COUNT_EXACT)
+        total_count, total_estimated = await count_matches(db, base_query, count_mode)
+        
+        # Apply pagination from the cursor, or at the page, and execute
+        try:
+            result_page = await fetch_keyset_page(
+                db, base_query, sort_keys, limit,
+                scope=f"products:{sort_by.value}", cursor=cursor, offset=offset
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        classifications = result_page.items
         
         # Build search results
         results = []
@@ -468,7 +487,12 @@ async def search_products(
             )
             results.append(result)
         
-        pagination = PaginationMeta.create(total_count, limit, offset)
+        pagination = PaginationMeta.create(
+            total_count, limit, result_page.offset,
+            has_next=result_page.has_next,
+            next_cursor=result_page.next_cursor,
+            total_estimated=total_estimated
+        )
         search_time = (time.time() - start_time) * 1000
         
         return ProductSearchResponse(
@@ -482,6 +506,8 @@ async def search_products(
             related_terms=[]
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error("Product search failed", error=str(e))
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
@@ -5,18 +5,21 @@ This module implements comprehensive tariff code lookup, hierarchical navigation
 and search functionality for Australian HS codes with related duty information.
 """
 
+import asyncio
 import logging
 import time
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from typing import List, Optional, Dict, Any, Set, Tuple
+from datetime import date, datetime
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Path
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func, text
-from sqlalchemy.orm import selectinload, joinedload, contains_eager
+from sqlalchemy import select, and_, or_, func, text, literal
+from sqlalchemy.orm import selectinload, joinedload, contains_eager, aliased
 from sqlalchemy.exc import SQLAlchemyError
 
-from database import get_async_session
+from config import get_settings
+from database import get_async_session, get_db_session, is_database_initialized
 from models.tariff import TariffCode
 from models.hierarchy import TariffSection, TariffChapter
 from models.duty import DutyRate
@@ -27,9 +30,23 @@ from models.gst import GstProvision
 from schemas.tariff import (
     TariffTreeResponse, TariffDetailResponse, TariffSearchRequest,
     TariffSearchResponse, TariffTreeNode, TariffCodeResponse,
-    TariffSearchResult, TariffCodeSummary
+    TariffSearchResult, TariffCodeSummary, TypeaheadSuggestion, TypeaheadResponse,
+    BulkComparisonRequest, BulkComparisonResponse
 )
 from schemas.common import PaginationMeta, PaginationParams
+from services.tariff_hierarchy import TariffHierarchy, get_tariff_hierarchy
+from services.tariff_fulltext import TariffFullTextSearch
+from services.fuzzy_search import FuzzySearch, TARIFF_DESCRIPTIONS
+from services.trigram import similarity
+from services.schedule_export import (
+    ScheduleExportFilter, iter_schedule, encode_schedule, parquet_available,
+    EXPORT_NDJSON, EXPORT_PARQUET, EXPORT_FORMAT_PATTERN, EXPORT_MEDIA_TYPES
+)
+from services.tariff_comparison import compare_codes_columnar, parse_comparison_codes
+from services.tariff_typeahead import get_tariff_typeahead, MATCH_HS_CODE, MATCH_DESCRIPTION, split_query
+from services.keyset_pagination import (
+    SortKey, fetch_keyset_page, count_matches, COUNT_EXACT, COUNT_NONE, COUNT_MODE_PATTERN
+)
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -37,6 +54,28 @@ logger = logging.getLogger(__name__)
 # Create router
 router = APIRouter(prefix="/api/tariff", tags=["Tariff"])
 
+# Search modes: substring match on descriptions, ranked full-text search,
+# or typo-tolerant trigram similarity
+SEARCH_MODE_CONTAINS = "contains"
+SEARCH_MODE_FULLTEXT = "fulltext"
+SEARCH_MODE_FUZZY = "fuzzy"
+
+# Sections of a tariff detail response selectable with fields=
+DETAIL_FIELDS = (
+    "section", "chapter", "parent", "breadcrumbs",
+    "duty_rates", "fta_rates", "children", "related_codes",
+)
+
+# Columns search results can be sorted on; the id breaks ties for keyset pagination
+TARIFF_SORT_COLUMNS = {
+    "hs_code": TariffCode.hs_code,
+    "description": TariffCode.description,
+    "level": TariffCode.level,
+    "id": TariffCode.id,
+    "created_at": TariffCode.created_at,
+    "updated_at": TariffCode.updated_at,
+}
+
 
 @router.get("/sections", response_model=List[Dict[str, Any]])
 async def get_tariff_sections(
@@ -54,19 +93,25 @@ async def get_tariff_sections(
     try:
         logger.info("Fetching all tariff sections")
         
-        # Query sections with chapter count
-        stmt = (
-            select(
-                TariffSection,
-                func.count(TariffChapter.id).label("chapter_count")
+        hierarchy = await get_tariff_hierarchy(db)
+        if hierarchy is not None:
+            sections_with_counts = [
+                (section, len(hierarchy.chapters(section.id))) for section in hierarchy.sections
+            ]
+        else:
+            # Query sections with chapter count
+            stmt = (
+                select(
+                    TariffSection,
+                    func.count(TariffChapter.id).label("chapter_count")
+                )
+                .outerjoin(TariffChapter, TariffSection.id == TariffChapter.section_id)
+                .group_by(TariffSection.id)
+                .order_by(TariffSection.section_number)
             )
-            .outerjoin(TariffChapter, TariffSection.id == TariffChapter.section_id)
-            .group_by(TariffSection.id)
-            .order_by(TariffSection.section_number)
-        )
-        
-        result = await db.execute(stmt)
-        sections_with_counts = result.all()
+            
+            result = await db.execute(stmt)
+            sections_with_counts = result.all()
         
         sections = []
         for section, chapter_count in sections_with_counts:
@@ -119,10 +164,15 @@ async def get_chapters_by_section(
     try:
         logger.info(f"Fetching chapters for section {section_id}")
         
+        hierarchy = await get_tariff_hierarchy(db)
+        
         # First verify section exists
-        section_stmt = select(TariffSection).where(TariffSection.id == section_id)
-        section_result = await db.execute(section_stmt)
-        section = section_result.scalar_one_or_none()
+        if hierarchy is not None:
+            section = hierarchy.section(section_id)
+        else:
+            section_stmt = select(TariffSection).where(TariffSection.id == section_id)
+            section_result = await db.execute(section_stmt)
+            section = section_result.scalar_one_or_none()
         
         if not section:
             raise HTTPException(
@@ -130,20 +180,26 @@ async def get_chapters_by_section(
                 detail=f"Section with ID {section_id} not found"
             )
         
-        # Query chapters with tariff code count
-        stmt = (
-            select(
-                TariffChapter,
-                func.count(TariffCode.id).label("tariff_code_count")
+        if hierarchy is not None:
+            chapters_with_counts = [
+                (chapter, hierarchy.chapter_code_count(chapter.id))
+                for chapter in hierarchy.chapters(section_id)
+            ]
+        else:
+            # Query chapters with tariff code count
+            stmt = (
+                select(
+                    TariffChapter,
+                    func.count(TariffCode.id).label("tariff_code_count")
+                )
+                .outerjoin(TariffCode)
+                .where(TariffChapter.section_id == section_id)
+                .group_by(TariffChapter.id)
+                .order_by(TariffChapter.chapter_number)
             )
-            .outerjoin(TariffCode)
-            .where(TariffChapter.section_id == section_id)
-            .group_by(TariffChapter.id)
-            .order_by(TariffChapter.chapter_number)
-        )
-        
-        result = await db.execute(stmt)
-        chapters_with_counts = result.all()
+            
+            result = await db.execute(stmt)
+            chapters_with_counts = result.all()
         
         chapters = []
         for chapter, tariff_count in chapters_with_counts:
@@ -204,6 +260,11 @@ async def get_tariff_tree(
         start_time = time.time()
         logger.info(f"Building tariff tree for section {section_id}, depth {depth}")
         
+        hierarchy = await get_tariff_hierarchy(db)
+        if hierarchy is not None:
+            root_nodes = _build_tree_from_hierarchy(hierarchy, section_id, parent_code, depth)
+            return _tree_response(root_nodes, section_id, parent_code, depth, start_time)
+        
         # Verify section exists
         section_stmt = select(TariffSection).where(TariffSection.id == section_id)
         section_result = await db.execute(section_stmt)
@@ -236,45 +297,13 @@ async def get_tariff_tree(
             # Get root level codes (level 2 - chapters)
             base_conditions.append(TariffCode.level == 2)
         
-        # Query tariff codes with children count
-        stmt = (
-            select(TariffCode)
-            .where(and_(*base_conditions))
-            .order_by(TariffCode.hs_code)
-        )
+        # Fetch every node of the tree with its child count in one statement
+        rows = await _load_tree_rows(db, base_conditions, depth)
         
-        result = await db.execute(stmt)
-        codes = result.scalars().all()
-        
-        # Build tree nodes with children count calculated separately
-        root_nodes = []
-        for code in codes:
-            # Count children for this code
-            children_stmt = select(func.count(TariffCode.id)).where(
-                TariffCode.parent_code == code.hs_code
-            )
-            children_result = await db.execute(children_stmt)
-            children_count = children_result.scalar() or 0
-            
-            node = await _build_tree_node(code, children_count, depth - 1, db)
-            root_nodes.append(node)
+        root_path = await _get_ancestor_codes(parent_code, db) if parent_code else []
+        root_nodes = _assemble_tree(rows, root_path, depth)
         
-        # Calculate tree metadata
-        total_nodes = len(root_nodes)
-        max_depth = depth
-        expanded_levels = list(range(1, depth + 1))
-        
-        execution_time = time.time() - start_time
-        logger.info(f"Built tariff tree with {total_nodes} nodes in {execution_time:.3f}s")
-        
-        return TariffTreeResponse(
-            root_nodes=root_nodes,
-            total_nodes=total_nodes,
-            max_depth=max_depth,
-            expanded_levels=expanded_levels,
-            section_id=section_id,
-            parent_code=parent_code
-        )
+        return _tree_response(root_nodes, section_id, parent_code, depth, start_time)
         
     except HTTPException:
         raise
@@ -292,34 +321,241 @@ async def get_tariff_tree(
         )
 
 
-async def _build_tree_node(
+def _tree_response(
+    root_nodes: List[TariffTreeNode],
+    section_id: int,
+    parent_code: Optional[str],
+    depth: int,
+    start_time: float
+) -> TariffTreeResponse:
+    """Wrap built tree nodes with tree metadata."""
+    total_nodes = len(root_nodes)
+    max_depth = depth
+    expanded_levels = list(range(1, depth + 1))
+    
+    execution_time = time.time() - start_time
+    logger.info(f"Built tariff tree with {total_nodes} nodes in {execution_time:.3f}s")
+    
+    return TariffTreeResponse(
+        root_nodes=root_nodes,
+        total_nodes=total_nodes,
+        max_depth=max_depth,
+        expanded_levels=expanded_levels,
+        section_id=section_id,
+        parent_code=parent_code
+    )
+
+
+def _build_tree_from_hierarchy(
+    hierarchy: TariffHierarchy,
+    section_id: int,
+    parent_code: Optional[str],
+    depth: int
+) -> List[TariffTreeNode]:
+    """
+    Build a tariff tree from the in-memory hierarchy index.
+    
+    Selects the same roots as the database path: the section's active
+    chapters, or the active children of ``parent_code`` in the section.
+    
+    Args:
+        hierarchy: Tariff hierarchy index
+        section_id: Section ID to build tree for
+        parent_code: Optional parent code to start tree from
+        depth: Number of levels expanded, counting the roots as 1
+        
+    Returns:
+        Root TariffTreeNodes with children expanded to depth
+        
+    Raises:
+        HTTPException: 404 if section or parent code not found
+    """
+    if hierarchy.section(section_id) is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Section with ID {section_id} not found"
+        )
+    
+    if parent_code:
+        parent = hierarchy.position(parent_code)
+        if parent is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Parent code {parent_code} not found"
+            )
+        roots = [
+            position for position in hierarchy.children(parent)
+            if hierarchy.nodes[position].section_id == section_id and hierarchy.nodes[position].is_active
+        ]
+    else:
+        roots = hierarchy.section_roots(section_id)
+    
+    def build(position: int, tree_depth: int) -> TariffTreeNode:
+        children = hierarchy.children(position)
+        node = _build_tree_node(hierarchy.nodes[position], len(children), list(hierarchy.path(position)))
+        if children and tree_depth < depth:
+            node.children = [build(child, tree_depth + 1) for child in children]
+        return node
+    
+    return [build(position, 1) for position in roots]
+
+
+async def _load_tree_rows(
+    db: AsyncSession,
+    root_conditions: List[Any],
+    depth: int
+) -> List[Tuple[TariffCode, int, int]]:
+    """
+    Fetch the nodes of a tariff tree with their child counts in one statement.
+    
+    A recursive CTE walks from the root codes down through parent_code to
+    the requested depth, and each node is joined to the number of its
+    direct children, so nodes below the expanded depth still report
+    whether they can be expanded.
+    
+    Args:
+        db: Database session
+        root_conditions: Conditions selecting the root codes
+        depth: Number of levels to fetch, counting the roots as 1
+        
+    Returns:
+        (code, tree depth, children count) rows ordered by tree depth and HS code
+    """
+    tree = (
+        select(TariffCode.hs_code, literal(1).label("tree_depth"))
+        .where(and_(*root_conditions))
+        .cte("tariff_tree", recursive=True)
+    )
+    tree = tree.union_all(
+        select(TariffCode.hs_code, tree.c.tree_depth + 1)
+        .join(tree, TariffCode.parent_code == tree.c.hs_code)
+        .where(tree.c.tree_depth < depth)
+    )
+    
+    child = aliased(TariffCode)
+    child_counts = (
+        select(child.parent_code, func.count(child.id).label("children_count"))
+        .where(child.parent_code.in_(select(tree.c.hs_code)))
+        .group_by(child.parent_code)
+        .subquery()
+    )
+    
+    stmt = (
+        select(TariffCode, tree.c.tree_depth, func.coalesce(child_counts.c.children_count, 0))
+        .join(tree, TariffCode.hs_code == tree.c.hs_code)
+        .outerjoin(child_counts, child_counts.c.parent_code == TariffCode.hs_code)
+        .order_by(tree.c.tree_depth, TariffCode.hs_code)
+    )
+    
+    result = await db.execute(stmt)
+    return [tuple(row) for row in result.all()]
+
+
+async def _get_ancestor_codes(hs_code: str, db: AsyncSession) -> List[str]:
+    """
+    Get the hierarchy path from the root down to an HS code in one statement.
+    
+    Args:
+        hs_code: HS code to get the path for
+        db: Database session
+        
+    Returns:
+        List of HS codes from root to the given code
+    """
+    ancestors = (
+        select(TariffCode.hs_code, TariffCode.parent_code, literal(0).label("distance"))
+        .where(TariffCode.hs_code == hs_code)
+        .cte("ancestors", recursive=True)
+    )
+    ancestors = ancestors.union_all(
+        select(TariffCode.hs_code, TariffCode.parent_code, ancestors.c.distance + 1)
+        .join(ancestors, TariffCode.hs_code == ancestors.c.parent_code)
+        .where(ancestors.c.distance < 10)
+    )
+    
+    result = await db.execute(
+        select(ancestors.c.hs_code).order_by(ancestors.c.distance.desc())
+    )
+    return list(result.scalars().all()) or [hs_code]
+
+
+async def _get_hierarchy_path(hs_code: str, db: AsyncSession) -> List[str]:
+    """
+    Get the hierarchy path of an HS code without loading its ancestors as objects.
+    
+    Uses the hierarchy index when available, otherwise one recursive query,
+    so the path never depends on the code's parent relationship being loaded.
+    
+    Args:
+        hs_code: HS code to get the path for
+        db: Database session
+        
+    Returns:
+        List of HS codes from root to the given code
+    """
+    hierarchy = await get_tariff_hierarchy(db)
+    if hierarchy is not None:
+        position = hierarchy.position(hs_code)
+        if position is not None:
+            return list(hierarchy.path(position))
+    return await _get_ancestor_codes(hs_code, db)
+
+
+def _assemble_tree(
+    rows: List[Tuple[TariffCode, int, int]],
+    root_path: List[str],
+    depth: int
+) -> List[TariffTreeNode]:
+    """
+    Assemble tree nodes fetched by _load_tree_rows in memory.
+    
+    Args:
+        rows: (code, tree depth, children count) rows, parents before children
+        root_path: Hierarchy path of the roots' parent, empty for chapters
+        depth: Number of levels expanded, counting the roots as 1
+        
+    Returns:
+        Root TariffTreeNodes with children expanded as fetched
+    """
+    nodes: Dict[str, TariffTreeNode] = {}
+    root_nodes: List[TariffTreeNode] = []
+    
+    for code, tree_depth, children_count in rows:
+        parent = nodes.get(code.parent_code) if tree_depth > 1 else None
+        path = (parent.path if parent is not None else root_path) + [code.hs_code]
+        
+        node = _build_tree_node(code, children_count, path)
+        if children_count and tree_depth < depth:
+            node.children = []
+        nodes[code.hs_code] = node
+        
+        if parent is not None:
+            parent.children.append(node)
+        else:
+            root_nodes.append(node)
+    
+    return root_nodes
+
+
+def _build_tree_node(
     code: TariffCode,
     children_count: int,
-    remaining_depth: int,
-    db: AsyncSession
+    path: List[str]
 ) -> TariffTreeNode:
     """
-    Build a tree node with optional children expansion.
+    Build a tree node without children.
     
     Args:
         code: TariffCode instance
         children_count: Number of direct children
-        remaining_depth: Remaining depth to expand
-        db: Database session
+        path: HS codes from root to this code
         
     Returns:
-        TariffTreeNode with optional children
+        TariffTreeNode
     """
     has_children = children_count > 0
-    is_leaf = not has_children
-    
-    # Calculate depth from level
-    depth = (code.level // 2) - 1
-    
-    # Get hierarchy path
-    path = code.get_hierarchy_path() if hasattr(code, 'get_hierarchy_path') else [code.hs_code]
     
-    node = TariffTreeNode(
+    return TariffTreeNode(
         id=code.id,
         hs_code=code.hs_code,
         description=code.description,
@@ -328,37 +564,10 @@ async def _build_tree_node(
         is_active=code.is_active,
         has_children=has_children,
         children_count=children_count,
-        is_leaf=is_leaf,
-        depth=depth,
+        is_leaf=not has_children,
+        depth=(code.level // 2) - 1,
         path=path
     )
-    
-    # Expand children if depth remaining and has children
-    if remaining_depth > 0 and has_children:
-        children_stmt = (
-            select(TariffCode)
-            .where(TariffCode.parent_code == code.hs_code)
-            .order_by(TariffCode.hs_code)
-        )
-        
-        children_result = await db.execute(children_stmt)
-        children = children_result.scalars().all()
-        
-        children_nodes = []
-        for child in children:
-            # Count children for this child code
-            child_children_stmt = select(func.count(TariffCode.id)).where(
-                TariffCode.parent_code == child.hs_code
-            )
-            child_children_result = await db.execute(child_children_stmt)
-            child_children_count = child_children_result.scalar() or 0
-            
-            child_node = await _build_tree_node(child, child_children_count, remaining_depth - 1, db)
-            children_nodes.append(child_node)
-        
-        node.children = children_nodes
-    
-    return node
 
 
 @router.get("/code/{hs_code}", response_model=TariffDetailResponse)
@@ -367,6 +576,11 @@ async def get_tariff_detail(
     include_rates: bool = Query(True, description="Include duty and FTA rates"),
     include_children: bool = Query(True, description="Include direct child codes"),
     include_related: bool = Query(False, description="Include related codes"),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated sections to include, replacing the include_* flags: "
+                    + ", ".join(DETAIL_FIELDS)
+    ),
     db: AsyncSession = Depends(get_async_session)
 ) -> TariffDetailResponse:
     """
@@ -375,35 +589,44 @@ async def get_tariff_detail(
     Returns comprehensive tariff code information including duty rates,
     FTA rates, dumping duties, TCOs, GST provisions, and hierarchy context.
     
+    The code is read together with its section, chapter and parent in one
+    joined query, and its hierarchy path is taken from the hierarchy index
+    (or one recursive query). Rates, children and related codes are then
+    loaded concurrently, each on its own pooled connection, so the response
+    costs a fixed number of round trips rather than one per section.
+    Sections not listed in ``fields`` are not loaded at all.
+    
     Args:
         hs_code: HS code to get details for
         include_rates: Whether to include duty and FTA rates
         include_children: Whether to include direct child codes
         include_related: Whether to include related/similar codes
+        fields: Sections to include, overriding the include_* flags
         
     Returns:
         Comprehensive tariff detail response
         
     Raises:
-        HTTPException: 404 if HS code not found
+        HTTPException: 400 if fields names an unknown section, 404 if HS code not found
     """
     try:
         start_time = time.time()
         logger.info(f"Fetching tariff details for HS code {hs_code}")
         
+        sections = _detail_fields(fields, include_rates, include_children, include_related)
+        
         # Clean HS code
         clean_hs_code = ''.join(c for c in hs_code if c.isdigit())
         
-        # Build query with eager loading
-        stmt = (
-            select(TariffCode)
-            .options(
-                selectinload(TariffCode.section),
-                selectinload(TariffCode.chapter),
-                selectinload(TariffCode.parent)
-            )
-            .where(TariffCode.hs_code == clean_hs_code)
-        )
+        # Join the single-row relationships into the code lookup
+        options = []
+        if sections & {"section", "breadcrumbs"}:
+            options.append(joinedload(TariffCode.section))
+        if sections & {"chapter", "breadcrumbs"}:
+            options.append(joinedload(TariffCode.chapter))
+        if "parent" in sections:
+            options.append(joinedload(TariffCode.parent))
+        stmt = select(TariffCode).options(*options).where(TariffCode.hs_code == clean_hs_code)
         
         result = await db.execute(stmt)
         tariff = result.scalar_one_or_none()
@@ -414,6 +637,9 @@ async def get_tariff_detail(
                 detail=f"Tariff code {clean_hs_code} not found"
             )
         
+        # Resolve the ancestors here, as walking tariff.parent would lazy load
+        hierarchy_path = await _get_hierarchy_path(tariff.hs_code, db)
+        
         # Build tariff response
         tariff_response = TariffCodeResponse(
             id=tariff.id,
@@ -432,7 +658,7 @@ async def get_tariff_detail(
             is_heading_level=tariff.is_heading_level,
             is_subheading_level=tariff.is_subheading_level,
             is_statistical_level=tariff.is_statistical_level,
-            hierarchy_path=tariff.get_hierarchy_path(),
+            hierarchy_path=hierarchy_path,
             chapter_code=tariff.get_chapter_code(),
             heading_code=tariff.get_heading_code()
         )
@@ -441,7 +667,7 @@ async def get_tariff_detail(
         detail_response = TariffDetailResponse(tariff=tariff_response)
         
         # Add section and chapter info
-        if tariff.section:
+        if "section" in sections and tariff.section:
             detail_response.section = {
                 "id": tariff.section.id,
                 "section_number": tariff.section.section_number,
@@ -449,7 +675,7 @@ async def get_tariff_detail(
                 "description": tariff.section.description
             }
         
-        if tariff.chapter:
+        if "chapter" in sections and tariff.chapter:
             detail_response.chapter = {
                 "id": tariff.chapter.id,
                 "chapter_number": tariff.chapter.chapter_number,
@@ -458,7 +684,7 @@ async def get_tariff_detail(
             }
         
         # Add parent info
-        if tariff.parent:
+        if "parent" in sections and tariff.parent:
             detail_response.parent = TariffCodeSummary(
                 id=tariff.parent.id,
                 hs_code=tariff.parent.hs_code,
@@ -468,21 +694,13 @@ async def get_tariff_detail(
                 parent_code=tariff.parent.parent_code
             )
         
-        # Include rates if requested
-        if include_rates:
-            detail_response.duty_rates = await _get_duty_rates(tariff.id, db)
-            detail_response.fta_rates = await _get_fta_rates(tariff.id, db)
-        
-        # Include children if requested
-        if include_children:
-            detail_response.children = await _get_child_codes(tariff.hs_code, db)
-        
         # Build breadcrumbs
-        detail_response.breadcrumbs = _build_breadcrumbs(tariff)
+        if "breadcrumbs" in sections:
+            detail_response.breadcrumbs = _build_breadcrumbs(tariff, hierarchy_path)
         
-        # Include related codes if requested
-        if include_related:
-            detail_response.related_codes = await _get_related_codes(tariff, db)
+        # Load rates, children and related codes
+        for name, value in (await _load_detail_sections(tariff, sections, db)).items():
+            setattr(detail_response, name, value)
         
         execution_time = time.time() - start_time
         logger.info(f"Retrieved tariff details for {clean_hs_code} in {execution_time:.3f}s")
@@ -505,32 +723,92 @@ async def get_tariff_detail(
         )
 
 
-async def _get_duty_rates(tariff_id: int, db: AsyncSession) -> List[Dict[str, Any]]:
+def _detail_fields(
+    fields: Optional[str],
+    include_rates: bool,
+    include_children: bool,
+    include_related: bool
+) -> Set[str]:
+    """Resolve the sections of a detail response to build."""
+    if fields is not None:
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested - set(DETAIL_FIELDS)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}. Valid fields: {', '.join(DETAIL_FIELDS)}"
+            )
+        return requested
+    
+    sections = {"section", "chapter", "parent", "breadcrumbs"}
+    if include_rates:
+        sections.update({"duty_rates", "fta_rates"})
+    if include_children:
+        sections.add("children")
+    if include_related:
+        sections.add("related_codes")
+    return sections
+
+
+async def _load_detail_sections(tariff: TariffCode, sections: Set[str], db: AsyncSession) -> Dict[str, Any]:
+    """
+    Load the requested detail sections that need their own queries.
+    
+    An AsyncSession cannot run statements concurrently, so when enabled and
+    more than one section is requested each is loaded on its own session;
+    SQLite, and the test sessions, load them one after another on ``db``.
+    """
+    loaders = {
+        "duty_rates": lambda session: _get_duty_rates(tariff.hs_code, session),
+        "fta_rates": lambda session: _get_fta_rates(tariff.hs_code, session),
+        "children": lambda session: _get_child_codes(tariff.hs_code, session),
+        "related_codes": lambda session: _get_related_codes(tariff, session),
+    }
+    requested = [name for name in loaders if name in sections]
+    
+    settings = get_settings()
+    concurrent = (
+        settings.concurrent_detail_queries
+        and len(requested) > 1
+        and not settings.database_url.startswith("sqlite")
+        and is_database_initialized()
+    )
+    if not concurrent:
+        return {name: await loaders[name](db) for name in requested}
+    
+    async def load(name: str) -> Any:
+        async with get_db_session() as session:
+            return await loaders[name](session)
+    
+    results = await asyncio.gather(*[load(name) for name in requested])
+    return dict(zip(requested, results))
+
+
+async def _get_duty_rates(hs_code: str, db: AsyncSession) -> List[Dict[str, Any]]:
     """Get duty rates for a tariff code."""
-    stmt = select(DutyRate).where(DutyRate.tariff_code_id == tariff_id)
+    stmt = select(DutyRate).where(DutyRate.hs_code == hs_code).order_by(DutyRate.id)
     result = await db.execute(stmt)
     rates = result.scalars().all()
     
     return [
         {
             "id": rate.id,
-            "rate_type": rate.rate_type,
-            "rate_value": float(rate.rate_value) if rate.rate_value else None,
+            "general_rate": float(rate.general_rate) if rate.general_rate is not None else None,
             "rate_text": rate.rate_text,
             "unit_type": rate.unit_type,
-            "effective_date": rate.effective_date.isoformat() if rate.effective_date else None,
-            "expiry_date": rate.expiry_date.isoformat() if rate.expiry_date else None
+            "statistical_code": rate.statistical_code
         }
         for rate in rates
     ]
 
 
-async def _get_fta_rates(tariff_id: int, db: AsyncSession) -> List[Dict[str, Any]]:
+async def _get_fta_rates(hs_code: str, db: AsyncSession) -> List[Dict[str, Any]]:
     """Get FTA rates for a tariff code."""
     stmt = (
         select(FtaRate)
         .options(selectinload(FtaRate.trade_agreement))
-        .where(FtaRate.tariff_code_id == tariff_id)
+        .where(FtaRate.hs_code == hs_code)
+        .order_by(FtaRate.fta_code, FtaRate.country_code)
     )
     result = await db.execute(stmt)
     rates = result.scalars().all()
@@ -539,10 +817,13 @@ async def _get_fta_rates(tariff_id: int, db: AsyncSession) -> List[Dict[str, Any
         {
             "id": rate.id,
             "fta_code": rate.fta_code,
-            "preferential_rate": float(rate.preferential_rate) if rate.preferential_rate else None,
-            "rate_text": rate.rate_text,
-            "safeguard_rate": float(rate.safeguard_rate) if rate.safeguard_rate else None,
+            "country_code": rate.country_code,
+            "preferential_rate": float(rate.preferential_rate) if rate.preferential_rate is not None else None,
+            "rate_type": rate.rate_type,
+            "staging_category": rate.staging_category,
             "effective_date": rate.effective_date.isoformat() if rate.effective_date else None,
+            "elimination_date": rate.elimination_date.isoformat() if rate.elimination_date else None,
+            "safeguard_applicable": rate.safeguard_applicable,
             "trade_agreement": {
                 "fta_code": rate.trade_agreement.fta_code,
                 "full_name": rate.trade_agreement.full_name
@@ -554,14 +835,18 @@ async def _get_fta_rates(tariff_id: int, db: AsyncSession) -> List[Dict[str, Any
 
 async def _get_child_codes(parent_hs_code: str, db: AsyncSession) -> List[TariffCodeSummary]:
     """Get direct child codes for a tariff code."""
-    stmt = (
-        select(TariffCode)
-        .where(TariffCode.parent_code == parent_hs_code)
-        .order_by(TariffCode.hs_code)
-        .limit(50)  # Limit to prevent large responses
-    )
-    result = await db.execute(stmt)
-    children = result.scalars().all()
+    hierarchy = await get_tariff_hierarchy(db)
+    if hierarchy is not None:
+        children = hierarchy.child_nodes(parent_hs_code)[:50]
+    else:
+        stmt = (
+            select(TariffCode)
+            .where(TariffCode.parent_code == parent_hs_code)
+            .order_by(TariffCode.hs_code)
+            .limit(50)  # Limit to prevent large responses
+        )
+        result = await db.execute(stmt)
+        children = result.scalars().all()
     
     return [
         TariffCodeSummary(
@@ -576,8 +861,8 @@ async def _get_child_codes(parent_hs_code: str, db: AsyncSession) -> List[Tariff
     ]
 
 
-def _build_breadcrumbs(tariff: TariffCode) -> List[Dict[str, str]]:
-    """Build breadcrumb navigation for a tariff code."""
+def _build_breadcrumbs(tariff: TariffCode, hierarchy_path: List[str]) -> List[Dict[str, str]]:
+    """Build breadcrumb navigation for a tariff code from its hierarchy path."""
     breadcrumbs = []
     
     # Add section breadcrumb
@@ -599,7 +884,6 @@ def _build_breadcrumbs(tariff: TariffCode) -> List[Dict[str, str]]:
         })
     
     # Add hierarchy levels
-    hierarchy_path = tariff.get_hierarchy_path()
     for i, code in enumerate(hierarchy_path[:-1]):  # Exclude current code
         level = len(code)
         breadcrumbs.append({
@@ -616,20 +900,27 @@ async def _get_related_codes(tariff: TariffCode, db: AsyncSession) -> List[Tarif
     """Get related/similar codes for a tariff code."""
     # Get sibling codes (same parent)
     if tariff.parent_code:
-        stmt = (
-            select(TariffCode)
-            .where(
-                and_(
-                    TariffCode.parent_code == tariff.parent_code,
-                    TariffCode.hs_code != tariff.hs_code,
-                    TariffCode.is_active == True
+        hierarchy = await get_tariff_hierarchy(db)
+        if hierarchy is not None:
+            related = [
+                node for node in hierarchy.child_nodes(tariff.parent_code)
+                if node.is_active and node.hs_code != tariff.hs_code
+            ][:10]
+        else:
+            stmt = (
+                select(TariffCode)
+                .where(
+                    and_(
+                        TariffCode.parent_code == tariff.parent_code,
+                        TariffCode.hs_code != tariff.hs_code,
+                        TariffCode.is_active == True
+                    )
                 )
+                .order_by(TariffCode.hs_code)
+                .limit(10)
             )
-            .order_by(TariffCode.hs_code)
-            .limit(10)
-        )
-        result = await db.execute(stmt)
-        related = result.scalars().all()
+            result = await db.execute(stmt)
+            related = result.scalars().all()
         
         return [
             TariffCodeSummary(
@@ -649,6 +940,15 @@ async def _get_related_codes(tariff: TariffCode, db: AsyncSession) -> List[Tarif
 @router.get("/search", response_model=TariffSearchResponse)
 async def search_tariff_codes(
     query: Optional[str] = Query(None, description="Search query"),
+    mode: str = Query(
+        SEARCH_MODE_CONTAINS, regex=f"^({SEARCH_MODE_CONTAINS}|{SEARCH_MODE_FULLTEXT}|{SEARCH_MODE_FUZZY})$",
+        description="contains: description substring; fulltext: ranked web search syntax; "
+                    "fuzzy: ranked by similarity, tolerating typos"
+    ),
+    include_notes: bool = Query(False, description="Also match chapter notes in fulltext mode"),
+    similarity_threshold: Optional[float] = Query(
+        None, ge=0.0, le=1.0, description="Minimum similarity in fuzzy mode (default from settings)"
+    ),
     level: Optional[int] = Query(None, ge=2, le=10, description="Filter by level"),
     section_id: Optional[int] = Query(None, description="Filter by section"),
     chapter_id: Optional[int] = Query(None, description="Filter by chapter"),
@@ -656,7 +956,14 @@ async def search_tariff_codes(
     hs_code_starts_with: Optional[str] = Query(None, description="HS code prefix filter"),
     limit: int = Query(50, ge=1, le=1000, description="Results per page"),
     offset: int = Query(0, ge=0, description="Results to skip"),
-    sort_by: str = Query("hs_code", description="Sort field"),
+    cursor: Optional[str] = Query(None, description="Cursor from pagination.next_cursor; replaces offset"),
+    count: Optional[str] = Query(
+        None, regex=COUNT_MODE_PATTERN,
+        description="Total count: exact, estimate or none (default exact, or none with a cursor)"
+    ),
+    sort_by: Optional[str] = Query(
+        None, description="Sort field, or relevance; relevance in fulltext and fuzzy modes and hs_code otherwise by default"
+    ),
     sort_order: str = Query("asc", regex="^(asc|desc)$", description="Sort order"),
     db: AsyncSession = Depends(get_async_session)
 ) -> TariffSearchResponse:
@@ -664,10 +971,22 @@ async def search_tariff_codes(
     Search tariff codes with filters and pagination.
     
     Provides comprehensive search functionality with full-text search,
-    filters, sorting, and pagination for tariff codes.
+    filters, sorting, and pagination for tariff codes. Pages after the
+    first are best fetched with the returned cursor, which reads from the
+    previous page's last row instead of skipping ``offset`` rows, so every
+    page costs the same.
+    
+    In fulltext mode the query uses web search syntax (quoted phrases,
+    ``or`` and ``-excluded`` words) against the descriptions' full-text
+    index, and results are ranked by relevance. In fuzzy mode descriptions
+    are matched by trigram similarity, so misspelled queries still find
+    codes, ranked by how similar they are.
     
     Args:
         query: Search query for description
+        mode: Search mode (contains/fulltext/fuzzy)
+        include_notes: Also match chapter notes in fulltext mode
+        similarity_threshold: Minimum similarity in fuzzy mode
         level: Filter by hierarchy level
         section_id: Filter by section ID
         chapter_id: Filter by chapter ID
@@ -675,11 +994,16 @@ async def search_tariff_codes(
         hs_code_starts_with: Filter by HS code prefix
         limit: Results per page (1-1000)
         offset: Results to skip
+        cursor: Cursor for the next page from a previous response
+        count: How to count the total (exact/estimate/none)
         sort_by: Field to sort by
         sort_order: Sort order (asc/desc)
         
     Returns:
         Paginated search results with metadata
+        
+    Raises:
+        HTTPException: 400 if the cursor is invalid
     """
     try:
         start_time = time.time()
@@ -710,8 +1034,9 @@ async def search_tariff_codes(
             clean_prefix = ''.join(c for c in hs_code_starts_with if c.isdigit())
             conditions.append(TariffCode.hs_code.like(f"{clean_prefix}%"))
         
-        if query:
-            # Full-text search on description
+        fulltext = TariffFullTextSearch(query, include_notes) if query and mode == SEARCH_MODE_FULLTEXT else None
+        fuzzy = FuzzySearch(TARIFF_DESCRIPTIONS, query, similarity_threshold) if query and mode == SEARCH_MODE_FUZZY else None
+        if query and fulltext is None and fuzzy is None:
             search_condition = TariffCode.description.ilike(f"%{query}%")
             conditions.append(search_condition)
         
@@ -719,29 +1044,42 @@ async def search_tariff_codes(
         if conditions:
             base_stmt = base_stmt.where(and_(*conditions))
         
+        rank = None
+        if fulltext is not None:
+            base_stmt, rank = await fulltext.apply(db, base_stmt)
+        elif fuzzy is not None:
+            base_stmt, rank = await fuzzy.apply(db, base_stmt)
+        
         # Get total count
-        count_stmt = select(func.count()).select_from(
-            base_stmt.subquery()
-        )
-        count_result = await db.execute(count_stmt)
-        total_count = count_result.scalar()
-        
-        # Apply sorting
-        sort_column = getattr(TariffCode, sort_by, TariffCode.hs_code)
-        if sort_order == "desc":
-            sort_column = sort_column.desc()
-        
-        # Apply pagination
-        search_stmt = (
-            base_stmt
-            .order_by(sort_column)
-            .offset(offset)
-            .limit(limit)
-        )
+        count_mode = count or (COUNT_NONE if cursor else COUNT_EXACT)
+        total_count, total_estimated = await count_matches(db, base_stmt, count_mode)
+        
+        # Apply sorting, with the id as tie-breaker so pages are stable
+        if rank is not None and sort_by in (None, "relevance"):
+            sort_by = "relevance"
+            sort_keys = [SortKey(rank, True), SortKey(TariffCode.id)]
+        else:
+            if sort_by not in TARIFF_SORT_COLUMNS:
+                sort_by = "hs_code"
+            descending = sort_order == "desc"
+            sort_keys = [SortKey(TARIFF_SORT_COLUMNS[sort_by], descending)]
+            if sort_by != "id":
+                sort_keys.append(SortKey(TariffCode.id, descending))
+        
+        # Execute search from the cursor, or at the offset
+        try:
+            page = await fetch_keyset_page(
+                db, base_stmt, sort_keys, limit,
+                scope=f"tariff:{mode}:{sort_by}:{sort_order}", cursor=cursor, offset=offset
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        tariff_codes = page.items
         
-        # Execute search
-        search_result = await db.execute(search_stmt)
-        tariff_codes = search_result.scalars().all()
+        # Rank and highlight full-text matches on this page only
+        highlights = {}
+        if fulltext is not None:
+            highlights = await fulltext.highlight(db, [code.id for code in tariff_codes])
         
         # Build search results
         results = []
@@ -764,6 +1102,16 @@ async def search_tariff_codes(
                     query, f"<mark>{query}</mark>"
                 )
             
+            if code.id in highlights:
+                relevance_score, highlighted_description = highlights[code.id]
+                relevance_score = min(relevance_score, 1.0)
+                match_type = "fulltext"
+            
+            if fuzzy is not None:
+                relevance_score = similarity(query, code.description)
+                match_type = "fuzzy"
+                highlighted_description = code.description
+            
             result = TariffSearchResult(
                 id=code.id,
                 hs_code=code.hs_code,
@@ -780,7 +1128,12 @@ async def search_tariff_codes(
             results.append(result)
         
         # Create pagination metadata
-        pagination = PaginationMeta.create(total_count, limit, offset)
+        pagination = PaginationMeta.create(
+            total_count, limit, page.offset,
+            has_next=page.has_next,
+            next_cursor=page.next_cursor,
+            total_estimated=total_estimated
+        )
         
         execution_time = time.time() - start_time
         
@@ -794,6 +1147,8 @@ async def search_tariff_codes(
             search_time_ms=execution_time * 1000
         )
         
+    except HTTPException:
+        raise
     except SQLAlchemyError as e:
         logger.error(f"Database error during tariff search: {e}")
         raise HTTPException(
@@ -808,6 +1163,165 @@ async def search_tariff_codes(
         )
 
 
+@router.get("/export")
+async def export_tariff_schedule(
+    output_format: str = Query(
+        EXPORT_NDJSON, alias="format", regex=EXPORT_FORMAT_PATTERN,
+        description="Export format: ndjson, csv or parquet"
+    ),
+    section_id: Optional[int] = Query(None, description="Only codes in this section"),
+    chapter_id: Optional[int] = Query(None, description="Only codes in this chapter"),
+    changed_since: Optional[date] = Query(
+        None, description="Only codes whose row, duty rates, FTA rates or TCOs changed on or after this date"
+    ),
+    is_active: Optional[bool] = Query(None, description="Filter by active status (default all codes)"),
+    db: AsyncSession = Depends(get_async_session)
+) -> StreamingResponse:
+    """
+    Export the tariff schedule in one streamed response.
+    
+    Codes are read from a server-side cursor in HS code order with their
+    general duty rate, FTA rates and current TCO flag, and each partition
+    is written out as soon as it is read, so a full nightly sync is one
+    request and memory use does not grow with the schedule.
+    
+    Args:
+        output_format: Export format (ndjson/csv/parquet)
+        section_id: Filter by section ID
+        chapter_id: Filter by chapter ID
+        changed_since: Only codes changed on or after this date
+        is_active: Filter by active status
+        
+    Returns:
+        Streamed schedule as an attachment
+        
+    Raises:
+        HTTPException: 501 if Parquet is requested without pyarrow installed
+    """
+    if output_format == EXPORT_PARQUET and not parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet export requires pyarrow, which is not installed")
+    
+    filters = ScheduleExportFilter(
+        section_id=section_id,
+        chapter_id=chapter_id,
+        changed_since=changed_since,
+        is_active=is_active
+    )
+    batch_size = get_settings().schedule_export_batch_size
+    logger.info(f"Exporting tariff schedule as {output_format} ({filters})")
+    
+    async def chunks():
+        start_time = time.time()
+        exported = 0
+        
+        async def batches():
+            nonlocal exported
+            async for rows in iter_schedule(db, filters, batch_size):
+                exported += len(rows)
+                yield rows
+        
+        try:
+            async for chunk in encode_schedule(batches(), output_format):
+                yield chunk
+        except SQLAlchemyError as e:
+            # Headers are already sent, so the truncated body is all the client sees
+            logger.error(f"Database error during tariff schedule export after {exported} codes: {e}")
+            raise
+        logger.info(f"Exported {exported} tariff codes as {output_format} in {time.time() - start_time:.3f}s")
+    
+    return StreamingResponse(
+        chunks(),
+        media_type=EXPORT_MEDIA_TYPES[output_format],
+        headers={"Content-Disposition": f'attachment; filename="tariff-schedule.{output_format}"'}
+    )
+
+
+@router.get("/typeahead", response_model=TypeaheadResponse)
+async def typeahead_tariff_codes(
+    q: str = Query(..., min_length=1, max_length=100, description="Partial HS code and/or description words"),
+    limit: int = Query(10, ge=1, le=50, description="Maximum suggestions"),
+    db: AsyncSession = Depends(get_async_session)
+) -> TypeaheadResponse:
+    """
+    Suggest active tariff codes for a partially typed query.
+    
+    Meant to be called on every keystroke: suggestions come from the
+    in-memory typeahead index without a database query. Digits (with or
+    without dots) match HS code prefixes; words match the start of
+    description words, so "alum extr" suggests aluminium extrusions.
+    Broader codes are suggested first.
+    
+    Args:
+        q: Text typed so far
+        limit: Maximum suggestions (1-50)
+        
+    Returns:
+        Top suggestions and the lookup time
+    """
+    try:
+        start_time = time.perf_counter()
+        
+        typeahead = await get_tariff_typeahead(db)
+        if typeahead is not None:
+            suggestions = [
+                TypeaheadSuggestion(
+                    id=entry.id,
+                    hs_code=entry.hs_code,
+                    description=entry.description,
+                    level=entry.level,
+                    match_type=match_type
+                )
+                for entry, match_type in typeahead.suggest(q, limit)
+            ]
+        else:
+            suggestions = await _typeahead_from_database(q, limit, db)
+        
+        return TypeaheadResponse(
+            query=q,
+            suggestions=suggestions,
+            took_ms=(time.perf_counter() - start_time) * 1000
+        )
+        
+    except SQLAlchemyError as e:
+        logger.error(f"Database error during tariff typeahead: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Database error occurred during typeahead"
+        )
+    except Exception as e:
+        logger.error(f"Unexpected error during tariff typeahead: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="An unexpected error occurred during typeahead"
+        )
+
+
+async def _typeahead_from_database(q: str, limit: int, db: AsyncSession) -> List[TypeaheadSuggestion]:
+    """Suggest codes with a database query when the typeahead index is unavailable."""
+    code_prefix, words = split_query(q)
+    if not code_prefix and not words:
+        return []
+    
+    conditions = [TariffCode.is_active == True]
+    if code_prefix:
+        conditions.append(TariffCode.hs_code.like(f"{code_prefix}%"))
+    for word in words:
+        conditions.append(TariffCode.description.ilike(f"%{word}%"))
+    
+    result = await db.execute(
+        select(TariffCode.id, TariffCode.hs_code, TariffCode.description, TariffCode.level)
+        .where(and_(*conditions))
+        .order_by(TariffCode.level, TariffCode.hs_code)
+        .limit(limit)
+    )
+    match_type = MATCH_HS_CODE if code_prefix else MATCH_DESCRIPTION
+    return [
+        TypeaheadSuggestion(id=row.id, hs_code=row.hs_code, description=row.description, level=row.level,
+                            match_type=match_type)
+        for row in result
+    ]
+
+
 @router.get("/compare", response_model=Dict[str, Any])
 async def compare_tariff_codes(
     codes: str = Query(..., description="Comma-separated list of HS codes to compare"),
@@ -957,6 +1471,71 @@ async def compare_tariff_codes(
         )
 
 
+@router.post("/compare/bulk", response_model=BulkComparisonResponse)
+async def compare_tariff_codes_bulk(
+    request: BulkComparisonRequest,
+    db: AsyncSession = Depends(get_async_session)
+) -> BulkComparisonResponse:
+    """
+    Compare a family of up to 200 tariff codes attribute by attribute.
+    
+    Each requested attribute comes back as one array aligned with
+    ``hs_codes``. Attributes are loaded with one set-based query per
+    attribute group for all codes, and groups not requested are not
+    queried.
+    
+    Args:
+        request: Codes to compare and attributes to return
+        
+    Returns:
+        Columnar comparison of the codes found
+        
+    Raises:
+        HTTPException: 400 for no valid codes or unknown attributes
+    """
+    try:
+        start_time = time.time()
+        
+        code_list = parse_comparison_codes(request.codes)
+        if not code_list:
+            raise HTTPException(status_code=400, detail="No codes provided")
+        
+        logger.info(f"Bulk comparing {len(code_list)} tariff codes")
+        
+        try:
+            comparison = await compare_codes_columnar(db, code_list, request.attributes)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        if comparison.missing_codes:
+            logger.warning(f"Some codes not found: {comparison.missing_codes}")
+        
+        execution_time = time.time() - start_time
+        logger.info(f"Bulk comparison completed for {len(comparison.hs_codes)} codes in {execution_time:.3f}s")
+        
+        return BulkComparisonResponse(
+            hs_codes=comparison.hs_codes,
+            columns=comparison.columns,
+            missing_codes=comparison.missing_codes,
+            execution_time_ms=execution_time * 1000
+        )
+        
+    except HTTPException:
+        raise
+    except SQLAlchemyError as e:
+        logger.error(f"Database error during bulk tariff comparison: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Database error occurred during comparison"
+        )
+    except Exception as e:
+        logger.error(f"Unexpected error during bulk tariff comparison: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="An unexpected error occurred during comparison"
+        )
+
+
 def _build_comparison_matrix(codes: List[TariffCode]) -> Dict[str, Any]:
     """
     Build a comparison matrix highlighting key differences between codes.
@@ -72,6 +72,7 @@ from .duty import (
 from .duty_calculator import (
     DutyCalculationRequest as DutyCalcRequest,
     DutyCalculationResponse as DutyCalcResponse,
+    StepTimingResponse,
     DutyComponentResponse,
     DutyBreakdownResponse,
     DutyRateResponse as DutyCalcRateResponse,
@@ -81,6 +82,20 @@ from .duty_calculator import (
     DutyRatesListResponse,
     FtaRateRequest,
     TcoCheckRequest,
+    BatchDutyLineRequest,
+    BatchDutyCalculationRequest,
+    BatchDutyLineResponse,
+    BatchDutyTotalsResponse,
+    BatchDutyCalculationResponse,
+    DutyScenarioRequest,
+    DutyScenarioOriginResponse,
+    DutyScenarioCheapestResponse,
+    DutyScenarioResponse,
+    FtaPartnerRateResponse,
+    FtaPartnerRatesResponse,
+    FtaRateProjectionYearResponse,
+    FtaRateProjectionResponse,
+    FtaRateProjectionsResponse,
 )
 
 # FTA rate and trade agreement schemas
@@ -179,6 +194,7 @@ DUTY_SCHEMAS = [
 DUTY_CALCULATOR_SCHEMAS = [
     DutyCalcRequest,
     DutyCalcResponse,
+    StepTimingResponse,
     DutyComponentResponse,
     DutyBreakdownResponse,
     DutyCalcRateResponse,
@@ -188,6 +204,20 @@ DUTY_CALCULATOR_SCHEMAS = [
     DutyRatesListResponse,
     FtaRateRequest,
     TcoCheckRequest,
+    BatchDutyLineRequest,
+    BatchDutyCalculationRequest,
+    BatchDutyLineResponse,
+    BatchDutyTotalsResponse,
+    BatchDutyCalculationResponse,
+    DutyScenarioRequest,
+    DutyScenarioOriginResponse,
+    DutyScenarioCheapestResponse,
+    DutyScenarioResponse,
+    FtaPartnerRateResponse,
+    FtaPartnerRatesResponse,
+    FtaRateProjectionYearResponse,
+    FtaRateProjectionResponse,
+    FtaRateProjectionsResponse,
 ]
 
 FTA_SCHEMAS = [
@@ -311,6 +341,21 @@ ENDPOINT_SCHEMAS = {
         "response": DutyCalcResponse,
         "summary": "Calculate comprehensive duty amount for customs value"
     },
+    "POST /api/duty/calculate-batch": {
+        "request": BatchDutyCalculationRequest,
+        "response": BatchDutyCalculationResponse,
+        "summary": "Calculate duty for all tariff lines of a declaration"
+    },
+    "POST /api/duty/calculate-invoice": {
+        "request": "text/csv",
+        "response": "application/x-ndjson | text/csv",
+        "summary": "Stream duty calculations for a CSV commercial invoice"
+    },
+    "POST /api/duty/scenarios": {
+        "request": DutyScenarioRequest,
+        "response": DutyScenarioResponse,
+        "summary": "Compare duty across customs values and origin countries"
+    },
     "GET /api/duty/rates/{hs_code}": {
         "response": DutyRatesListResponse,
         "summary": "Get all duty rates for an HS code"
@@ -323,10 +368,22 @@ ENDPOINT_SCHEMAS = {
         "response": "List[DutyCalcFtaRateResponse]",
         "summary": "Get FTA rates for specific country"
     },
+    "GET /api/duty/fta-partners/{hs_code}": {
+        "response": FtaPartnerRatesResponse,
+        "summary": "Rank the best FTA rate from every partner country"
+    },
+    "GET /api/duty/fta-projection/{hs_code}/{country_code}": {
+        "response": FtaRateProjectionsResponse,
+        "summary": "Project staged FTA rates year by year until elimination"
+    },
     "GET /api/duty/tco-check/{hs_code}": {
         "response": "List[TcoExemptionResponse]",
         "summary": "Check TCO exemptions"
     },
+    "GET /api/duty/metrics": {
+        "response": "Dict[str, Any]",
+        "summary": "Per-step duty calculation latency histograms"
+    },
     
     # FTA rate endpoints
     "POST /api/fta/calculate": {
@@ -461,6 +518,7 @@ __all__ = [
     # Duty calculator schemas
     "DutyCalcRequest",
     "DutyCalcResponse",
+    "StepTimingResponse",
     "DutyComponentResponse",
     "DutyBreakdownResponse",
     "DutyCalcRateResponse",
@@ -470,6 +528,20 @@ __all__ = [
     "DutyRatesListResponse",
     "FtaRateRequest",
     "TcoCheckRequest",
+    "BatchDutyLineRequest",
+    "BatchDutyCalculationRequest",
+    "BatchDutyLineResponse",
+    "BatchDutyTotalsResponse",
+    "BatchDutyCalculationResponse",
+    "DutyScenarioRequest",
+    "DutyScenarioOriginResponse",
+    "DutyScenarioCheapestResponse",
+    "DutyScenarioResponse",
+    "FtaPartnerRateResponse",
+    "FtaPartnerRatesResponse",
+    "FtaRateProjectionYearResponse",
+    "FtaRateProjectionResponse",
+    "FtaRateProjectionsResponse",
     
     # FTA schemas
     "TradeAgreementBase",
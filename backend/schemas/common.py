@@ -76,10 +76,12 @@ class PaginationMeta(BaseModel):
     Pagination metadata for responses.
     
     Contains information about the current page, total items, and navigation.
+    Endpoints with keyset pagination also return an opaque cursor for the
+    next page, and may leave the total uncounted or estimated.
     """
     
-    total: int = Field(
-        description="Total number of items available"
+    total: Optional[int] = Field(
+        description="Total number of items available, null if not counted"
     )
     limit: int = Field(
         description="Maximum items per page"
@@ -90,8 +92,8 @@ class PaginationMeta(BaseModel):
     page: int = Field(
         description="Current page number (1-based)"
     )
-    pages: int = Field(
-        description="Total number of pages"
+    pages: Optional[int] = Field(
+        description="Total number of pages, null if not counted"
     )
     has_next: bool = Field(
         description="Whether there is a next page"
@@ -99,27 +101,43 @@ class PaginationMeta(BaseModel):
     has_prev: bool = Field(
         description="Whether there is a previous page"
     )
+    next_cursor: Optional[str] = Field(
+        None,
+        description="Opaque cursor to pass as 'cursor' for the next page"
+    )
+    total_estimated: bool = Field(
+        False,
+        description="Whether total is a query planner estimate"
+    )
     
     @classmethod
     def create(
         cls,
-        total: int,
+        total: Optional[int],
         limit: int,
-        offset: int
+        offset: int,
+        has_next: Optional[bool] = None,
+        next_cursor: Optional[str] = None,
+        total_estimated: bool = False
     ) -> "PaginationMeta":
         """
         Create pagination metadata from total count and pagination params.
         
         Args:
-            total: Total number of items
+            total: Total number of items, None if not counted
             limit: Items per page
             offset: Items skipped
+            has_next: Whether a next page exists, derived from total if omitted
+            next_cursor: Cursor for the next page, if any
+            total_estimated: Whether total is an estimate
             
         Returns:
             PaginationMeta instance
         """
         page = (offset // limit) + 1
-        pages = (total + limit - 1) // limit  # Ceiling division
+        pages = (total + limit - 1) // limit if total is not None else None  # Ceiling division
+        if has_next is None:
+            has_next = total is not None and offset + limit < total
         
         return cls(
             total=total,
@@ -127,8 +145,10 @@ class PaginationMeta(BaseModel):
             offset=offset,
             page=page,
             pages=pages,
-            has_next=offset + limit < total,
-            has_prev=offset > 0
+            has_next=has_next,
+            has_prev=offset > 0,
+            next_cursor=next_cursor,
+            total_estimated=total_estimated
         )
 
 
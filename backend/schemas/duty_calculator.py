@@ -131,6 +131,18 @@ class DutyComponentResponse(BaseModel):
     )
 
 
+class StepTimingResponse(BaseModel):
+    """
+    Time spent in one step of a duty calculation.
+    """
+    
+    step: str = Field(description="Calculation step")
+    wall_ms: float = Field(description="Elapsed time in milliseconds")
+    cpu_ms: float = Field(description="CPU time in milliseconds")
+    db_ms: float = Field(description="Database statement time in milliseconds")
+    query_count: int = Field(description="Database statements executed")
+
+
 class DutyCalculationResponse(BaseModel):
     """
     Complete response schema for duty calculations.
@@ -215,6 +227,12 @@ class DutyCalculationResponse(BaseModel):
         default_factory=list,
         description="Important warnings and considerations"
     )
+    
+    # Instrumentation
+    step_timings: Optional[List[StepTimingResponse]] = Field(
+        None,
+        description="Per-step timings, when requested with the X-Debug-Timings header"
+    )
 
 
 class DutyRateResponse(BaseModel):
@@ -437,4 +455,369 @@ class TcoCheckRequest(BaseModel):
     @field_validator('hs_code')
     @classmethod
     def validate_hs_code(cls, v):
-        return HSCodeValidator.validate_hs_code(v)
\ No newline at end of file
+        return HSCodeValidator.validate_hs_code(v)
+
+# Batch calculation schemas
+class BatchDutyLineRequest(BaseModel):
+    """
+    Request schema for a single tariff line in a batch calculation.
+    """
+    
+    hs_code: str = Field(
+        ...,
+        min_length=2,
+        max_length=10,
+        description="HS code for the tariff line",
+        example="8471.30.00"
+    )
+    country_code: str = Field(
+        ...,
+        min_length=2,
+        max_length=3,
+        description="Country of origin code (ISO 3166-1)",
+        example="CHN"
+    )
+    customs_value: Decimal = Field(
+        ...,
+        gt=0,
+        description="Customs value in AUD",
+        example="1000.00"
+    )
+    quantity: Optional[Decimal] = Field(
+        None,
+        gt=0,
+        description="Quantity for specific duty calculations",
+        example="1.0"
+    )
+    exporter_name: Optional[str] = Field(
+        None,
+        max_length=200,
+        description="Exporter name for anti-dumping duty checks",
+        example="ABC Manufacturing Co."
+    )
+    
+    @field_validator('hs_code')
+    @classmethod
+    def validate_hs_code(cls, v):
+        """Validate HS code format."""
+        return HSCodeValidator.validate_hs_code(v)
+    
+    @field_validator('country_code')
+    @classmethod
+    def validate_country_code(cls, v):
+        """Validate country code format."""
+        return CountryCodeValidator.validate_country_code(v)
+
+
+class BatchDutyCalculationRequest(BaseModel):
+    """
+    Request schema for calculating duty on all lines of an import declaration.
+    """
+    
+    model_config = ConfigDict(
+        json_encoders={
+            Decimal: str,
+            date: lambda v: v.isoformat() if v else None
+        }
+    )
+    
+    lines: List[BatchDutyLineRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=2000,
+        description="Tariff lines to calculate (maximum 2000)"
+    )
+    calculation_date: Optional[date] = Field(
+        None,
+        description="Date for rate validity (defaults to today)",
+        example="2024-01-15"
+    )
+    value_basis: str = Field(
+        default="CIF",
+        description="Value basis for customs valuation",
+        example="CIF"
+    )
+    
+    @field_validator('value_basis')
+    @classmethod
+    def validate_value_basis(cls, v):
+        """Validate value basis."""
+        valid_bases = ["FOB", "CIF", "CFR", "EXW", "DDP", "DDU"]
+        if v.upper() not in valid_bases:
+            raise ValueError(f"Value basis must be one of: {', '.join(valid_bases)}")
+        return v.upper()
+
+
+class BatchDutyLineResponse(DutyCalculationResponse):
+    """
+    Response schema for a single tariff line in a batch calculation.
+    """
+    
+    line_number: int = Field(description="1-based position of the line in the request")
+
+
+class BatchDutyTotalsResponse(BaseModel):
+    """
+    Declaration-level totals for a batch calculation.
+    """
+    
+    model_config = ConfigDict(
+        json_encoders={Decimal: str}
+    )
+    
+    line_count: int = Field(description="Number of tariff lines calculated")
+    total_customs_value: Decimal = Field(description="Sum of customs values in AUD")
+    total_duty: Decimal = Field(description="Sum of duties in AUD")
+    total_gst: Decimal = Field(description="Sum of GST in AUD")
+    total_amount: Decimal = Field(description="Total amount payable in AUD")
+    potential_savings: Decimal = Field(description="Sum of savings against general rates in AUD")
+
+
+class BatchDutyCalculationResponse(BaseModel):
+    """
+    Response schema for a batch duty calculation.
+    """
+    
+    lines: List[BatchDutyLineResponse] = Field(
+        default_factory=list,
+        description="Per-line calculation results, in request order"
+    )
+    totals: BatchDutyTotalsResponse = Field(description="Declaration totals")
+    calculation_time_ms: float = Field(description="Calculation time in milliseconds")
+
+
+# What-if scenario schemas
+class DutyScenarioRequest(BaseModel):
+    """
+    Request schema for a what-if duty scenario matrix.
+    """
+    
+    hs_code: str = Field(
+        ...,
+        min_length=2,
+        max_length=10,
+        description="HS code for the scenarios",
+        example="8471.30.00"
+    )
+    customs_values: List[Decimal] = Field(
+        ...,
+        min_length=1,
+        max_length=100,
+        description="Customs values in AUD to evaluate",
+        example=["1000.00", "2500.00", "5000.00"]
+    )
+    country_codes: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=50,
+        description="Candidate countries of origin",
+        example=["CHN", "VNM", "THA"]
+    )
+    quantity: Optional[Decimal] = Field(
+        None,
+        gt=0,
+        description="Quantity for specific duty calculations",
+        example="1.0"
+    )
+    exporter_name: Optional[str] = Field(
+        None,
+        max_length=200,
+        description="Exporter name for anti-dumping duty checks"
+    )
+    calculation_date: Optional[date] = Field(
+        None,
+        description="Date for rate validity (defaults to today)",
+        example="2024-01-15"
+    )
+    
+    @field_validator('hs_code')
+    @classmethod
+    def validate_hs_code(cls, v):
+        """Validate HS code format."""
+        return HSCodeValidator.validate_hs_code(v)
+    
+    @field_validator('customs_values')
+    @classmethod
+    def validate_customs_values(cls, v):
+        """Validate customs values are positive."""
+        if any(value <= 0 for value in v):
+            raise ValueError("Customs values must be greater than zero")
+        return v
+    
+    @field_validator('country_codes')
+    @classmethod
+    def validate_country_codes(cls, v):
+        """Validate and de-duplicate country codes, keeping order."""
+        codes = [CountryCodeValidator.validate_country_code(code) for code in v]
+        return list(dict.fromkeys(codes))
+
+
+class DutyScenarioOriginResponse(BaseModel):
+    """
+    Scenario results for one country of origin across all customs values.
+    """
+    
+    model_config = ConfigDict(
+        json_encoders={Decimal: str}
+    )
+    
+    country_code: str = Field(description="Country of origin")
+    fta_code: Optional[str] = Field(None, description="FTA providing the preferential rate")
+    fta_rate: Optional[Decimal] = Field(None, description="Effective FTA rate percentage")
+    anti_dumping_rate: Optional[Decimal] = Field(None, description="Anti-dumping ad valorem rate percentage")
+    fta_duty: List[Optional[Decimal]] = Field(description="FTA duty per customs value")
+    anti_dumping_duty: List[Decimal] = Field(description="Anti-dumping duty per customs value")
+    total_duty: List[Decimal] = Field(description="Total duty per customs value")
+    gst: List[Decimal] = Field(description="GST per customs value")
+    total_amount: List[Decimal] = Field(description="Total amount payable per customs value")
+    best_rate_type: List[str] = Field(description="Best applicable rate type per customs value")
+
+
+class DutyScenarioCheapestResponse(BaseModel):
+    """
+    Cheapest origin for one customs value.
+    """
+    
+    customs_value: Decimal = Field(description="Customs value in AUD")
+    country_code: str = Field(description="Origin with the lowest total amount")
+    total_amount: Decimal = Field(description="Total amount payable in AUD")
+
+
+class DutyScenarioResponse(BaseModel):
+    """
+    Response schema for a what-if duty scenario matrix.
+    """
+    
+    model_config = ConfigDict(
+        json_encoders={Decimal: str}
+    )
+    
+    hs_code: str = Field(description="HS code")
+    customs_values: List[Decimal] = Field(description="Customs values evaluated, in column order")
+    general_rate: Optional[Decimal] = Field(None, description="General/MFN rate")
+    general_basis: str = Field(description="General duty basis (Ad Valorem, Specific, Free)")
+    general_duty: List[Decimal] = Field(description="General duty per customs value")
+    tco_number: Optional[str] = Field(None, description="Applicable TCO exemption")
+    origins: List[DutyScenarioOriginResponse] = Field(
+        default_factory=list,
+        description="Scenario rows, one per country of origin"
+    )
+    cheapest_origins: List[DutyScenarioCheapestResponse] = Field(
+        default_factory=list,
+        description="Cheapest origin for each customs value"
+    )
+    calculation_time_ms: float = Field(description="Calculation time in milliseconds")
+
+
+# FTA partner comparison schemas
+class FtaPartnerRateResponse(BaseModel):
+    """
+    Best preferential rate available from one FTA partner country.
+    """
+    
+    model_config = ConfigDict(
+        json_encoders={
+            Decimal: str,
+            date: lambda v: v.isoformat() if v else None
+        }
+    )
+    
+    rank: int = Field(description="Rank by landed duty, 1 is cheapest")
+    country_code: str = Field(description="Partner country code")
+    fta_code: str = Field(description="FTA code")
+    agreement_name: Optional[str] = Field(None, description="Trade agreement name")
+    hs_code: str = Field(description="HS code level the rate is recorded at")
+    preferential_rate: Optional[Decimal] = Field(None, description="Preferential rate percentage")
+    effective_rate: Optional[Decimal] = Field(None, description="Effective rate after elimination")
+    staging_category: Optional[str] = Field(None, description="Staging category")
+    elimination_date: Optional[date] = Field(None, description="Date the tariff is eliminated")
+    duty_amount: Decimal = Field(description="Duty payable in AUD at this rate")
+    savings_vs_general: Optional[Decimal] = Field(None, description="Saving against the general rate in AUD")
+    quota_applicable: bool = Field(False, description="Whether quota restrictions apply")
+    rule_of_origin: Optional[str] = Field(None, description="Rules of origin summary")
+
+
+class FtaPartnerRatesResponse(BaseModel):
+    """
+    Response schema for comparing FTA partner countries for one HS code.
+    """
+    
+    model_config = ConfigDict(
+        json_encoders={
+            Decimal: str,
+            date: lambda v: v.isoformat() if v else None
+        }
+    )
+    
+    hs_code: str = Field(description="HS code")
+    customs_value: Decimal = Field(description="Customs value in AUD used for ranking")
+    calculation_date: date = Field(description="Date for rate validity")
+    general_rate: Optional[Decimal] = Field(None, description="General/MFN rate")
+    general_duty: Optional[Decimal] = Field(None, description="General duty payable in AUD")
+    partners: List[FtaPartnerRateResponse] = Field(
+        default_factory=list,
+        description="Partner countries ranked by landed duty"
+    )
+
+
+# FTA rate projection schemas
+class FtaRateProjectionYearResponse(BaseModel):
+    """
+    Projected preferential rate on 1 January of one year.
+    """
+    
+    model_config = ConfigDict(
+        json_encoders={
+            Decimal: str,
+            date: lambda v: v.isoformat() if v else None
+        }
+    )
+    
+    year: int = Field(description="Year projected")
+    projection_date: date = Field(description="Date the rate is projected on")
+    rate: Optional[Decimal] = Field(None, description="Projected preferential rate percentage")
+    staging_category: Optional[str] = Field(None, description="Staging category of the rate in force")
+    eliminated: bool = Field(False, description="Whether the tariff has been eliminated")
+
+
+class FtaRateProjectionResponse(BaseModel):
+    """
+    Year-by-year projection of one trade agreement's preferential rate.
+    """
+    
+    model_config = ConfigDict(
+        json_encoders={
+            Decimal: str,
+            date: lambda v: v.isoformat() if v else None
+        }
+    )
+    
+    fta_code: str = Field(description="FTA code")
+    agreement_name: Optional[str] = Field(None, description="Trade agreement name")
+    hs_code: str = Field(description="HS code level the rates are recorded at")
+    elimination_date: Optional[date] = Field(None, description="Date the tariff is eliminated")
+    years: List[FtaRateProjectionYearResponse] = Field(
+        default_factory=list,
+        description="Projected rate for each year"
+    )
+
+
+class FtaRateProjectionsResponse(BaseModel):
+    """
+    Response schema for projecting staged FTA rates for an HS code and country.
+    """
+    
+    model_config = ConfigDict(
+        json_encoders={
+            Decimal: str,
+            date: lambda v: v.isoformat() if v else None
+        }
+    )
+    
+    hs_code: str = Field(description="HS code")
+    country_code: str = Field(description="Country of origin")
+    general_rate: Optional[Decimal] = Field(None, description="General/MFN rate")
+    agreements: List[FtaRateProjectionResponse] = Field(
+        default_factory=list,
+        description="Projection per trade agreement"
+    )
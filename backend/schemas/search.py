@@ -660,9 +660,9 @@ class ProductSearchResponse(BaseModel):
         ...,
         description="Original search term"
     )
-    total_results: int = Field(
+    total_results: Optional[int] = Field(
         ...,
-        description="Total number of matching results"
+        description="Total number of matching results, null if not counted"
     )
     search_time_ms: float = Field(
         ...,
@@ -406,8 +406,8 @@ class TariffSearchResponse(BaseModel):
         None,
         description="Original search query"
     )
-    total_results: int = Field(
-        description="Total number of matching results"
+    total_results: Optional[int] = Field(
+        description="Total number of matching results, null if not counted"
     )
     search_time_ms: Optional[float] = Field(
         None,
@@ -425,6 +425,61 @@ class TariffSearchResponse(BaseModel):
     )
 
 
+class TypeaheadSuggestion(BaseModel):
+    """
+    Typeahead suggestion for a tariff code.
+    
+    Contains only what a search box renders.
+    """
+    
+    model_config = {"from_attributes": True}
+    
+    id: int = Field(description="Primary key")
+    hs_code: str = Field(description="HS code")
+    description: str = Field(description="Description of the tariff code")
+    level: int = Field(description="Hierarchy level")
+    match_type: str = Field(description="What matched the query (hs_code or description)")
+
+
+class TypeaheadResponse(BaseModel):
+    """
+    Typeahead suggestions for a partial query.
+    """
+    
+    query: str = Field(description="Query as typed")
+    suggestions: List[TypeaheadSuggestion] = Field(description="Top suggestions, best first")
+    took_ms: float = Field(description="Lookup time in milliseconds")
+
+
+class BulkComparisonRequest(BaseModel):
+    """
+    Request schema for comparing a family of tariff codes.
+    """
+    
+    codes: List[str] = Field(
+        min_length=1,
+        max_length=200,
+        description="HS codes to compare"
+    )
+    attributes: Optional[List[str]] = Field(
+        None,
+        description="Attributes to return, one column each (default description, level, general_rate, best_fta_rate)"
+    )
+
+
+class BulkComparisonResponse(BaseModel):
+    """
+    Columnar comparison of tariff codes.
+    
+    Every column holds one value per entry of hs_codes, in the same order.
+    """
+    
+    hs_codes: List[str] = Field(description="Codes found, in request order")
+    columns: Dict[str, List[Any]] = Field(description="One array of values per requested attribute")
+    missing_codes: List[str] = Field(default_factory=list, description="Requested codes that do not exist")
+    execution_time_ms: Optional[float] = Field(None, description="Comparison time in milliseconds")
+
+
 class TariffTreeResponse(BaseModel):
     """
     Response schema for hierarchical tariff tree.
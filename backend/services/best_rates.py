@@ -0,0 +1,411 @@
+"""
+Materialized best duty rates for the Customs Broker Portal.
+
+The best_rates table holds, per tariff code and FTA partner country, the
+general rate, best preferential rate and TCO exemption that apply and which
+of them wins, so the database path of the duty calculator resolves them with
+a primary-key lookup instead of three HS-prefix queries.
+
+Rows are kept current incrementally: writes to duty_rates, fta_rates or tcos
+made through the ORM delete the affected rows in the same transaction (so
+readers never see a stale winner) and, once committed, recompute them in the
+background. Raw SQL writes by the scrapers and populate scripts have their
+rows deleted by database triggers instead; lookups notice the source tables'
+data version change and recompute the rows of codes left without any. Rows
+also carry the date until which they hold, after which lookups fall back to
+live resolution until the next refresh.
+
+The table is only read by calculators running without the rate book, so it
+is not rebuilt at startup while the rate book is enabled.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Set, TYPE_CHECKING
+
+from sqlalchemy import delete, event, exists, func, insert, inspect, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+
+from config import get_settings
+from database import get_db_session, is_database_initialized
+from models.best_rate import BestRate, GENERAL_ORIGIN
+from models.duty import DutyRate
+from models.fta import FtaRate
+from models.tariff import TariffCode
+from models.tco import Tco
+from services.data_version import VersionedCache, get_data_version
+from services.rate_timeline import next_staging_date, staged_rate
+
+if TYPE_CHECKING:
+    from services.rate_book import RateBook
+
+logger = logging.getLogger(__name__)
+
+# Models whose rows feed the best_rates table
+SOURCE_MODELS = (DutyRate, FtaRate, Tco)
+
+INSERT_BATCH_SIZE = 1000
+
+ZERO = Decimal('0.00')
+
+_PENDING_KEY = "best_rates_pending_prefixes"
+
+# Strong references to running refresh tasks, so they are not collected
+_refresh_tasks: Set[asyncio.Task] = set()
+
+# Background refreshes run one at a time, so they never write the same rows at once
+_refresh_lock = asyncio.Lock()
+
+
+def compute_best_rates(
+    rate_book: "RateBook",
+    hs_codes: Iterable[str],
+    on_date: date
+) -> List[Dict[str, Any]]:
+    """
+    Compute best_rates rows for tariff codes from a rate book.
+
+    Args:
+        rate_book: Rate book covering the codes and their prefixes
+        hs_codes: Tariff codes to compute rows for
+        on_date: Date the rates must be in force on
+
+    Returns:
+        Row dictionaries, one GENERAL_ORIGIN row per code plus one per FTA partner
+    """
+    rows = []
+    for hs_code in hs_codes:
+        general = rate_book.get_general_rate(hs_code)
+        tco = rate_book.get_tco_exemption(hs_code, on_date)
+
+        # Only ad valorem (or free) general rates compare independently of quantity
+        general_is_specific = general is not None and general.is_specific and bool(general.general_rate)
+        general_rate = None
+        if general is not None:
+            general_rate = general.general_rate if general.is_ad_valorem and general.general_rate else ZERO
+
+        # Partners get a row even when none of their rates is in force yet,
+        # so the row's validity covers the date their first rate starts
+        origins = [GENERAL_ORIGIN, *rate_book.get_fta_partners(hs_code)]
+
+        for country_code in origins:
+            fta = None
+            if country_code != GENERAL_ORIGIN:
+                fta = rate_book.get_best_fta_rate(hs_code, country_code, on_date)
+            fta_rate = (staged_rate(fta, on_date) or ZERO) if fta is not None else None
+
+            if tco is not None:
+                best_rate_type, best_rate = "tco_exemption", ZERO
+            elif general_is_specific:
+                best_rate_type, best_rate = None, None
+            elif fta_rate is not None and (general_rate is None or fta_rate < general_rate):
+                best_rate_type, best_rate = "fta", fta_rate
+            elif general is not None:
+                best_rate_type, best_rate = "general", general_rate
+            else:
+                best_rate_type, best_rate = None, None
+
+            # Rows also expire at the next instalment of a staged FTA rate
+            valid_until = rate_book.next_rate_change(
+                hs_code, None if country_code == GENERAL_ORIGIN else country_code, on_date
+            )
+            staging_step = next_staging_date(fta, on_date) if fta is not None else None
+            if staging_step is not None and (valid_until is None or staging_step < valid_until):
+                valid_until = staging_step
+
+            rows.append({
+                "hs_code": hs_code,
+                "country_code": country_code,
+                "general_rate_id": general.id if general is not None else None,
+                "general_rate": general.general_rate if general is not None else None,
+                "general_unit_type": general.unit_type if general is not None else None,
+                "fta_rate_id": fta.id if fta is not None else None,
+                "fta_code": fta.fta_code if fta is not None else None,
+                "fta_rate": fta_rate,
+                "tco_id": tco.id if tco is not None else None,
+                "tco_number": tco.tco_number if tco is not None else None,
+                "best_rate_type": best_rate_type,
+                "best_rate": best_rate,
+                "computed_on": on_date,
+                "valid_until": valid_until,
+            })
+    return rows
+
+
+async def refresh_best_rates(
+    session: AsyncSession,
+    hs_prefixes: Optional[Iterable[str]] = None,
+    on_date: Optional[date] = None
+) -> int:
+    """
+    Recompute best_rates rows, for every tariff code or those under given prefixes.
+
+    The caller commits.
+
+    Args:
+        session: Database session
+        hs_prefixes: Recompute only tariff codes starting with these prefixes
+        on_date: Date the rates must be in force on, today by default
+
+    Returns:
+        Number of rows written
+    """
+    # Imported here as the rate book module depends on the duty calculator
+    from services.rate_book import RateBook
+
+    on_date = on_date or date.today()
+    prefixes = sorted(set(hs_prefixes)) if hs_prefixes is not None else None
+
+    code_query = select(TariffCode.hs_code).where(TariffCode.is_active == True)
+    stale_rows = delete(BestRate)
+    if prefixes is not None:
+        if not prefixes:
+            return 0
+        code_query = code_query.where(or_(*(TariffCode.hs_code.startswith(p) for p in prefixes)))
+        stale_rows = stale_rows.where(or_(*(BestRate.hs_code.startswith(p) for p in prefixes)))
+
+    hs_codes = (await session.execute(code_query)).scalars().all()
+    rate_book = await RateBook.load(
+        session,
+        version="best-rates",
+        hs_codes=hs_codes if prefixes is not None else None
+    )
+    rows = compute_best_rates(rate_book, hs_codes, on_date)
+
+    await session.execute(stale_rows)
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        await session.execute(insert(BestRate), rows[start:start + INSERT_BATCH_SIZE])
+
+    logger.info(
+        f"Best rates refreshed: {len(rows)} rows for {len(hs_codes)} tariff codes"
+        + (f" under {len(prefixes)} prefixes" if prefixes is not None else "")
+    )
+    return len(rows)
+
+
+async def refresh_best_rates_if_stale(
+    session: AsyncSession,
+    on_date: Optional[date] = None
+) -> int:
+    """
+    Recompute every best_rates row unless all rows were computed on the date.
+
+    The caller commits.
+
+    Args:
+        session: Database session
+        on_date: Date the rates must be in force on, today by default
+
+    Returns:
+        Number of rows written, 0 if the table was current
+    """
+    on_date = on_date or date.today()
+    oldest = await session.scalar(select(func.min(BestRate.computed_on)))
+    if oldest is not None and oldest >= on_date:
+        return 0
+    return await refresh_best_rates(session, on_date=on_date)
+
+
+async def refresh_missing_best_rates(
+    session: AsyncSession,
+    on_date: Optional[date] = None
+) -> int:
+    """
+    Recompute best_rates rows of active tariff codes that have none.
+
+    Rows go missing when database triggers delete them after a raw SQL write
+    to a source table. The caller commits.
+
+    Args:
+        session: Database session
+        on_date: Date the rates must be in force on, today by default
+
+    Returns:
+        Number of rows written
+    """
+    has_row = exists().where(BestRate.hs_code == TariffCode.hs_code, BestRate.country_code == GENERAL_ORIGIN)
+    hs_codes = (await session.execute(
+        select(TariffCode.hs_code).where(TariffCode.is_active == True, ~has_row)
+    )).scalars().all()
+    if not hs_codes:
+        return 0
+
+    # A full rebuild beats matching thousands of prefixes
+    if len(hs_codes) > INSERT_BATCH_SIZE:
+        return await refresh_best_rates(session, on_date=on_date)
+    return await refresh_best_rates(session, hs_codes, on_date)
+
+
+@dataclass
+class BestRateResolution:
+    """Materialized best rate with the source rate rows it was derived from."""
+    best_rate: BestRate
+    general_rate: Optional[DutyRate] = None
+    fta_rate: Optional[FtaRate] = None
+    tco_exemption: Optional[Tco] = None
+
+
+async def resolve_best_rate(
+    session: AsyncSession,
+    hs_code: str,
+    country_code: str,
+    on_date: date
+) -> Optional[BestRateResolution]:
+    """
+    Resolve the materialized best rate for an HS code and origin.
+
+    The best rate row and its source rate rows are read in one statement,
+    a primary-key probe joined to the sources by primary key.
+
+    Args:
+        session: Database session
+        hs_code: Tariff code
+        country_code: Country of origin
+        on_date: Date the rates must be in force on
+
+    Returns:
+        The partner row (or the GENERAL_ORIGIN row for other origins) with its
+        sources; None if the code has no row, the row does not hold on the
+        date or a source row has since been removed
+    """
+    result = await session.execute(
+        select(BestRate, DutyRate, FtaRate, Tco)
+        .outerjoin(DutyRate, DutyRate.id == BestRate.general_rate_id)
+        .outerjoin(FtaRate, FtaRate.id == BestRate.fta_rate_id)
+        .outerjoin(Tco, Tco.id == BestRate.tco_id)
+        .where(
+            BestRate.hs_code == hs_code,
+            BestRate.country_code.in_((country_code, GENERAL_ORIGIN))
+        )
+        .options(selectinload(FtaRate.trade_agreement))
+    )
+    matches = {row.BestRate.country_code: row for row in result}
+    match = matches.get(country_code) or matches.get(GENERAL_ORIGIN)
+    if match is None or not match.BestRate.is_valid_on(on_date):
+        return None
+
+    best_rate, general_rate, fta_rate, tco = match
+    if (
+        (best_rate.general_rate_id is not None and general_rate is None)
+        or (best_rate.fta_rate_id is not None and fta_rate is None)
+        or (best_rate.tco_id is not None and tco is None)
+    ):
+        return None
+
+    return BestRateResolution(best_rate, general_rate, fta_rate, tco)
+
+
+def _changed_hs_codes(session: Session) -> Set[str]:
+    """Collect old and new HS codes of rate rows added, changed or deleted in a flush."""
+    hs_codes = set()
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if not isinstance(instance, SOURCE_MODELS):
+            continue
+        history = inspect(instance).attrs.hs_code.history
+        hs_codes.update(code for code in (*history.added, *history.unchanged, *history.deleted) if code)
+    return hs_codes
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_best_rates(session: Session, flush_context) -> None:
+    """Delete best rates derived from rate rows written in this flush."""
+    if not get_settings().best_rate_table_enabled:
+        return
+
+    hs_codes = _changed_hs_codes(session)
+    if not hs_codes:
+        return
+
+    session.execute(
+        delete(BestRate).where(or_(*(BestRate.hs_code.startswith(code) for code in hs_codes)))
+    )
+    session.info.setdefault(_PENDING_KEY, set()).update(hs_codes)
+
+
+@event.listens_for(Session, "after_commit")
+def _schedule_best_rate_refresh(session: Session) -> None:
+    """Recompute invalidated best rates in the background once committed."""
+    hs_prefixes = session.info.pop(_PENDING_KEY, None)
+    if not hs_prefixes or not get_settings().best_rate_table_enabled:
+        return
+
+    try:
+        schedule_best_rate_refresh(hs_prefixes)
+    except RuntimeError:
+        logger.debug("No running event loop; best rates will refresh on the next full refresh")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_refresh(session: Session) -> None:
+    """Forget invalidations rolled back with their transaction."""
+    session.info.pop(_PENDING_KEY, None)
+
+
+async def _refresh_in_background(hs_prefixes: Optional[Set[str]]) -> None:
+    """Refresh best rates, under prefixes or stale and missing ones, on a session of their own."""
+    if not is_database_initialized():
+        return
+    try:
+        async with _refresh_lock, get_db_session() as session:
+            if hs_prefixes is None:
+                if not await refresh_best_rates_if_stale(session):
+                    await refresh_missing_best_rates(session)
+            else:
+                await refresh_best_rates(session, hs_prefixes)
+            await session.commit()
+    except Exception as e:
+        logger.warning(f"Best rate refresh failed for {sorted(hs_prefixes or ['all'])}: {e}")
+
+
+def schedule_best_rate_refresh(hs_prefixes: Optional[Set[str]] = None) -> asyncio.Task:
+    """
+    Refresh best rates in the background.
+
+    Args:
+        hs_prefixes: Refresh only tariff codes under these prefixes; all
+            codes if the table is stale, otherwise codes without rows, by
+            default
+
+    Returns:
+        The scheduled task
+    """
+    task = asyncio.get_running_loop().create_task(_refresh_in_background(hs_prefixes))
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+    return task
+
+
+async def _get_source_version(session: AsyncSession) -> str:
+    return await get_data_version(session, SOURCE_MODELS)
+
+
+async def _schedule_repair(session: AsyncSession, version: str) -> str:
+    schedule_best_rate_refresh()
+    return version
+
+
+# Schedules a refresh whenever the source tables' data version changes
+best_rate_source_watch = VersionedCache(
+    _schedule_repair,
+    check_interval=get_settings().rate_book_refresh_interval,
+    get_version=_get_source_version
+)
+
+
+async def check_best_rate_sources(session: Optional[AsyncSession]) -> None:
+    """
+    Schedule recomputing best rates deleted by triggers if the source tables changed.
+
+    The data version is read at most once per check interval, so lookups
+    usually return without touching the database.
+
+    Args:
+        session: Database session used for the version check
+    """
+    if session is None or not get_settings().best_rate_table_enabled or not is_database_initialized():
+        return
+    await best_rate_source_watch.get(session)
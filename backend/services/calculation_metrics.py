@@ -0,0 +1,281 @@
+"""
+Per-step timing instrumentation for duty calculations.
+
+A calculation run under ``trace_calculation`` records, for each of its steps,
+the wall time, CPU time, and the time and number of database statements
+executed while the step was active. Database statements are attributed
+through SQLAlchemy cursor events and a context variable holding the active
+step, so concurrent lookups running in separate tasks are attributed to
+their own steps and untraced code pays only a context variable read.
+
+Completed traces are aggregated into per-step latency histograms for the
+metrics endpoint.
+"""
+
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import get_settings
+
+# Calculation steps, in order
+GENERAL_RATE_STEP = "general_rate"
+FTA_RATE_STEP = "fta_rate"
+TCO_EXEMPTION_STEP = "tco_exemption"
+ANTI_DUMPING_STEP = "anti_dumping"
+BEST_RATE_STEP = "best_rate"
+GST_STEP = "gst"
+TOTALS_STEP = "totals"
+
+CALCULATION_STEPS = (
+    GENERAL_RATE_STEP, FTA_RATE_STEP, TCO_EXEMPTION_STEP, ANTI_DUMPING_STEP,
+    BEST_RATE_STEP, GST_STEP, TOTALS_STEP
+)
+
+# Histogram bucket upper bounds in milliseconds
+LATENCY_BUCKETS_MS = (
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0, 2500.0
+)
+
+_QUERY_STARTS_KEY = "calculation_query_starts"
+
+_current_trace: ContextVar[Optional["CalculationTrace"]] = ContextVar("calculation_trace", default=None)
+_current_step: ContextVar[Optional["StepTiming"]] = ContextVar("calculation_step", default=None)
+
+
+@dataclass
+class StepTiming:
+    """Time spent in one calculation step."""
+    step: str
+    wall_ms: float = 0.0
+    cpu_ms: float = 0.0  # Includes other tasks run while the step awaited I/O
+    db_ms: float = 0.0
+    query_count: int = 0
+
+
+@dataclass
+class CalculationTrace:
+    """Step timings recorded for one duty calculation."""
+    steps: Dict[str, StepTiming] = field(
+        default_factory=lambda: {name: StepTiming(name) for name in CALCULATION_STEPS}
+    )
+    wall_ms: float = 0.0
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[StepTiming]:
+        """Time a block of work against a step, accumulating over repeated entries."""
+        timing = self.steps.setdefault(name, StepTiming(name))
+        token = _current_step.set(timing)
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
+        try:
+            yield timing
+        finally:
+            timing.wall_ms += (time.perf_counter() - wall_start) * 1000
+            timing.cpu_ms += (time.thread_time() - cpu_start) * 1000
+            _current_step.reset(token)
+
+    @property
+    def timings(self) -> List[StepTiming]:
+        """Get the step timings in calculation order."""
+        return list(self.steps.values())
+
+    def server_timing(self) -> str:
+        """Format the step timings as a Server-Timing header value."""
+        entries = [
+            f'{timing.step};dur={timing.wall_ms:.3f};desc="{timing.query_count} queries, '
+            f'db {timing.db_ms:.3f}ms, cpu {timing.cpu_ms:.3f}ms"'
+            for timing in self.timings
+        ]
+        entries.append(f"total;dur={self.wall_ms:.3f}")
+        return ", ".join(entries)
+
+
+def timed_step(name: str):
+    """
+    Time a block of work against a step of the active calculation trace.
+
+    Args:
+        name: Step name
+
+    Returns:
+        Context manager; a no-op when no calculation is being traced
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return nullcontext()
+    return trace.step(name)
+
+
+@contextmanager
+def trace_calculation() -> Iterator[CalculationTrace]:
+    """
+    Trace the steps of a duty calculation.
+
+    On exit the trace is added to the shared histograms when metrics are
+    enabled. A calculation nested in one already traced joins the outer trace.
+
+    Yields:
+        The CalculationTrace being recorded
+    """
+    outer = _current_trace.get()
+    if outer is not None:
+        yield outer
+        return
+
+    trace = CalculationTrace()
+    token = _current_trace.set(trace)
+    start = time.perf_counter()
+    try:
+        yield trace
+    finally:
+        trace.wall_ms = (time.perf_counter() - start) * 1000
+        _current_trace.reset(token)
+        if get_settings().metrics_enabled:
+            calculation_metrics.record(trace)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    """Note when a statement run during a traced step starts."""
+    if _current_step.get() is not None:
+        conn.info.setdefault(_QUERY_STARTS_KEY, []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    """Attribute a completed statement to the active step."""
+    timing = _current_step.get()
+    starts = conn.info.get(_QUERY_STARTS_KEY)
+    if timing is None or not starts:
+        return
+    timing.db_ms += (time.perf_counter() - starts.pop()) * 1000
+    timing.query_count += 1
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of latencies in milliseconds."""
+
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Add an observation."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile by linear interpolation within its bucket.
+
+        Args:
+            q: Quantile between 0 and 1
+
+        Returns:
+            Estimated latency in milliseconds, or None with no observations;
+            observations above the last bucket report its upper bound
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                if index == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[index - 1] if index else 0.0
+                upper = self.bounds[index]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.bounds[-1]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Summarise the histogram with cumulative bucket counts."""
+        cumulative, buckets = 0, {}
+        for bound, bucket_count in zip((*self.bounds, float("inf")), self.counts):
+            cumulative += bucket_count
+            buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "sum_ms": round(self.sum, 3),
+            "mean_ms": round(self.sum / self.count, 3) if self.count else None,
+            "p50_ms": _rounded(self.quantile(0.50)),
+            "p95_ms": _rounded(self.quantile(0.95)),
+            "p99_ms": _rounded(self.quantile(0.99)),
+            "buckets": buckets,
+        }
+
+
+def _rounded(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
+
+
+class StepMetrics:
+    """Latency histograms for one calculation step."""
+
+    __slots__ = ("wall", "cpu", "db", "queries")
+
+    def __init__(self):
+        self.wall = LatencyHistogram()
+        self.cpu = LatencyHistogram()
+        self.db = LatencyHistogram()
+        self.queries = 0
+
+    def observe(self, timing: StepTiming) -> None:
+        """Add one calculation's timing for the step."""
+        self.wall.observe(timing.wall_ms)
+        self.cpu.observe(timing.cpu_ms)
+        self.db.observe(timing.db_ms)
+        self.queries += timing.query_count
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Summarise the step's histograms."""
+        return {
+            "wall": self.wall.snapshot(),
+            "cpu": self.cpu.snapshot(),
+            "db": self.db.snapshot(),
+            "queries": self.queries,
+            "queries_per_calculation": (
+                round(self.queries / self.wall.count, 3) if self.wall.count else None
+            ),
+        }
+
+
+class CalculationMetrics:
+    """Per-process aggregate of traced duty calculations."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        """Discard every recorded observation."""
+        self.total = LatencyHistogram()
+        self.steps: Dict[str, StepMetrics] = {name: StepMetrics() for name in CALCULATION_STEPS}
+
+    def record(self, trace: CalculationTrace) -> None:
+        """Add a completed calculation trace."""
+        self.total.observe(trace.wall_ms)
+        for timing in trace.timings:
+            self.steps.setdefault(timing.step, StepMetrics()).observe(timing)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Summarise every histogram."""
+        return {
+            "calculations": self.total.count,
+            "total": self.total.snapshot(),
+            "steps": {name: metrics.snapshot() for name, metrics in self.steps.items()},
+        }
+
+
+calculation_metrics = CalculationMetrics()
@@ -0,0 +1,191 @@
+"""
+Data version tracking for the Customs Broker Portal.
+
+Process-resident caches such as the duty rate book are only valid for the
+data they were built from. This module computes cheap fingerprints of the
+rate and tariff hierarchy tables so a cache can detect changes without
+re-reading every row, and a cache holder that rebuilds its value when the
+fingerprint changes.
+
+Most rate tables have no update timestamp and the scrapers update rows in
+place with raw SQL, so fingerprints are built from the per-table write
+counters that database triggers keep in data_versions (see
+models.data_version), alongside row counts and latest ids and timestamps.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Generic, List, Optional, Sequence, TypeVar
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.duty import DutyRate
+from models.fta import FtaRate
+from models.dumping import DumpingDuty
+from models.tco import Tco
+from models.gst import GstProvision
+from models.hierarchy import TradeAgreement, TariffSection, TariffChapter
+from models.tariff import TariffCode
+from models.export import ExportCode
+from models.data_version import DataVersion
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Tables whose contents feed duty calculations
+RATE_TABLE_MODELS = (DutyRate, FtaRate, TradeAgreement, Tco, DumpingDuty, GstProvision)
+
+# Tables whose contents make up the tariff hierarchy
+HIERARCHY_TABLE_MODELS = (TariffSection, TariffChapter, TariffCode)
+
+# Tables served by the tariff, export and duty reference endpoints
+REFERENCE_TABLE_MODELS = HIERARCHY_TABLE_MODELS + RATE_TABLE_MODELS + (ExportCode,)
+
+
+async def get_data_version(session: AsyncSession, models: Sequence[Any]) -> str:
+    """
+    Get a fingerprint of a set of tables.
+
+    The fingerprint combines the write counter of every table with its row
+    count and its latest creation and update timestamps and highest id,
+    where the table has them, and is computed in a single round trip.
+
+    Args:
+        session: Database session
+        models: Models of the tables to fingerprint
+
+    Returns:
+        Opaque version string that changes whenever the tables change
+    """
+    columns = []
+    for model in models:
+        columns.append(
+            select(DataVersion.version)
+            .where(DataVersion.table_name == model.__tablename__)
+            .scalar_subquery()
+        )
+        columns.append(select(func.count()).select_from(model).scalar_subquery())
+        for name in ("created_at", "updated_at", "id"):
+            if hasattr(model, name):
+                columns.append(select(func.max(getattr(model, name))).scalar_subquery())
+
+    result = await session.execute(select(*columns))
+    row = result.one()
+
+    parts: List[str] = ["" if value is None else str(value) for value in row]
+    return "|".join(parts)
+
+
+async def get_rate_data_version(session: AsyncSession) -> str:
+    """
+    Get a fingerprint of the duty rate tables.
+
+    Args:
+        session: Database session
+
+    Returns:
+        Opaque version string that changes whenever rate data changes
+    """
+    return await get_data_version(session, RATE_TABLE_MODELS)
+
+
+async def get_hierarchy_data_version(session: AsyncSession) -> str:
+    """
+    Get a fingerprint of the tariff section, chapter and code tables.
+
+    Args:
+        session: Database session
+
+    Returns:
+        Opaque version string that changes whenever the hierarchy changes
+    """
+    return await get_data_version(session, HIERARCHY_TABLE_MODELS)
+
+
+async def get_reference_data_version(session: AsyncSession) -> str:
+    """
+    Get a fingerprint of every table behind the reference endpoints.
+
+    Args:
+        session: Database session
+
+    Returns:
+        Opaque version string that changes whenever reference data changes
+    """
+    return await get_data_version(session, REFERENCE_TABLE_MODELS)
+
+
+class VersionedCache(Generic[T]):
+    """
+    Process-wide holder for a value built from database tables.
+
+    The data version (of the rate tables unless another version function is
+    given) is checked at most once per ``check_interval`` seconds;
+    when it changes a new value is loaded and the reference swapped in one
+    assignment. Concurrent callers share a single rebuild.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[AsyncSession, str], Awaitable[T]],
+        check_interval: float,
+        get_version: Optional[Callable[[AsyncSession], Awaitable[str]]] = None
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            loader: Coroutine building the value from a session and data version
+            check_interval: Seconds between data version checks
+            get_version: Coroutine fingerprinting the value's source tables,
+                get_rate_data_version by default
+        """
+        self.loader = loader
+        self.check_interval = check_interval
+        self.get_version = get_version or get_rate_data_version
+        self._value: Optional[T] = None
+        self._version: Optional[str] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def value(self) -> Optional[T]:
+        """Get the current value without checking freshness."""
+        return self._value
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._value is not None
+            and time.monotonic() - self._checked_at < self.check_interval
+        )
+
+    async def get(self, session: AsyncSession) -> T:
+        """
+        Get a value that is current as of the last version check.
+
+        Args:
+            session: Database session used for the version check and rebuild
+
+        Returns:
+            Current value
+        """
+        if self._is_fresh():
+            return self._value
+
+        async with self._lock:
+            if self._is_fresh():
+                return self._value
+
+            version = await self.get_version(session)
+            if self._value is None or self._version != version:
+                self._value = await self.loader(session, version)
+                self._version = version
+            self._checked_at = time.monotonic()
+            return self._value
+
+    def invalidate(self) -> None:
+        """Force a version check on the next access."""
+        self._checked_at = 0.0
@@ -5,22 +5,39 @@ This service handles comprehensive duty calculations including general rates,
 FTA rates, anti-dumping duties, TCO exemptions, and GST calculations.
 """
 
+import asyncio
 import logging
 from datetime import date
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, TYPE_CHECKING
 from dataclasses import dataclass, field
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_
+from sqlalchemy import func, or_
 from sqlalchemy.orm import selectinload
 
+from config import get_settings
+from database import get_db_session, is_database_initialized
 from models.duty import DutyRate
 from models.fta import FtaRate
-from models.dumping import DumpingDuty
+from models.dumping import DumpingDuty, normalize_exporter_name
 from models.tco import Tco
 from models.gst import GstProvision
 from models.hierarchy import TradeAgreement
+from services.best_rates import check_best_rate_sources, resolve_best_rate
+from services.calculation_metrics import (
+    CalculationTrace, timed_step, trace_calculation,
+    GENERAL_RATE_STEP, FTA_RATE_STEP, TCO_EXEMPTION_STEP, ANTI_DUMPING_STEP,
+    BEST_RATE_STEP, GST_STEP, TOTALS_STEP
+)
+from services.gst_rules import GstRule, get_gst_rules
+from services.hs_lookup import select_by_hs_prefix
+from services.rate_context_cache import get_rate_context_cache, rate_context_key
+from services.rate_timeline import fta_rate_order, staged_rate
+from services.trigram import rank_by_similarity
+
+if TYPE_CHECKING:
+    from services.rate_book import RateBook
 
 logger = logging.getLogger(__name__)
 
@@ -78,6 +95,36 @@ class DutyCalculationResult:
     calculation_steps: List[str] = field(default_factory=list)
     compliance_notes: List[str] = field(default_factory=list)
     warnings: List[str] = field(default_factory=list)
+    
+    # Per-step timings, when the calculation was traced
+    trace: Optional[CalculationTrace] = None
+
+
+@dataclass
+class DutyRateContext:
+    """
+    Rates resolved for a single calculation.
+
+    Values are ORM instances when resolved from the database, or the
+    equivalent read-only entries when resolved from a rate book.
+    """
+    general_rate: Optional[DutyRate] = None
+    fta_rate: Optional[FtaRate] = None
+    tco_exemption: Optional[Tco] = None
+    dumping_duty: Optional[DumpingDuty] = None
+    gst_provisions: List[GstProvision] = field(default_factory=list)
+    gst_rule: Optional[GstRule] = None  # Compiled from gst_provisions, when already available
+    best_rate_type: Optional[str] = None  # Precomputed winner, from the best_rates table; not trusted over amounts
+
+
+@dataclass
+class FtaPartnerOption:
+    """Best preferential rate available from one FTA partner country."""
+    country_code: str
+    fta_rate: FtaRate
+    fta_duty: DutyComponent
+    agreement_name: Optional[str] = None
+    savings_vs_general: Optional[Decimal] = None
 
 
 class DutyCalculatorService:
@@ -90,12 +137,38 @@ class DutyCalculatorService:
     - Anti-dumping and countervailing duties
     - TCO (Tariff Concession Order) exemptions
     - GST calculations on duty-inclusive values
+    
+    When constructed with a rate book, all rates are resolved in memory and
+    calculations do not query the database. Otherwise resolved rates are
+    memoized per HS code, origin, date and exporter, and the rate lookups
+    on a miss can run concurrently, each on its own pooled connection.
     """
     
-    def __init__(self):
-        """Initialize the duty calculator service."""
+    def __init__(
+        self,
+        rate_book: Optional["RateBook"] = None,
+        concurrent_lookups: Optional[bool] = None
+    ):
+        """
+        Initialize the duty calculator service.
+        
+        Args:
+            rate_book: Optional in-memory rate book used instead of database lookups
+            concurrent_lookups: Resolve rate components concurrently; defaults to
+                the concurrent_rate_lookups setting, and is always off for SQLite
+        """
         self.gst_rate = Decimal('0.10')  # 10% standard GST rate
         self.gst_threshold = Decimal('1000.00')  # GST threshold for imports
+        self.rate_book = rate_book
+        
+        settings = get_settings()
+        if concurrent_lookups is None:
+            concurrent_lookups = settings.concurrent_rate_lookups
+        self.concurrent_lookups = (
+            concurrent_lookups and not settings.database_url.startswith("sqlite")
+        )
+        self.use_best_rates = settings.best_rate_table_enabled
+        self.context_cache = get_rate_context_cache() if rate_book is None else None
     
     async def calculate_comprehensive_duty(
         self,
@@ -113,17 +186,42 @@ class DutyCalculatorService:
             Comprehensive duty calculation result
         """
         try:
-            result = DutyCalculationResult(
-                hs_code=calculation_input.hs_code,
-                country_code=calculation_input.country_code,
-                customs_value=calculation_input.customs_value
-            )
-            
             calc_date = calculation_input.calculation_date or date.today()
+            with trace_calculation() as trace:
+                context = await self.resolve_rate_context(session, calculation_input, calc_date)
+                result = await self.calculate_from_context(calculation_input, context)
+            result.trace = trace
+            return result
             
-            # Step 1: Get general duty rate
+        except Exception as e:
+            logger.error(f"Error in comprehensive duty calculation: {str(e)}")
+            raise
+    
+    async def calculate_from_context(
+        self,
+        calculation_input: DutyCalculationInput,
+        context: DutyRateContext
+    ) -> DutyCalculationResult:
+        """
+        Calculate comprehensive duty from already resolved rates.
+        
+        Args:
+            calculation_input: Input parameters for calculation
+            context: Rates resolved for the calculation input
+            
+        Returns:
+            Comprehensive duty calculation result
+        """
+        result = DutyCalculationResult(
+            hs_code=calculation_input.hs_code,
+            country_code=calculation_input.country_code,
+            customs_value=calculation_input.customs_value
+        )
+        
+        # Step 1: Get general duty rate
+        with timed_step(GENERAL_RATE_STEP):
             result.calculation_steps.append("Step 1: Calculating general duty rate")
-            general_rate = await self.get_general_duty_rate(session, calculation_input.hs_code)
+            general_rate = context.general_rate
             
             if general_rate:
                 result.general_duty = await self._calculate_duty_component(
@@ -132,12 +230,11 @@ class DutyCalculatorService:
                 result.calculation_steps.append(
                     f"General duty: {result.general_duty.rate}% = ${result.general_duty.amount}"
                 )
-            
-            # Step 2: Check for best FTA rate
+        
+        # Step 2: Check for best FTA rate
+        with timed_step(FTA_RATE_STEP):
             result.calculation_steps.append("Step 2: Checking FTA preferential rates")
-            fta_rate = await self.get_best_fta_rate(
-                session, calculation_input.hs_code, calculation_input.country_code, calc_date
-            )
+            fta_rate = context.fta_rate
             
             if fta_rate:
                 result.fta_duty = await self._calculate_fta_component(
@@ -146,12 +243,11 @@ class DutyCalculatorService:
                 result.calculation_steps.append(
                     f"FTA duty ({fta_rate.fta_code}): {result.fta_duty.rate}% = ${result.fta_duty.amount}"
                 )
-            
-            # Step 3: Check TCO exemptions
+        
+        # Step 3: Check TCO exemptions
+        with timed_step(TCO_EXEMPTION_STEP):
             result.calculation_steps.append("Step 3: Checking TCO exemptions")
-            tco_exemption = await self.check_tco_exemption(
-                session, calculation_input.hs_code, calc_date
-            )
+            tco_exemption = context.tco_exemption
             
             if tco_exemption:
                 result.tco_exemption = DutyComponent(
@@ -163,13 +259,11 @@ class DutyCalculatorService:
                     calculation_details={"tco_number": tco_exemption.tco_number}
                 )
                 result.calculation_steps.append(f"TCO exemption applies: {tco_exemption.tco_number}")
-            
-            # Step 4: Calculate anti-dumping duties
+        
+        # Step 4: Calculate anti-dumping duties
+        with timed_step(ANTI_DUMPING_STEP):
             result.calculation_steps.append("Step 4: Checking anti-dumping duties")
-            dumping_duty = await self.calculate_anti_dumping_duty(
-                session, calculation_input.hs_code, calculation_input.country_code,
-                calculation_input.exporter_name, calc_date
-            )
+            dumping_duty = context.dumping_duty
             
             if dumping_duty:
                 result.anti_dumping_duty = await self._calculate_dumping_component(
@@ -178,7 +272,8 @@ class DutyCalculatorService:
                 result.calculation_steps.append(
                     f"Anti-dumping duty: {result.anti_dumping_duty.description} = ${result.anti_dumping_duty.amount}"
                 )
-            
+        
+        with timed_step(BEST_RATE_STEP):
             # Step 5: Determine best applicable duty
             result.calculation_steps.append("Step 5: Determining best applicable duty rate")
             best_duty = await self._determine_best_duty(result)
@@ -194,18 +289,19 @@ class DutyCalculatorService:
             result.calculation_steps.append(
                 f"Total duty: ${result.total_duty}, Duty-inclusive value: ${result.duty_inclusive_value}"
             )
-            
-            # Step 7: Calculate GST
+        
+        # Step 7: Calculate GST
+        with timed_step(GST_STEP):
             result.calculation_steps.append("Step 6: Calculating GST")
-            result.gst_component = await self.calculate_gst(
-                session, calculation_input.hs_code, result.duty_inclusive_value
-            )
+            gst_rule = context.gst_rule or GstRule(context.gst_provisions)
+            result.gst_component = self._calculate_gst_component(gst_rule, result.duty_inclusive_value)
             
             if result.gst_component:
                 result.total_gst = result.gst_component.amount
                 result.calculation_steps.append(f"GST: {result.gst_component.rate}% = ${result.total_gst}")
-            
-            # Step 8: Calculate totals and savings analysis
+        
+        # Step 8: Calculate totals and savings analysis
+        with timed_step(TOTALS_STEP):
             result.total_amount = result.duty_inclusive_value + result.total_gst
             await self._calculate_savings_analysis(result)
             
@@ -213,13 +309,235 @@ class DutyCalculatorService:
             
             # Add compliance notes
             await self._add_compliance_notes(result, fta_rate, tco_exemption)
+        
+        return result
+    
+    async def calculate_batch(
+        self,
+        session: AsyncSession,
+        calculation_inputs: List[DutyCalculationInput]
+    ) -> List[DutyCalculationResult]:
+        """
+        Calculate duty for many tariff lines, such as an import declaration.
+        
+        Rates are resolved from the rate book when one is configured. Otherwise
+        a rate book covering only the lines' HS codes and countries is loaded
+        with one query per rate table, so the number of queries does not grow
+        with the number of lines.
+        
+        Args:
+            session: Database session
+            calculation_inputs: Input parameters for each line
             
-            return result
+        Returns:
+            Calculation results in the same order as the inputs
+        """
+        # Imported here as the rate book module depends on this one
+        from services.rate_book import RateBook
+        
+        try:
+            rate_book = self.rate_book
+            if rate_book is None:
+                rate_book = await RateBook.load(
+                    session,
+                    version="batch",
+                    hs_codes={line.hs_code for line in calculation_inputs},
+                    country_codes={line.country_code for line in calculation_inputs}
+                )
+            
+            results = []
+            for calculation_input in calculation_inputs:
+                calc_date = calculation_input.calculation_date or date.today()
+                context = rate_book.resolve(
+                    calculation_input.hs_code,
+                    calculation_input.country_code,
+                    calculation_input.exporter_name,
+                    calc_date
+                )
+                results.append(await self.calculate_from_context(calculation_input, context))
+            
+            return results
             
         except Exception as e:
-            logger.error(f"Error in comprehensive duty calculation: {str(e)}")
+            logger.error(f"Error in batch duty calculation: {str(e)}")
             raise
     
+    async def resolve_rate_context(
+        self,
+        session: AsyncSession,
+        calculation_input: DutyCalculationInput,
+        calculation_date: date
+    ) -> DutyRateContext:
+        """
+        Resolve every rate needed for a calculation.
+        
+        Uses the rate book when one is configured. Otherwise contexts are
+        memoized in the rate context cache, as they do not depend on the
+        customs value or quantity, and resolved from the database on a miss.
+        
+        Args:
+            session: Database session
+            calculation_input: Input parameters for calculation
+            calculation_date: Date for rate validity
+            
+        Returns:
+            DutyRateContext with the applicable rates
+        """
+        if self.rate_book is not None:
+            return self.rate_book.resolve(
+                calculation_input.hs_code,
+                calculation_input.country_code,
+                calculation_input.exporter_name,
+                calculation_date
+            )
+        
+        if self.context_cache is not None:
+            key = rate_context_key(
+                calculation_input.hs_code,
+                calculation_input.country_code,
+                calculation_date,
+                calculation_input.exporter_name
+            )
+            return await self.context_cache.get_or_resolve(
+                session, key,
+                lambda: self._resolve_rate_context_from_database(session, calculation_input, calculation_date)
+            )
+        
+        return await self._resolve_rate_context_from_database(session, calculation_input, calculation_date)
+    
+    async def _resolve_rate_context_from_database(
+        self,
+        session: AsyncSession,
+        calculation_input: DutyCalculationInput,
+        calculation_date: date
+    ) -> DutyRateContext:
+        """
+        Resolve every rate needed for a calculation from the database.
+        
+        General, FTA and TCO rates come from the materialized best_rates table
+        when it holds a current row, and any remaining rates are queried,
+        concurrently when enabled.
+        """
+        if self.use_best_rates:
+            context = await self._resolve_rate_context_from_best_rate(
+                session, calculation_input, calculation_date
+            )
+            if context is not None:
+                return context
+        
+        if self.concurrent_lookups and is_database_initialized():
+            return await self._resolve_rate_context_concurrently(calculation_input, calculation_date)
+        
+        with timed_step(GENERAL_RATE_STEP):
+            general_rate = await self.get_general_duty_rate(session, calculation_input.hs_code)
+        with timed_step(FTA_RATE_STEP):
+            fta_rate = await self.get_best_fta_rate(
+                session, calculation_input.hs_code, calculation_input.country_code, calculation_date
+            )
+        with timed_step(TCO_EXEMPTION_STEP):
+            tco_exemption = await self.check_tco_exemption(
+                session, calculation_input.hs_code, calculation_date
+            )
+        with timed_step(ANTI_DUMPING_STEP):
+            dumping_duty = await self.calculate_anti_dumping_duty(
+                session, calculation_input.hs_code, calculation_input.country_code,
+                calculation_input.exporter_name, calculation_date
+            )
+        with timed_step(GST_STEP):
+            gst_context = await self._gst_context(session, calculation_input.hs_code)
+        
+        return DutyRateContext(
+            general_rate=general_rate,
+            fta_rate=fta_rate,
+            tco_exemption=tco_exemption,
+            dumping_duty=dumping_duty,
+            **gst_context
+        )
+    
+    async def _resolve_rate_context_from_best_rate(
+        self,
+        session: AsyncSession,
+        calculation_input: DutyCalculationInput,
+        calculation_date: date
+    ) -> Optional[DutyRateContext]:
+        """
+        Resolve rates from the materialized best_rates table.
+        
+        Returns:
+            DutyRateContext, or None when the table has no current row
+        """
+        try:
+            with timed_step(BEST_RATE_STEP):
+                await check_best_rate_sources(session)
+                resolution = await resolve_best_rate(
+                    session, calculation_input.hs_code, calculation_input.country_code, calculation_date
+                )
+        except Exception as e:
+            logger.debug(f"Best rate lookup unavailable for {calculation_input.hs_code}: {str(e)}")
+            if session is not None:
+                await session.rollback()
+            return None
+        
+        if resolution is None:
+            return None
+        
+        with timed_step(ANTI_DUMPING_STEP):
+            dumping_duty = await self.calculate_anti_dumping_duty(
+                session, calculation_input.hs_code, calculation_input.country_code,
+                calculation_input.exporter_name, calculation_date
+            )
+        with timed_step(GST_STEP):
+            gst_context = await self._gst_context(session, calculation_input.hs_code)
+        
+        return DutyRateContext(
+            general_rate=resolution.general_rate,
+            fta_rate=resolution.fta_rate,
+            tco_exemption=resolution.tco_exemption,
+            dumping_duty=dumping_duty,
+            **gst_context,
+            best_rate_type=resolution.best_rate.best_rate_type
+        )
+    
+    async def _resolve_rate_context_concurrently(
+        self,
+        calculation_input: DutyCalculationInput,
+        calculation_date: date
+    ) -> DutyRateContext:
+        """
+        Resolve rates with every lookup on its own session, run concurrently.
+        
+        An AsyncSession cannot run statements concurrently, so each lookup
+        checks out a separate pooled connection; total latency approaches
+        that of the slowest lookup rather than the sum of all of them.
+        """
+        async def lookup(step, method, *args):
+            with timed_step(step):
+                async with get_db_session() as lookup_session:
+                    return await method(lookup_session, *args)
+        
+        hs_code = calculation_input.hs_code
+        country_code = calculation_input.country_code
+        
+        general_rate, fta_rate, tco_exemption, dumping_duty, gst_rule = await asyncio.gather(
+            lookup(GENERAL_RATE_STEP, self.get_general_duty_rate, hs_code),
+            lookup(FTA_RATE_STEP, self.get_best_fta_rate, hs_code, country_code, calculation_date),
+            lookup(TCO_EXEMPTION_STEP, self.check_tco_exemption, hs_code, calculation_date),
+            lookup(
+                ANTI_DUMPING_STEP, self.calculate_anti_dumping_duty, hs_code, country_code,
+                calculation_input.exporter_name, calculation_date
+            ),
+            lookup(GST_STEP, self.get_gst_rule, hs_code)
+        )
+        
+        return DutyRateContext(
+            general_rate=general_rate,
+            fta_rate=fta_rate,
+            tco_exemption=tco_exemption,
+            dumping_duty=dumping_duty,
+            gst_provisions=list(gst_rule.provisions),
+            gst_rule=gst_rule
+        )
+    
     async def get_general_duty_rate(
         self,
         session: AsyncSession,
@@ -236,26 +554,11 @@ class DutyCalculatorService:
             DutyRate object or None if not found
         """
         try:
-            # Try exact match first
-            stmt = select(DutyRate).where(DutyRate.hs_code == hs_code)
-            result = await session.execute(stmt)
-            duty_rate = result.scalar_one_or_none()
-            
-            if duty_rate:
-                return duty_rate
-            
-            # Try hierarchical lookup (8-digit, 6-digit, 4-digit, 2-digit)
-            for length in [8, 6, 4, 2]:
-                if len(hs_code) > length:
-                    truncated_code = hs_code[:length]
-                    stmt = select(DutyRate).where(DutyRate.hs_code == truncated_code)
-                    result = await session.execute(stmt)
-                    duty_rate = result.scalar_one_or_none()
-                    
-                    if duty_rate:
-                        return duty_rate
-            
-            return None
+            # Exact code and all fallback prefixes in one query, most specific first
+            duty_rates = await select_by_hs_prefix(
+                session, DutyRate, hs_code, order_by=(DutyRate.id,)
+            )
+            return duty_rates[0] if duty_rates else None
             
         except Exception as e:
             logger.error(f"Error getting general duty rate for {hs_code}: {str(e)}")
@@ -281,67 +584,135 @@ class DutyCalculatorService:
             Best FtaRate object or None if not found
         """
         try:
-            stmt = (
-                select(FtaRate)
-                .options(selectinload(FtaRate.trade_agreement))
-                .where(
-                    and_(
-                        FtaRate.hs_code == hs_code,
-                        FtaRate.country_code == country_code,
-                        or_(
-                            FtaRate.effective_date.is_(None),
-                            FtaRate.effective_date <= calculation_date
-                        ),
-                        or_(
-                            FtaRate.elimination_date.is_(None),
-                            FtaRate.elimination_date > calculation_date
-                        )
-                    )
-                )
-                .order_by(FtaRate.preferential_rate.asc())
+            # Rates for the most specific matching prefix, lowest rate first
+            fta_rates = await select_by_hs_prefix(
+                session, FtaRate, hs_code,
+                FtaRate.country_code == country_code,
+                or_(
+                    FtaRate.effective_date.is_(None),
+                    FtaRate.effective_date <= calculation_date
+                ),
+                or_(
+                    FtaRate.elimination_date.is_(None),
+                    FtaRate.elimination_date > calculation_date
+                ),
+                options=(selectinload(FtaRate.trade_agreement),)
             )
             
-            result = await session.execute(stmt)
-            fta_rates = result.scalars().all()
-            
-            if not fta_rates:
-                # Try hierarchical lookup
-                for length in [8, 6, 4, 2]:
-                    if len(hs_code) > length:
-                        truncated_code = hs_code[:length]
-                        stmt = (
-                            select(FtaRate)
-                            .options(selectinload(FtaRate.trade_agreement))
-                            .where(
-                                and_(
-                                    FtaRate.hs_code == truncated_code,
-                                    FtaRate.country_code == country_code,
-                                    or_(
-                                        FtaRate.effective_date.is_(None),
-                                        FtaRate.effective_date <= calculation_date
-                                    ),
-                                    or_(
-                                        FtaRate.elimination_date.is_(None),
-                                        FtaRate.elimination_date > calculation_date
-                                    )
-                                )
-                            )
-                            .order_by(FtaRate.preferential_rate.asc())
-                        )
-                        
-                        result = await session.execute(stmt)
-                        fta_rates = result.scalars().all()
-                        
-                        if fta_rates:
-                            break
-            
-            # Return the best (lowest) rate
-            return fta_rates[0] if fta_rates else None
+            # Return the lowest rate once staged to the calculation date
+            return min(
+                fta_rates, key=lambda fta_rate: fta_rate_order(fta_rate, calculation_date), default=None
+            )
             
         except Exception as e:
             logger.error(f"Error getting FTA rate for {hs_code}, {country_code}: {str(e)}")
             return None
     
+    async def get_best_fta_rates_by_partner(
+        self,
+        session: AsyncSession,
+        hs_code: str,
+        calculation_date: date
+    ) -> Dict[str, FtaRate]:
+        """
+        Find the best FTA rate for an HS code from every partner country.
+        
+        A rate is considered when it is in force on the calculation date, the
+        same rule FtaRate.is_currently_effective applies for today. Each
+        country falls back through HS code prefixes independently, and all
+        countries are resolved from one query (or the rate book).
+        
+        Args:
+            session: Database session
+            hs_code: HS code to lookup
+            calculation_date: Date for rate validity
+            
+        Returns:
+            Best FtaRate keyed by partner country code
+        """
+        if self.rate_book is not None:
+            return self.rate_book.get_best_fta_rates_by_country(hs_code, calculation_date)
+        
+        try:
+            # All prefix levels and countries, most specific level first
+            fta_rates = await select_by_hs_prefix(
+                session, FtaRate, hs_code,
+                or_(
+                    FtaRate.effective_date.is_(None),
+                    FtaRate.effective_date <= calculation_date
+                ),
+                or_(
+                    FtaRate.elimination_date.is_(None),
+                    FtaRate.elimination_date > calculation_date
+                ),
+                options=(selectinload(FtaRate.trade_agreement),),
+                most_specific_only=False
+            )
+            
+            # Each country's rates at its most specific level, lowest staged rate wins
+            candidates: Dict[str, List[FtaRate]] = {}
+            for fta_rate in fta_rates:
+                rates = candidates.setdefault(fta_rate.country_code, [])
+                if not rates or rates[0].hs_code == fta_rate.hs_code:
+                    rates.append(fta_rate)
+            return {
+                country_code: min(rates, key=lambda fta_rate: fta_rate_order(fta_rate, calculation_date))
+                for country_code, rates in candidates.items()
+            }
+            
+        except Exception as e:
+            logger.error(f"Error getting FTA partner rates for {hs_code}: {str(e)}")
+            return {}
+    
+    async def rank_fta_partners(
+        self,
+        session: AsyncSession,
+        calculation_input: DutyCalculationInput
+    ) -> Tuple[Optional[DutyComponent], List[FtaPartnerOption]]:
+        """
+        Rank every FTA partner country by the duty payable on a shipment.
+        
+        Args:
+            session: Database session
+            calculation_input: HS code, customs value and date to evaluate;
+                the country code is ignored
+            
+        Returns:
+            Tuple of the general duty component (if any) and partner options
+            ordered by landed duty, lowest first
+        """
+        calc_date = calculation_input.calculation_date or date.today()
+        
+        if self.rate_book is not None:
+            general_rate = self.rate_book.get_general_rate(calculation_input.hs_code)
+        else:
+            general_rate = await self.get_general_duty_rate(session, calculation_input.hs_code)
+        best_rates = await self.get_best_fta_rates_by_partner(
+            session, calculation_input.hs_code, calc_date
+        )
+        
+        general_duty = None
+        if general_rate:
+            general_duty = await self._calculate_duty_component(
+                general_rate, calculation_input, "General Duty (MFN)"
+            )
+        
+        options = []
+        for country_code, fta_rate in best_rates.items():
+            fta_duty = await self._calculate_fta_component(fta_rate, calculation_input)
+            options.append(FtaPartnerOption(
+                country_code=country_code,
+                fta_rate=fta_rate,
+                fta_duty=fta_duty,
+                agreement_name=self._agreement_name(fta_rate),
+                savings_vs_general=(
+                    general_duty.amount - fta_duty.amount if general_duty else None
+                )
+            ))
+        
+        options.sort(key=lambda option: (option.fta_duty.amount, option.country_code))
+        return general_duty, options
+    
     async def check_tco_exemption(
         self,
         session: AsyncSession,
@@ -360,27 +731,20 @@ class DutyCalculatorService:
             Applicable Tco object or None if not found
         """
         try:
-            stmt = (
-                select(Tco)
-                .where(
-                    and_(
-                        Tco.hs_code == hs_code,
-                        Tco.is_current == True,
-                        or_(
-                            Tco.effective_date.is_(None),
-                            Tco.effective_date <= calculation_date
-                        ),
-                        or_(
-                            Tco.expiry_date.is_(None),
-                            Tco.expiry_date > calculation_date
-                        )
-                    )
-                )
-                .order_by(Tco.effective_date.desc())
+            tcos = await select_by_hs_prefix(
+                session, Tco, hs_code,
+                Tco.is_current == True,
+                or_(
+                    Tco.effective_date.is_(None),
+                    Tco.effective_date <= calculation_date
+                ),
+                or_(
+                    Tco.expiry_date.is_(None),
+                    Tco.expiry_date > calculation_date
+                ),
+                order_by=(Tco.effective_date.desc(),)
             )
-            
-            result = await session.execute(stmt)
-            return result.scalar_one_or_none()
+            return tcos[0] if tcos else None
             
         except Exception as e:
             logger.error(f"Error checking TCO exemption for {hs_code}: {str(e)}")
@@ -410,7 +774,6 @@ class DutyCalculatorService:
         try:
             # Build query conditions
             conditions = [
-                DumpingDuty.hs_code == hs_code,
                 DumpingDuty.country_code == country_code,
                 DumpingDuty.is_active == True,
                 or_(
@@ -424,43 +787,148 @@ class DutyCalculatorService:
             ]
             
             # If exporter specified, try to find exporter-specific duty first
-            if exporter_name:
-                exporter_stmt = (
-                    select(DumpingDuty)
-                    .where(
-                        and_(
-                            *conditions,
-                            DumpingDuty.exporter_name.ilike(f"%{exporter_name}%")
-                        )
-                    )
-                    .order_by(DumpingDuty.effective_date.desc())
+            exporter_key = normalize_exporter_name(exporter_name)
+            if exporter_key:
+                exporter_duties = await select_by_hs_prefix(
+                    session, DumpingDuty, hs_code,
+                    *conditions,
+                    DumpingDuty.exporter_key == exporter_key,
+                    order_by=(DumpingDuty.effective_date.desc(),)
                 )
+                if not exporter_duties:
+                    exporter_duties = await self._match_exporter_duties(
+                        session, hs_code, exporter_key, conditions
+                    )
                 
-                result = await session.execute(exporter_stmt)
-                exporter_duty = result.scalar_one_or_none()
-                
-                if exporter_duty:
-                    return exporter_duty
+                if exporter_duties:
+                    return exporter_duties[0]
             
             # Fall back to general country duty
-            general_stmt = (
-                select(DumpingDuty)
-                .where(
-                    and_(
-                        *conditions,
-                        DumpingDuty.exporter_name.is_(None)
-                    )
-                )
-                .order_by(DumpingDuty.effective_date.desc())
+            general_duties = await select_by_hs_prefix(
+                session, DumpingDuty, hs_code,
+                *conditions,
+                DumpingDuty.exporter_name.is_(None),
+                order_by=(DumpingDuty.effective_date.desc(),)
             )
-            
-            result = await session.execute(general_stmt)
-            return result.scalar_one_or_none()
+            return general_duties[0] if general_duties else None
             
         except Exception as e:
             logger.error(f"Error calculating anti-dumping duty: {str(e)}")
             return None
     
+    async def _match_exporter_duties(
+        self,
+        session: AsyncSession,
+        hs_code: str,
+        exporter_key: str,
+        conditions: List[Any]
+    ) -> List[DumpingDuty]:
+        """
+        Find exporter-specific duties whose exporter is similar to the key.
+        
+        On PostgreSQL this is a pg_trgm index probe ranked by similarity();
+        elsewhere the exporter-specific duties for the HS code are ranked in
+        Python with the same trigram measure. Rows written by raw SQL since
+        the last exporter key backfill have no key, so when the probe finds
+        nothing those rows are ranked in Python on their normalized names.
+        
+        Args:
+            session: Database session
+            hs_code: HS code
+            exporter_key: Normalized exporter name
+            conditions: Country and date conditions for the duty
+            
+        Returns:
+            Matching duties, most specific HS code then most similar first
+        """
+        candidate_conditions = [*conditions, DumpingDuty.exporter_name.isnot(None)]
+        if session.get_bind().dialect.name == "postgresql":
+            matches = await select_by_hs_prefix(
+                session, DumpingDuty, hs_code,
+                *conditions,
+                DumpingDuty.exporter_key.op("%")(exporter_key),
+                order_by=(
+                    func.similarity(DumpingDuty.exporter_key, exporter_key).desc(),
+                    DumpingDuty.effective_date.desc()
+                )
+            )
+            if matches:
+                return matches
+            candidate_conditions.append(DumpingDuty.exporter_key.is_(None))
+        
+        candidates = await select_by_hs_prefix(
+            session, DumpingDuty, hs_code,
+            *candidate_conditions,
+            order_by=(DumpingDuty.effective_date.desc(),),
+            most_specific_only=False
+        )
+        for level in sorted({len(duty.hs_code) for duty in candidates}, reverse=True):
+            matches = rank_by_similarity(
+                exporter_key,
+                [duty for duty in candidates if len(duty.hs_code) == level],
+                key=lambda duty: duty.exporter_key or normalize_exporter_name(duty.exporter_name)
+            )
+            if matches:
+                return [duty for _, duty in matches]
+        return []
+    
+    async def get_gst_provisions(
+        self,
+        session: AsyncSession,
+        hs_code: str
+    ) -> List[GstProvision]:
+        """
+        Get active GST provisions for an HS code, including general provisions.
+        
+        Args:
+            session: Database session
+            hs_code: HS code for GST exemption checking
+            
+        Returns:
+            List of applicable GstProvision objects
+        """
+        try:
+            # Provisions for the code, any of its prefixes, and general provisions
+            return await select_by_hs_prefix(
+                session, GstProvision, hs_code,
+                GstProvision.is_active == True,
+                order_by=(GstProvision.id,),
+                most_specific_only=False,
+                include_general=True
+            )
+            
+        except Exception as e:
+            logger.error(f"Error getting GST provisions for {hs_code}: {str(e)}")
+            return []
+    
+    async def get_gst_rule(
+        self,
+        session: AsyncSession,
+        hs_code: str
+    ) -> GstRule:
+        """
+        Get the compiled GST exemption rule for an HS code.
+        
+        The rule comes from the shared rule set when available, without a
+        query; otherwise it is compiled from the provisions in the database.
+        
+        Args:
+            session: Database session
+            hs_code: HS code for GST exemption checking
+            
+        Returns:
+            GstRule for the HS code
+        """
+        gst_rules = await get_gst_rules(session)
+        if gst_rules is not None:
+            return gst_rules.rule_for(hs_code)
+        return GstRule(await self.get_gst_provisions(session, hs_code))
+    
+    async def _gst_context(self, session: AsyncSession, hs_code: str) -> Dict[str, Any]:
+        """Resolve the GST fields of a DutyRateContext."""
+        gst_rule = await self.get_gst_rule(session, hs_code)
+        return {"gst_provisions": list(gst_rule.provisions), "gst_rule": gst_rule}
+    
     async def calculate_gst(
         self,
         session: AsyncSession,
@@ -478,38 +946,34 @@ class DutyCalculatorService:
         Returns:
             GST DutyComponent or None if exempt/below threshold
         """
+        if self.rate_book is not None:
+            gst_rule = self.rate_book.get_gst_rule(hs_code)
+        else:
+            gst_rule = await self.get_gst_rule(session, hs_code)
+        
+        return self._calculate_gst_component(gst_rule, duty_inclusive_value)
+    
+    def _calculate_gst_component(
+        self,
+        gst_rule: GstRule,
+        duty_inclusive_value: Decimal
+    ) -> Optional[DutyComponent]:
+        """Calculate the GST component from the compiled exemption rule."""
         try:
-            # Check for GST exemptions
-            stmt = (
-                select(GstProvision)
-                .where(
-                    and_(
-                        or_(
-                            GstProvision.hs_code == hs_code,
-                            GstProvision.hs_code.is_(None)  # General provisions
-                        ),
-                        GstProvision.is_active == True
-                    )
-                )
-            )
-            
-            result = await session.execute(stmt)
-            gst_provisions = result.scalars().all()
-            
             # Check if any exemption applies
-            for provision in gst_provisions:
-                if provision.exemption_type and provision.applies_to_value(duty_inclusive_value):
-                    return DutyComponent(
-                        duty_type="GST",
-                        rate=Decimal('0.00'),
-                        amount=Decimal('0.00'),
-                        description=f"GST Exempt: {provision.exemption_type}",
-                        basis="Exemption",
-                        calculation_details={
-                            "exemption_type": provision.exemption_type,
-                            "schedule_reference": provision.schedule_reference
-                        }
-                    )
+            provision = gst_rule.exemption_for(duty_inclusive_value)
+            if provision is not None:
+                return DutyComponent(
+                    duty_type="GST",
+                    rate=Decimal('0.00'),
+                    amount=Decimal('0.00'),
+                    description=f"GST Exempt: {provision.exemption_type}",
+                    basis="Exemption",
+                    calculation_details={
+                        "exemption_type": provision.exemption_type,
+                        "schedule_reference": provision.schedule_reference
+                    }
+                )
             
             # Check GST threshold
             if duty_inclusive_value < self.gst_threshold:
@@ -662,8 +1126,15 @@ class DutyCalculatorService:
         fta_rate: FtaRate,
         calculation_input: DutyCalculationInput
     ) -> DutyComponent:
-        """Calculate FTA duty component."""
-        effective_rate = fta_rate.effective_rate or Decimal('0.00')
+        """
+        Calculate FTA duty component.
+        
+        The rate is staged to the calculation date exactly as the rate
+        timeline projects it, so forward-dated calculations agree with
+        /fta-projection.
+        """
+        calculation_date = calculation_input.calculation_date or date.today()
+        effective_rate = staged_rate(fta_rate, calculation_date) or Decimal('0.00')
         amount = (calculation_input.customs_value * effective_rate / 100).quantize(
             Decimal('0.01'), rounding=ROUND_HALF_UP
         )
@@ -676,6 +1147,7 @@ class DutyCalculatorService:
             basis="FTA Preferential",
             calculation_details={
                 "fta_code": fta_rate.fta_code,
+                "base_rate": str(fta_rate.preferential_rate),
                 "staging_category": fta_rate.staging_category,
                 "rule_of_origin": fta_rate.rule_of_origin
             }
@@ -723,7 +1195,14 @@ class DutyCalculatorService:
         )
     
     async def _determine_best_duty(self, result: DutyCalculationResult) -> Optional[DutyComponent]:
-        """Determine the best applicable duty rate."""
+        """
+        Determine the best applicable duty rate.
+        
+        The FTA and general duties calculated for this request are always
+        compared by amount. A winner precomputed in the best_rates table is
+        not relied on, as its row may predate a rate change still being
+        refreshed or have been computed for another date.
+        """
         # TCO exemption takes precedence
         if result.tco_exemption:
             result.best_rate_type = "tco_exemption"
@@ -781,6 +1260,12 @@ class DutyCalculatorService:
                     f"TCO expires in {tco_exemption.days_until_expiry()} days"
                 )
     
+    def _agreement_name(self, fta_rate: FtaRate) -> Optional[str]:
+        """Get the trade agreement name from an FTA rate or rate book entry."""
+        if hasattr(fta_rate, "agreement_name"):
+            return fta_rate.agreement_name
+        return fta_rate.trade_agreement.full_name if fta_rate.trade_agreement else None
+    
     def _component_to_dict(self, component: DutyComponent) -> Dict[str, Any]:
         """Convert DutyComponent to dictionary."""
         return {
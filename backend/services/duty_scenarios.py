@@ -0,0 +1,308 @@
+"""
+What-if duty scenario engine for the Customs Broker Portal.
+
+Answers questions such as "what if we source from Vietnam instead of China,
+at these five price points?" for a single HS code. Rates are resolved once
+per candidate origin, then general, FTA, anti-dumping and GST amounts are
+computed for every (origin, customs value) pair as NumPy array operations
+instead of one full calculation per pair.
+
+Amounts are int64 cents and rates are applied as exact integer ratios,
+rounding half up to the cent, so every amount equals the Decimal result
+of DutyCalculatorService for the same inputs.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal, ROUND_CEILING, ROUND_HALF_UP
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services.duty_calculator import DutyCalculatorService, DutyRateContext
+from services.rate_timeline import staged_rate
+
+if TYPE_CHECKING:
+    from services.rate_book import RateBook
+
+logger = logging.getLogger(__name__)
+
+
+def _to_cents(amount: Decimal) -> int:
+    """Convert a money amount to whole cents."""
+    cents = amount * 100
+    if cents != cents.to_integral_value():
+        raise ValueError(f"Amount {amount} is not a whole number of cents")
+    return int(cents)
+
+
+def _threshold_cents(amount: Decimal) -> int:
+    """Convert a threshold to the smallest whole cent amount reaching it."""
+    return int((amount * 100).to_integral_value(rounding=ROUND_CEILING))
+
+
+def _specific_cents(quantity: Decimal, rate: Decimal) -> int:
+    """Calculate a specific (per unit) amount in cents, as the calculator does."""
+    return _to_cents((quantity * rate).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
+
+
+def _percent_ratios(rates: List[Optional[Decimal]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Split percentage rates into exact int64 numerator and denominator vectors."""
+    numerators = np.zeros(len(rates), dtype=np.int64)
+    denominators = np.ones(len(rates), dtype=np.int64)
+    for index, rate in enumerate(rates):
+        if rate:
+            numerator, denominator = rate.as_integer_ratio()
+            numerators[index] = numerator
+            denominators[index] = denominator * 100
+    return numerators, denominators
+
+
+def cents_to_money(cents: Any) -> Decimal:
+    """Convert an amount in cents to a 2dp Decimal."""
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def _apply_rate(cents: np.ndarray, numerator: Any, denominator: Any) -> np.ndarray:
+    """Multiply non-negative cent amounts by numerator / denominator, rounding half up."""
+    return (2 * cents * numerator + denominator) // (2 * denominator)
+
+
+@dataclass
+class DutyScenarioInput:
+    """Input parameters for a what-if scenario matrix."""
+    hs_code: str
+    customs_values: List[Decimal]
+    country_codes: List[str]
+    quantity: Optional[Decimal] = None
+    exporter_name: Optional[str] = None
+    calculation_date: Optional[date] = None
+
+
+@dataclass
+class DutyScenarioResult:
+    """
+    What-if scenario matrix result.
+
+    Matrices hold int64 cents indexed [country, value] in input order;
+    ``general_duty`` does not depend on origin and is indexed by value only.
+    ``fta_duty`` rows of countries without an FTA rate are zero, with a
+    None entry in ``fta_rates``.
+    """
+    hs_code: str
+    customs_values: List[Decimal]
+    country_codes: List[str]
+    general_rate: Optional[Decimal] = None
+    general_basis: str = "Free"
+    tco_number: Optional[str] = None
+    fta_codes: List[Optional[str]] = field(default_factory=list)
+    fta_rates: List[Optional[Decimal]] = field(default_factory=list)
+    dumping_rates: List[Optional[Decimal]] = field(default_factory=list)
+
+    general_duty: Optional[np.ndarray] = None
+    fta_duty: Optional[np.ndarray] = None
+    anti_dumping_duty: Optional[np.ndarray] = None
+    total_duty: Optional[np.ndarray] = None
+    duty_inclusive_value: Optional[np.ndarray] = None
+    gst: Optional[np.ndarray] = None
+    total_amount: Optional[np.ndarray] = None
+    best_rate_type: Optional[np.ndarray] = None
+
+
+class DutyScenarioService:
+    """
+    Service for computing duty scenario matrices across values and origins.
+
+    Rate resolution uses DutyCalculatorService (and its rate book when
+    configured); only the arithmetic is vectorized.
+    """
+
+    def __init__(self, rate_book: Optional["RateBook"] = None):
+        """
+        Initialize the scenario service.
+
+        Args:
+            rate_book: Optional in-memory rate book used instead of database lookups
+        """
+        self.calculator = DutyCalculatorService(rate_book=rate_book)
+        self.rate_book = rate_book
+
+    async def calculate_scenarios(
+        self,
+        session: AsyncSession,
+        scenario_input: DutyScenarioInput
+    ) -> DutyScenarioResult:
+        """
+        Calculate the duty matrix for every customs value and origin country.
+
+        Args:
+            session: Database session
+            scenario_input: Scenario parameters
+
+        Returns:
+            DutyScenarioResult with one row per country and one column per value
+        """
+        # Imported here as the rate book module depends on the calculator
+        from services.rate_book import RateBook
+
+        try:
+            calc_date = scenario_input.calculation_date or date.today()
+
+            rate_book = self.rate_book
+            if rate_book is None:
+                rate_book = await RateBook.load(
+                    session,
+                    version="scenario",
+                    hs_codes=[scenario_input.hs_code],
+                    country_codes=scenario_input.country_codes
+                )
+
+            contexts = [
+                rate_book.resolve(
+                    scenario_input.hs_code, country_code,
+                    scenario_input.exporter_name, calc_date
+                )
+                for country_code in scenario_input.country_codes
+            ]
+
+            return self.compute(scenario_input, contexts)
+
+        except Exception as e:
+            logger.error(f"Error calculating duty scenarios for {scenario_input.hs_code}: {str(e)}")
+            raise
+
+    def compute(
+        self,
+        scenario_input: DutyScenarioInput,
+        contexts: List[DutyRateContext]
+    ) -> DutyScenarioResult:
+        """
+        Compute scenario matrices from resolved rates.
+
+        Args:
+            scenario_input: Scenario parameters
+            contexts: Resolved rates, one per country in input order
+
+        Returns:
+            DutyScenarioResult with all matrices populated
+        """
+        values = np.array([_to_cents(v) for v in scenario_input.customs_values], dtype=np.int64)
+        quantity = scenario_input.quantity
+        country_count = len(contexts)
+
+        result = DutyScenarioResult(
+            hs_code=scenario_input.hs_code,
+            customs_values=list(scenario_input.customs_values),
+            country_codes=list(scenario_input.country_codes)
+        )
+
+        # General duty is the same for every origin
+        general_rate = contexts[0].general_rate if contexts else None
+        general_duty = np.zeros_like(values)
+        has_general = general_rate is not None
+        if general_rate is not None:
+            result.general_rate = general_rate.general_rate
+            if general_rate.is_ad_valorem and general_rate.general_rate:
+                numerators, denominators = _percent_ratios([general_rate.general_rate])
+                general_duty = _apply_rate(values, numerators[0], denominators[0])
+                result.general_basis = "Ad Valorem"
+            elif general_rate.is_specific and general_rate.general_rate and quantity:
+                general_duty = np.full_like(values, _specific_cents(quantity, general_rate.general_rate))
+                result.general_basis = "Specific"
+
+        # TCO exemptions do not depend on origin either
+        tco = contexts[0].tco_exemption if contexts else None
+        result.tco_number = tco.tco_number if tco else None
+
+        # Per-origin rate vectors, FTA rates staged to the calculation date
+        calc_date = scenario_input.calculation_date or date.today()
+        has_fta = np.zeros(country_count, dtype=bool)
+        dumping_specific = np.zeros(country_count, dtype=np.int64)
+        for index, context in enumerate(contexts):
+            fta_rate = context.fta_rate
+            result.fta_codes.append(fta_rate.fta_code if fta_rate else None)
+            effective_rate = (staged_rate(fta_rate, calc_date) or Decimal('0.00')) if fta_rate else None
+            result.fta_rates.append(effective_rate)
+            has_fta[index] = effective_rate is not None
+
+            dumping = context.dumping_duty
+            result.dumping_rates.append(dumping.duty_rate if dumping else None)
+            if dumping is not None and dumping.duty_amount and quantity:
+                dumping_specific[index] = _specific_cents(quantity, dumping.duty_amount)
+
+        # Duty matrices, shape (countries, values)
+        general_matrix = np.broadcast_to(general_duty, (country_count, values.size))
+        fta_numerators, fta_denominators = _percent_ratios(result.fta_rates)
+        fta_matrix = _apply_rate(values[None, :], fta_numerators[:, None], fta_denominators[:, None])
+        dumping_numerators, dumping_denominators = _percent_ratios(result.dumping_rates)
+        dumping_matrix = (
+            _apply_rate(values[None, :], dumping_numerators[:, None], dumping_denominators[:, None])
+            + dumping_specific[:, None]
+        )
+
+        # Best duty: TCO exemption, then FTA if strictly cheaper than general
+        has_fta = has_fta[:, None]
+        if has_general:
+            fta_wins = has_fta & (fta_matrix < general_matrix)
+        else:
+            fta_wins = np.broadcast_to(has_fta, general_matrix.shape)
+        best_duty = np.where(fta_wins, fta_matrix, general_matrix)
+        best_rate_type = np.where(fta_wins, "fta", "general").astype(object)
+        if tco is not None:
+            best_duty = np.zeros_like(general_matrix)
+            best_rate_type[:] = "tco_exemption"
+
+        total_duty = best_duty + dumping_matrix
+        dutiable = values[None, :] + total_duty
+
+        # GST provisions do not depend on origin; exemptions depend on value
+        gst_exempt = np.zeros(dutiable.shape, dtype=bool)
+        for provision in (contexts[0].gst_provisions if contexts else []):
+            if not provision.exemption_type:
+                continue
+            if provision.value_threshold is None:
+                gst_exempt[:] = True
+            else:
+                gst_exempt |= dutiable >= _threshold_cents(provision.value_threshold)
+
+        gst_numerator, gst_denominator = self.calculator.gst_rate.as_integer_ratio()
+        gst = np.where(
+            gst_exempt | (dutiable < _threshold_cents(self.calculator.gst_threshold)),
+            0,
+            _apply_rate(dutiable, gst_numerator, gst_denominator)
+        )
+
+        result.general_duty = general_duty
+        result.fta_duty = fta_matrix
+        result.anti_dumping_duty = dumping_matrix
+        result.total_duty = total_duty
+        result.duty_inclusive_value = dutiable
+        result.gst = gst
+        result.total_amount = dutiable + gst
+        result.best_rate_type = best_rate_type
+        return result
+
+    def cheapest_origins(self, result: DutyScenarioResult) -> List[Dict[str, Any]]:
+        """
+        Find the origin with the lowest total amount at each customs value.
+
+        Args:
+            result: Computed scenario result
+
+        Returns:
+            One entry per customs value with the cheapest country and its total
+        """
+        if not result.country_codes:
+            return []
+
+        cheapest_index = np.argmin(result.total_amount, axis=0)
+        return [
+            {
+                "customs_value": result.customs_values[column],
+                "country_code": result.country_codes[row],
+                "total_amount": cents_to_money(result.total_amount[row, column])
+            }
+            for column, row in enumerate(cheapest_index.tolist())
+        ]
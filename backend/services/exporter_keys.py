@@ -0,0 +1,47 @@
+"""
+Exporter key maintenance for the Customs Broker Portal.
+
+dumping_duties.exporter_key is set when a duty is written through the
+DumpingDuty model, but the scrapers and older populate scripts write rows
+with raw SQL and leave it empty. Exact and pg_trgm exporter lookups only
+see keyed rows, so this module fills in missing or outdated keys from the
+exporter names.
+"""
+
+import logging
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.dumping import DumpingDuty, normalize_exporter_name
+
+logger = logging.getLogger(__name__)
+
+
+async def backfill_exporter_keys(session: AsyncSession) -> int:
+    """
+    Set exporter_key on every dumping duty whose key does not match its exporter name.
+
+    The caller commits.
+
+    Args:
+        session: Database session
+
+    Returns:
+        Number of rows updated
+    """
+    result = await session.execute(
+        select(DumpingDuty.id, DumpingDuty.exporter_name, DumpingDuty.exporter_key)
+        .where(DumpingDuty.exporter_name.isnot(None))
+    )
+    updates = []
+    for duty_id, exporter_name, exporter_key in result:
+        key = normalize_exporter_name(exporter_name)
+        if key != exporter_key:
+            updates.append({"id": duty_id, "exporter_key": key})
+
+    if updates:
+        # Bulk UPDATE by primary key, one executemany round trip
+        await session.execute(update(DumpingDuty), updates)
+        logger.info(f"Filled in exporter keys for {len(updates)} dumping duties")
+    return len(updates)
@@ -0,0 +1,226 @@
+"""
+Typo-tolerant description search for the Customs Broker Portal.
+
+On PostgreSQL, fuzzy searches are pg_trgm ``%`` matches against the
+description columns' trigram GIN indexes, ranked by ``similarity()``; the
+threshold is set per transaction through ``pg_trgm.similarity_threshold``
+so the index applies it. Other databases have no trigram indexes, so the
+same search runs against an in-memory inverted index from trigrams to row
+ids, built from the table and rebuilt when its data version changes.
+
+Both use the pg_trgm similarity measure from ``services.trigram``, so a
+misspelled query ranks codes the same way on either.
+"""
+
+import logging
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, func, false, case, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from config import get_settings
+from database import is_database_initialized
+from models.tariff import TariffCode
+from models.tco import Tco
+from models.export import ExportCode
+from services.data_version import VersionedCache, get_data_version, get_hierarchy_data_version
+from services.trigram import trigrams
+
+logger = logging.getLogger(__name__)
+
+
+async def _get_tco_data_version(session: AsyncSession) -> str:
+    return await get_data_version(session, (Tco,))
+
+
+async def _get_export_data_version(session: AsyncSession) -> str:
+    return await get_data_version(session, (ExportCode,))
+
+
+@dataclass(frozen=True)
+class FuzzyField:
+    """A text column searchable by trigram similarity."""
+    name: str
+    key: Any
+    column: Any
+    get_version: Callable[[AsyncSession], Awaitable[str]]
+
+
+TARIFF_DESCRIPTIONS = FuzzyField("tariff_codes", TariffCode.id, TariffCode.description, get_hierarchy_data_version)
+TCO_DESCRIPTIONS = FuzzyField("tcos", Tco.id, Tco.description, _get_tco_data_version)
+EXPORT_DESCRIPTIONS = FuzzyField("export_codes", ExportCode.id, ExportCode.description, _get_export_data_version)
+
+
+class TrigramIndex:
+    """
+    Inverted index from trigrams to the ids of rows containing them.
+
+    A search only visits the rows sharing at least one trigram with the
+    query, counting shared trigrams per row from the posting lists, and
+    scores them as pg_trgm does: shared / (query + row - shared).
+    """
+
+    __slots__ = ("version", "_postings", "_sizes")
+
+    def __init__(self, documents: Iterable[Tuple[int, Optional[str]]], version: Optional[str] = None):
+        """
+        Build the index.
+
+        Args:
+            documents: (id, text) pairs
+            version: Data version the documents were read at
+        """
+        self.version = version
+        postings: Dict[str, array] = defaultdict(lambda: array("i"))
+        self._sizes: Dict[int, int] = {}
+        for key, text in documents:
+            document_trigrams = trigrams(text)
+            if not document_trigrams:
+                continue
+            self._sizes[key] = len(document_trigrams)
+            for trigram in document_trigrams:
+                postings[trigram].append(key)
+        self._postings = dict(postings)
+
+    @classmethod
+    async def load(cls, session: AsyncSession, field: FuzzyField, version: Optional[str] = None) -> "TrigramIndex":
+        """
+        Build the index over a column from the database.
+
+        Args:
+            session: Database session
+            field: Column to index
+            version: Data version being loaded
+
+        Returns:
+            TrigramIndex of the column
+        """
+        result = await session.execute(select(field.key, field.column))
+        index = cls(result.tuples(), version)
+        logger.info(f"Built trigram index over {len(index)} {field.name} rows")
+        return index
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def search(self, query: str, threshold: float, limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Find rows whose text is similar to a query.
+
+        Args:
+            query: Text to match
+            threshold: Minimum similarity (0-1)
+            limit: Maximum matches to return, most similar kept
+
+        Returns:
+            (id, similarity) pairs, most similar first, then by id
+        """
+        query_trigrams = trigrams(query)
+        if not query_trigrams:
+            return []
+
+        shared: Dict[int, int] = defaultdict(int)
+        for trigram in query_trigrams:
+            for key in self._postings.get(trigram, ()):
+                shared[key] += 1
+
+        query_size = len(query_trigrams)
+        matches = []
+        for key, count in shared.items():
+            score = count / (query_size + self._sizes[key] - count)
+            if score >= threshold:
+                matches.append((key, score))
+
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return matches[:limit] if limit is not None else matches
+
+
+_index_caches: Dict[str, VersionedCache] = {}
+
+
+def _index_cache(field: FuzzyField) -> VersionedCache:
+    cache = _index_caches.get(field.name)
+    if cache is None:
+        cache = VersionedCache(
+            lambda session, version: TrigramIndex.load(session, field, version),
+            check_interval=get_settings().rate_book_refresh_interval,
+            get_version=field.get_version
+        )
+        _index_caches[field.name] = cache
+    return cache
+
+
+async def get_trigram_index(session: AsyncSession, field: FuzzyField) -> TrigramIndex:
+    """
+    Get a trigram index over a column.
+
+    The index is shared process-wide with the application database; any
+    other session gets one built for the call.
+
+    Args:
+        session: Database session
+        field: Column to index
+
+    Returns:
+        TrigramIndex over the column's current rows
+    """
+    if not is_database_initialized():
+        return await TrigramIndex.load(session, field)
+    return await _index_cache(field).get(session)
+
+
+class FuzzySearch:
+    """
+    Trigram similarity search of one text column.
+
+    ``apply`` restricts a statement to rows similar to the query and
+    provides the similarity to rank them by.
+    """
+
+    def __init__(self, field: FuzzyField, query: str, threshold: Optional[float] = None):
+        """
+        Initialize the search.
+
+        Args:
+            field: Column to search
+            query: Search text, typos and all
+            threshold: Minimum similarity, the configured default if None
+        """
+        settings = get_settings()
+        self.field = field
+        self.query = query
+        self.threshold = settings.fuzzy_similarity_threshold if threshold is None else threshold
+        self.max_matches = settings.fuzzy_index_max_matches
+
+    async def apply(self, session: AsyncSession, stmt: Select) -> Tuple[Select, Any]:
+        """
+        Restrict a statement to rows similar to the query.
+
+        Without pg_trgm at most ``fuzzy_index_max_matches`` of the most
+        similar rows are considered, before any other filters.
+
+        Args:
+            session: Database session
+            stmt: Statement selecting the field's model
+
+        Returns:
+            The restricted statement and its similarity expression (0-1)
+        """
+        if session.get_bind().dialect.name == "postgresql":
+            # Transaction-local, so it holds for the search query that follows
+            await session.execute(select(func.set_config(
+                "pg_trgm.similarity_threshold", str(self.threshold), True
+            )))
+            rank = func.similarity(self.field.column, self.query)
+            return stmt.where(self.field.column.op("%")(self.query)), rank
+
+        index = await get_trigram_index(session, self.field)
+        scores = dict(index.search(self.query, self.threshold, self.max_matches))
+        if not scores:
+            return stmt.where(false()), literal(0.0)
+        rank = case(scores, value=self.field.key, else_=0.0)
+        return stmt.where(self.field.key.in_(scores)), rank
@@ -0,0 +1,204 @@
+"""
+Compiled GST exemption rules for the Customs Broker Portal.
+
+GST provisions exempt goods by HS code (or any of its prefixes, or every
+code for general provisions), optionally only from a value threshold up.
+The first matching provision, most specific code first, grants the
+exemption. The active provisions are compiled once per data version into a
+rule per recorded HS code, holding only the provisions that can ever win
+ordered by threshold, so evaluating an exemption is a dictionary hit and a
+binary search with no query.
+"""
+
+import logging
+from bisect import bisect_right
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import get_settings
+from database import is_database_initialized
+from models.gst import GstProvision
+from services.data_version import VersionedCache
+from services.hs_lookup import hs_code_candidates
+
+logger = logging.getLogger(__name__)
+
+# Threshold of provisions exempting goods of any value
+_ANY_VALUE = Decimal('-Infinity')
+
+
+@dataclass(frozen=True, slots=True)
+class GstProvisionEntry:
+    """Active GST provision held in a compiled rule set."""
+    id: int
+    hs_code: Optional[str]
+    schedule_reference: str
+    exemption_type: str
+    value_threshold: Optional[Decimal]
+
+    def applies_to_value(self, value: Decimal) -> bool:
+        """Check if provision applies to given value based on value_threshold."""
+        if self.value_threshold is None:
+            return True
+        return value >= self.value_threshold
+
+
+class GstRule:
+    """
+    GST exemption rule for one HS code.
+
+    Provisions are evaluated in order and the first exempting provision whose
+    threshold the value reaches wins. A provision can only win if its
+    threshold is below that of every exempting provision before it, so just
+    those are kept; their thresholds fall in evaluation order, and the winner
+    for a value is the kept provision with the highest threshold not above it.
+    """
+
+    __slots__ = ("provisions", "_thresholds", "_exemptions")
+
+    def __init__(self, provisions: Iterable[Any]):
+        """
+        Compile the rule.
+
+        Args:
+            provisions: GST provisions applicable to the code, in evaluation order
+        """
+        self.provisions: Tuple[Any, ...] = tuple(provisions)
+
+        candidates: List[Tuple[Decimal, Any]] = []
+        for provision in self.provisions:
+            if not provision.exemption_type or getattr(provision, "is_active", True) is False:
+                continue
+            threshold = provision.value_threshold if provision.value_threshold is not None else _ANY_VALUE
+            if not candidates or threshold < candidates[-1][0]:
+                candidates.append((threshold, provision))
+
+        candidates.reverse()
+        self._thresholds = tuple(threshold for threshold, _ in candidates)
+        self._exemptions = tuple(provision for _, provision in candidates)
+
+    def exemption_for(self, value: Decimal) -> Optional[Any]:
+        """
+        Get the provision exempting goods of a given value, if any.
+
+        Args:
+            value: Duty-inclusive value
+
+        Returns:
+            Winning provision, or None if GST applies
+        """
+        index = bisect_right(self._thresholds, value) - 1
+        return self._exemptions[index] if index >= 0 else None
+
+
+class GstRuleSet:
+    """
+    GST exemption rules for every HS code with provisions.
+
+    Each recorded code's rule folds in the provisions of its recorded
+    prefixes and the general provisions, so a lookup only has to find the
+    most specific recorded code.
+    """
+
+    __slots__ = ("_rules", "_general")
+
+    def __init__(self, provisions: Iterable[Any]):
+        """
+        Compile the rule set.
+
+        Args:
+            provisions: Active GST provisions, general ones with no HS code
+        """
+        groups: Dict[Optional[str], List[Any]] = {}
+        for provision in sorted(provisions, key=lambda p: p.id):
+            groups.setdefault(provision.hs_code, []).append(provision)
+
+        general = groups.pop(None, [])
+        self._general = GstRule(general)
+        self._rules: Dict[str, GstRule] = {
+            hs_code: GstRule([
+                provision
+                for candidate in hs_code_candidates(hs_code)
+                for provision in groups.get(candidate, ())
+            ] + general)
+            for hs_code in groups
+        }
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    @classmethod
+    async def load(cls, session: AsyncSession, version: Optional[str] = None) -> "GstRuleSet":
+        """
+        Compile the rule set from the active provisions in the database.
+
+        Args:
+            session: Database session
+            version: Data version being loaded (unused, for cache loaders)
+
+        Returns:
+            Compiled GstRuleSet
+        """
+        result = await session.execute(
+            select(
+                GstProvision.id, GstProvision.hs_code, GstProvision.schedule_reference,
+                GstProvision.exemption_type, GstProvision.value_threshold
+            )
+            .where(GstProvision.is_active == True)
+        )
+        provisions = [GstProvisionEntry(*row) for row in result]
+        logger.debug(f"GST rules compiled from {len(provisions)} provisions")
+        return cls(provisions)
+
+    def rule_for(self, hs_code: str) -> GstRule:
+        """Get the rule for an HS code, from its most specific recorded prefix."""
+        for candidate in hs_code_candidates(hs_code):
+            rule = self._rules.get(candidate)
+            if rule is not None:
+                return rule
+        return self._general
+
+    def exemption_for(self, hs_code: str, value: Decimal) -> Optional[Any]:
+        """
+        Get the provision exempting goods of an HS code and value, if any.
+
+        Args:
+            hs_code: HS code
+            value: Duty-inclusive value
+
+        Returns:
+            Winning provision, or None if GST applies
+        """
+        return self.rule_for(hs_code).exemption_for(value)
+
+
+gst_rule_cache = VersionedCache(GstRuleSet.load, check_interval=get_settings().rate_book_refresh_interval)
+
+
+async def get_gst_rules(session: AsyncSession) -> Optional[GstRuleSet]:
+    """
+    Get the shared GST rule set if enabled.
+
+    The rule set is shared process-wide, so it is only used with the
+    application database. Failures are logged and reported as ``None`` so
+    callers can fall back to querying the provisions directly.
+
+    Args:
+        session: Database session
+
+    Returns:
+        Current GstRuleSet, or None if disabled or unavailable
+    """
+    if not get_settings().gst_rules_enabled or not is_database_initialized():
+        return None
+
+    try:
+        return await gst_rule_cache.get(session)
+    except Exception as e:
+        logger.warning(f"GST rules unavailable, using database lookups: {str(e)}")
+        await session.rollback()
+        return None
@@ -0,0 +1,102 @@
+"""
+HS code prefix resolution for the Customs Broker Portal.
+
+Rates are recorded at whatever level of the tariff they apply to, so a
+lookup for a 10-digit statistical code falls back through its 8, 6, 4 and
+2 digit prefixes. This module fetches every candidate prefix in a single
+statement and orders the rows by specificity, replacing one round trip per
+truncation.
+"""
+
+from typing import Any, List, Sequence, Type
+
+from sqlalchemy import select, case, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Prefix lengths tried, in order, when an exact HS code has no rate
+HS_FALLBACK_LENGTHS = (8, 6, 4, 2)
+
+
+def hs_code_candidates(hs_code: str) -> List[str]:
+    """
+    Get the HS codes to try for a lookup, most specific first.
+
+    Args:
+        hs_code: HS code being looked up
+
+    Returns:
+        The code itself followed by its 8, 6, 4 and 2 digit prefixes
+    """
+    candidates = [hs_code]
+    for length in HS_FALLBACK_LENGTHS:
+        if len(hs_code) > length:
+            candidates.append(hs_code[:length])
+    return candidates
+
+
+def hs_specificity(column: Any, candidates: Sequence[str]) -> Any:
+    """
+    Build an ORDER BY expression ranking candidate codes by specificity.
+
+    Args:
+        column: HS code column being matched
+        candidates: Candidate codes, most specific first
+
+    Returns:
+        CASE expression evaluating to 0 for the most specific candidate
+    """
+    return case(
+        {code: rank for rank, code in enumerate(candidates)},
+        value=column,
+        else_=len(candidates)
+    )
+
+
+async def select_by_hs_prefix(
+    session: AsyncSession,
+    model: Type,
+    hs_code: str,
+    *conditions: Any,
+    order_by: Sequence[Any] = (),
+    options: Sequence[Any] = (),
+    most_specific_only: bool = True,
+    include_general: bool = False
+) -> List[Any]:
+    """
+    Fetch rows for an HS code and all of its prefixes in one statement.
+
+    Args:
+        session: Database session
+        model: Mapped class with an ``hs_code`` column
+        hs_code: HS code being looked up
+        *conditions: Additional WHERE conditions
+        order_by: Ordering applied within each prefix level
+        options: Loader options for the statement
+        most_specific_only: Only return rows from the most specific
+            prefix level that matched
+        include_general: Also return rows with no HS code, ranked last
+
+    Returns:
+        Matching rows ordered most specific first
+    """
+    candidates = hs_code_candidates(hs_code)
+    code_match = model.hs_code.in_(candidates)
+    if include_general:
+        code_match = or_(code_match, model.hs_code.is_(None))
+
+    stmt = (
+        select(model)
+        .where(code_match, *conditions)
+        .order_by(hs_specificity(model.hs_code, candidates), *order_by)
+    )
+    if options:
+        stmt = stmt.options(*options)
+
+    result = await session.execute(stmt)
+    rows = list(result.scalars().all())
+
+    if most_specific_only and rows:
+        matched_code = rows[0].hs_code
+        rows = [row for row in rows if row.hs_code == matched_code]
+
+    return rows
@@ -0,0 +1,224 @@
+"""
+Incremental commercial invoice parsing for the Customs Broker Portal.
+
+Invoices arrive as CSV uploads with thousands of lines. The upload is
+spooled to a temporary file before the response starts, as a streaming
+response listens for client disconnects on the same receive channel and
+would take body chunks away from a reader still consuming the request.
+The reader here then decodes and parses the spooled body incrementally,
+yielding one row at a time, so an invoice is calculated and answered in
+chunks and memory stays bounded by the chunk size rather than the file
+size.
+"""
+
+import codecs
+import csv
+import re
+import tempfile
+from typing import IO, AsyncIterator, Dict, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Invoice columns and the header names accepted for each
+INVOICE_COLUMN_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "hs_code": ("hs_code", "hs", "tariff_code", "tariff_classification", "commodity_code"),
+    "country_code": ("country_code", "country", "origin", "country_of_origin", "origin_country"),
+    "customs_value": ("customs_value", "value", "line_value", "invoice_value", "amount"),
+    "quantity": ("quantity", "qty"),
+    "exporter_name": ("exporter_name", "exporter", "supplier", "manufacturer"),
+}
+
+REQUIRED_INVOICE_COLUMNS = ("hs_code", "country_code", "customs_value")
+
+# Uploads larger than this are spooled to disk rather than held in memory
+SPOOL_MEMORY_LIMIT = 1024 * 1024
+
+# Bytes read from the spooled upload at a time
+SPOOL_READ_SIZE = 64 * 1024
+
+# Largest CSV record accepted, guarding against an unterminated quote
+# buffering the rest of the upload
+MAX_RECORD_LENGTH = 64 * 1024
+
+_HEADER_SEPARATORS = re.compile(r"[^0-9a-z]+")
+
+
+def _normalize_header(name: str) -> str:
+    return _HEADER_SEPARATORS.sub("_", name.strip().lower()).strip("_")
+
+
+class InvoiceCsvReader:
+    """
+    Incremental CSV reader over a stream of byte chunks.
+
+    Records are split on line endings outside quoted fields, so quoted
+    values may contain commas and newlines. Columns are matched to invoice
+    fields through INVOICE_COLUMN_ALIASES; unknown columns are ignored.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes], encoding: str = "utf-8-sig"):
+        """
+        Initialize the reader.
+
+        Args:
+            chunks: Body chunks as received
+            encoding: Text encoding; the default also strips a byte order mark
+        """
+        self._chunks = chunks.__aiter__()
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self._buffer = ""
+        self._exhausted = False
+        self._records_iter: Optional[AsyncIterator[str]] = None
+        self.columns: Optional[Dict[str, int]] = None
+
+    async def _records(self) -> AsyncIterator[str]:
+        """Yield raw CSV records as their final line ending arrives."""
+        record = ""
+        while True:
+            newline = self._buffer.find("\n")
+            if newline < 0:
+                if self._exhausted:
+                    break
+                try:
+                    chunk = await self._chunks.__anext__()
+                except StopAsyncIteration:
+                    self._exhausted = True
+                    self._buffer += self._decoder.decode(b"", final=True)
+                    if self._buffer:
+                        self._buffer += "\n"
+                    continue
+                self._buffer += self._decoder.decode(chunk)
+                if len(self._buffer) + len(record) > MAX_RECORD_LENGTH and "\n" not in self._buffer:
+                    raise ValueError(f"CSV record exceeds {MAX_RECORD_LENGTH} characters")
+                continue
+
+            record += self._buffer[:newline + 1]
+            self._buffer = self._buffer[newline + 1:]
+            # A line ending inside a quoted field leaves an odd number of quotes
+            if record.count('"') % 2:
+                if len(record) > MAX_RECORD_LENGTH:
+                    raise ValueError(f"CSV record exceeds {MAX_RECORD_LENGTH} characters")
+                continue
+            if record.strip():
+                yield record
+            record = ""
+
+        if record.strip():
+            raise ValueError("CSV ends inside a quoted field")
+
+    async def read_header(self) -> Dict[str, int]:
+        """
+        Read the header row and map invoice fields to column positions.
+
+        Returns:
+            Column position of every recognised invoice field
+
+        Raises:
+            ValueError: If the upload is empty or lacks a required column
+        """
+        self._records_iter = self._records()
+        try:
+            header = await self._records_iter.__anext__()
+        except StopAsyncIteration:
+            raise ValueError("Invoice CSV is empty")
+
+        names = [_normalize_header(name) for name in next(csv.reader([header]))]
+        columns = {}
+        for field_name, aliases in INVOICE_COLUMN_ALIASES.items():
+            for position, name in enumerate(names):
+                if name in aliases:
+                    columns[field_name] = position
+                    break
+
+        missing = [name for name in REQUIRED_INVOICE_COLUMNS if name not in columns]
+        if missing:
+            raise ValueError(f"Invoice CSV is missing required columns: {', '.join(missing)}")
+
+        self.columns = columns
+        return columns
+
+    async def rows(self) -> AsyncIterator[Tuple[int, Dict[str, Optional[str]]]]:
+        """
+        Yield invoice rows after the header.
+
+        Yields:
+            1-based row number and the row's invoice fields, with empty
+            values as None
+
+        Raises:
+            ValueError: If a record is malformed or too long
+        """
+        if self.columns is None:
+            await self.read_header()
+
+        row_number = 0
+        async for record in self._records_iter:
+            row_number += 1
+            values = next(csv.reader([record]))
+            yield row_number, {
+                field_name: (values[position].strip() or None) if position < len(values) else None
+                for field_name, position in self.columns.items()
+            }
+
+
+async def spool_body(chunks: AsyncIterator[bytes]) -> IO[bytes]:
+    """
+    Read a request body to the end into a temporary file.
+
+    The file stays in memory up to SPOOL_MEMORY_LIMIT bytes and rolls over
+    to disk beyond that. The caller closes it.
+
+    Args:
+        chunks: Body chunks as received
+
+    Returns:
+        Temporary file positioned at the start of the body
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_LIMIT)
+    try:
+        async for chunk in chunks:
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+async def iter_file(file: IO[bytes], size: int = SPOOL_READ_SIZE) -> AsyncIterator[bytes]:
+    """
+    Yield the rest of a file in chunks of at most ``size`` bytes.
+
+    Args:
+        file: Binary file to read
+        size: Maximum bytes per chunk
+
+    Yields:
+        File contents in order
+    """
+    while True:
+        chunk = file.read(size)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def iter_chunks(items: AsyncIterator[T], size: int) -> AsyncIterator[List[T]]:
+    """
+    Group an async iterator into lists of at most ``size`` items.
+
+    Args:
+        items: Items to group
+        size: Maximum items per chunk
+
+    Yields:
+        Chunks of items in order
+    """
+    chunk: List[T] = []
+    async for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,245 @@
+"""
+Keyset pagination for the Customs Broker Portal search endpoints.
+
+Paging with OFFSET makes the database produce and discard every skipped
+row, so deep pages get linearly slower. Keyset pagination instead orders on
+a unique sort key and continues from the last row returned: the next page
+is a ``WHERE (sort key) > (last key)`` range read that costs the same at any
+depth. The last key travels to the client as an opaque cursor.
+
+Counting every match is the other per-page cost, so totals can be exact,
+a query planner estimate, or skipped.
+"""
+
+import base64
+import json
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+from sqlalchemy import and_, or_, select, func, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Total count modes
+COUNT_EXACT = "exact"
+COUNT_ESTIMATE = "estimate"
+COUNT_NONE = "none"
+COUNT_MODE_PATTERN = f"^({COUNT_EXACT}|{COUNT_ESTIMATE}|{COUNT_NONE})$"
+
+
+@dataclass(frozen=True)
+class SortKey:
+    """One column of a keyset sort order."""
+    expression: Any
+    descending: bool = False
+
+    def order_by(self) -> Any:
+        return self.expression.desc() if self.descending else self.expression.asc()
+
+
+@dataclass
+class KeysetPage(Generic[T]):
+    """One page of keyset results."""
+    items: List[T]
+    offset: int
+    has_next: bool
+    next_cursor: Optional[str]
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "dec" in value:
+            return Decimal(value["dec"])
+        raise ValueError("Unknown cursor value")
+    return value
+
+
+def encode_cursor(scope: str, values: Sequence[Any], offset: int) -> str:
+    """
+    Encode the position after a row as an opaque cursor.
+
+    Args:
+        scope: Identifies the endpoint and sort order the cursor is valid for
+        values: Sort key values of the last row returned
+        offset: Number of rows before the next page
+
+    Returns:
+        URL-safe cursor string
+    """
+    payload = json.dumps(
+        {"s": scope, "k": [_encode_value(value) for value in values], "o": offset},
+        separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, scope: str) -> Tuple[List[Any], int]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor: Cursor from a previous page
+        scope: Scope the cursor must have been issued for
+
+    Returns:
+        Sort key values and offset of the next page
+
+    Raises:
+        ValueError: If the cursor is malformed or issued for another sort
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = [_decode_value(value) for value in payload["k"]]
+        offset = int(payload["o"])
+        issued_scope = payload["s"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid pagination cursor") from e
+    if issued_scope != scope:
+        raise ValueError("Pagination cursor was issued for a different search or sort order")
+    return values, offset
+
+
+def after_key(keys: Sequence[SortKey], values: Sequence[Any]) -> Any:
+    """
+    Build the condition selecting rows after a sort key position.
+
+    Uses a row value comparison when every key sorts the same way, so the
+    database can range-scan a composite index, and the equivalent expanded
+    OR form for mixed directions.
+
+    Args:
+        keys: Sort keys, ending in a unique column
+        values: Sort key values of the last row returned
+
+    Returns:
+        SQL condition
+    """
+    if len(values) != len(keys):
+        raise ValueError("Pagination cursor does not match the sort order")
+
+    if len({key.descending for key in keys}) == 1:
+        columns = tuple_(*[key.expression for key in keys])
+        position = tuple_(*values)
+        return columns < position if keys[0].descending else columns > position
+
+    clauses = []
+    for index, key in enumerate(keys):
+        beyond = key.expression < values[index] if key.descending else key.expression > values[index]
+        clauses.append(and_(*[
+            keys[prior].expression == values[prior] for prior in range(index)
+        ], beyond))
+    return or_(*clauses)
+
+
+async def fetch_keyset_page(
+    db: AsyncSession,
+    stmt: Select,
+    keys: Sequence[SortKey],
+    limit: int,
+    scope: str,
+    cursor: Optional[str] = None,
+    offset: int = 0
+) -> KeysetPage:
+    """
+    Fetch a page of a statement ordered on keys.
+
+    With a cursor the page is read from the cursor's position; without one
+    ``offset`` is applied, so the first page of a scroll (or a client still
+    jumping to numbered pages) works as before. Either way the page carries
+    a cursor for the one after it.
+
+    Args:
+        db: Database session
+        stmt: Statement selecting a single entity, filtered but not ordered
+        keys: Sort keys, ending in a unique column
+        limit: Page size
+        scope: Cursor scope for this endpoint and sort order
+        cursor: Cursor from the previous page, if any
+        offset: Rows to skip when no cursor is given
+
+    Returns:
+        KeysetPage of entities
+
+    Raises:
+        ValueError: If the cursor is invalid
+    """
+    if cursor:
+        values, offset = decode_cursor(cursor, scope)
+        stmt = stmt.where(after_key(keys, values))
+    elif offset:
+        stmt = stmt.offset(offset)
+
+    stmt = (
+        stmt.add_columns(*[key.expression for key in keys])
+        .order_by(*[key.order_by() for key in keys])
+        .limit(limit + 1)
+    )
+    rows = (await db.execute(stmt)).all()
+
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(scope, rows[-1][1:], offset + len(rows)) if has_next else None
+
+    return KeysetPage(
+        items=[row[0] for row in rows],
+        offset=offset,
+        has_next=has_next,
+        next_cursor=next_cursor
+    )
+
+
+async def count_matches(db: AsyncSession, stmt: Select, mode: str) -> Tuple[Optional[int], bool]:
+    """
+    Count the rows a search statement matches.
+
+    Estimates come from the PostgreSQL planner and cost no more than
+    planning the query; other databases fall back to an exact count.
+
+    Args:
+        db: Database session
+        stmt: Filtered statement
+        mode: "exact", "estimate" or "none"
+
+    Returns:
+        Total (None when not counted) and whether it is an estimate
+    """
+    if mode == COUNT_NONE:
+        return None, False
+
+    if mode == COUNT_ESTIMATE and db.bind.dialect.name == "postgresql":
+        try:
+            compiled = stmt.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True})
+        except Exception as e:
+            # Parameters without a literal form can't be inlined into EXPLAIN
+            logger.warning(f"Row estimate unavailable, counting exactly: {str(e)}")
+        else:
+            result = await db.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"))
+            plan = result.scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"]), True
+
+    result = await db.execute(select(func.count()).select_from(stmt.subquery()))
+    return result.scalar(), False
@@ -0,0 +1,623 @@
+"""
+In-memory rate book for the Customs Broker Portal.
+
+The rate book is an immutable, process-resident snapshot of every table the
+duty calculator reads (duty rates, FTA rates, trade agreements, TCOs,
+anti-dumping duties and GST provisions). Lookups are plain dictionary hits
+keyed by HS code (and country where relevant), so a warm worker can run a
+full duty calculation without touching the database.
+
+The shared cache rebuilds the book when the rate data version changes and
+swaps the reference atomically, so in-flight calculations keep using the
+snapshot they started with.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import get_settings
+from models.duty import DutyRate
+from models.fta import FtaRate
+from models.dumping import DumpingDuty, normalize_exporter_name
+from models.tco import Tco
+from models.gst import GstProvision
+from models.hierarchy import TradeAgreement
+from services.calculation_metrics import (
+    timed_step, GENERAL_RATE_STEP, FTA_RATE_STEP, TCO_EXEMPTION_STEP, ANTI_DUMPING_STEP, GST_STEP
+)
+from services.data_version import VersionedCache, get_rate_data_version
+from services.gst_rules import GstProvisionEntry, GstRule, GstRuleSet
+from services.duty_calculator import DutyRateContext
+from services.hs_lookup import hs_code_candidates
+from services.rate_timeline import RateTimeline, fta_rate_order
+from services.trigram import rank_by_similarity
+
+logger = logging.getLogger(__name__)
+
+
+def _is_in_force(effective_date: Optional[date], end_date: Optional[date], on_date: date) -> bool:
+    """Check whether a dated record is in force on a given date."""
+    if effective_date is not None and effective_date > on_date:
+        return False
+    if end_date is not None and end_date <= on_date:
+        return False
+    return True
+
+
+# Rate book entries
+#
+# Entries are read-only copies of the ORM rows, exposing the same attributes
+# and helpers the duty calculator uses so they can stand in for model
+# instances.
+
+@dataclass(frozen=True, slots=True)
+class GeneralRateEntry:
+    """General/MFN duty rate held in the rate book."""
+    id: int
+    hs_code: str
+    general_rate: Optional[Decimal]
+    unit_type: Optional[str]
+    rate_text: Optional[str]
+
+    @property
+    def is_ad_valorem(self) -> bool:
+        """Check if this is an ad valorem duty (percentage-based)."""
+        return self.unit_type == "ad_valorem" if self.unit_type else False
+
+    @property
+    def is_specific(self) -> bool:
+        """Check if this is a specific duty (per-unit based)."""
+        return self.unit_type == "specific" if self.unit_type else False
+
+
+@dataclass(frozen=True, slots=True)
+class FtaRateEntry:
+    """FTA preferential rate held in the rate book."""
+    id: int
+    hs_code: str
+    fta_code: str
+    country_code: str
+    preferential_rate: Optional[Decimal]
+    rate_type: Optional[str]
+    staging_category: Optional[str]
+    effective_date: Optional[date]
+    elimination_date: Optional[date]
+    quota_quantity: Optional[Decimal]
+    quota_unit: Optional[str]
+    safeguard_applicable: bool
+    rule_of_origin: Optional[str]
+    agreement_name: Optional[str] = None
+
+    @property
+    def is_eliminated(self) -> bool:
+        """Check if the tariff has been eliminated (reached zero)."""
+        if self.elimination_date:
+            return self.elimination_date <= date.today()
+        return False
+
+    @property
+    def effective_rate(self) -> Optional[Decimal]:
+        """Get the effective preferential rate, considering elimination."""
+        if self.is_eliminated:
+            return Decimal('0.00')
+        return self.preferential_rate
+
+    @property
+    def is_quota_applicable(self) -> bool:
+        """Check if quota restrictions apply to this rate."""
+        return self.quota_quantity is not None and self.quota_quantity > 0
+
+    def get_origin_requirements_summary(self) -> str:
+        """Get a summary of rules of origin requirements."""
+        if not self.rule_of_origin:
+            return "No specific origin requirements specified"
+        if len(self.rule_of_origin) > 200:
+            return self.rule_of_origin[:197] + "..."
+        return self.rule_of_origin
+
+    def is_in_force(self, on_date: date) -> bool:
+        """Check if the rate is in force on a given date."""
+        return _is_in_force(self.effective_date, self.elimination_date, on_date)
+
+
+@dataclass(frozen=True, slots=True)
+class TcoEntry:
+    """Current TCO held in the rate book."""
+    id: int
+    tco_number: str
+    hs_code: str
+    description: str
+    effective_date: Optional[date]
+    expiry_date: Optional[date]
+
+    def days_until_expiry(self) -> Optional[int]:
+        """Calculate days until expiry."""
+        if not self.expiry_date:
+            return None
+        return (self.expiry_date - date.today()).days
+
+    def is_in_force(self, on_date: date) -> bool:
+        """Check if the TCO is in force on a given date."""
+        return _is_in_force(self.effective_date, self.expiry_date, on_date)
+
+
+@dataclass(frozen=True, slots=True)
+class DumpingEntry:
+    """Active anti-dumping or countervailing duty held in the rate book."""
+    id: int
+    hs_code: str
+    country_code: str
+    exporter_name: Optional[str]
+    duty_type: str
+    duty_rate: Optional[Decimal]
+    duty_amount: Optional[Decimal]
+    unit: Optional[str]
+    effective_date: Optional[date]
+    expiry_date: Optional[date]
+    case_number: Optional[str]
+    exporter_key: Optional[str] = None
+
+    def __post_init__(self):
+        # Rows written before exporter keys existed are keyed on load
+        if self.exporter_key is None and self.exporter_name:
+            object.__setattr__(self, "exporter_key", normalize_exporter_name(self.exporter_name))
+
+    def is_in_force(self, on_date: date) -> bool:
+        """Check if the duty is in force on a given date."""
+        return _is_in_force(self.effective_date, self.expiry_date, on_date)
+
+
+def _latest_first(entries: Iterable, *, key_date: str = "effective_date") -> Tuple:
+    """Order dated entries most recent first, undated entries last."""
+    return tuple(sorted(
+        entries,
+        key=lambda entry: (getattr(entry, key_date) is not None, getattr(entry, key_date) or date.min),
+        reverse=True
+    ))
+
+
+class RateBook:
+    """
+    Immutable snapshot of all duty rate data, indexed for lookup.
+
+    Indexes:
+    - general rates by HS code
+    - FTA rates by (HS code, country), lowest preferential rate first, with
+      a date-effective timeline per key, and partner countries by HS code
+    - TCOs by HS code, most recent first
+    - dumping duties by (HS code, country), most recent first
+    - GST provisions compiled into exemption rules by HS code
+    """
+
+    __slots__ = (
+        "version", "built_at", "_general_rates", "_fta_rates", "_fta_timelines", "_fta_partners",
+        "_tcos", "_dumping_duties", "gst_rules"
+    )
+
+    def __init__(
+        self,
+        version: str,
+        general_rates: Mapping[str, GeneralRateEntry],
+        fta_rates: Mapping[Tuple[str, str], Tuple[FtaRateEntry, ...]],
+        tcos: Mapping[str, Tuple[TcoEntry, ...]],
+        dumping_duties: Mapping[Tuple[str, str], Tuple[DumpingEntry, ...]],
+        gst_provisions: Mapping[Optional[str], Tuple[GstProvisionEntry, ...]]
+    ):
+        self.version = version
+        self.built_at = datetime.now()
+        self._general_rates = MappingProxyType(dict(general_rates))
+        self._fta_rates = MappingProxyType(dict(fta_rates))
+        self._fta_timelines = MappingProxyType(
+            {key: RateTimeline(entries) for key, entries in self._fta_rates.items()}
+        )
+        partners: Dict[str, List[str]] = {}
+        for hs_code, country_code in self._fta_rates:
+            partners.setdefault(hs_code, []).append(country_code)
+        self._fta_partners = MappingProxyType(
+            {hs_code: tuple(sorted(countries)) for hs_code, countries in partners.items()}
+        )
+        self._tcos = MappingProxyType(dict(tcos))
+        self._dumping_duties = MappingProxyType(dict(dumping_duties))
+        self.gst_rules = GstRuleSet(
+            provision for group in gst_provisions.values() for provision in group
+        )
+
+    @classmethod
+    def from_entries(
+        cls,
+        version: str,
+        general_rates: Iterable[GeneralRateEntry] = (),
+        fta_rates: Iterable[FtaRateEntry] = (),
+        tcos: Iterable[TcoEntry] = (),
+        dumping_duties: Iterable[DumpingEntry] = (),
+        gst_provisions: Iterable[GstProvisionEntry] = ()
+    ) -> "RateBook":
+        """
+        Build a rate book from flat lists of entries.
+
+        Args:
+            version: Data version the entries were read at
+            general_rates: General duty rates
+            fta_rates: FTA preferential rates
+            tcos: Current TCOs
+            dumping_duties: Active dumping duties
+            gst_provisions: Active GST provisions
+
+        Returns:
+            Indexed RateBook
+        """
+        general_index: Dict[str, GeneralRateEntry] = {}
+        for entry in sorted(general_rates, key=lambda e: e.id):
+            general_index.setdefault(entry.hs_code, entry)
+
+        fta_groups: Dict[Tuple[str, str], List[FtaRateEntry]] = {}
+        for entry in fta_rates:
+            fta_groups.setdefault((entry.hs_code, entry.country_code), []).append(entry)
+        fta_index = {
+            key: tuple(sorted(group, key=fta_rate_order))
+            for key, group in fta_groups.items()
+        }
+
+        tco_groups: Dict[str, List[TcoEntry]] = {}
+        for entry in tcos:
+            tco_groups.setdefault(entry.hs_code, []).append(entry)
+        tco_index = {key: _latest_first(group) for key, group in tco_groups.items()}
+
+        dumping_groups: Dict[Tuple[str, str], List[DumpingEntry]] = {}
+        for entry in dumping_duties:
+            dumping_groups.setdefault((entry.hs_code, entry.country_code), []).append(entry)
+        dumping_index = {key: _latest_first(group) for key, group in dumping_groups.items()}
+
+        gst_groups: Dict[Optional[str], List[GstProvisionEntry]] = {}
+        for entry in sorted(gst_provisions, key=lambda e: e.id):
+            gst_groups.setdefault(entry.hs_code, []).append(entry)
+        gst_index = {key: tuple(group) for key, group in gst_groups.items()}
+
+        return cls(version, general_index, fta_index, tco_index, dumping_index, gst_index)
+
+    @classmethod
+    async def load(
+        cls,
+        session: AsyncSession,
+        version: Optional[str] = None,
+        hs_codes: Optional[Iterable[str]] = None,
+        country_codes: Optional[Iterable[str]] = None
+    ) -> "RateBook":
+        """
+        Load a rate book from the database.
+
+        Only rows that can ever apply are read (current TCOs, active dumping
+        duties and GST provisions); date validity is checked at lookup time
+        so forward-dated rates become effective without a rebuild.
+
+        Passing ``hs_codes`` and ``country_codes`` loads a partial book that
+        covers only those codes (and their fallback prefixes) and countries,
+        still with one query per rate table.
+
+        Args:
+            session: Database session
+            version: Data version being loaded, computed if not given
+            hs_codes: Restrict the book to these HS codes
+            country_codes: Restrict FTA and dumping rates to these countries
+
+        Returns:
+            Populated RateBook
+        """
+        if version is None:
+            version = await get_rate_data_version(session)
+
+        codes = None
+        if hs_codes is not None:
+            codes = sorted({
+                candidate for hs_code in hs_codes for candidate in hs_code_candidates(hs_code)
+            })
+        countries = sorted(set(country_codes)) if country_codes is not None else None
+
+        def restrict(stmt, model, by_country=False, include_general=False):
+            if codes is not None:
+                code_match = model.hs_code.in_(codes)
+                if include_general:
+                    code_match = or_(code_match, model.hs_code.is_(None))
+                stmt = stmt.where(code_match)
+            if by_country and countries is not None:
+                stmt = stmt.where(model.country_code.in_(countries))
+            return stmt
+
+        general_result = await session.execute(restrict(
+            select(
+                DutyRate.id, DutyRate.hs_code, DutyRate.general_rate,
+                DutyRate.unit_type, DutyRate.rate_text
+            ),
+            DutyRate
+        ))
+        general_rates = [GeneralRateEntry(*row) for row in general_result]
+
+        fta_result = await session.execute(restrict(
+            select(
+                FtaRate.id, FtaRate.hs_code, FtaRate.fta_code, FtaRate.country_code,
+                FtaRate.preferential_rate, FtaRate.rate_type, FtaRate.staging_category,
+                FtaRate.effective_date, FtaRate.elimination_date, FtaRate.quota_quantity,
+                FtaRate.quota_unit, FtaRate.safeguard_applicable, FtaRate.rule_of_origin,
+                TradeAgreement.full_name
+            )
+            .outerjoin(TradeAgreement, FtaRate.fta_code == TradeAgreement.fta_code),
+            FtaRate, by_country=True
+        ))
+        fta_rates = [FtaRateEntry(*row) for row in fta_result]
+
+        tco_result = await session.execute(restrict(
+            select(
+                Tco.id, Tco.tco_number, Tco.hs_code, Tco.description,
+                Tco.effective_date, Tco.expiry_date
+            )
+            .where(Tco.is_current == True),
+            Tco
+        ))
+        tcos = [TcoEntry(*row) for row in tco_result]
+
+        dumping_result = await session.execute(restrict(
+            select(
+                DumpingDuty.id, DumpingDuty.hs_code, DumpingDuty.country_code,
+                DumpingDuty.exporter_name, DumpingDuty.duty_type, DumpingDuty.duty_rate,
+                DumpingDuty.duty_amount, DumpingDuty.unit, DumpingDuty.effective_date,
+                DumpingDuty.expiry_date, DumpingDuty.case_number, DumpingDuty.exporter_key
+            )
+            .where(DumpingDuty.is_active == True),
+            DumpingDuty, by_country=True
+        ))
+        dumping_duties = [DumpingEntry(*row) for row in dumping_result]
+
+        gst_result = await session.execute(restrict(
+            select(
+                GstProvision.id, GstProvision.hs_code, GstProvision.schedule_reference,
+                GstProvision.exemption_type, GstProvision.value_threshold
+            )
+            .where(GstProvision.is_active == True),
+            GstProvision, include_general=True
+        ))
+        gst_provisions = [GstProvisionEntry(*row) for row in gst_result]
+
+        book = cls.from_entries(
+            version, general_rates, fta_rates, tcos, dumping_duties, gst_provisions
+        )
+        log = logger.info if codes is None else logger.debug
+        log(
+            f"Rate book loaded: {len(general_rates)} general rates, {len(fta_rates)} FTA rates, "
+            f"{len(tcos)} TCOs, {len(dumping_duties)} dumping duties, "
+            f"{len(gst_provisions)} GST provisions"
+        )
+        return book
+
+    def __len__(self) -> int:
+        return len(self._general_rates)
+
+    # Lookups
+
+    def get_general_rate(self, hs_code: str) -> Optional[GeneralRateEntry]:
+        """Get the general duty rate for an HS code, falling back to its prefixes."""
+        for candidate in hs_code_candidates(hs_code):
+            entry = self._general_rates.get(candidate)
+            if entry is not None:
+                return entry
+        return None
+
+    def get_best_fta_rate(
+        self,
+        hs_code: str,
+        country_code: str,
+        calculation_date: date
+    ) -> Optional[FtaRateEntry]:
+        """Get the lowest FTA rate in force, falling back to HS code prefixes."""
+        for candidate in hs_code_candidates(hs_code):
+            timeline = self._fta_timelines.get((candidate, country_code))
+            if timeline is not None:
+                entry = timeline.entry_on(calculation_date)
+                if entry is not None:
+                    return entry
+        return None
+
+    def get_fta_timelines(self, hs_code: str, country_code: str) -> Dict[str, RateTimeline]:
+        """
+        Get a rate timeline per trade agreement for an HS code and country.
+
+        Each agreement's timeline covers its rates at the most specific HS
+        code level it has rates for.
+        """
+        levels: Dict[str, List[FtaRateEntry]] = {}
+        for candidate in hs_code_candidates(hs_code):
+            found: Dict[str, List[FtaRateEntry]] = {}
+            for entry in self._fta_rates.get((candidate, country_code), ()):
+                if entry.fta_code not in levels:
+                    found.setdefault(entry.fta_code, []).append(entry)
+            levels.update(found)
+        return {fta_code: RateTimeline(entries) for fta_code, entries in sorted(levels.items())}
+
+    def get_fta_partners(self, hs_code: str) -> List[str]:
+        """Get every country with an FTA rate for an HS code or its prefixes, in force or not."""
+        countries = set()
+        for candidate in hs_code_candidates(hs_code):
+            countries.update(self._fta_partners.get(candidate, ()))
+        return sorted(countries)
+
+    def get_best_fta_rates_by_country(
+        self,
+        hs_code: str,
+        calculation_date: date
+    ) -> Dict[str, FtaRateEntry]:
+        """Get the best FTA rate in force for every partner country with a rate."""
+        best_rates = {}
+        for country_code in self.get_fta_partners(hs_code):
+            entry = self.get_best_fta_rate(hs_code, country_code, calculation_date)
+            if entry is not None:
+                best_rates[country_code] = entry
+        return best_rates
+
+    def next_rate_change(
+        self,
+        hs_code: str,
+        country_code: Optional[str],
+        after: date
+    ) -> Optional[date]:
+        """
+        Get the first date after a given date on which an FTA rate or TCO
+        that could apply to an HS code (and country) starts or ends.
+        """
+        dates = []
+        for candidate in hs_code_candidates(hs_code):
+            if country_code is not None:
+                timeline = self._fta_timelines.get((candidate, country_code))
+                if timeline is not None:
+                    dates.append(timeline.next_change(after))
+            for entry in self._tcos.get(candidate, ()):
+                dates.extend((entry.effective_date, entry.expiry_date))
+        return min((day for day in dates if day is not None and day > after), default=None)
+
+    def get_tco_exemption(self, hs_code: str, calculation_date: date) -> Optional[TcoEntry]:
+        """Get the most recent TCO in force, falling back to HS code prefixes."""
+        for candidate in hs_code_candidates(hs_code):
+            for entry in self._tcos.get(candidate, ()):
+                if entry.is_in_force(calculation_date):
+                    return entry
+        return None
+
+    def get_dumping_duty(
+        self,
+        hs_code: str,
+        country_code: str,
+        exporter_name: Optional[str],
+        calculation_date: date
+    ) -> Optional[DumpingEntry]:
+        """
+        Get the dumping duty in force, preferring an exporter-specific duty.
+
+        Exporters are matched on their normalized key, exactly first and then
+        by trigram similarity, before falling back to the country-wide duty.
+        """
+        levels = []
+        for candidate in hs_code_candidates(hs_code):
+            entries = [
+                entry for entry in self._dumping_duties.get((candidate, country_code), ())
+                if entry.is_in_force(calculation_date)
+            ]
+            if entries:
+                levels.append(entries)
+
+        exporter_key = normalize_exporter_name(exporter_name)
+        if exporter_key:
+            for entries in levels:
+                for entry in entries:
+                    if entry.exporter_key == exporter_key:
+                        return entry
+
+            for entries in levels:
+                matches = rank_by_similarity(
+                    exporter_key,
+                    [entry for entry in entries if entry.exporter_key],
+                    key=lambda entry: entry.exporter_key
+                )
+                if matches:
+                    return matches[0][1]
+
+        for entries in levels:
+            for entry in entries:
+                if entry.exporter_name is None:
+                    return entry
+        return None
+
+    def get_gst_provisions(self, hs_code: str) -> List[GstProvisionEntry]:
+        """Get the GST provisions for an HS code, its prefixes and general provisions."""
+        return list(self.gst_rules.rule_for(hs_code).provisions)
+
+    def get_gst_rule(self, hs_code: str) -> GstRule:
+        """Get the compiled GST exemption rule for an HS code."""
+        return self.gst_rules.rule_for(hs_code)
+
+    def resolve(
+        self,
+        hs_code: str,
+        country_code: str,
+        exporter_name: Optional[str],
+        calculation_date: date
+    ) -> DutyRateContext:
+        """
+        Resolve every rate needed for a duty calculation.
+
+        Args:
+            hs_code: HS code being calculated
+            country_code: Country of origin
+            exporter_name: Specific exporter (optional)
+            calculation_date: Date for rate validity
+
+        Returns:
+            DutyRateContext populated from the rate book
+        """
+        with timed_step(GENERAL_RATE_STEP):
+            general_rate = self.get_general_rate(hs_code)
+        with timed_step(FTA_RATE_STEP):
+            fta_rate = self.get_best_fta_rate(hs_code, country_code, calculation_date)
+        with timed_step(TCO_EXEMPTION_STEP):
+            tco_exemption = self.get_tco_exemption(hs_code, calculation_date)
+        with timed_step(ANTI_DUMPING_STEP):
+            dumping_duty = self.get_dumping_duty(hs_code, country_code, exporter_name, calculation_date)
+        with timed_step(GST_STEP):
+            gst_rule = self.get_gst_rule(hs_code)
+
+        return DutyRateContext(
+            general_rate=general_rate,
+            fta_rate=fta_rate,
+            tco_exemption=tco_exemption,
+            dumping_duty=dumping_duty,
+            gst_provisions=list(gst_rule.provisions),
+            gst_rule=gst_rule
+        )
+
+
+class RateBookCache(VersionedCache[RateBook]):
+    """
+    Process-wide holder for the current rate book.
+
+    In-flight calculations keep the book they started with when a rebuild
+    swaps in a new one.
+    """
+
+    def __init__(self, check_interval: float):
+        super().__init__(lambda session, version: RateBook.load(session, version), check_interval)
+
+    @property
+    def book(self) -> Optional[RateBook]:
+        """Get the current rate book without checking freshness."""
+        return self.value
+
+
+rate_book_cache = RateBookCache(check_interval=get_settings().rate_book_refresh_interval)
+
+
+async def get_rate_book(session: AsyncSession) -> Optional[RateBook]:
+    """
+    Get the shared rate book if enabled.
+
+    Failures are logged and reported as ``None`` so callers can fall back to
+    querying the database directly.
+
+    Args:
+        session: Database session
+
+    Returns:
+        Current RateBook, or None if disabled or unavailable
+    """
+    if not get_settings().rate_book_enabled:
+        return None
+
+    try:
+        return await rate_book_cache.get(session)
+    except Exception as e:
+        logger.warning(f"Rate book unavailable, using database lookups: {str(e)}")
+        await session.rollback()
+        return None
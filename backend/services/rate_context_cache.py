@@ -0,0 +1,216 @@
+"""
+Resolved rate context cache for the Customs Broker Portal.
+
+The rates and exemptions that apply to a calculation (general, FTA, TCO,
+anti-dumping and GST) depend only on the HS code, origin, calculation date
+and exporter; the customs value and quantity only feed the arithmetic. This
+module memoizes resolved contexts under that key in a bounded LRU, so
+repeated calculations for popular codes at different values skip the rate
+queries entirely when the calculator is not running on a rate book.
+
+The cache is only a fallback: the rate book, which is enabled by default,
+already serves every rate from memory, so calculators built on a rate book
+never consult this cache. It is used when the rate book is disabled or
+could not be loaded and the calculator resolves rates from the database.
+
+Entries expire after a TTL and the whole cache is dropped when the rate data
+version changes; the version is checked at most once per check interval.
+The version includes the trigger-maintained write counters of the rate
+tables, so in-place updates by the scrapers drop cached contexts as well.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Awaitable, Callable, Optional, Tuple, TYPE_CHECKING
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import get_settings
+from database import is_database_initialized
+from models.dumping import normalize_exporter_name
+from services.data_version import get_rate_data_version
+
+if TYPE_CHECKING:
+    from services.duty_calculator import DutyRateContext
+
+logger = logging.getLogger(__name__)
+
+# (HS code, country code, calculation date, normalized exporter name)
+RateContextKey = Tuple[str, str, date, Optional[str]]
+
+
+def rate_context_key(
+    hs_code: str,
+    country_code: str,
+    calculation_date: date,
+    exporter_name: Optional[str] = None
+) -> RateContextKey:
+    """
+    Build the cache key for a calculation.
+
+    Exporters are matched on their normalized name, so names differing only
+    in case, punctuation or legal form share an entry.
+
+    Args:
+        hs_code: HS code
+        country_code: Country of origin
+        calculation_date: Date for rate validity
+        exporter_name: Exporter name, if any
+
+    Returns:
+        RateContextKey
+    """
+    return hs_code, country_code, calculation_date, normalize_exporter_name(exporter_name)
+
+
+class RateContextCache:
+    """
+    Bounded LRU of resolved rate contexts with TTL and data version invalidation.
+
+    Contexts are shared between calculations and must be treated as
+    read-only.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, check_interval: float):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Most contexts held; the least recently used is evicted
+            ttl: Seconds a context is served for after being resolved
+            check_interval: Seconds between data version checks
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._entries: "OrderedDict[RateContextKey, Tuple[float, DutyRateContext]]" = OrderedDict()
+        self._version: Optional[str] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: RateContextKey) -> Optional["DutyRateContext"]:
+        """
+        Get a cached context without checking the data version.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The context, or None if absent or expired
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, context = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return context
+
+    def put(self, key: RateContextKey, context: "DutyRateContext") -> None:
+        """
+        Cache a context, evicting the least recently used beyond the bound.
+
+        Args:
+            key: Cache key
+            context: Resolved rate context
+        """
+        self._entries[key] = (time.monotonic() + self.ttl, context)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Discard every cached context."""
+        self._entries.clear()
+
+    async def check_version(self, session: AsyncSession) -> None:
+        """
+        Drop every context if the rate data changed since the last check.
+
+        The version is read at most once per check interval.
+
+        Args:
+            session: Database session used for the version check
+        """
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return
+
+        async with self._lock:
+            if time.monotonic() - self._checked_at < self.check_interval:
+                return
+            version = await get_rate_data_version(session)
+            if version != self._version:
+                if self._version is not None:
+                    logger.info(f"Rate data changed, dropping {len(self._entries)} cached rate contexts")
+                self.clear()
+                self._version = version
+            self._checked_at = time.monotonic()
+
+    async def get_or_resolve(
+        self,
+        session: AsyncSession,
+        key: RateContextKey,
+        resolve: Callable[[], Awaitable["DutyRateContext"]]
+    ) -> "DutyRateContext":
+        """
+        Get a context, resolving and caching it on a miss.
+
+        Args:
+            session: Database session used for the version check
+            key: Cache key
+            resolve: Coroutine function resolving the context from the database
+
+        Returns:
+            The cached or newly resolved context
+        """
+        await self.check_version(session)
+        context = self.get(key)
+        if context is not None:
+            self.hits += 1
+            return context
+
+        self.misses += 1
+        version = self._version
+        context = await resolve()
+        # Don't cache a context resolved across a version change
+        if version == self._version:
+            self.put(key, context)
+        return context
+
+    def invalidate(self) -> None:
+        """Discard every cached context and force a version check on the next access."""
+        self.clear()
+        self._checked_at = 0.0
+
+
+rate_context_cache = RateContextCache(
+    max_entries=get_settings().rate_context_cache_size,
+    ttl=get_settings().rate_context_cache_ttl,
+    check_interval=get_settings().rate_book_refresh_interval
+)
+
+
+def get_rate_context_cache() -> Optional[RateContextCache]:
+    """
+    Get the shared rate context cache if enabled.
+
+    The cache is shared process-wide, so it is only used with the
+    application database, and only by calculators running without a rate
+    book.
+
+    Returns:
+        The RateContextCache, or None if disabled
+    """
+    if not get_settings().rate_context_cache_enabled or not is_database_initialized():
+        return None
+    return rate_context_cache
@@ -0,0 +1,242 @@
+"""
+Date-effective FTA rate timelines for the Customs Broker Portal.
+
+FTA rates are in force from their effective date until their elimination
+date, and several rows (staging steps, overlapping agreements) can cover the
+same HS code and country. A timeline compiles those rows once into
+consecutive segments, each holding the best rate in force throughout it, so
+the rate for any date is a binary search rather than a range scan over the
+rows, and the next date the rate changes is the next segment boundary.
+
+Timelines also project staged tariff elimination year by year, for
+forward-dated calculations and multi-year contract pricing.
+"""
+
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Iterable, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from services.rate_book import FtaRateEntry
+
+# Staging categories reducing the rate in equal annual instalments to zero
+# at the elimination date; other categories hold their rate until then
+LINEAR_STAGING_CATEGORIES = frozenset({'B', 'C'})
+
+# Years projected for rates without an elimination date
+DEFAULT_PROJECTION_YEARS = 5
+
+RATE_QUANTUM = Decimal('0.01')
+
+
+def fta_rate_order(entry: "FtaRateEntry", on_date: Optional[date] = None) -> Tuple:
+    """
+    Sort key ranking FTA rates lowest preferential rate first.
+
+    Given a date, entries are ranked by their staged rate on that date, as a
+    staged entry with a higher base rate can be the lower rate by then.
+    """
+    rate = entry.preferential_rate if on_date is None else staged_rate(entry, on_date)
+    return (rate is None, rate or Decimal('0'), entry.id)
+
+
+def staged_rate(entry: "FtaRateEntry", on_date: date) -> Optional[Decimal]:
+    """
+    Get the preferential rate of an entry on a date, applying its staging.
+
+    Linearly staged rates fall by an equal share of the base rate on each
+    anniversary of the effective date, reaching zero at the elimination date.
+
+    Args:
+        entry: FTA rate entry
+        on_date: Date to get the rate on
+
+    Returns:
+        Staged rate, zero once eliminated, or None if the entry has no rate
+    """
+    if entry.elimination_date is not None and on_date >= entry.elimination_date:
+        return Decimal('0.00')
+    rate = entry.preferential_rate
+    if (
+        rate is None
+        or entry.staging_category not in LINEAR_STAGING_CATEGORIES
+        or entry.effective_date is None
+        or entry.elimination_date is None
+    ):
+        return rate
+
+    total_years = _anniversaries(entry.effective_date, entry.elimination_date)
+    if entry.elimination_date > _add_years(entry.effective_date, total_years):
+        total_years += 1
+    elapsed_years = _anniversaries(entry.effective_date, on_date)
+    if total_years <= 0 or elapsed_years <= 0:
+        return rate
+    remaining = Decimal(total_years - min(elapsed_years, total_years)) / Decimal(total_years)
+    return (rate * remaining).quantize(RATE_QUANTUM, rounding=ROUND_HALF_UP)
+
+
+def next_staging_date(entry: "FtaRateEntry", after: date) -> Optional[date]:
+    """
+    Get the first date after a given date on which a staged rate falls.
+
+    Args:
+        entry: FTA rate entry
+        after: Date to look after
+
+    Returns:
+        Next anniversary of the effective date before elimination, or None if
+        the rate is not linearly staged or has no further instalment
+    """
+    if (
+        entry.preferential_rate is None
+        or entry.staging_category not in LINEAR_STAGING_CATEGORIES
+        or entry.effective_date is None
+        or entry.elimination_date is None
+    ):
+        return None
+    step = _add_years(entry.effective_date, _anniversaries(entry.effective_date, after) + 1)
+    return step if step < entry.elimination_date else None
+
+
+def staging_dates(entry: "FtaRateEntry") -> List[date]:
+    """Get every date on which a linearly staged rate falls before elimination."""
+    dates = []
+    day = entry.effective_date
+    while day is not None:
+        day = next_staging_date(entry, day)
+        if day is not None:
+            dates.append(day)
+    return dates
+
+
+def _anniversaries(start: date, end: date) -> int:
+    """Count the anniversaries of a date passed by another date."""
+    return max(end.year - start.year - ((end.month, end.day) < (start.month, start.day)), 0)
+
+
+def _add_years(day: date, years: int) -> date:
+    """Add whole years to a date, moving 29 February to 28 February."""
+    try:
+        return day.replace(year=day.year + years)
+    except ValueError:
+        return day.replace(year=day.year + years, day=28)
+
+
+@dataclass(frozen=True)
+class RateProjection:
+    """Projected preferential rate on one date."""
+    year: int
+    on_date: date
+    rate: Optional[Decimal]
+    entry: Optional["FtaRateEntry"]
+    eliminated: bool = False
+
+
+class RateTimeline:
+    """
+    Interval index of the best FTA rate in force over time.
+
+    Segment ``i`` covers ``[starts[i], starts[i + 1])`` and holds the entry
+    with the lowest staged rate in force throughout it, or None. Staging
+    instalments are boundaries too, as they can change which overlapping
+    agreement is cheapest. Adjacent segments with the same entry are merged,
+    so every boundary is a date the best entry changes.
+    """
+
+    __slots__ = ("_starts", "_entries", "elimination_date")
+
+    def __init__(self, entries: Iterable["FtaRateEntry"]):
+        """
+        Compile the timeline.
+
+        Args:
+            entries: FTA rate entries for one HS code and country
+        """
+        entries = list(entries)
+        boundaries = sorted({
+            day for entry in entries
+            for day in (entry.effective_date, entry.elimination_date, *staging_dates(entry))
+            if day is not None
+        })
+
+        starts: List[date] = []
+        segment_entries: List[Optional["FtaRateEntry"]] = []
+        for start in (date.min, *boundaries):
+            best = min(
+                (entry for entry in entries if entry.is_in_force(start)),
+                key=lambda entry: fta_rate_order(entry, start),
+                default=None
+            )
+            if segment_entries and segment_entries[-1] is best:
+                continue
+            starts.append(start)
+            segment_entries.append(best)
+
+        self._starts = tuple(starts)
+        self._entries = tuple(segment_entries)
+        # Rates leave force only at their elimination date, so the rate is
+        # eliminated from the end of the last segment with a rate, if it ends
+        last_rated = max((i for i, entry in enumerate(self._entries) if entry is not None), default=None)
+        self.elimination_date = (
+            self._starts[last_rated + 1]
+            if last_rated is not None and last_rated < len(self._starts) - 1
+            else None
+        )
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def entry_on(self, on_date: date) -> Optional["FtaRateEntry"]:
+        """Get the best FTA rate entry in force on a date."""
+        return self._entries[bisect_right(self._starts, on_date) - 1]
+
+    def next_change(self, after: date) -> Optional[date]:
+        """Get the first date after a given date on which the best rate changes."""
+        index = bisect_right(self._starts, after)
+        return self._starts[index] if index < len(self._starts) else None
+
+    def segments(self) -> List[Tuple[date, Optional[date], Optional["FtaRateEntry"]]]:
+        """Get every segment as (start, end, entry), the first starting at date.min."""
+        ends = (*self._starts[1:], None)
+        return list(zip(self._starts, ends, self._entries))
+
+    def rate_on(self, on_date: date) -> RateProjection:
+        """
+        Project the preferential rate on a date.
+
+        Args:
+            on_date: Date to project the rate on
+
+        Returns:
+            Staged rate of the best entry in force, or zero once eliminated
+        """
+        entry = self.entry_on(on_date)
+        if entry is not None:
+            return RateProjection(on_date.year, on_date, staged_rate(entry, on_date), entry)
+        if self.elimination_date is not None and on_date >= self.elimination_date:
+            return RateProjection(on_date.year, on_date, Decimal('0.00'), None, True)
+        return RateProjection(on_date.year, on_date, None, None)
+
+    def project(self, start_year: int, years: Optional[int] = None) -> List[RateProjection]:
+        """
+        Project the rate on 1 January of each year.
+
+        Args:
+            start_year: First year to project
+            years: Number of years to project; by default until the year the
+                rate is eliminated, or DEFAULT_PROJECTION_YEARS if it never is
+
+        Returns:
+            One projection per year
+        """
+        if years is None:
+            if self.elimination_date is not None and self.elimination_date.year >= start_year:
+                end_year = self.elimination_date.year
+                if (self.elimination_date.month, self.elimination_date.day) > (1, 1):
+                    end_year += 1
+                years = end_year - start_year + 1
+            else:
+                years = DEFAULT_PROJECTION_YEARS
+        return [self.rate_on(date(year, 1, 1)) for year in range(start_year, start_year + years)]
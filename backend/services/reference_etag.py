@@ -0,0 +1,107 @@
+"""
+Conditional GET support for the Customs Broker Portal reference endpoints.
+
+Tariff, export and duty reference data only changes when the scrapers or
+populate scripts write, so responses from those GET routes are identified by
+an entity tag derived from the reference data version. The version is
+fingerprinted at most once per check interval and held process-wide, so a
+client revalidating an unchanged response gets a 304 without the request
+reaching a route or the database.
+
+The version includes the per-table write counters kept by database
+triggers, so in-place updates by raw SQL change the tag too. A write is
+reflected within one check interval, after which clients holding the old
+tag get a full response.
+"""
+
+import hashlib
+from datetime import date
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import get_settings
+from services.data_version import VersionedCache, get_reference_data_version
+
+# GET routes whose responses depend only on reference data and the date
+CONDITIONAL_PATH_PREFIXES = ("/api/tariff/", "/api/export/", "/api/duty/")
+
+# Routes under those prefixes whose responses change without a data write
+EXCLUDED_PATHS = frozenset({"/api/duty/metrics"})
+
+
+async def _load_version(session: AsyncSession, version: str) -> str:
+    return version
+
+
+reference_version_cache = VersionedCache(
+    _load_version,
+    check_interval=get_settings().rate_book_refresh_interval,
+    get_version=get_reference_data_version
+)
+
+
+def is_conditional_path(path: str) -> bool:
+    """Check whether responses for a path are tagged with the reference ETag."""
+    return path.startswith(CONDITIONAL_PATH_PREFIXES) and path not in EXCLUDED_PATHS
+
+
+def reference_etag(version: str, on_date: Optional[date] = None) -> str:
+    """
+    Build the entity tag for a reference data version.
+
+    The date is folded in because rates default to the current date, so
+    tags also change at midnight.
+
+    Args:
+        version: Reference data version
+        on_date: Date responses are computed for, today by default
+
+    Returns:
+        Quoted strong entity tag
+    """
+    on_date = on_date or date.today()
+    digest = hashlib.sha1(f"{version}|{on_date.isoformat()}".encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an entity tag.
+
+    Uses weak comparison, as required for If-None-Match, so tags weakened
+    by compressing proxies still match.
+
+    Args:
+        if_none_match: If-None-Match header value, if any
+        etag: Current entity tag
+
+    Returns:
+        True if the client's copy is current
+    """
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in (
+        candidate[2:] if candidate.startswith("W/") else candidate for candidate in candidates
+    )
+
+
+async def get_reference_etag(session: AsyncSession) -> str:
+    """
+    Get the entity tag for the current reference data.
+
+    Only reads the database when the cached version is due a check.
+
+    Args:
+        session: Database session used for the version check
+
+    Returns:
+        Quoted entity tag
+    """
+    return reference_etag(await reference_version_cache.get(session))
+
+
+def cache_control_header() -> str:
+    """Get the Cache-Control value for tagged reference responses."""
+    return f"public, max-age={get_settings().reference_cache_max_age}, must-revalidate"
@@ -0,0 +1,284 @@
+"""
+Streaming tariff schedule export for the Customs Broker Portal.
+
+Downstream systems sync the whole schedule nightly. Rather than paging
+through the search endpoint, the export reads tariff codes from a single
+server-side cursor in HS code order, a partition at a time, attaching each
+code's general duty rate, FTA rates and TCO flag, and encodes each
+partition as soon as it is read. Memory is bounded by the partition size,
+whatever the size of the schedule.
+
+Codes are written as NDJSON (one object per code, FTA rates nested), CSV
+(FTA rates as a JSON column) or Parquet (one row group per partition,
+FTA rates as a list of structs; requires pyarrow).
+"""
+
+import csv
+import importlib.util
+import io
+import json
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from sqlalchemy import select, func, exists, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from models.tariff import TariffCode
+from models.duty import DutyRate
+from models.fta import FtaRate
+from models.tco import Tco
+
+logger = logging.getLogger(__name__)
+
+# Export formats
+EXPORT_NDJSON = "ndjson"
+EXPORT_CSV = "csv"
+EXPORT_PARQUET = "parquet"
+EXPORT_FORMAT_PATTERN = f"^({EXPORT_NDJSON}|{EXPORT_CSV}|{EXPORT_PARQUET})$"
+
+EXPORT_MEDIA_TYPES = {
+    EXPORT_NDJSON: "application/x-ndjson",
+    EXPORT_CSV: "text/csv",
+    EXPORT_PARQUET: "application/vnd.apache.parquet",
+}
+
+EXPORT_COLUMNS = (
+    "hs_code", "description", "level", "parent_code", "section_id", "chapter_id", "is_active",
+    "unit_description", "general_rate", "rate_text", "unit_type", "has_current_tco", "updated_at",
+    "fta_rates",
+)
+
+FTA_RATE_FIELDS = ("fta_code", "country_code", "preferential_rate", "effective_date", "elimination_date")
+
+
+@dataclass(frozen=True)
+class ScheduleExportFilter:
+    """Restricts an export to part of the schedule."""
+    section_id: Optional[int] = None
+    chapter_id: Optional[int] = None
+    changed_since: Optional[date] = None
+    is_active: Optional[bool] = None
+
+
+def parquet_available() -> bool:
+    """Check whether Parquet export is possible (pyarrow installed)."""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _plain(value: Any) -> Any:
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def _schedule_query(filters: ScheduleExportFilter) -> Any:
+    # The general rate is each code's first duty rate row
+    first_rates = (
+        select(DutyRate.hs_code, func.min(DutyRate.id).label("id"))
+        .group_by(DutyRate.hs_code)
+        .subquery("first_rates")
+    )
+    has_current_tco = exists().where(Tco.hs_code == TariffCode.hs_code, Tco.is_current == True)
+
+    stmt = (
+        select(
+            TariffCode.hs_code, TariffCode.description, TariffCode.level, TariffCode.parent_code,
+            TariffCode.section_id, TariffCode.chapter_id, TariffCode.is_active, TariffCode.unit_description,
+            DutyRate.general_rate, DutyRate.rate_text, DutyRate.unit_type,
+            has_current_tco.label("has_current_tco"), TariffCode.updated_at
+        )
+        .outerjoin(first_rates, first_rates.c.hs_code == TariffCode.hs_code)
+        .outerjoin(DutyRate, DutyRate.id == first_rates.c.id)
+        .order_by(TariffCode.hs_code)
+    )
+
+    if filters.section_id is not None:
+        stmt = stmt.where(TariffCode.section_id == filters.section_id)
+    if filters.chapter_id is not None:
+        stmt = stmt.where(TariffCode.chapter_id == filters.chapter_id)
+    if filters.is_active is not None:
+        stmt = stmt.where(TariffCode.is_active == filters.is_active)
+    if filters.changed_since is not None:
+        # A code has changed if its row was updated or any of its rates or TCOs were added since
+        since = datetime.combine(filters.changed_since, time.min, tzinfo=timezone.utc)
+        # DutyRate is already joined for the general rate, so the EXISTS needs its own alias
+        changed_rate = aliased(DutyRate)
+        stmt = stmt.where(or_(
+            TariffCode.updated_at >= since,
+            exists().where(changed_rate.hs_code == TariffCode.hs_code, changed_rate.created_at >= since),
+            exists().where(FtaRate.hs_code == TariffCode.hs_code, FtaRate.created_at >= since),
+            exists().where(Tco.hs_code == TariffCode.hs_code, Tco.created_at >= since),
+        ))
+    return stmt
+
+
+async def _fta_rates_by_code(session: AsyncSession, hs_codes: Sequence[str]) -> Dict[str, List[Dict[str, Any]]]:
+    result = await session.execute(
+        select(
+            FtaRate.hs_code, FtaRate.fta_code, FtaRate.country_code, FtaRate.preferential_rate,
+            FtaRate.effective_date, FtaRate.elimination_date
+        )
+        .where(FtaRate.hs_code.in_(hs_codes))
+        .order_by(FtaRate.hs_code, FtaRate.fta_code, FtaRate.country_code)
+    )
+    rates: Dict[str, List[Dict[str, Any]]] = {}
+    for row in result:
+        rates.setdefault(row[0], []).append(dict(zip(FTA_RATE_FIELDS, map(_plain, row[1:]))))
+    return rates
+
+
+async def iter_schedule(
+    session: AsyncSession,
+    filters: ScheduleExportFilter,
+    batch_size: int
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Read the schedule a partition at a time from a server-side cursor.
+
+    The FTA rates of each partition are fetched with one query over its
+    codes, so the number of queries grows with partitions, not codes.
+
+    Args:
+        session: Database session, kept for the whole iteration
+        filters: Part of the schedule to export
+        batch_size: Codes per partition
+
+    Yields:
+        Lists of export rows (dicts keyed by EXPORT_COLUMNS), in HS code order
+    """
+    result = await session.stream(_schedule_query(filters).execution_options(yield_per=batch_size))
+    try:
+        async for partition in result.partitions(batch_size):
+            fta_rates = await _fta_rates_by_code(session, [row.hs_code for row in partition])
+            yield [
+                {
+                    **{column: _plain(value) for column, value in zip(EXPORT_COLUMNS, row)},
+                    "has_current_tco": bool(row.has_current_tco),
+                    "fta_rates": fta_rates.get(row.hs_code, []),
+                }
+                for row in partition
+            ]
+    finally:
+        await result.close()
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, list):
+        return json.dumps(value, default=_json_default, separators=(",", ":"))
+    return "" if value is None else value
+
+
+async def _ndjson_chunks(batches: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    async for rows in batches:
+        yield "".join(json.dumps(row, default=_json_default) + "\n" for row in rows).encode()
+
+
+async def _csv_chunks(batches: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    async for rows in batches:
+        writer.writerows([_csv_value(row[column]) for column in EXPORT_COLUMNS] for row in rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file collecting bytes to hand out in chunks, keeping its position."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_schema() -> Any:
+    import pyarrow as pa
+
+    return pa.schema([
+        ("hs_code", pa.string()),
+        ("description", pa.string()),
+        ("level", pa.int32()),
+        ("parent_code", pa.string()),
+        ("section_id", pa.int32()),
+        ("chapter_id", pa.int32()),
+        ("is_active", pa.bool_()),
+        ("unit_description", pa.string()),
+        ("general_rate", pa.float64()),
+        ("rate_text", pa.string()),
+        ("unit_type", pa.string()),
+        ("has_current_tco", pa.bool_()),
+        ("updated_at", pa.timestamp("us", tz="UTC")),
+        ("fta_rates", pa.list_(pa.struct([
+            ("fta_code", pa.string()),
+            ("country_code", pa.string()),
+            ("preferential_rate", pa.float64()),
+            ("effective_date", pa.date32()),
+            ("elimination_date", pa.date32()),
+        ]))),
+    ])
+
+
+async def _parquet_chunks(batches: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _parquet_schema()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        async for rows in batches:
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    # The footer is written on close
+    yield sink.drain()
+
+
+def encode_schedule(batches: AsyncIterator[List[Dict[str, Any]]], export_format: str) -> AsyncIterator[bytes]:
+    """
+    Encode streamed schedule partitions in an export format.
+
+    Args:
+        batches: Partitions from iter_schedule
+        export_format: ndjson, csv or parquet
+
+    Returns:
+        Async iterator of encoded chunks, one per partition
+    """
+    if export_format == EXPORT_PARQUET:
+        return _parquet_chunks(batches)
+    if export_format == EXPORT_CSV:
+        return _csv_chunks(batches)
+    return _ndjson_chunks(batches)
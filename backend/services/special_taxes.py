@@ -0,0 +1,169 @@
+"""
+Special tax dispatch for the Customs Broker Portal.
+
+Excise, luxury car tax, wine equalisation tax and industry levies each apply
+to a set of HS code prefixes. The prefixes are compiled once, at import, into
+a prefix trie whose nodes carry every tax applicable at that depth, so all
+applicable taxes for a code are found in a single walk over its digits.
+"""
+
+from typing import Dict, FrozenSet, Iterable, Mapping, Optional
+
+# Special tax identifiers
+TOBACCO_EXCISE = "tobacco_excise"
+FUEL_EXCISE = "fuel_excise"
+LUXURY_CAR_TAX = "luxury_car_tax"
+WINE_EQUALISATION_TAX = "wine_equalisation_tax"
+ACMA_CHARGE = "acma_charge"
+CONTAINER_DEPOSIT = "container_deposit"
+QUARANTINE_CHARGE = "quarantine_charge"
+TCF_SCHEME = "tcf_scheme"
+WINE_INDUSTRY_LEVY = "wine_industry_levy"
+DAIRY_INDUSTRY_LEVY = "dairy_industry_levy"
+MARINE_SAFETY_LEVY = "marine_safety_levy"
+
+SPECIAL_TAX_PREFIXES: Dict[str, tuple] = {
+    TOBACCO_EXCISE: ('2401', '2402', '2403', '2404'),
+    FUEL_EXCISE: ('2710', '2711', '2712', '2713', '2714', '2715'),
+    LUXURY_CAR_TAX: ('8703', '8704', '8705'),  # Passenger cars, commercial vehicles
+    WINE_EQUALISATION_TAX: ('2204', '2205', '2206'),
+    ACMA_CHARGE: (
+        '8517',  # Telephone sets, other apparatus for transmission/reception
+        '8518',  # Microphones, loudspeakers, headphones
+        '8519',  # Sound recording/reproducing apparatus
+        '8521',  # Video recording/reproducing apparatus
+        '8525',  # Transmission apparatus for radio-broadcasting/television
+        '8526',  # Radar apparatus, radio navigational aid apparatus
+        '8527',  # Reception apparatus for radio-broadcasting
+        '8528'   # Monitors, projectors, television receivers
+    ),
+    CONTAINER_DEPOSIT: (
+        '2201',  # Waters, including natural/artificial mineral waters
+        '2202',  # Waters with added sugar/sweetening matter
+        '2203',  # Beer made from malt
+        '2204',  # Wine of fresh grapes
+        '2205',  # Vermouth and other wine of fresh grapes
+        '2206',  # Other fermented beverages
+        '2207',  # Undenatured ethyl alcohol
+        '2208',  # Undenatured ethyl alcohol; spirits, liqueurs
+        '2209'   # Vinegar and substitutes for vinegar
+    ),
+    QUARANTINE_CHARGE: (
+        '01',  # Live animals
+        '02',  # Meat and edible meat offal
+        '03',  # Fish and crustaceans
+        '04',  # Dairy produce
+        '05',  # Products of animal origin
+        '06',  # Live trees and other plants
+        '07',  # Edible vegetables
+        '08',  # Edible fruit and nuts
+        '09',  # Coffee, tea, mate and spices
+        '10',  # Cereals
+        '11',  # Products of the milling industry
+        '12',  # Oil seeds and oleaginous fruits
+        '13',  # Lac, gums, resins
+        '14',  # Vegetable plaiting materials
+        '15',  # Animal or vegetable fats and oils
+        '16',  # Preparations of meat, fish or crustaceans
+        '17',  # Sugars and sugar confectionery
+        '18',  # Cocoa and cocoa preparations
+        '19',  # Preparations of cereals, flour, starch or milk
+        '20',  # Preparations of vegetables, fruit, nuts
+        '21',  # Miscellaneous edible preparations
+        '22',  # Beverages, spirits and vinegar
+        '23',  # Residues and waste from the food industries
+        '24'   # Tobacco and manufactured tobacco substitutes
+    ),
+    TCF_SCHEME: ('50', '51', '52', '53', '54', '55', '56', '57', '58', '59', '60', '61', '62', '63', '64'),
+    WINE_INDUSTRY_LEVY: ('2204',),  # Wine of fresh grapes
+    DAIRY_INDUSTRY_LEVY: ('04',),  # Dairy produce
+    MARINE_SAFETY_LEVY: ('8901', '8902', '8903', '8904', '8905', '8906', '8907', '8908'),
+}
+
+
+class _TrieNode:
+    """Prefix trie node holding the taxes applicable to codes reaching it."""
+
+    __slots__ = ("children", "taxes")
+
+    def __init__(self, taxes: FrozenSet[str] = frozenset()):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.taxes = taxes
+
+
+class SpecialTaxTrie:
+    """
+    Compiled prefix trie mapping HS codes to applicable special taxes.
+
+    Each node stores the union of the taxes registered at it and at all of
+    its ancestors, so a lookup returns the taxes of the deepest node reached
+    without merging sets on the way down. Non-digit characters in codes are
+    ignored, so "2204.21.00" and "22042100" match alike.
+    """
+
+    __slots__ = ("_root",)
+
+    def __init__(self, prefixes: Mapping[str, Iterable[str]]):
+        """
+        Compile the trie.
+
+        Args:
+            prefixes: HS code prefixes keyed by tax identifier
+        """
+        registered: Dict[str, set] = {}
+        for tax, tax_prefixes in prefixes.items():
+            for prefix in tax_prefixes:
+                registered.setdefault(_digits(prefix), set()).add(tax)
+
+        root = _TrieNode(frozenset(registered.get("", ())))
+        for prefix in sorted(registered, key=len):
+            node = root
+            for digit in prefix:
+                child = node.children.get(digit)
+                if child is None:
+                    child = node.children[digit] = _TrieNode(node.taxes)
+                node = child
+            node.taxes = node.taxes | registered[prefix]
+
+        self._root = root
+
+    def match(self, hs_code: Optional[str]) -> FrozenSet[str]:
+        """
+        Get every special tax applicable to an HS code.
+
+        Args:
+            hs_code: HS code, with or without separators
+
+        Returns:
+            Frozen set of tax identifiers
+        """
+        node = self._root
+        for char in hs_code or "":
+            if not char.isdigit():
+                continue
+            child = node.children.get(char)
+            if child is None:
+                break
+            node = child
+        return node.taxes
+
+
+def _digits(code: str) -> str:
+    """Strip separators from an HS code prefix."""
+    return "".join(char for char in code if char.isdigit())
+
+
+special_tax_trie = SpecialTaxTrie(SPECIAL_TAX_PREFIXES)
+
+
+def applicable_special_taxes(hs_code: Optional[str]) -> FrozenSet[str]:
+    """
+    Get every special tax applicable to an HS code.
+
+    Args:
+        hs_code: HS code, with or without separators
+
+    Returns:
+        Frozen set of tax identifiers
+    """
+    return special_tax_trie.match(hs_code)
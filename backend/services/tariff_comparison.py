@@ -0,0 +1,214 @@
+"""
+Columnar bulk comparison of tariff codes for the Customs Broker Portal.
+
+Comparing a product family means the same few attributes for many codes,
+so attributes are loaded a group at a time with one set-based query over
+all the codes (an aggregate ``GROUP BY hs_code`` for rates, duties, TCOs
+and GST provisions) instead of loading every relationship of every code.
+Only the groups holding requested attributes are queried, so the number of
+queries is fixed however many codes are compared.
+
+Results are columnar: one array per attribute, aligned with the list of
+codes, so the payload grows linearly with codes times attributes and
+repeats no keys.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select, func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.tariff import TariffCode
+from models.hierarchy import TariffSection, TariffChapter
+from models.duty import DutyRate
+from models.fta import FtaRate
+from models.dumping import DumpingDuty
+from models.tco import Tco
+from models.gst import GstProvision
+
+logger = logging.getLogger(__name__)
+
+# Largest product family compared in one request
+MAX_BULK_COMPARISON_CODES = 200
+
+# Attributes returned when none are requested
+DEFAULT_COMPARISON_ATTRIBUTES = ("description", "level", "general_rate", "best_fta_rate")
+
+RowsByCode = Dict[str, Tuple[Any, ...]]
+
+
+@dataclass(frozen=True)
+class AttributeGroup:
+    """Attributes loaded together by one set-based query."""
+    attributes: Tuple[str, ...]
+    load: Callable[[AsyncSession, Sequence[str]], Awaitable[RowsByCode]]
+    default: Tuple[Any, ...]
+
+
+def _plain(value: Any) -> Any:
+    return float(value) if isinstance(value, Decimal) else value
+
+
+async def _rows_by_code(session: AsyncSession, stmt: Any) -> RowsByCode:
+    result = await session.execute(stmt)
+    return {row[0]: tuple(_plain(value) for value in row[1:]) for row in result}
+
+
+async def _load_codes(session: AsyncSession, codes: Sequence[str]) -> RowsByCode:
+    stmt = (
+        select(
+            TariffCode.hs_code, TariffCode.description, TariffCode.level, TariffCode.is_active,
+            TariffCode.parent_code
+        )
+        .where(TariffCode.hs_code.in_(codes))
+    )
+    return await _rows_by_code(session, stmt)
+
+
+async def _load_hierarchy(session: AsyncSession, codes: Sequence[str]) -> RowsByCode:
+    stmt = (
+        select(
+            TariffCode.hs_code, TariffSection.section_number, TariffSection.title,
+            TariffChapter.chapter_number, TariffChapter.title
+        )
+        .outerjoin(TariffSection, TariffSection.id == TariffCode.section_id)
+        .outerjoin(TariffChapter, TariffChapter.id == TariffCode.chapter_id)
+        .where(TariffCode.hs_code.in_(codes))
+    )
+    return await _rows_by_code(session, stmt)
+
+
+async def _load_general_rates(session: AsyncSession, codes: Sequence[str]) -> RowsByCode:
+    # The first duty rate row of each code is its general rate
+    first_rates = (
+        select(func.min(DutyRate.id))
+        .where(DutyRate.hs_code.in_(codes))
+        .group_by(DutyRate.hs_code)
+    )
+    stmt = (
+        select(DutyRate.hs_code, DutyRate.general_rate, DutyRate.rate_text, DutyRate.unit_type)
+        .where(DutyRate.id.in_(first_rates))
+    )
+    return await _rows_by_code(session, stmt)
+
+
+async def _load_fta_rates(session: AsyncSession, codes: Sequence[str]) -> RowsByCode:
+    # Only rates in force today, as the duty calculator selects them
+    today = date.today()
+    stmt = (
+        select(FtaRate.hs_code, func.count(func.distinct(FtaRate.fta_code)), func.min(FtaRate.preferential_rate))
+        .where(
+            FtaRate.hs_code.in_(codes),
+            or_(FtaRate.effective_date.is_(None), FtaRate.effective_date <= today),
+            or_(FtaRate.elimination_date.is_(None), FtaRate.elimination_date > today)
+        )
+        .group_by(FtaRate.hs_code)
+    )
+    return await _rows_by_code(session, stmt)
+
+
+def _counter(model: Any, current: Any) -> Callable[[AsyncSession, Sequence[str]], Awaitable[RowsByCode]]:
+    async def load(session: AsyncSession, codes: Sequence[str]) -> RowsByCode:
+        stmt = (
+            select(model.hs_code, func.count())
+            .where(model.hs_code.in_(codes), current == True)
+            .group_by(model.hs_code)
+        )
+        return await _rows_by_code(session, stmt)
+    return load
+
+
+ATTRIBUTE_GROUPS = (
+    AttributeGroup(("description", "level", "is_active", "parent_code"), _load_codes, (None, None, None, None)),
+    AttributeGroup(
+        ("section_number", "section_title", "chapter_number", "chapter_title"),
+        _load_hierarchy, (None, None, None, None)
+    ),
+    AttributeGroup(("general_rate", "rate_text", "unit_type"), _load_general_rates, (None, None, None)),
+    AttributeGroup(("fta_agreements", "best_fta_rate"), _load_fta_rates, (0, None)),
+    AttributeGroup(("dumping_duties",), _counter(DumpingDuty, DumpingDuty.is_active), (0,)),
+    AttributeGroup(("current_tcos",), _counter(Tco, Tco.is_current), (0,)),
+    AttributeGroup(("gst_provisions",), _counter(GstProvision, GstProvision.is_active), (0,)),
+)
+
+COMPARISON_ATTRIBUTES = tuple(attribute for group in ATTRIBUTE_GROUPS for attribute in group.attributes)
+
+
+@dataclass
+class ColumnarComparison:
+    """Attribute columns aligned with the compared codes."""
+    hs_codes: List[str]
+    columns: Dict[str, List[Any]]
+    missing_codes: List[str]
+
+
+def parse_comparison_codes(codes: Sequence[str]) -> List[str]:
+    """
+    Normalize requested HS codes to digits, dropping blanks and repeats.
+
+    Args:
+        codes: HS codes as given, possibly with dots or spaces
+
+    Returns:
+        Digit-only codes in request order
+    """
+    parsed: List[str] = []
+    seen = set()
+    for code in codes:
+        clean = "".join(c for c in code if c.isdigit())
+        if clean and clean not in seen:
+            seen.add(clean)
+            parsed.append(clean)
+    return parsed
+
+
+async def compare_codes_columnar(
+    session: AsyncSession,
+    codes: Sequence[str],
+    attributes: Optional[Sequence[str]] = None
+) -> ColumnarComparison:
+    """
+    Load attributes of many tariff codes as columns.
+
+    Args:
+        session: Database session
+        codes: Digit-only HS codes, in the order columns should follow
+        attributes: Attributes to load, DEFAULT_COMPARISON_ATTRIBUTES if None
+
+    Returns:
+        ColumnarComparison over the codes found
+
+    Raises:
+        ValueError: If an attribute is unknown
+    """
+    requested = list(dict.fromkeys(attributes or DEFAULT_COMPARISON_ATTRIBUTES))
+    unknown = [attribute for attribute in requested if attribute not in COMPARISON_ATTRIBUTES]
+    if unknown:
+        raise ValueError(f"Unknown comparison attributes: {', '.join(unknown)}")
+
+    # The code lookup always runs, as it decides which codes exist
+    code_rows = await _load_codes(session, codes)
+    hs_codes = [code for code in codes if code in code_rows]
+    missing_codes = [code for code in codes if code not in code_rows]
+
+    values: Dict[str, List[Any]] = {}
+    for group in ATTRIBUTE_GROUPS:
+        wanted = [attribute for attribute in group.attributes if attribute in requested]
+        if not wanted:
+            continue
+        rows = code_rows if group.load is _load_codes else (
+            await group.load(session, hs_codes) if hs_codes else {}
+        )
+        for attribute in wanted:
+            position = group.attributes.index(attribute)
+            values[attribute] = [rows.get(code, group.default)[position] for code in hs_codes]
+
+    return ColumnarComparison(
+        hs_codes=hs_codes,
+        columns={attribute: values[attribute] for attribute in requested},
+        missing_codes=missing_codes
+    )
@@ -0,0 +1,252 @@
+"""
+Full-text tariff description search for the Customs Broker Portal.
+
+On PostgreSQL, searches are ``websearch_to_tsquery`` matches against the
+same ``to_tsvector('english', ...)`` expressions as the schema's GIN indexes
+on tariff descriptions and chapter notes, so they are index lookups ranked
+by ``ts_rank``. SQLite has no GIN indexes, so the same searches run against
+an FTS5 table over the tariff codes, created on first use and kept in step
+with ``tariff_codes`` by triggers.
+
+Either way, ranks are normalized to 0-1 with higher better, and highlighted
+snippets are only computed for the codes on the page being returned.
+"""
+
+import logging
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select, func, or_, false, text, literal_column, table, column
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from models.tariff import TariffCode
+
+logger = logging.getLogger(__name__)
+
+# Text search configuration, as written in the schema's index expressions
+TEXT_SEARCH_CONFIG = literal_column("'english'::regconfig")
+
+# Weight of a chapter notes match relative to a description match
+NOTES_WEIGHT = 0.5
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+
+SQLITE_FTS_TABLE = "tariff_codes_fts"
+
+_SQLITE_FTS_DDL = (
+    f"""CREATE VIRTUAL TABLE {SQLITE_FTS_TABLE} USING fts5(
+        description, chapter_notes,
+        content='tariff_codes', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ai AFTER INSERT ON tariff_codes BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, description, chapter_notes)
+        VALUES (new.id, new.description, new.chapter_notes);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ad AFTER DELETE ON tariff_codes BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, description, chapter_notes)
+        VALUES ('delete', old.id, old.description, old.chapter_notes);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_au AFTER UPDATE ON tariff_codes BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, description, chapter_notes)
+        VALUES ('delete', old.id, old.description, old.chapter_notes);
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, description, chapter_notes)
+        VALUES (new.id, new.description, new.chapter_notes);
+    END""",
+    f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')",
+)
+
+_QUERY_TOKENS = re.compile(r'-?"[^"]*"?|\S+')
+_WORDS = re.compile(r"[^\W_]+")
+
+
+def websearch_to_fts5(query: str, include_notes: bool = False) -> Optional[str]:
+    """
+    Translate web search syntax into an FTS5 query.
+
+    Follows websearch_to_tsquery: words are ANDed, ``"quoted text"`` is a
+    phrase, ``or`` between terms is OR and a leading ``-`` excludes a term.
+    Every word is quoted, so FTS5 operators in user input are literal.
+
+    Args:
+        query: Search text as typed
+        include_notes: Also match chapter notes, not just descriptions
+
+    Returns:
+        FTS5 query, or None if the query has no words to match
+    """
+    groups: List[List[str]] = [[]]
+    excluded: List[str] = []
+    pending_or = False
+
+    for token in _QUERY_TOKENS.findall(query):
+        negated = token.startswith("-") and len(token) > 1
+        words = _WORDS.findall(token.lower())
+        if not words:
+            continue
+        if not negated and words == ["or"] and not token.startswith('"'):
+            pending_or = bool(groups[-1])
+            continue
+
+        phrase = '"' + " ".join(words) + '"'
+        if negated:
+            excluded.append(phrase)
+        else:
+            if pending_or:
+                groups.append([])
+            groups[-1].append(phrase)
+        pending_or = False
+
+    groups = [group for group in groups if group]
+    if not groups:
+        return None
+
+    expression = " OR ".join(f"({' AND '.join(group)})" for group in groups)
+    if excluded:
+        expression = f"({expression}) NOT ({' OR '.join(excluded)})"
+    if not include_notes:
+        expression = f"{{description}} : ({expression})"
+    return expression
+
+
+def _description_document() -> Any:
+    return func.to_tsvector(TEXT_SEARCH_CONFIG, TariffCode.description)
+
+
+def _notes_document() -> Any:
+    return func.to_tsvector(TEXT_SEARCH_CONFIG, TariffCode.chapter_notes)
+
+
+async def ensure_sqlite_fts(session: AsyncSession) -> None:
+    """
+    Create and fill the SQLite FTS5 table over tariff codes if missing.
+
+    Args:
+        session: Database session on SQLite
+
+    Raises:
+        OperationalError: If SQLite was built without FTS5
+    """
+    exists = await session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": SQLITE_FTS_TABLE}
+    )
+    if exists.scalar() is not None:
+        return
+
+    for statement in _SQLITE_FTS_DDL:
+        await session.execute(text(statement))
+    await session.commit()
+    logger.info(f"Created SQLite full-text index {SQLITE_FTS_TABLE}")
+
+
+class TariffFullTextSearch:
+    """
+    Full-text search of tariff descriptions, and optionally chapter notes.
+
+    ``apply`` restricts a tariff code statement to matching codes and
+    provides the rank to order by; ``highlight`` then fetches ranks and
+    highlighted descriptions for the codes returned.
+    """
+
+    def __init__(self, query: str, include_notes: bool = False):
+        """
+        Initialize the search.
+
+        Args:
+            query: Search text in web search syntax
+            include_notes: Also match chapter notes
+        """
+        self.query = query
+        self.include_notes = include_notes
+        self.dialect: Optional[str] = None
+        self._fts_query: Optional[str] = None
+
+    async def apply(self, session: AsyncSession, stmt: Select) -> Tuple[Select, Optional[Any]]:
+        """
+        Restrict a statement over TariffCode to codes matching the search.
+
+        Args:
+            session: Database session
+            stmt: Statement selecting TariffCode
+
+        Returns:
+            The restricted statement and its rank expression (0-1, higher
+            better), or a description substring match and None if the
+            database has no full-text support
+        """
+        self.dialect = session.get_bind().dialect.name
+
+        if self.dialect == "postgresql":
+            tsquery = func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, self.query)
+            # Normalization 32 scales ranks to rank / (rank + 1)
+            rank = func.ts_rank(_description_document(), tsquery, 32)
+            condition = _description_document().op("@@")(tsquery)
+            if self.include_notes:
+                rank = func.greatest(rank, NOTES_WEIGHT * func.ts_rank(_notes_document(), tsquery, 32))
+                condition = or_(condition, _notes_document().op("@@")(tsquery))
+            return stmt.where(condition), rank
+
+        if self.dialect == "sqlite":
+            try:
+                await ensure_sqlite_fts(session)
+            except OperationalError as e:
+                logger.warning(f"SQLite full-text search unavailable, using substring match: {str(e)}")
+                await session.rollback()
+            else:
+                self._fts_query = websearch_to_fts5(self.query, self.include_notes)
+                if self._fts_query is None:
+                    return stmt.where(false()), None
+                matches = self._sqlite_matches().subquery("fts_matches")
+                return stmt.join(matches, matches.c.id == TariffCode.id), matches.c.rank
+
+        self.dialect = None
+        return stmt.where(TariffCode.description.ilike(f"%{self.query}%")), None
+
+    def _sqlite_matches(self, *columns: Any) -> Select:
+        fts = table(SQLITE_FTS_TABLE, column("rowid"))
+        fts_column = literal_column(SQLITE_FTS_TABLE)
+        # bm25() is negative, more negative for better matches
+        score = -func.bm25(fts_column, 1.0, NOTES_WEIGHT)
+        return (
+            select(fts.c.rowid.label("id"), (score / (score + 1)).label("rank"), *columns)
+            .where(fts_column.op("MATCH")(self._fts_query))
+        )
+
+    async def highlight(self, session: AsyncSession, ids: Sequence[int]) -> Dict[int, Tuple[float, str]]:
+        """
+        Get ranks and highlighted descriptions for matching codes.
+
+        Args:
+            session: Database session
+            ids: Ids of the codes returned
+
+        Returns:
+            Rank and description with matched terms in <mark> tags, by id
+        """
+        if not ids or self.dialect is None or (self.dialect == "sqlite" and self._fts_query is None):
+            return {}
+
+        if self.dialect == "postgresql":
+            tsquery = func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, self.query)
+            rank = func.ts_rank(_description_document(), tsquery, 32)
+            if self.include_notes:
+                rank = func.greatest(rank, NOTES_WEIGHT * func.ts_rank(_notes_document(), tsquery, 32))
+            stmt = select(
+                TariffCode.id,
+                rank,
+                func.ts_headline(
+                    TEXT_SEARCH_CONFIG, TariffCode.description, tsquery,
+                    f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, HighlightAll=true"
+                )
+            ).where(TariffCode.id.in_(ids))
+        else:
+            matches = self._sqlite_matches(
+                func.highlight(literal_column(SQLITE_FTS_TABLE), 0, HIGHLIGHT_START, HIGHLIGHT_STOP)
+            )
+            stmt = matches.where(literal_column("rowid").in_(ids))
+
+        result = await session.execute(stmt)
+        return {row[0]: (float(row[1] or 0.0), row[2]) for row in result}
@@ -0,0 +1,297 @@
+"""
+In-memory tariff hierarchy index for the Customs Broker Portal.
+
+The tariff hierarchy (sections, chapters and the parent/child structure of
+HS codes) only changes when the schedule is re-imported, yet navigation
+endpoints would otherwise re-derive it from ``tariff_codes`` on every
+request. The index here is an immutable, process-resident snapshot of it:
+nodes are held in one array in breadth-first order so every node's children
+occupy a contiguous range, and child counts and hierarchy paths are
+precomputed, so navigating the tree is a matter of slicing arrays.
+
+The shared cache rebuilds the index when the hierarchy data version changes
+and swaps the reference atomically, like the duty rate book.
+"""
+
+import logging
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import get_settings
+from database import is_database_initialized
+from models.tariff import TariffCode
+from models.hierarchy import TariffSection, TariffChapter
+from services.data_version import VersionedCache, get_hierarchy_data_version
+
+logger = logging.getLogger(__name__)
+
+
+# Index entries
+#
+# Entries are read-only copies of the ORM rows, exposing the same attributes
+# the navigation endpoints use so they can stand in for model instances.
+
+@dataclass(frozen=True, slots=True)
+class SectionEntry:
+    """Tariff section held in the hierarchy index."""
+    id: int
+    section_number: int
+    title: str
+    description: Optional[str]
+    chapter_range: Optional[str]
+
+
+@dataclass(frozen=True, slots=True)
+class ChapterEntry:
+    """Tariff chapter held in the hierarchy index."""
+    id: int
+    chapter_number: int
+    title: str
+    chapter_notes: Optional[str]
+    section_id: int
+
+
+@dataclass(frozen=True, slots=True)
+class HierarchyNode:
+    """Tariff code held in the hierarchy index."""
+    id: int
+    hs_code: str
+    description: str
+    level: int
+    parent_code: Optional[str]
+    section_id: Optional[int]
+    chapter_id: Optional[int]
+    is_active: bool
+
+
+class TariffHierarchy:
+    """
+    Immutable index of the tariff hierarchy.
+
+    Nodes are addressed by their position in ``nodes``. Codes whose parent
+    is not in the schedule are roots; children are ordered by HS code.
+    """
+
+    __slots__ = (
+        "version", "nodes", "sections", "_positions", "_parents", "_first_child",
+        "_child_counts", "_paths", "_section_roots", "_sections_by_id",
+        "_chapters_by_section", "_chapter_code_counts"
+    )
+
+    def __init__(
+        self,
+        sections: Iterable[SectionEntry],
+        chapters: Iterable[ChapterEntry],
+        codes: Iterable[HierarchyNode],
+        version: Optional[str] = None
+    ):
+        """
+        Build the index.
+
+        Args:
+            sections: Tariff sections
+            chapters: Tariff chapters
+            codes: Tariff codes, active or not
+            version: Data version the entries were read at
+        """
+        self.version = version
+        self.sections: Tuple[SectionEntry, ...] = tuple(sorted(sections, key=lambda s: s.section_number))
+        self._sections_by_id = {section.id: section for section in self.sections}
+
+        chapters_by_section: Dict[int, List[ChapterEntry]] = defaultdict(list)
+        for chapter in sorted(chapters, key=lambda c: c.chapter_number):
+            chapters_by_section[chapter.section_id].append(chapter)
+        self._chapters_by_section = {
+            section_id: tuple(entries) for section_id, entries in chapters_by_section.items()
+        }
+
+        codes = sorted(codes, key=lambda c: c.hs_code)
+        by_code = {code.hs_code: code for code in codes}
+        children_of: Dict[str, List[HierarchyNode]] = defaultdict(list)
+        for code in codes:
+            if code.parent_code in by_code and code.parent_code != code.hs_code:
+                children_of[code.parent_code].append(code)
+
+        # Breadth-first from the roots, appending each node's children
+        # together so they occupy a contiguous range
+        nodes = [code for code in codes if code.parent_code not in by_code or code.parent_code == code.hs_code]
+        positions = {node.hs_code: position for position, node in enumerate(nodes)}
+        parents = array("i", [-1] * len(nodes))
+        first_child = array("i")
+        child_counts = array("i")
+        position = 0
+        while True:
+            while position < len(nodes):
+                children = [
+                    child for child in children_of.get(nodes[position].hs_code, ())
+                    if child.hs_code not in positions
+                ]
+                first_child.append(len(nodes))
+                child_counts.append(len(children))
+                for child in children:
+                    positions[child.hs_code] = len(nodes)
+                    parents.append(position)
+                    nodes.append(child)
+                position += 1
+            if len(nodes) == len(codes):
+                break
+            # Codes on a parent cycle are unreachable from any root
+            orphan = next(code for code in codes if code.hs_code not in positions)
+            logger.warning(f"Tariff code {orphan.hs_code} is on a parent_code cycle, indexing it as a root")
+            positions[orphan.hs_code] = len(nodes)
+            parents.append(-1)
+            nodes.append(orphan)
+
+        paths: List[Tuple[str, ...]] = []
+        for node, parent in zip(nodes, parents):
+            paths.append((paths[parent] if parent >= 0 else ()) + (node.hs_code,))
+
+        section_roots: Dict[int, List[int]] = defaultdict(list)
+        chapter_code_counts: Dict[int, int] = defaultdict(int)
+        for position, node in enumerate(nodes):
+            if node.level == 2 and node.is_active and node.section_id is not None:
+                section_roots[node.section_id].append(position)
+            if node.chapter_id is not None:
+                chapter_code_counts[node.chapter_id] += 1
+        for roots in section_roots.values():
+            roots.sort(key=lambda p: nodes[p].hs_code)
+
+        self.nodes: Tuple[HierarchyNode, ...] = tuple(nodes)
+        self._positions = positions
+        self._parents = parents
+        self._first_child = first_child
+        self._child_counts = child_counts
+        self._paths = paths
+        self._section_roots = {section_id: tuple(roots) for section_id, roots in section_roots.items()}
+        self._chapter_code_counts = dict(chapter_code_counts)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    @classmethod
+    async def load(cls, session: AsyncSession, version: Optional[str] = None) -> "TariffHierarchy":
+        """
+        Build the index from the database.
+
+        Args:
+            session: Database session
+            version: Data version being loaded
+
+        Returns:
+            TariffHierarchy
+        """
+        sections = await session.execute(
+            select(
+                TariffSection.id, TariffSection.section_number, TariffSection.title,
+                TariffSection.description, TariffSection.chapter_range
+            )
+        )
+        chapters = await session.execute(
+            select(
+                TariffChapter.id, TariffChapter.chapter_number, TariffChapter.title,
+                TariffChapter.chapter_notes, TariffChapter.section_id
+            )
+        )
+        codes = await session.execute(
+            select(
+                TariffCode.id, TariffCode.hs_code, TariffCode.description, TariffCode.level,
+                TariffCode.parent_code, TariffCode.section_id, TariffCode.chapter_id, TariffCode.is_active
+            )
+        )
+
+        hierarchy = cls(
+            [SectionEntry(*row) for row in sections],
+            [ChapterEntry(*row) for row in chapters],
+            [HierarchyNode(*row) for row in codes],
+            version
+        )
+        logger.info(f"Tariff hierarchy indexed {len(hierarchy)} codes in {len(hierarchy.sections)} sections")
+        return hierarchy
+
+    def position(self, hs_code: str) -> Optional[int]:
+        """Get the position of an HS code, or None if it is not in the schedule."""
+        return self._positions.get(hs_code)
+
+    def get(self, hs_code: str) -> Optional[HierarchyNode]:
+        """Get the node for an HS code, or None if it is not in the schedule."""
+        position = self._positions.get(hs_code)
+        return self.nodes[position] if position is not None else None
+
+    def children(self, position: int) -> range:
+        """Get the positions of a node's direct children, ordered by HS code."""
+        first = self._first_child[position]
+        return range(first, first + self._child_counts[position])
+
+    def child_count(self, position: int) -> int:
+        """Get the number of a node's direct children."""
+        return self._child_counts[position]
+
+    def child_nodes(self, hs_code: str) -> Tuple[HierarchyNode, ...]:
+        """Get the direct children of an HS code, ordered by HS code."""
+        position = self._positions.get(hs_code)
+        if position is None:
+            return ()
+        first = self._first_child[position]
+        return self.nodes[first:first + self._child_counts[position]]
+
+    def path(self, position: int) -> Tuple[str, ...]:
+        """Get the HS codes from the root down to a node."""
+        return self._paths[position]
+
+    def parent(self, position: int) -> Optional[int]:
+        """Get the position of a node's parent, or None for a root."""
+        parent = self._parents[position]
+        return parent if parent >= 0 else None
+
+    def section(self, section_id: int) -> Optional[SectionEntry]:
+        """Get a section by id."""
+        return self._sections_by_id.get(section_id)
+
+    def section_roots(self, section_id: int) -> Tuple[int, ...]:
+        """Get the positions of a section's active chapter-level codes, ordered by HS code."""
+        return self._section_roots.get(section_id, ())
+
+    def chapters(self, section_id: int) -> Tuple[ChapterEntry, ...]:
+        """Get a section's chapters, ordered by chapter number."""
+        return self._chapters_by_section.get(section_id, ())
+
+    def chapter_code_count(self, chapter_id: int) -> int:
+        """Get the number of tariff codes in a chapter."""
+        return self._chapter_code_counts.get(chapter_id, 0)
+
+
+tariff_hierarchy_cache = VersionedCache(
+    TariffHierarchy.load,
+    check_interval=get_settings().rate_book_refresh_interval,
+    get_version=get_hierarchy_data_version
+)
+
+
+async def get_tariff_hierarchy(session: AsyncSession) -> Optional[TariffHierarchy]:
+    """
+    Get the shared tariff hierarchy index if enabled.
+
+    The index is shared process-wide, so it is only used with the
+    application database. Failures are logged and reported as ``None`` so
+    callers can fall back to querying the database directly.
+
+    Args:
+        session: Database session
+
+    Returns:
+        Current TariffHierarchy, or None if disabled or unavailable
+    """
+    if not get_settings().tariff_hierarchy_enabled or not is_database_initialized():
+        return None
+
+    try:
+        return await tariff_hierarchy_cache.get(session)
+    except Exception as e:
+        logger.warning(f"Tariff hierarchy index unavailable, using database queries: {str(e)}")
+        await session.rollback()
+        return None
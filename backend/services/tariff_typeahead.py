@@ -0,0 +1,233 @@
+"""
+In-memory tariff typeahead index for the Customs Broker Portal.
+
+Search boxes send a request per keystroke, so suggestions are answered from
+a process-resident snapshot of the active tariff codes instead of the
+database: HS codes are held sorted within each level, so a code prefix is
+one binary-searched range per level, and description words are held as a sorted term list with a posting
+array of codes per term, so a word prefix is a range of terms.
+
+Codes are numbered in suggestion order (broader levels first, then by HS
+code) and every posting array is in that order, so the top suggestions are
+the first ones produced by merging the postings, and a lookup stops as soon
+as it has enough.
+
+The shared cache rebuilds the index when the hierarchy data version changes,
+like the tariff hierarchy index.
+"""
+
+import heapq
+import logging
+import re
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import get_settings
+from database import is_database_initialized
+from models.tariff import TariffCode
+from services.data_version import VersionedCache, get_hierarchy_data_version
+
+logger = logging.getLogger(__name__)
+
+MATCH_HS_CODE = "hs_code"
+MATCH_DESCRIPTION = "description"
+
+_CODE_TOKEN = re.compile(r"^[\d.]+$")
+_WORDS = re.compile(r"[^\W_]+")
+_MAX_CHAR = "\U0010ffff"
+
+
+@dataclass(frozen=True, slots=True)
+class TypeaheadEntry:
+    """Active tariff code held in the typeahead index."""
+    id: int
+    hs_code: str
+    description: str
+    level: int
+
+
+def split_query(query: str) -> Tuple[str, List[str]]:
+    """
+    Split typed text into an HS code prefix and description words.
+
+    Tokens made of digits and dots (``8471.30``) form the code prefix; all
+    other words must each start a word of the description.
+
+    Args:
+        query: Text as typed
+
+    Returns:
+        HS code prefix (possibly empty) and lower-cased words
+    """
+    code_prefix = ""
+    words: List[str] = []
+    for token in query.split():
+        if _CODE_TOKEN.match(token):
+            code_prefix += token.replace(".", "")
+        else:
+            words.extend(_WORDS.findall(token.lower()))
+    return code_prefix, words
+
+
+class TariffTypeahead:
+    """
+    Immutable prefix index of active tariff codes and description words.
+
+    Entries are addressed by their position in ``entries``, which is the
+    order suggestions are returned in.
+    """
+
+    __slots__ = ("version", "entries", "_level_codes", "_terms", "_postings", "_posting_offsets", "_entry_terms")
+
+    def __init__(self, entries: Iterable[TypeaheadEntry], version: Optional[str] = None):
+        """
+        Build the index.
+
+        Args:
+            entries: Active tariff codes
+            version: Hierarchy data version the entries were read at
+        """
+        self.version = version
+        self.entries: List[TypeaheadEntry] = sorted(entries, key=lambda entry: (entry.level, entry.hs_code))
+
+        # Entries of a level are contiguous and in HS code order, so a code
+        # prefix matches one run of positions per level, in suggestion order
+        self._level_codes: List[Tuple[int, List[str]]] = []
+        for position, entry in enumerate(self.entries):
+            if position == 0 or entry.level != self.entries[position - 1].level:
+                self._level_codes.append((position, []))
+            self._level_codes[-1][1].append(entry.hs_code)
+
+        postings: Dict[str, array] = defaultdict(lambda: array("i"))
+        entry_terms = []
+        for position, entry in enumerate(self.entries):
+            terms = frozenset(_WORDS.findall(entry.description.lower()))
+            entry_terms.append(terms)
+            for term in terms:
+                postings[term].append(position)
+        self._terms: List[str] = sorted(postings)
+        self._postings: List[array] = [postings[term] for term in self._terms]
+        # Running posting counts, so the postings under a term range are counted in O(1)
+        self._posting_offsets = array("q", [0])
+        for posting in self._postings:
+            self._posting_offsets.append(self._posting_offsets[-1] + len(posting))
+        self._entry_terms: List[frozenset] = entry_terms
+
+    @classmethod
+    async def load(cls, session: AsyncSession, version: Optional[str] = None) -> "TariffTypeahead":
+        """
+        Build the index from the database.
+
+        Args:
+            session: Database session
+            version: Hierarchy data version being loaded
+
+        Returns:
+            TariffTypeahead over the active tariff codes
+        """
+        result = await session.execute(
+            select(TariffCode.id, TariffCode.hs_code, TariffCode.description, TariffCode.level)
+            .where(TariffCode.is_active == True)
+        )
+        index = cls((TypeaheadEntry(*row) for row in result), version)
+        logger.info(f"Built tariff typeahead index: {len(index.entries)} codes, {len(index._terms)} terms")
+        return index
+
+    def _term_range(self, prefix: str) -> range:
+        start = bisect_left(self._terms, prefix)
+        return range(start, bisect_left(self._terms, prefix + _MAX_CHAR, start))
+
+    def _code_matches(self, prefix: str) -> Iterator[int]:
+        for offset, codes in self._level_codes:
+            start = bisect_left(codes, prefix)
+            end = bisect_left(codes, prefix + ":", start)  # ":" sorts after every digit
+            yield from range(offset + start, offset + end)
+
+    def _has_words(self, position: int, words: List[str]) -> bool:
+        terms = self._entry_terms[position]
+        return all(word in terms or any(term.startswith(word) for term in terms) for word in words)
+
+    def _description_matches(self, words: List[str]) -> Iterator[int]:
+        # Drive the merge from the word with the fewest postings; check the rest per entry
+        ranges = {word: self._term_range(word) for word in set(words)}
+        driver = min(
+            ranges,
+            key=lambda word: self._posting_offsets[ranges[word].stop] - self._posting_offsets[ranges[word].start]
+        )
+        others = [word for word in ranges if word != driver]
+
+        previous = -1
+        for position in heapq.merge(*[self._postings[i] for i in ranges[driver]]):
+            if position != previous and self._has_words(position, others):
+                yield position
+            previous = position
+
+    def suggest(self, query: str, limit: int) -> List[Tuple[TypeaheadEntry, str]]:
+        """
+        Get the top suggestions for typed text.
+
+        Args:
+            query: Text as typed: an HS code prefix, description word
+                prefixes, or both
+            limit: Maximum suggestions
+
+        Returns:
+            (entry, match type) pairs in suggestion order
+        """
+        code_prefix, words = split_query(query)
+
+        if code_prefix:
+            positions: Iterable[int] = self._code_matches(code_prefix)
+            if words:
+                positions = (position for position in positions if self._has_words(position, words))
+            match_type = MATCH_HS_CODE
+        elif words:
+            positions = self._description_matches(words)
+            match_type = MATCH_DESCRIPTION
+        else:
+            return []
+
+        suggestions = []
+        for position in positions:
+            suggestions.append((self.entries[position], match_type))
+            if len(suggestions) >= limit:
+                break
+        return suggestions
+
+
+tariff_typeahead_cache = VersionedCache(
+    TariffTypeahead.load,
+    check_interval=get_settings().rate_book_refresh_interval,
+    get_version=get_hierarchy_data_version
+)
+
+
+async def get_tariff_typeahead(session: AsyncSession) -> Optional[TariffTypeahead]:
+    """
+    Get the shared typeahead index if enabled.
+
+    Between data version checks this doesn't touch the database. Failures
+    are logged and reported as ``None`` so callers can fall back to a
+    database query.
+
+    Args:
+        session: Database session, only used to check and rebuild the index
+
+    Returns:
+        Current TariffTypeahead, or None if disabled or unavailable
+    """
+    if not get_settings().tariff_typeahead_enabled or not is_database_initialized():
+        return None
+
+    try:
+        return await tariff_typeahead_cache.get(session)
+    except Exception as e:
+        logger.warning(f"Tariff typeahead index unavailable, using database queries: {str(e)}")
+        await session.rollback()
+        return None
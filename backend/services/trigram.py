@@ -0,0 +1,92 @@
+"""
+Trigram similarity helpers for the Customs Broker Portal.
+
+Mirrors PostgreSQL's pg_trgm semantics (lower-cased words padded with two
+leading and one trailing space, similarity as shared over total distinct
+trigrams) so that fuzzy matching ranks the same way whether it runs in the
+database or against in-memory data.
+"""
+
+import re
+from typing import Callable, FrozenSet, Iterable, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# pg_trgm.similarity_threshold default, used by the % operator
+SIMILARITY_THRESHOLD = 0.3
+
+_WORD_PATTERN = re.compile(r"[^\W_]+")
+
+
+def trigrams(text: Optional[str]) -> FrozenSet[str]:
+    """
+    Get the set of trigrams of a string, as pg_trgm's show_trgm() does.
+
+    Args:
+        text: Text to split into trigrams
+
+    Returns:
+        Frozen set of three-character strings
+    """
+    result = set()
+    for word in _WORD_PATTERN.findall((text or "").lower()):
+        padded = f"  {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(result)
+
+
+def similarity(left: Optional[str], right: Optional[str]) -> float:
+    """
+    Get the trigram similarity of two strings, as pg_trgm's similarity() does.
+
+    Args:
+        left: First string
+        right: Second string
+
+    Returns:
+        Similarity between 0.0 (nothing shared) and 1.0 (same trigrams)
+    """
+    left_trigrams = trigrams(left)
+    right_trigrams = trigrams(right)
+    if not left_trigrams or not right_trigrams:
+        return 0.0
+    shared = len(left_trigrams & right_trigrams)
+    return shared / (len(left_trigrams) + len(right_trigrams) - shared)
+
+
+def rank_by_similarity(
+    query: str,
+    items: Iterable[T],
+    key: Callable[[T], Optional[str]],
+    threshold: float = SIMILARITY_THRESHOLD
+) -> List[Tuple[float, T]]:
+    """
+    Rank items by trigram similarity of their key to a query.
+
+    Items below the threshold are dropped; ties keep their input order.
+
+    Args:
+        query: Text to match against
+        items: Candidate items
+        key: Function returning the text to compare for an item
+        threshold: Minimum similarity for an item to be returned
+
+    Returns:
+        (similarity, item) pairs, most similar first
+    """
+    query_trigrams = trigrams(query)
+    if not query_trigrams:
+        return []
+
+    ranked = []
+    for item in items:
+        item_trigrams = trigrams(key(item))
+        if not item_trigrams:
+            continue
+        shared = len(query_trigrams & item_trigrams)
+        score = shared / (len(query_trigrams) + len(item_trigrams) - shared)
+        if score >= threshold:
+            ranked.append((score, item))
+
+    ranked.sort(key=lambda pair: pair[0], reverse=True)
+    return ranked
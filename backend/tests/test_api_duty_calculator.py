@@ -5,6 +5,8 @@ This module tests all duty calculator API endpoints including comprehensive
 duty calculations, rate lookups, FTA rates, TCO exemptions, and breakdowns.
 """
 
+import asyncio
+import json
 import pytest
 import pytest_asyncio
 from decimal import Decimal
@@ -611,6 +613,69 @@ class TestDutyCalculatorAPIIntegration:
             assert len(set(duty_amounts)) > 1  # Should have different duty amounts
 
 
+@pytest.mark.api
+class TestInvoiceCalculationAPI:
+    """Test streamed invoice calculation."""
+    
+    @pytest.mark.asyncio
+    async def test_chunked_upload_answers_every_line(self, override_get_async_session, test_session: AsyncSession):
+        """Test an upload arriving in many body chunks gets a result for every line."""
+        from main import app
+        from models.tariff import TariffCode
+        from models.duty import DutyRate
+        
+        test_session.add_all([
+            TariffCode(hs_code="84713000", description="Portable computers", level=8),
+            DutyRate(hs_code="84713000", general_rate=Decimal("5.00"), unit_type="ad_valorem", rate_text="5%"),
+        ])
+        await test_session.commit()
+        
+        line_total = 200
+        body = ("hs_code,country_code,customs_value\n" + "".join(
+            f"84713000,USA,{1000 + line}.00\n" for line in range(line_total)
+        )).encode()
+        chunks = [body[start:start + 256] for start in range(0, len(body), 256)]
+        assert len(chunks) > 10
+        
+        # Deliver the body in chunks, then keep the connection open like a live client
+        messages = [
+            {"type": "http.request", "body": chunk, "more_body": index < len(chunks) - 1}
+            for index, chunk in enumerate(chunks)
+        ]
+        connection_open = asyncio.Event()
+        
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await connection_open.wait()
+            return {"type": "http.disconnect"}
+        
+        sent = []
+        
+        async def send(message):
+            sent.append(message)
+        
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+            "scheme": "http", "path": "/api/duty/calculate-invoice", "raw_path": b"/api/duty/calculate-invoice",
+            "query_string": b"chunk_size=50", "root_path": "",
+            "headers": [(b"host", b"localhost"), (b"content-type", b"text/csv")],
+            "client": ("127.0.0.1", 50000), "server": ("localhost", 80),
+        }
+        await asyncio.wait_for(app(scope, receive, send), timeout=30)
+        
+        assert sent[0]["status"] == 200
+        records = [
+            json.loads(line)
+            for line in b"".join(message.get("body", b"") for message in sent[1:]).decode().splitlines()
+        ]
+        summary = records.pop()["summary"]
+        assert [record["line_number"] for record in records] == list(range(1, line_total + 1))
+        assert all("error" not in record for record in records)
+        assert summary["line_count"] == line_total
+        assert summary["error_count"] == 0
+
+
 @pytest.mark.api
 @pytest.mark.slow
 class TestDutyCalculatorAPIPerformance:
@@ -7,8 +7,10 @@ tree navigation, detailed tariff lookup, and search functionality.
 
 import pytest
 import pytest_asyncio
+from decimal import Decimal
 from fastapi.testclient import TestClient
 from httpx import AsyncClient
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from tests.utils.test_helpers import (
@@ -17,6 +19,31 @@ from tests.utils.test_helpers import (
 )
 
 
+async def _create_detail_family(session: AsyncSession) -> None:
+    """Create a section, chapter and three-level code family with a duty rate."""
+    from models.hierarchy import TariffSection, TariffChapter
+    from models.tariff import TariffCode
+    from models.duty import DutyRate
+
+    section = TariffSection(section_number=1, title="Live animals; animal products")
+    session.add(section)
+    await session.flush()
+    chapter = TariffChapter(chapter_number=1, title="Live animals", section_id=section.id)
+    session.add(chapter)
+    await session.flush()
+
+    session.add_all([
+        TariffCode(hs_code="0102", description="Live bovine animals", level=4,
+                   section_id=section.id, chapter_id=chapter.id),
+        TariffCode(hs_code="010221", description="Pure-bred breeding cattle", level=6, parent_code="0102",
+                   section_id=section.id, chapter_id=chapter.id),
+        TariffCode(hs_code="0102210010", description="Dairy breeds", level=10, parent_code="010221",
+                   section_id=section.id, chapter_id=chapter.id),
+        DutyRate(hs_code="0102210010", general_rate=Decimal("5.00"), unit_type="ad_valorem", rate_text="5%"),
+    ])
+    await session.commit()
+
+
 @pytest.mark.api
 class TestTariffSectionsAPI:
     """Test tariff sections API endpoints."""
@@ -161,6 +188,55 @@ class TestTariffTreeAPI:
             assert data["parent_code"] == parent_code
 
 
+@pytest.mark.database
+class TestTariffTreeLoading:
+    """Test set-based tariff tree loading."""
+
+    @pytest_asyncio.fixture
+    async def hierarchy(self, test_session: AsyncSession):
+        """Create a chapter with two headings, one split into subheadings."""
+        from models.tariff import TariffCode
+
+        test_session.add_all([
+            TariffCode(hs_code="01", description="Live animals", level=2, section_id=1),
+            TariffCode(hs_code="0101", description="Horses", parent_code="01", level=4, section_id=1),
+            TariffCode(hs_code="0102", description="Bovine animals", parent_code="01", level=4, section_id=1),
+            TariffCode(hs_code="010121", description="Pure-bred horses", parent_code="0101", level=6, section_id=1),
+            TariffCode(hs_code="010129", description="Other horses", parent_code="0101", level=6, section_id=1),
+            TariffCode(hs_code="01012100", description="Breeding horses", parent_code="010121", level=8, section_id=1),
+        ])
+        await test_session.commit()
+
+    async def test_tree_expands_to_depth_with_child_counts(self, test_session: AsyncSession, hierarchy):
+        """Test nodes below the expanded depth still report their children."""
+        from models.tariff import TariffCode
+        from routes.tariff import _load_tree_rows, _assemble_tree
+
+        conditions = [TariffCode.section_id == 1, TariffCode.level == 2]
+        rows = await _load_tree_rows(test_session, conditions, depth=2)
+        roots = _assemble_tree(rows, [], depth=2)
+
+        assert [node.hs_code for node in roots] == ["01"]
+        headings = roots[0].children
+        assert [node.hs_code for node in headings] == ["0101", "0102"]
+        assert [node.children_count for node in headings] == [2, 0]
+        assert headings[0].children is None
+        assert headings[0].path == ["01", "0101"]
+
+    async def test_subtree_paths_include_ancestors(self, test_session: AsyncSession, hierarchy):
+        """Test a subtree's paths start from the chapter."""
+        from models.tariff import TariffCode
+        from routes.tariff import _load_tree_rows, _assemble_tree, _get_ancestor_codes
+
+        conditions = [TariffCode.section_id == 1, TariffCode.parent_code == "0101"]
+        rows = await _load_tree_rows(test_session, conditions, depth=5)
+        roots = _assemble_tree(rows, await _get_ancestor_codes("0101", test_session), depth=5)
+
+        assert [node.hs_code for node in roots] == ["010121", "010129"]
+        assert roots[0].children[0].path == ["01", "0101", "010121", "01012100"]
+        assert roots[0].children[0].is_leaf
+
+
 @pytest.mark.api
 class TestTariffDetailAPI:
     """Test tariff detail API endpoints."""
@@ -233,6 +309,71 @@ class TestTariffDetailAPI:
         assert "related_codes" in data
         assert isinstance(data["related_codes"], list)
     
+    @pytest.mark.asyncio
+    async def test_get_tariff_detail_fields(self, test_client: TestClient, test_session: AsyncSession):
+        """Test fields= selects which sections are loaded."""
+        await _create_detail_family(test_session)
+
+        response = test_client.get("/api/tariff/code/0102210010?fields=duty_rates,children")
+
+        APITestHelper.assert_response_success(response, 200)
+        data = response.json()
+
+        assert data["tariff"]["hs_code"] == "0102210010"
+        assert [(rate["general_rate"], rate["rate_text"]) for rate in data["duty_rates"]] == [(5.0, "5%")]
+        assert data["children"] == []
+        assert data["fta_rates"] is None
+        assert data["section"] is None
+        assert data["breadcrumbs"] == []
+
+    @pytest.mark.asyncio
+    async def test_get_tariff_detail_fields_without_parent(self, test_client: TestClient, test_session: AsyncSession):
+        """Test a parented code's hierarchy path resolves when fields= leaves out parent."""
+        await _create_detail_family(test_session)
+
+        statements = []
+        engine = test_session.bind.sync_engine
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(" ".join(statement.split()))
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            response = test_client.get("/api/tariff/code/0102210010?fields=section,chapter,breadcrumbs")
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+        APITestHelper.assert_response_success(response, 200)
+        data = response.json()
+
+        assert data["tariff"]["hierarchy_path"] == ["0102", "010221", "0102210010"]
+        assert data["parent"] is None
+        assert data["section"]["title"] == "Live animals; animal products"
+        assert data["chapter"]["title"] == "Live animals"
+        assert [(crumb["type"], crumb["code"]) for crumb in data["breadcrumbs"]] == [
+            ("section", "1"), ("chapter", "01"), ("level_4", "0102"), ("level_6", "010221")
+        ]
+
+        # The code is read once with its section and chapter joined in, and nothing is lazy loaded
+        lookups = [sql for sql in statements if "FROM tariff_codes" in sql and "JOIN tariff_sections" in sql]
+        assert len(lookups) == 1
+        assert "JOIN tariff_chapters" in lookups[0]
+        assert not any(
+            "WHERE tariff_sections.id =" in sql or "WHERE tariff_chapters.id =" in sql
+            or ("FROM tariff_codes WHERE tariff_codes.hs_code =" in sql and "ancestors" not in sql)
+            for sql in statements
+        )
+
+    @pytest.mark.asyncio
+    async def test_get_tariff_detail_unknown_field(self, test_client: TestClient, test_session: AsyncSession):
+        """Test unknown fields= sections are rejected."""
+        await _create_detail_family(test_session)
+
+        response = test_client.get("/api/tariff/code/0102210010?fields=duty_rates,tcos")
+
+        APITestHelper.assert_response_error(response, 400)
+        assert "tcos" in response.json()["detail"]
+    
     async def test_get_tariff_detail_not_found(self, test_client: TestClient):
         """Test tariff detail for non-existent HS code."""
         non_existent_code = "9999999999"
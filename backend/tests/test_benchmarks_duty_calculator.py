@@ -0,0 +1,118 @@
+"""
+Tests for the duty calculator benchmark suite.
+
+This module tests:
+- Synthetic schedule shape, determinism and referential integrity
+- Prefix fallback in the generated general rates
+- Latency percentile summaries
+"""
+
+import pytest
+from datetime import date
+from decimal import Decimal
+
+from benchmarks.duty_calculator import build_workload, percentile, summarize
+from benchmarks.synthetic_tariff import SyntheticTariffSpec, generate_schedule, load_schedule
+from models.tariff import TariffCode
+from models.duty import DutyRate
+from models.fta import FtaRate
+from models.tco import Tco
+from models.dumping import DumpingDuty
+from services.duty_calculator import DutyCalculatorService, DutyCalculationInput
+from services.rate_book import RateBook
+
+SMALL_SPEC = SyntheticTariffSpec(
+    chapters=4, headings_per_chapter=3, tco_count=20, dumping_count=20, gst_provision_count=5
+)
+
+
+@pytest.mark.unit
+class TestSyntheticSchedule:
+    """Test suite for synthetic schedule generation."""
+
+    def test_default_spec_is_full_scale(self):
+        """Test the default schedule matches the real tariff's size."""
+        counts = generate_schedule(as_of=date(2024, 7, 1)).counts()
+
+        assert 14_000 <= counts["tariff_codes"] <= 17_000
+        assert 90_000 <= counts["fta_rates"] <= 115_000
+        assert counts["tcos"] == 3000
+        assert counts["dumping_duties"] == 2000
+
+    def test_generation_is_deterministic(self):
+        """Test equal specs generate identical schedules."""
+        first = generate_schedule(SMALL_SPEC, as_of=date(2024, 7, 1))
+        second = generate_schedule(SMALL_SPEC, as_of=date(2024, 7, 1))
+
+        assert first.tables == second.tables
+
+    def test_rates_reference_tariff_codes(self):
+        """Test every rate row points at a generated tariff code."""
+        schedule = generate_schedule(SMALL_SPEC, as_of=date(2024, 7, 1))
+        hs_codes = {row["hs_code"] for row in schedule.tables[TariffCode]}
+
+        for model in (DutyRate, FtaRate, Tco, DumpingDuty):
+            assert {row["hs_code"] for row in schedule.tables[model]} <= hs_codes
+
+    def test_most_leaves_resolve_through_prefix_fallback(self):
+        """Test general rates are mostly recorded above the declared code."""
+        schedule = generate_schedule(SMALL_SPEC, as_of=date(2024, 7, 1))
+        rated = {row["hs_code"] for row in schedule.tables[DutyRate]}
+        leaves = schedule.leaf_codes
+
+        fallback = [leaf for leaf in leaves if leaf not in rated]
+        assert all(any(leaf[:length] in rated for length in (8, 6, 4)) for leaf in fallback)
+        assert len(fallback) > len(leaves) / 2
+
+    def test_workload_mixes_origins_and_exporters(self):
+        """Test the workload covers partners, non-partners and named exporters."""
+        schedule = generate_schedule(SMALL_SPEC, as_of=date(2024, 7, 1))
+        workload = build_workload(schedule, 500, seed=1)
+
+        assert len(workload) == 500
+        assert any(request.exporter_name for request in workload)
+        assert {request.country_code for request in workload} & {"USA", "CHN", "NZL"}
+        assert {request.country_code for request in workload} & {"DEU", "FRA"}
+
+
+@pytest.mark.unit
+class TestBenchmarkSummary:
+    """Test suite for benchmark result summaries."""
+
+    def test_percentile_interpolates(self):
+        """Test percentiles interpolate between closest ranks."""
+        values = [1.0, 2.0, 3.0, 4.0, 5.0]
+
+        assert percentile(values, 50) == 3.0
+        assert percentile(values, 95) == pytest.approx(4.8)
+        assert percentile([], 50) is None
+
+    def test_summarize_reports_milliseconds_and_throughput(self):
+        """Test summaries convert to milliseconds and count errors."""
+        summary = summarize([0.001, 0.002, 0.003], elapsed=0.5, errors=1)
+
+        assert summary["calls"] == 4
+        assert summary["errors"] == 1
+        assert summary["p50_ms"] == 2.0
+        assert summary["throughput_per_s"] == 6.0
+
+
+@pytest.mark.database
+class TestSyntheticScheduleLoading:
+    """Test suite for loading a synthetic schedule."""
+
+    @pytest.mark.asyncio
+    async def test_loaded_schedule_serves_calculations(self, test_session):
+        """Test a loaded schedule resolves every leaf code in the rate book."""
+        schedule = generate_schedule(SMALL_SPEC)
+        await load_schedule(test_session, schedule)
+        await test_session.commit()
+
+        rate_book = await RateBook.load(test_session, version="test")
+        calculator = DutyCalculatorService(rate_book=rate_book)
+
+        for hs_code in schedule.leaf_codes[:25]:
+            result = await calculator.calculate_comprehensive_duty(
+                None, DutyCalculationInput(hs_code=hs_code, country_code="USA", customs_value=Decimal("1000.00"))
+            )
+            assert result.general_duty is not None
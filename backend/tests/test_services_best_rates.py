@@ -0,0 +1,192 @@
+"""
+Tests for the materialized best rate table.
+
+This module tests:
+- Best rate computation per tariff code and origin
+- Row validity windows
+- Change tracking for incremental refresh
+- Invalidation respecting the best_rate_table_enabled setting
+- Recomputing rows deleted by triggers after raw SQL writes
+"""
+
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models.best_rate import BestRate, GENERAL_ORIGIN
+from models.duty import DutyRate
+from models.fta import FtaRate
+from models.gst import GstProvision
+from services import best_rates as best_rates_module
+from services.best_rates import (
+    compute_best_rates, refresh_best_rates, refresh_missing_best_rates,
+    _changed_hs_codes, _invalidate_best_rates
+)
+from services.duty_calculator import DutyCalculatorService, DutyCalculationInput, DutyRateContext
+from services.rate_book import RateBook, GeneralRateEntry, FtaRateEntry, TcoEntry
+
+TODAY = date(2025, 7, 1)
+
+
+def _fta(id, hs_code, country_code, rate, **kwargs):
+    """Build an FTA rate entry with sensible defaults."""
+    values = dict(
+        id=id, hs_code=hs_code, fta_code="KAFTA", country_code=country_code,
+        preferential_rate=rate, rate_type="ad_valorem", staging_category="A",
+        effective_date=None, elimination_date=None, quota_quantity=None,
+        quota_unit=None, safeguard_applicable=False, rule_of_origin=None
+    )
+    values.update(kwargs)
+    return FtaRateEntry(**values)
+
+
+@pytest.fixture
+def rows():
+    """Compute best rate rows for a small rate book, keyed by (code, origin)."""
+    book = RateBook.from_entries(
+        "best-rate-test",
+        general_rates=[
+            GeneralRateEntry(1, "6403", Decimal("5.00"), "ad_valorem", "5%"),
+            GeneralRateEntry(2, "2203", Decimal("1.50"), "specific", "$1.50/L"),
+        ],
+        fta_rates=[
+            _fta(1, "6403", "KOR", Decimal("4.00")),
+            _fta(2, "640399", "KOR", Decimal("1.00")),
+            _fta(3, "6403", "JPN", Decimal("7.00")),
+            _fta(4, "6403", "VNM", Decimal("0.00"), effective_date=TODAY + timedelta(days=30)),
+            _fta(5, "2203", "KOR", Decimal("0.00")),
+        ],
+        tcos=[
+            TcoEntry(1, "TCO-1", "640320", "Ski boots", None, TODAY + timedelta(days=90)),
+        ]
+    )
+    computed = compute_best_rates(book, ["64039900", "64032000", "22030000"], TODAY)
+    return {(row["hs_code"], row["country_code"]): row for row in computed}
+
+
+@pytest.mark.unit
+class TestComputeBestRates:
+    """Test suite for best rate computation."""
+
+    def test_one_row_per_partner_and_general_origin(self, rows):
+        """Test every partner with a rate at any prefix level gets a row."""
+        assert {origin for code, origin in rows if code == "64039900"} == {
+            GENERAL_ORIGIN, "JPN", "KOR", "VNM"
+        }
+
+    def test_most_specific_fta_rate_wins_against_general(self, rows):
+        """Test the FTA rate is chosen only when lower than the general rate."""
+        assert rows[("64039900", "KOR")]["best_rate_type"] == "fta"
+        assert rows[("64039900", "KOR")]["best_rate"] == Decimal("1.00")
+        assert rows[("64039900", "JPN")]["best_rate_type"] == "general"
+        assert rows[("64039900", GENERAL_ORIGIN)]["best_rate_type"] == "general"
+
+    def test_forward_dated_rate_bounds_validity(self, rows):
+        """Test a partner whose rate starts later holds general until that date."""
+        row = rows[("64039900", "VNM")]
+        assert row["best_rate_type"] == "general"
+        assert row["fta_rate_id"] is None
+        assert row["valid_until"] == TODAY + timedelta(days=30)
+
+    def test_tco_exemption_wins(self, rows):
+        """Test a TCO in force wins for every origin until it expires."""
+        for origin in (GENERAL_ORIGIN, "KOR", "VNM"):
+            row = rows[("64032000", origin)]
+            assert row["best_rate_type"] == "tco_exemption"
+            assert row["tco_number"] == "TCO-1"
+        assert rows[("64032000", GENERAL_ORIGIN)]["valid_until"] == TODAY + timedelta(days=90)
+
+    def test_specific_general_rate_left_undecided(self, rows):
+        """Test quantity-dependent comparisons are left to the calculator."""
+        assert rows[("22030000", "KOR")]["best_rate_type"] is None
+        assert rows[("22030000", GENERAL_ORIGIN)]["best_rate_type"] is None
+
+    def test_row_validity_window(self):
+        """Test rows hold from their computation date until valid_until."""
+        row = BestRate(computed_on=TODAY, valid_until=TODAY + timedelta(days=30))
+        assert row.is_valid_on(TODAY)
+        assert row.is_valid_on(TODAY + timedelta(days=29))
+        assert not row.is_valid_on(TODAY + timedelta(days=30))
+        assert not row.is_valid_on(TODAY - timedelta(days=1))
+
+
+@pytest.mark.unit
+class TestBestRateChangeTracking:
+    """Test suite for incremental refresh change tracking."""
+
+    def test_rate_rows_mark_their_codes(self):
+        """Test only rate tables feeding best rates are tracked."""
+        session = Session()
+        session.add_all([
+            DutyRate(hs_code="6403", general_rate=Decimal("5.00")),
+            FtaRate(hs_code="640399", fta_code="KAFTA", country_code="KOR"),
+            GstProvision(hs_code="8471"),
+        ])
+        assert _changed_hs_codes(session) == {"6403", "640399"}
+
+    def test_disabled_table_is_not_invalidated(self):
+        """Test flushes leave best_rates alone when the table is disabled."""
+        session = Session()  # Unbound, so any statement would raise
+        session.add(DutyRate(hs_code="6403", general_rate=Decimal("5.00")))
+        settings = best_rates_module.get_settings().model_copy(update={"best_rate_table_enabled": False})
+
+        with patch.object(best_rates_module, "get_settings", return_value=settings):
+            _invalidate_best_rates(session, None)
+
+        assert "best_rates_pending_prefixes" not in session.info
+
+    @pytest.mark.asyncio
+    async def test_stale_precomputed_winner_is_not_trusted(self):
+        """Test a cheaper FTA duty wins over a precomputed general winner."""
+        calculator = DutyCalculatorService()
+        general = DutyRate(id=1, hs_code="6403", general_rate=Decimal("5.00"), unit_type="ad_valorem")
+        calculation_input = DutyCalculationInput(
+            hs_code="64039900", country_code="KOR", customs_value=Decimal("1000.00"), calculation_date=TODAY
+        )
+
+        stale = await calculator.calculate_from_context(
+            calculation_input,
+            DutyRateContext(
+                general_rate=general, fta_rate=_fta(1, "6403", "KOR", Decimal("0.00")), best_rate_type="general"
+            )
+        )
+        general_only = await calculator.calculate_from_context(
+            calculation_input, DutyRateContext(general_rate=general, best_rate_type="general")
+        )
+
+        assert stale.best_rate_type == "fta"
+        assert stale.total_duty == Decimal("0.00")
+        assert general_only.best_rate_type == "general"
+        assert general_only.total_duty == Decimal("50.00")
+
+
+@pytest.mark.database
+class TestMissingBestRates:
+    """Test suite for recomputing rows deleted outside the application."""
+
+    @pytest.mark.asyncio
+    async def test_deleted_rows_are_recomputed(self, test_session: AsyncSession):
+        """Test codes left without rows, as after a trigger delete, are refreshed."""
+        from models.tariff import TariffCode
+
+        test_session.add_all([
+            TariffCode(hs_code="64039900", description="Other footwear", level=8),
+            TariffCode(hs_code="64032000", description="Sandals", level=8),
+            DutyRate(hs_code="6403", general_rate=Decimal("5.00"), unit_type="ad_valorem", rate_text="5%"),
+        ])
+        await test_session.commit()
+        await refresh_best_rates(test_session, on_date=TODAY)
+        await test_session.commit()
+
+        await test_session.execute(delete(BestRate).where(BestRate.hs_code == "64039900"))
+        await test_session.commit()
+
+        assert await refresh_missing_best_rates(test_session, on_date=TODAY) == 1
+        await test_session.commit()
+        assert await test_session.scalar(select(func.count()).select_from(BestRate)) == 2
+        assert await refresh_missing_best_rates(test_session, on_date=TODAY) == 0
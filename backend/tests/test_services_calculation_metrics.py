@@ -0,0 +1,108 @@
+"""
+Tests for duty calculation step instrumentation.
+
+This module tests:
+- Step timing and database statement attribution
+- Latency histogram quantile estimates
+- Tracing of calculations served from the rate book
+"""
+
+import pytest
+from decimal import Decimal
+
+from sqlalchemy import create_engine, text
+
+from services.calculation_metrics import (
+    CALCULATION_STEPS, GENERAL_RATE_STEP, GST_STEP,
+    CalculationMetrics, LatencyHistogram, timed_step, trace_calculation
+)
+from services.duty_calculator import DutyCalculatorService, DutyCalculationInput
+from services.rate_book import RateBook, GeneralRateEntry
+
+
+@pytest.mark.unit
+class TestCalculationTrace:
+    """Test suite for calculation tracing."""
+
+    def test_statements_attributed_to_active_step(self):
+        """Test statements count against the step they ran in only."""
+        engine = create_engine("sqlite://")
+        with engine.connect() as conn, trace_calculation() as trace:
+            with timed_step(GENERAL_RATE_STEP):
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT 2"))
+            with timed_step(GST_STEP):
+                conn.execute(text("SELECT 3"))
+            conn.execute(text("SELECT 4"))  # Outside any step
+
+        assert [t.step for t in trace.timings] == list(CALCULATION_STEPS)
+        assert trace.steps[GENERAL_RATE_STEP].query_count == 2
+        assert trace.steps[GST_STEP].query_count == 1
+        assert sum(t.query_count for t in trace.timings) == 3
+        assert trace.steps[GENERAL_RATE_STEP].db_ms > 0
+        assert trace.wall_ms >= trace.steps[GENERAL_RATE_STEP].wall_ms
+
+    def test_untraced_work_is_not_recorded(self):
+        """Test steps outside a trace are no-ops and nested traces join the outer one."""
+        with timed_step(GST_STEP) as timing:
+            assert timing is None
+
+        with trace_calculation() as outer:
+            with trace_calculation() as inner:
+                assert inner is outer
+
+    def test_server_timing_header(self):
+        """Test every step and the total appear in the Server-Timing value."""
+        with trace_calculation() as trace:
+            with timed_step(GST_STEP):
+                pass
+        header = trace.server_timing()
+        assert header.count(";dur=") == len(CALCULATION_STEPS) + 1
+        assert header.startswith("general_rate;dur=")
+
+    @pytest.mark.asyncio
+    async def test_rate_book_calculation_is_traced(self):
+        """Test a calculation reports every step and no statements from the rate book."""
+        calculator = DutyCalculatorService(rate_book=RateBook.from_entries(
+            "metrics-test",
+            general_rates=[GeneralRateEntry(1, "8471", Decimal("5.00"), "ad_valorem", "5%")]
+        ))
+        result = await calculator.calculate_comprehensive_duty(
+            None, DutyCalculationInput("84713000", "USA", Decimal("2000.00"))
+        )
+        assert result.total_duty == Decimal("100.00")
+        assert [t.step for t in result.trace.timings] == list(CALCULATION_STEPS)
+        assert all(t.query_count == 0 for t in result.trace.timings)
+
+
+@pytest.mark.unit
+class TestLatencyHistogram:
+    """Test suite for latency histograms."""
+
+    def test_quantiles_interpolate_within_buckets(self):
+        """Test quantiles fall in the bucket holding their rank."""
+        histogram = LatencyHistogram(bounds=(1.0, 10.0, 100.0))
+        for value in [0.5] * 90 + [50.0] * 9 + [500.0]:
+            histogram.observe(value)
+        # The first bucket spans [0, 1] ms, so rank 50 of its 90 observations interpolates to 50/90 ms
+        assert histogram.quantile(0.5) == pytest.approx(1.0 * 50 / 90)
+        assert 10.0 < histogram.quantile(0.95) < 100.0
+        assert histogram.quantile(1.0) == 100.0
+        assert LatencyHistogram().quantile(0.99) is None
+
+    def test_metrics_snapshot(self):
+        """Test traces aggregate into cumulative per-step buckets."""
+        metrics = CalculationMetrics()
+        with trace_calculation() as trace:
+            with timed_step(GST_STEP):
+                pass
+        metrics.record(trace)
+        metrics.record(trace)
+
+        snapshot = metrics.snapshot()
+        assert snapshot["calculations"] == 2
+        assert set(snapshot["steps"]) == set(CALCULATION_STEPS)
+        gst = snapshot["steps"][GST_STEP]
+        assert gst["wall"]["count"] == 2
+        assert gst["wall"]["buckets"]["+Inf"] == 2
+        assert gst["queries_per_calculation"] == 0
@@ -0,0 +1,81 @@
+"""
+Tests for data version fingerprints.
+
+This module tests:
+- Trigger DDL for PostgreSQL and SQLite
+- Fingerprints changing on in-place raw SQL updates of rate tables
+"""
+
+import pytest
+import pytest_asyncio
+from decimal import Decimal
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.data_version import data_version_trigger_ddl
+from services.data_version import get_rate_data_version
+
+
+@pytest.mark.unit
+class TestDataVersionTriggerDdl:
+    """Test suite for the write-counting trigger statements."""
+
+    def test_postgresql_statement_triggers(self):
+        """Test PostgreSQL gets one statement-level trigger per table."""
+        statements = data_version_trigger_ddl("postgresql", ["fta_rates", "tcos"])
+
+        assert "bump_data_version()" in statements[0]
+        assert sum("CREATE TRIGGER" in statement for statement in statements) == 2
+        assert all("FOR EACH STATEMENT" in s for s in statements if "CREATE TRIGGER" in s)
+
+    def test_sqlite_row_triggers(self):
+        """Test SQLite gets an idempotent trigger per table and operation."""
+        statements = data_version_trigger_ddl("sqlite", ["fta_rates"])
+
+        assert len(statements) == 3
+        assert all(statement.startswith("CREATE TRIGGER IF NOT EXISTS") for statement in statements)
+
+    def test_other_dialects(self):
+        """Test unsupported dialects get no triggers."""
+        assert data_version_trigger_ddl("mysql", ["fta_rates"]) == []
+
+
+@pytest.mark.database
+class TestRateDataVersion:
+    """Test suite for the rate data fingerprint."""
+
+    @pytest_asyncio.fixture
+    async def rates(self, test_session: AsyncSession):
+        """Create a tariff code with a duty, FTA and dumping rate."""
+        from models.tariff import TariffCode
+        from models.duty import DutyRate
+        from models.fta import FtaRate
+        from models.dumping import DumpingDuty
+
+        test_session.add_all([
+            TariffCode(hs_code="72085100", description="Flat-rolled steel", level=8),
+            DutyRate(hs_code="72085100", general_rate=Decimal("5.00"), rate_text="5%"),
+            FtaRate(hs_code="72085100", fta_code="KAFTA", country_code="KOR", preferential_rate=Decimal("5.00")),
+            DumpingDuty(hs_code="72085100", country_code="CHN", duty_type="dumping", duty_rate=Decimal("10.00")),
+        ])
+        await test_session.commit()
+
+    @pytest.mark.parametrize("statement", [
+        "UPDATE fta_rates SET preferential_rate = 0 WHERE hs_code = '72085100'",
+        "UPDATE dumping_duties SET duty_rate = 12.5 WHERE hs_code = '72085100'",
+        "UPDATE duty_rates SET general_rate = 0 WHERE hs_code = '72085100'",
+    ])
+    @pytest.mark.asyncio
+    async def test_in_place_update_changes_version(self, test_session: AsyncSession, rates, statement):
+        """Test a raw SQL update keeping counts, ids and timestamps still changes the version."""
+        before = await get_rate_data_version(test_session)
+
+        await test_session.execute(text(statement))
+        await test_session.commit()
+
+        assert await get_rate_data_version(test_session) != before
+
+    @pytest.mark.asyncio
+    async def test_unchanged_data_keeps_version(self, test_session: AsyncSession, rates):
+        """Test the version is stable while nothing is written."""
+        assert await get_rate_data_version(test_session) == await get_rate_data_version(test_session)
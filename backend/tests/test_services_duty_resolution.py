@@ -0,0 +1,99 @@
+"""
+Tests for duty rate resolution modes.
+
+This module tests that rate components are resolved concurrently when
+enabled and sequentially otherwise.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+from services.duty_calculator import DutyCalculatorService, DutyCalculationInput
+
+LOOKUP_DELAY = 0.05
+
+
+class SlowLookupCalculator(DutyCalculatorService):
+    """Calculator whose database lookups each take a fixed time."""
+
+    async def get_general_duty_rate(self, session, hs_code):
+        await asyncio.sleep(LOOKUP_DELAY)
+        return None
+
+    async def get_best_fta_rate(self, session, hs_code, country_code, calculation_date):
+        await asyncio.sleep(LOOKUP_DELAY)
+        return None
+
+    async def check_tco_exemption(self, session, hs_code, calculation_date):
+        await asyncio.sleep(LOOKUP_DELAY)
+        return None
+
+    async def calculate_anti_dumping_duty(self, session, hs_code, country_code, exporter_name, calculation_date):
+        await asyncio.sleep(LOOKUP_DELAY)
+        return None
+
+    async def get_gst_provisions(self, session, hs_code):
+        await asyncio.sleep(LOOKUP_DELAY)
+        return []
+
+
+@asynccontextmanager
+async def fake_db_session():
+    """Stand-in for database.get_db_session."""
+    yield object()
+
+
+@pytest.fixture
+def calculation_input():
+    """Create a calculation input."""
+    return DutyCalculationInput(
+        hs_code="84713000",
+        country_code="USA",
+        customs_value=Decimal("1000.00"),
+        calculation_date=date.today()
+    )
+
+
+@pytest.mark.unit
+class TestRateResolutionModes:
+    """Test suite for sequential and concurrent rate resolution."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_resolution(self, calculation_input):
+        """Test lookups overlap when concurrent mode is enabled."""
+        service = SlowLookupCalculator()
+        service.concurrent_lookups = True  # Regardless of the configured database
+
+        with patch("services.duty_calculator.get_db_session", fake_db_session), \
+                patch("services.duty_calculator.is_database_initialized", return_value=True):
+            start = time.perf_counter()
+            await service.resolve_rate_context(None, calculation_input, date.today())
+            elapsed = time.perf_counter() - start
+
+        assert elapsed < LOOKUP_DELAY * 3
+
+    @pytest.mark.asyncio
+    async def test_sequential_resolution(self, calculation_input):
+        """Test lookups run one after another when concurrency is disabled."""
+        service = SlowLookupCalculator(concurrent_lookups=False)
+
+        start = time.perf_counter()
+        await service.resolve_rate_context(None, calculation_input, date.today())
+        elapsed = time.perf_counter() - start
+
+        assert elapsed >= LOOKUP_DELAY * 5
+
+    def test_sqlite_is_always_sequential(self):
+        """Test SQLite deployments keep the sequential path."""
+        with patch("services.duty_calculator.get_settings") as mock_settings:
+            mock_settings.return_value.database_url = "sqlite+aiosqlite:///./test.db"
+            mock_settings.return_value.concurrent_rate_lookups = True
+            service = DutyCalculatorService()
+
+        assert service.concurrent_lookups is False
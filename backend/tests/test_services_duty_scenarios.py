@@ -0,0 +1,154 @@
+"""
+Tests for the vectorized what-if duty scenario engine.
+
+This module checks scenario matrices against the line-by-line results of
+DutyCalculatorService for the same rates, to the cent.
+"""
+
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+
+from services.duty_calculator import DutyCalculatorService, DutyCalculationInput
+from services.duty_scenarios import DutyScenarioService, DutyScenarioInput, cents_to_money
+from services.rate_book import (
+    RateBook,
+    GeneralRateEntry,
+    FtaRateEntry,
+    DumpingEntry,
+    GstProvisionEntry
+)
+
+
+def _fta(id, country_code, rate, fta_code):
+    """Build an FTA rate entry."""
+    return FtaRateEntry(
+        id=id, hs_code="64039900", fta_code=fta_code, country_code=country_code,
+        preferential_rate=rate, rate_type="ad_valorem", staging_category="A",
+        effective_date=None, elimination_date=None, quota_quantity=None,
+        quota_unit=None, safeguard_applicable=False, rule_of_origin=None
+    )
+
+
+@pytest.fixture
+def scenario_book():
+    """Create a rate book with a mix of origins for one HS code."""
+    return RateBook.from_entries(
+        "scenario-test",
+        general_rates=[GeneralRateEntry(1, "64039900", Decimal("5.00"), "ad_valorem", "5%")],
+        fta_rates=[
+            _fta(1, "VNM", Decimal("0.00"), "AANZFTA"),
+            _fta(2, "THA", Decimal("2.50"), "TAFTA"),
+            _fta(3, "JPN", Decimal("7.00"), "JAEPA"),
+        ],
+        dumping_duties=[
+            DumpingEntry(
+                id=1, hs_code="64039900", country_code="CHN", exporter_name=None,
+                duty_type="dumping", duty_rate=Decimal("12.30"), duty_amount=None,
+                unit=None, effective_date=None, expiry_date=None, case_number="ADN-1"
+            )
+        ],
+        gst_provisions=[
+            GstProvisionEntry(1, "64039900", "Sch 4", "Large consignment", Decimal("9000.00"))
+        ]
+    )
+
+
+@pytest.mark.unit
+class TestDutyScenarioService:
+    """Test suite for DutyScenarioService."""
+
+    @pytest.mark.asyncio
+    async def test_matrix_matches_calculator(self, scenario_book):
+        """Test every cell matches a full calculation for the same inputs."""
+        values = [Decimal("500.00"), Decimal("999.99"), Decimal("1234.57"), Decimal("8700.00")]
+        countries = ["CHN", "VNM", "THA", "JPN", "USA"]
+
+        service = DutyScenarioService(rate_book=scenario_book)
+        result = await service.calculate_scenarios(
+            None,
+            DutyScenarioInput(hs_code="64039900", customs_values=values, country_codes=countries)
+        )
+
+        calculator = DutyCalculatorService(rate_book=scenario_book)
+        assert result.total_amount.shape == (len(countries), len(values))
+        for row, country_code in enumerate(countries):
+            for column, value in enumerate(values):
+                expected = await calculator.calculate_comprehensive_duty(
+                    None,
+                    DutyCalculationInput(hs_code="64039900", country_code=country_code, customs_value=value)
+                )
+                assert cents_to_money(result.total_duty[row, column]) == expected.total_duty
+                assert cents_to_money(result.gst[row, column]) == expected.total_gst
+                assert cents_to_money(result.total_amount[row, column]) == expected.total_amount
+                assert result.best_rate_type[row, column] == expected.best_rate_type
+
+    @pytest.mark.asyncio
+    async def test_half_cent_amounts_match_calculator(self):
+        """Test amounts on and near half-cent boundaries round exactly as the calculator does."""
+        book = RateBook.from_entries(
+            "rounding-test",
+            general_rates=[GeneralRateEntry(1, "64039900", Decimal("5.00"), "ad_valorem", "5%")],
+            fta_rates=[_fta(1, "THA", Decimal("2.50"), "TAFTA"), _fta(2, "KOR", Decimal("3.35"), "KAFTA")],
+            dumping_duties=[
+                DumpingEntry(
+                    id=1, hs_code="64039900", country_code="CHN", exporter_name=None,
+                    duty_type="dumping", duty_rate=Decimal("12.3456"), duty_amount=Decimal("0.35"),
+                    unit=None, effective_date=None, expiry_date=None, case_number="ADN-1"
+                )
+            ]
+        )
+        values = [
+            Decimal("0.10"), Decimal("1.01"), Decimal("20.10"), Decimal("100.10"), Decimal("1000.05"),
+            Decimal("4321.87"), Decimal("999999.99"), Decimal("12345678.91"),
+        ]
+        countries = ["CHN", "THA", "KOR"]
+        quantity = Decimal("3.5")
+
+        result = DutyScenarioService(rate_book=book).compute(
+            DutyScenarioInput(hs_code="64039900", customs_values=values, country_codes=countries, quantity=quantity),
+            [book.resolve("64039900", country_code, None, date.today()) for country_code in countries]
+        )
+
+        calculator = DutyCalculatorService(rate_book=book)
+        for row, country_code in enumerate(countries):
+            for column, value in enumerate(values):
+                expected = await calculator.calculate_comprehensive_duty(
+                    None,
+                    DutyCalculationInput(
+                        hs_code="64039900", country_code=country_code, customs_value=value, quantity=quantity
+                    )
+                )
+                if expected.fta_duty:
+                    assert cents_to_money(result.fta_duty[row, column]) == expected.fta_duty.amount
+                if expected.anti_dumping_duty:
+                    assert cents_to_money(result.anti_dumping_duty[row, column]) == expected.anti_dumping_duty.amount
+                assert cents_to_money(result.total_duty[row, column]) == expected.total_duty
+                assert cents_to_money(result.gst[row, column]) == expected.total_gst
+                assert cents_to_money(result.total_amount[row, column]) == expected.total_amount
+
+    def test_sub_cent_values_are_rejected(self, scenario_book):
+        """Test customs values must be whole cents."""
+        with pytest.raises(ValueError, match="cents"):
+            DutyScenarioService(rate_book=scenario_book).compute(
+                DutyScenarioInput(hs_code="64039900", customs_values=[Decimal("10.005")], country_codes=["THA"]),
+                [scenario_book.resolve("64039900", "THA", None, date.today())]
+            )
+
+    @pytest.mark.asyncio
+    async def test_cheapest_origins(self, scenario_book):
+        """Test the cheapest origin is reported per customs value."""
+        service = DutyScenarioService(rate_book=scenario_book)
+        result = await service.calculate_scenarios(
+            None,
+            DutyScenarioInput(
+                hs_code="64039900",
+                customs_values=[Decimal("2000.00")],
+                country_codes=["CHN", "THA", "VNM"],
+                calculation_date=date.today() + timedelta(days=1)
+            )
+        )
+
+        cheapest = service.cheapest_origins(result)
+        assert cheapest[0]["country_code"] == "VNM"
+        assert cheapest[0]["total_amount"] == Decimal("2200.00")
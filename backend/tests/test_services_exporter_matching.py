@@ -0,0 +1,162 @@
+"""
+Tests for normalized exporter matching on anti-dumping duties.
+
+This module tests:
+- Exporter name normalization
+- pg_trgm-compatible trigram similarity
+- Exact-then-fuzzy exporter matching in the rate book
+- Backfilling exporter keys on rows written by raw SQL
+"""
+
+import pytest
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.dumping import DumpingDuty, normalize_exporter_name
+from services.exporter_keys import backfill_exporter_keys
+from services.rate_book import RateBook, DumpingEntry
+from services.trigram import trigrams, similarity, rank_by_similarity
+
+
+def _dumping(id, exporter_name, rate, hs_code="72081000"):
+    """Build a dumping duty entry for China."""
+    return DumpingEntry(
+        id=id, hs_code=hs_code, country_code="CHN", exporter_name=exporter_name,
+        duty_type="dumping", duty_rate=rate, duty_amount=None, unit=None,
+        effective_date=None, expiry_date=None, case_number=f"ADN-{id}"
+    )
+
+
+@pytest.fixture
+def exporter_book():
+    """Create a rate book with general and exporter-specific duties."""
+    return RateBook.from_entries(
+        "exporter-test",
+        dumping_duties=[
+            _dumping(1, None, Decimal("10.00"), hs_code="7208"),
+            _dumping(2, "Beijing Steel Works Co., Ltd.", Decimal("3.00"), hs_code="7208"),
+            _dumping(3, "Shanghai Metals Corp", Decimal("4.00"), hs_code="7208"),
+            _dumping(4, "Shanghai Metals Trading Pty Ltd", Decimal("5.00")),
+        ]
+    )
+
+
+@pytest.mark.unit
+class TestExporterNormalization:
+    """Test suite for exporter name normalization."""
+
+    @pytest.mark.parametrize("name", [
+        "Acme Steel Co., Ltd.",
+        "ACME STEEL COMPANY LIMITED",
+        "Acme  Steel Co.Ltd",
+        "acme steel",
+    ])
+    def test_legal_forms_share_a_key(self, name):
+        """Test punctuation, case and legal suffixes do not affect the key."""
+        assert normalize_exporter_name(name) == "acme steel"
+
+    def test_accents_initialisms_and_ampersands(self):
+        """Test accents are stripped and dotted initialisms rejoined."""
+        assert normalize_exporter_name("Société Générale S.A.") == "societe generale"
+        assert normalize_exporter_name("P.T. Krakatau Steel Tbk") == "pt krakatau steel"
+        assert normalize_exporter_name("Smith & Sons Pty Ltd") == "smith and sons"
+
+    def test_empty_and_suffix_only_names(self):
+        """Test names without usable words give no key, but a lone word is kept."""
+        assert normalize_exporter_name(None) is None
+        assert normalize_exporter_name(" ., ") is None
+        assert normalize_exporter_name("Company") == "company"
+
+    def test_model_keeps_key_in_step(self):
+        """Test setting exporter_name on the model sets exporter_key."""
+        duty = DumpingDuty(exporter_name="Dell Inc")
+        assert duty.exporter_key == "dell"
+        duty.exporter_name = None
+        assert duty.exporter_key is None
+
+
+@pytest.mark.unit
+class TestTrigramSimilarity:
+    """Test suite for trigram similarity."""
+
+    def test_trigrams_match_pg_trgm(self):
+        """Test trigrams are padded per word like show_trgm()."""
+        assert trigrams("cat") == {"  c", " ca", "cat", "at "}
+        assert trigrams("Co, Ltd") == trigrams("co ltd")
+
+    def test_similarity_bounds(self):
+        """Test identical strings score 1 and disjoint strings score 0."""
+        assert similarity("beijing steel", "beijing steel") == 1.0
+        assert similarity("beijing steel", "xyz") == 0.0
+        assert similarity("", "beijing") == 0.0
+
+    def test_rank_by_similarity(self):
+        """Test ranking drops dissimilar items and puts the closest first."""
+        ranked = rank_by_similarity(
+            "shanghai metal",
+            ["shanghai metals", "shanghai metals trading", "beijing steel"],
+            key=lambda item: item
+        )
+        assert [item for _, item in ranked] == ["shanghai metals", "shanghai metals trading"]
+
+
+@pytest.mark.unit
+class TestRateBookExporterMatching:
+    """Test suite for exporter matching in the rate book."""
+
+    def test_keys_filled_for_unkeyed_entries(self, exporter_book):
+        """Test entries loaded without a stored key are keyed on construction."""
+        assert _dumping(9, "Acme Steel Co", Decimal("1.00")).exporter_key == "acme steel"
+
+    def test_exact_key_match(self, exporter_book):
+        """Test differently written names of the same exporter match exactly."""
+        duty = exporter_book.get_dumping_duty(
+            "72081000", "CHN", "BEIJING STEEL WORKS COMPANY LIMITED", date.today()
+        )
+        assert duty.id == 2
+
+    def test_exact_match_beats_more_specific_fuzzy_match(self, exporter_book):
+        """Test an exact key at a broader HS level wins over a fuzzy match."""
+        duty = exporter_book.get_dumping_duty("72081000", "CHN", "Shanghai Metals Co", date.today())
+        assert duty.id == 3
+
+    def test_fuzzy_match_prefers_most_specific_code(self, exporter_book):
+        """Test fuzzy matches are taken from the most specific HS level first."""
+        duty = exporter_book.get_dumping_duty("72081000", "CHN", "Shanghai Metal", date.today())
+        assert duty.id == 4
+
+    def test_unknown_exporter_gets_country_duty(self, exporter_book):
+        """Test exporters without a similar entry fall back to the general duty."""
+        duty = exporter_book.get_dumping_duty("72081000", "CHN", "Guangzhou Paper", date.today())
+        assert duty.id == 1
+
+
+@pytest.mark.database
+class TestExporterKeyBackfill:
+    """Test suite for keying dumping duties written outside the model."""
+
+    @pytest.mark.asyncio
+    async def test_scraped_rows_get_keys(self, test_session: AsyncSession):
+        """Test rows inserted by raw SQL, as the scrapers do, are keyed once."""
+        from models.tariff import TariffCode
+
+        test_session.add(TariffCode(hs_code="72081000", description="Hot-rolled coils", level=8))
+        await test_session.commit()
+        await test_session.execute(text(
+            "INSERT INTO dumping_duties (hs_code, country_code, exporter_name, duty_rate, is_active) "
+            "VALUES ('72081000', 'CHN', 'Baosteel Co., Ltd.', 12.5, 1), "
+            "('72081000', 'CHN', NULL, 20.0, 1)"
+        ))
+        await test_session.commit()
+
+        assert await backfill_exporter_keys(test_session) == 1
+        await test_session.commit()
+        keys = (await test_session.execute(
+            select(DumpingDuty.exporter_key).order_by(DumpingDuty.id)
+        )).scalars().all()
+
+        assert keys == ["baosteel", None]
+        assert await backfill_exporter_keys(test_session) == 0
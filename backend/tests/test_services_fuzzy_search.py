@@ -0,0 +1,100 @@
+"""
+Tests for typo-tolerant description search.
+
+This module tests:
+- The in-memory trigram index against pg_trgm similarity
+- Fuzzy matching and ranking of tariff codes without pg_trgm
+"""
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services.fuzzy_search import FuzzySearch, TrigramIndex, TARIFF_DESCRIPTIONS
+from services.trigram import rank_by_similarity
+
+DESCRIPTIONS = {
+    1: "Aluminium extrusions, bars and profiles",
+    2: "Aluminium foil",
+    3: "Stainless steel tubes and pipes",
+    4: "Live horses, asses, mules and hinnies",
+    5: None,
+}
+
+
+@pytest.mark.unit
+class TestTrigramIndex:
+    """Test suite for the trigram index."""
+
+    @pytest.fixture
+    def index(self):
+        """Index over the sample descriptions."""
+        return TrigramIndex(DESCRIPTIONS.items())
+
+    @pytest.mark.parametrize("query", ["alumnium extrusion", "stainles pipe", "horse", "aluminium"])
+    def test_scores_match_similarity(self, index, query):
+        """Test index matches and scores agree with scanning every row."""
+        expected = [
+            (key, score) for score, key in
+            rank_by_similarity(query, DESCRIPTIONS, key=DESCRIPTIONS.get, threshold=0.1)
+        ]
+
+        assert index.search(query, 0.1) == sorted(expected, key=lambda match: (-match[1], match[0]))
+
+    def test_threshold_and_limit(self, index):
+        """Test the threshold drops weak matches and the limit keeps the best."""
+        matches = index.search("alumnium extrusion", 0.3)
+
+        assert [key for key, _ in matches] == [1]
+        assert [key for key, _ in index.search("aluminium", 0.0, limit=1)] == [2]
+
+    def test_empty_query(self, index):
+        """Test queries without words match nothing."""
+        assert index.search("--", 0.0) == []
+        assert len(index) == 4
+
+
+@pytest.mark.database
+class TestFuzzyTariffSearch:
+    """Test suite for fuzzy tariff search without pg_trgm."""
+
+    @pytest_asyncio.fixture
+    async def codes(self, test_session: AsyncSession):
+        """Create codes to search."""
+        from models.tariff import TariffCode
+
+        test_session.add_all([
+            TariffCode(id=key, hs_code=f"{7600 + key}", description=description or "", level=4)
+            for key, description in DESCRIPTIONS.items()
+        ])
+        await test_session.commit()
+
+    async def _search(self, session, query, threshold=None):
+        from models.tariff import TariffCode
+
+        stmt, rank = await FuzzySearch(TARIFF_DESCRIPTIONS, query, threshold).apply(session, select(TariffCode))
+        rows = (await session.execute(stmt.add_columns(rank).order_by(rank.desc(), TariffCode.id))).all()
+        return [(code.id, score) for code, score in rows]
+
+    @pytest.mark.asyncio
+    async def test_misspelling_finds_code(self, test_session: AsyncSession, codes):
+        """Test a misspelled query finds the code ranked by similarity."""
+        from services.trigram import similarity
+
+        results = await self._search(test_session, "alumnium extrusion")
+
+        assert [key for key, _ in results] == [1]
+        assert results[0][1] == pytest.approx(similarity("alumnium extrusion", DESCRIPTIONS[1]))
+
+    @pytest.mark.asyncio
+    async def test_threshold(self, test_session: AsyncSession, codes):
+        """Test lowering the threshold admits weaker matches, best first."""
+        results = await self._search(test_session, "alumnium", threshold=0.15)
+
+        assert [key for key, _ in results] == [2, 1]
+
+    @pytest.mark.asyncio
+    async def test_no_match(self, test_session: AsyncSession, codes):
+        """Test unrelated queries return nothing."""
+        assert await self._search(test_session, "zzzz") == []
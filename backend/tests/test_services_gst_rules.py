@@ -0,0 +1,68 @@
+"""
+Tests for compiled GST exemption rules.
+
+This module tests the compiled rules against evaluating every provision in
+turn, and their use in duty calculations.
+"""
+
+import random
+import pytest
+from decimal import Decimal
+
+from services.duty_calculator import DutyCalculatorService
+from services.gst_rules import GstProvisionEntry, GstRule, GstRuleSet
+from services.hs_lookup import hs_code_candidates
+
+
+def _scan(provisions, hs_code, value):
+    """Evaluate provisions the way the calculator used to, one at a time."""
+    applicable = [
+        p for candidate in hs_code_candidates(hs_code) for p in provisions if p.hs_code == candidate
+    ] + [p for p in provisions if p.hs_code is None]
+    return next(
+        (p for p in applicable if p.exemption_type and p.applies_to_value(value)),
+        None
+    )
+
+
+@pytest.mark.unit
+class TestGstRules:
+    """Test suite for GST rule compilation."""
+
+    def test_matches_scan_for_random_provisions(self):
+        """Test compiled rules pick the same provision as a scan."""
+        rng = random.Random(11)
+        codes = [None, "30", "3004", "300490", "30049000", "8471", "84713000"]
+        thresholds = [None, Decimal("500"), Decimal("1000"), Decimal("2500")]
+        for _ in range(50):
+            provisions = sorted([
+                GstProvisionEntry(
+                    i, rng.choice(codes), f"Schedule {i}",
+                    rng.choice([None, "Medical", "Education"]), rng.choice(thresholds)
+                )
+                for i in range(1, rng.randint(1, 8))
+            ], key=lambda p: p.id)
+            rules = GstRuleSet(provisions)
+            for hs_code in ("30049000", "30041000", "84713000", "01012100"):
+                for value in (Decimal("0"), Decimal("500"), Decimal("999.99"), Decimal("3000")):
+                    assert rules.exemption_for(hs_code, value) is _scan(provisions, hs_code, value)
+
+    def test_first_provision_wins_over_lower_threshold(self):
+        """Test a later provision only wins below an earlier one's threshold."""
+        rule = GstRule([
+            GstProvisionEntry(1, "3004", "Schedule 4", "Medical", Decimal("1000")),
+            GstProvisionEntry(2, None, "Schedule 1", "Low value", Decimal("100")),
+            GstProvisionEntry(3, None, "Schedule 2", "Other", Decimal("50")),
+        ])
+        assert rule.exemption_for(Decimal("1500")).id == 1
+        assert rule.exemption_for(Decimal("500")).id == 2
+        assert rule.exemption_for(Decimal("60")).id == 3
+        assert rule.exemption_for(Decimal("10")) is None
+
+    def test_calculator_component_from_rule(self):
+        """Test the GST component honours exemptions and the threshold."""
+        calculator = DutyCalculatorService()
+        rule = GstRule([GstProvisionEntry(1, "3004", "Schedule 4", "Medical", Decimal("2000"))])
+        assert calculator._calculate_gst_component(rule, Decimal("2500")).basis == "Exemption"
+        assert calculator._calculate_gst_component(rule, Decimal("1500")).amount == Decimal("150.00")
+        assert calculator._calculate_gst_component(GstRule([]), Decimal("500")).basis == "Threshold"
@@ -0,0 +1,91 @@
+"""
+Tests for single-query HS code prefix resolution.
+
+This module tests:
+- Candidate prefix generation
+- Most-specific-first resolution across prefix levels
+- Inclusion of general (HS-code-less) rows
+"""
+
+import pytest
+import pytest_asyncio
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import String, Numeric, event
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+from services.hs_lookup import hs_code_candidates, select_by_hs_prefix
+
+
+class LookupBase(DeclarativeBase):
+    """Isolated declarative base for lookup tests."""
+
+
+class PrefixRate(LookupBase):
+    """Minimal rate table keyed by HS code."""
+    __tablename__ = "prefix_rates"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    hs_code: Mapped[Optional[str]] = mapped_column(String(10))
+    rate: Mapped[Decimal] = mapped_column(Numeric(5, 2))
+
+
+@pytest_asyncio.fixture
+async def lookup_session():
+    """Create an in-memory session with a populated rate table."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(LookupBase.metadata.create_all)
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        session.add_all([
+            PrefixRate(id=1, hs_code="8471", rate=Decimal("5.00")),
+            PrefixRate(id=2, hs_code="847130", rate=Decimal("2.00")),
+            PrefixRate(id=3, hs_code=None, rate=Decimal("0.00")),
+            PrefixRate(id=4, hs_code="30049000", rate=Decimal("1.00")),
+        ])
+        await session.commit()
+        yield session
+
+    await engine.dispose()
+
+
+@pytest.mark.unit
+class TestHsPrefixLookup:
+    """Test suite for HS prefix lookups."""
+
+    def test_candidates_skip_longer_prefixes(self):
+        """Test short codes only produce shorter prefixes."""
+        assert hs_code_candidates("847130") == ["847130", "8471", "84"]
+        assert hs_code_candidates("84") == ["84"]
+
+    @pytest.mark.asyncio
+    async def test_most_specific_prefix_wins(self, lookup_session):
+        """Test the most specific matching prefix is returned in one query."""
+        statements = []
+        engine = lookup_session.bind.sync_engine
+        listener = lambda *args: statements.append(args[2])
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            rows = await select_by_hs_prefix(lookup_session, PrefixRate, "8471300000")
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        assert [row.hs_code for row in rows] == ["847130"]
+        assert len(statements) == 1
+
+    @pytest.mark.asyncio
+    async def test_no_match_returns_empty(self, lookup_session):
+        """Test codes with no rate at any level return no rows."""
+        assert await select_by_hs_prefix(lookup_session, PrefixRate, "01012100") == []
+
+    @pytest.mark.asyncio
+    async def test_include_general_rows(self, lookup_session):
+        """Test general rows are ranked after code-specific rows."""
+        rows = await select_by_hs_prefix(
+            lookup_session, PrefixRate, "30049000",
+            most_specific_only=False, include_general=True
+        )
+        assert [row.id for row in rows] == [4, 3]
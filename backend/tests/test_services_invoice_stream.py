@@ -0,0 +1,120 @@
+"""
+Tests for incremental commercial invoice parsing.
+
+This module tests:
+- Header alias matching and required columns
+- Records split across body chunks, including quoted newlines
+- Spooling the upload before parsing
+- Chunking of parsed rows
+"""
+
+import pytest
+
+from services.invoice_stream import (
+    InvoiceCsvReader, iter_chunks, iter_file, spool_body, MAX_RECORD_LENGTH, SPOOL_MEMORY_LIMIT
+)
+
+INVOICE = (
+    '﻿HS Code,Country of Origin,Value,Qty,Supplier,Description\r\n'
+    '8471.30.00,CHN,1000,2,"Acme, Inc.","Laptops\nwith ""retina"" displays"\r\n'
+    '\r\n'
+    '0101,usa,5,,,\n'
+    '7208,KOR,12.5'
+).encode()
+
+
+async def _body(data: bytes, size: int):
+    """Yield a body in chunks of a given size."""
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+async def _rows(reader):
+    return [row async for row in reader.rows()]
+
+
+@pytest.mark.unit
+class TestInvoiceCsvReader:
+    """Test suite for the incremental invoice CSV reader."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("chunk_size", [1, 7, len(INVOICE)])
+    async def test_rows_independent_of_chunking(self, chunk_size):
+        """Test rows parse identically however the body is split."""
+        reader = InvoiceCsvReader(_body(INVOICE, chunk_size))
+
+        assert await reader.read_header() == {
+            "hs_code": 0, "country_code": 1, "customs_value": 2, "quantity": 3, "exporter_name": 4
+        }
+        assert await _rows(reader) == [
+            (1, {"hs_code": "8471.30.00", "country_code": "CHN", "customs_value": "1000",
+                 "quantity": "2", "exporter_name": "Acme, Inc."}),
+            (2, {"hs_code": "0101", "country_code": "usa", "customs_value": "5",
+                 "quantity": None, "exporter_name": None}),
+            (3, {"hs_code": "7208", "country_code": "KOR", "customs_value": "12.5",
+                 "quantity": None, "exporter_name": None}),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_missing_required_column(self):
+        """Test a header without a customs value column is rejected."""
+        reader = InvoiceCsvReader(_body(b"hs_code,country\n8471,CHN\n", 64))
+
+        with pytest.raises(ValueError, match="customs_value"):
+            await reader.read_header()
+
+    @pytest.mark.asyncio
+    async def test_empty_upload(self):
+        """Test an empty body is rejected."""
+        with pytest.raises(ValueError, match="empty"):
+            await InvoiceCsvReader(_body(b"", 64)).read_header()
+
+    @pytest.mark.asyncio
+    async def test_unterminated_quote_is_bounded(self):
+        """Test an unterminated quoted field fails instead of buffering the upload."""
+        body = b"hs_code,country,value\n8471,CHN,\"" + b"x\n" * MAX_RECORD_LENGTH
+        reader = InvoiceCsvReader(_body(body, 4096))
+        await reader.read_header()
+
+        with pytest.raises(ValueError):
+            await _rows(reader)
+
+
+@pytest.mark.unit
+class TestSpoolBody:
+    """Test suite for spooling the upload."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("size", [len(INVOICE), SPOOL_MEMORY_LIMIT + 1])
+    async def test_spooled_body_reads_back(self, size):
+        """Test a spooled body reads back whole, in memory or on disk."""
+        data = (INVOICE * (size // len(INVOICE) + 1))[:size]
+        body = await spool_body(_body(data, 4096))
+        try:
+            assert b"".join([chunk async for chunk in iter_file(body, 1000)]) == data
+        finally:
+            body.close()
+
+    @pytest.mark.asyncio
+    async def test_reader_over_spooled_body(self):
+        """Test the reader parses a spooled body like the live one."""
+        body = await spool_body(_body(INVOICE, 7))
+        reader = InvoiceCsvReader(iter_file(body, 5))
+        await reader.read_header()
+
+        assert [row_number for row_number, _ in await _rows(reader)] == [1, 2, 3]
+        body.close()
+
+
+@pytest.mark.unit
+class TestIterChunks:
+    """Test suite for chunking parsed rows."""
+
+    @pytest.mark.asyncio
+    async def test_groups_in_order(self):
+        """Test items are grouped into bounded chunks in order."""
+        async def items():
+            for item in range(5):
+                yield item
+
+        assert [chunk async for chunk in iter_chunks(items(), 2)] == [[0, 1], [2, 3], [4]]
@@ -0,0 +1,123 @@
+"""
+Tests for keyset pagination.
+
+This module tests:
+- Cursor encoding, scoping and validation
+- Walking every page by cursor against a single ordered query
+- Exact, estimated and skipped totals
+"""
+
+import pytest
+import pytest_asyncio
+from datetime import datetime, timezone
+from decimal import Decimal
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services.keyset_pagination import (
+    SortKey, count_matches, decode_cursor, encode_cursor, fetch_keyset_page
+)
+
+
+@pytest.mark.unit
+class TestCursors:
+    """Test suite for pagination cursors."""
+
+    def test_round_trip(self):
+        """Test cursor values survive encoding with their types."""
+        values = ["8471", 42, Decimal("0.95"), datetime(2024, 7, 1, 9, 30, tzinfo=timezone.utc)]
+        cursor = encode_cursor("tariff:hs_code:asc", values, 100)
+
+        assert decode_cursor(cursor, "tariff:hs_code:asc") == (values, 100)
+
+    def test_rejects_other_scope(self):
+        """Test a cursor can't be replayed against another sort order."""
+        cursor = encode_cursor("tariff:hs_code:asc", ["8471", 1], 50)
+
+        with pytest.raises(ValueError, match="different"):
+            decode_cursor(cursor, "tariff:level:desc")
+
+    @pytest.mark.parametrize("cursor", ["not a cursor", "e30", "eyJzIjoxfQ"])
+    def test_rejects_malformed(self, cursor):
+        """Test malformed cursors raise ValueError."""
+        with pytest.raises(ValueError):
+            decode_cursor(cursor, "tariff:hs_code:asc")
+
+
+@pytest.mark.database
+class TestKeysetPages:
+    """Test suite for fetching keyset pages."""
+
+    @pytest_asyncio.fixture
+    async def codes(self, test_session: AsyncSession):
+        """Create codes with repeated levels and description lengths."""
+        from models.tariff import TariffCode
+
+        test_session.add_all([
+            TariffCode(
+                hs_code=f"{chapter:02d}{heading:02d}",
+                description="x" * (1 + (chapter * heading) % 4),
+                level=2 + 2 * (heading % 3),
+                is_active=heading != 4
+            )
+            for chapter in range(1, 6) for heading in range(1, 6)
+        ])
+        await test_session.commit()
+
+    async def _walk(self, session, keys, limit, scope):
+        from models.tariff import TariffCode
+
+        stmt = select(TariffCode).where(TariffCode.is_active == True)
+        seen, cursor, offsets = [], None, []
+        while True:
+            page = await fetch_keyset_page(session, stmt, keys, limit, scope, cursor=cursor)
+            seen.extend(code.hs_code for code in page.items)
+            offsets.append(page.offset)
+            if not page.has_next:
+                return seen, offsets
+            cursor = page.next_cursor
+
+    @pytest.mark.parametrize("descending", [(False, False), (True, True), (False, True)])
+    @pytest.mark.asyncio
+    async def test_cursor_walk_matches_full_order(self, test_session: AsyncSession, codes, descending):
+        """Test walking pages by cursor visits every row once, in order."""
+        from models.tariff import TariffCode
+
+        keys = [
+            SortKey(TariffCode.level, descending[0]),
+            SortKey(func.length(TariffCode.description), descending[1]),
+            SortKey(TariffCode.id, descending[0])
+        ]
+        expected = (await test_session.execute(
+            select(TariffCode.hs_code).where(TariffCode.is_active == True)
+            .order_by(*[key.order_by() for key in keys])
+        )).scalars().all()
+
+        seen, offsets = await self._walk(test_session, keys, 3, "test")
+
+        assert seen == expected
+        assert offsets == list(range(0, len(expected), 3))
+
+    @pytest.mark.asyncio
+    async def test_offset_page_returns_cursor(self, test_session: AsyncSession, codes):
+        """Test an offset page hands over to cursor pages seamlessly."""
+        from models.tariff import TariffCode
+
+        stmt = select(TariffCode)
+        keys = [SortKey(TariffCode.hs_code)]
+        first = await fetch_keyset_page(test_session, stmt, keys, 5, "test", offset=10)
+        second = await fetch_keyset_page(test_session, stmt, keys, 5, "test", cursor=first.next_cursor)
+        by_offset = await fetch_keyset_page(test_session, stmt, keys, 5, "test", offset=15)
+
+        assert [code.hs_code for code in second.items] == [code.hs_code for code in by_offset.items]
+        assert second.offset == 15
+
+    @pytest.mark.parametrize("mode,expected", [("exact", (20, False)), ("estimate", (20, False)), ("none", (None, False))])
+    @pytest.mark.asyncio
+    async def test_count_modes(self, test_session: AsyncSession, codes, mode, expected):
+        """Test totals per count mode; SQLite estimates fall back to exact counts."""
+        from models.tariff import TariffCode
+
+        stmt = select(TariffCode).where(TariffCode.is_active == True)
+
+        assert await count_matches(test_session, stmt, mode) == expected
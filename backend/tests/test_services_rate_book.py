@@ -0,0 +1,248 @@
+"""
+Tests for the in-memory duty rate book.
+
+This module tests:
+- Rate book indexing and HS code prefix fallback
+- Date-effective FTA, TCO and anti-dumping lookups
+- Duty calculations served entirely from the rate book
+"""
+
+import time
+
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+
+from services.duty_calculator import DutyCalculatorService, DutyCalculationInput
+from services.hs_lookup import hs_code_candidates
+from services.rate_book import (
+    RateBook,
+    GeneralRateEntry,
+    FtaRateEntry,
+    TcoEntry,
+    DumpingEntry,
+    GstProvisionEntry
+)
+
+
+def _fta(id, hs_code, rate, fta_code="AUSFTA", country_code="USA", **kwargs):
+    """Build an FTA rate entry with sensible defaults."""
+    values = dict(
+        id=id, hs_code=hs_code, fta_code=fta_code, country_code=country_code,
+        preferential_rate=rate, rate_type="ad_valorem", staging_category="A",
+        effective_date=None, elimination_date=None, quota_quantity=None,
+        quota_unit=None, safeguard_applicable=False, rule_of_origin=None,
+        agreement_name="Australia-United States FTA"
+    )
+    values.update(kwargs)
+    return FtaRateEntry(**values)
+
+
+def _dumping(id, exporter_name, rate, **kwargs):
+    """Build a dumping duty entry with sensible defaults."""
+    values = dict(
+        id=id, hs_code="72081000", country_code="CHN", exporter_name=exporter_name,
+        duty_type="dumping", duty_rate=rate, duty_amount=None, unit=None,
+        effective_date=None, expiry_date=None, case_number=f"ADN-{id}"
+    )
+    values.update(kwargs)
+    return DumpingEntry(**values)
+
+
+@pytest.fixture
+def rate_book():
+    """Create a small rate book covering every rate type."""
+    today = date.today()
+    return RateBook.from_entries(
+        "test-version",
+        general_rates=[
+            GeneralRateEntry(1, "8471", Decimal("5.00"), "ad_valorem", "5%"),
+            GeneralRateEntry(2, "84713000", Decimal("0.00"), "ad_valorem", "Free"),
+            GeneralRateEntry(3, "72081000", Decimal("5.00"), "ad_valorem", "5%"),
+        ],
+        fta_rates=[
+            _fta(1, "8471", Decimal("2.00")),
+            _fta(2, "8471", Decimal("1.00"), effective_date=today + timedelta(days=30)),
+            _fta(3, "8471", None),
+        ],
+        tcos=[
+            TcoEntry(1, "TCO-OLD", "85171200", "Old concession", today - timedelta(days=400), today - timedelta(days=1)),
+            TcoEntry(2, "TCO-NEW", "85171200", "Mobile phones", today - timedelta(days=10), None),
+        ],
+        dumping_duties=[
+            _dumping(1, None, Decimal("10.00")),
+            _dumping(2, "Acme Steel Co", Decimal("3.50")),
+        ],
+        gst_provisions=[
+            GstProvisionEntry(1, "30049000", "Schedule 4", "Medical", None),
+        ]
+    )
+
+
+@pytest.mark.unit
+class TestRateBookLookups:
+    """Test suite for rate book lookups."""
+
+    def test_hs_code_candidates(self):
+        """Test prefix candidates are most specific first."""
+        assert hs_code_candidates("8471300000") == ["8471300000", "84713000", "847130", "8471", "84"]
+        assert hs_code_candidates("8471") == ["8471", "84"]
+
+    def test_general_rate_exact_and_prefix(self, rate_book):
+        """Test general rate lookup uses exact match before prefixes."""
+        assert rate_book.get_general_rate("84713000").id == 2
+        assert rate_book.get_general_rate("84714100").id == 1
+        assert rate_book.get_general_rate("0101") is None
+
+    def test_best_fta_rate_respects_dates(self, rate_book):
+        """Test the lowest FTA rate in force is returned."""
+        today = date.today()
+        assert rate_book.get_best_fta_rate("84714100", "USA", today).id == 1
+        assert rate_book.get_best_fta_rate("84714100", "USA", today + timedelta(days=31)).id == 2
+        assert rate_book.get_best_fta_rate("84714100", "JPN", today) is None
+
+    def test_tco_exemption_skips_expired(self, rate_book):
+        """Test expired TCOs are ignored."""
+        tco = rate_book.get_tco_exemption("85171200", date.today())
+        assert tco.tco_number == "TCO-NEW"
+
+    def test_dumping_duty_prefers_exporter(self, rate_book):
+        """Test exporter-specific dumping duty takes precedence."""
+        today = date.today()
+        assert rate_book.get_dumping_duty("72081000", "CHN", "acme steel", today).id == 2
+        assert rate_book.get_dumping_duty("72081000", "CHN", "Other Mill", today).id == 1
+        assert rate_book.get_dumping_duty("72081000", "CHN", None, today).id == 1
+
+    def test_gst_provisions_include_general(self, rate_book):
+        """Test HS-specific GST provisions are returned."""
+        assert [p.id for p in rate_book.get_gst_provisions("30049000")] == [1]
+        assert rate_book.get_gst_provisions("84713000") == []
+
+
+@pytest.mark.unit
+class TestRateBookCalculation:
+    """Test suite for duty calculations served from the rate book."""
+
+    @pytest.mark.asyncio
+    async def test_calculation_without_session(self, rate_book):
+        """Test a full calculation runs without a database session."""
+        service = DutyCalculatorService(rate_book=rate_book)
+        result = await service.calculate_comprehensive_duty(
+            None,
+            DutyCalculationInput(
+                hs_code="84714100",
+                country_code="USA",
+                customs_value=Decimal("2000.00")
+            )
+        )
+
+        assert result.general_duty.amount == Decimal("100.00")
+        assert result.fta_duty.amount == Decimal("40.00")
+        assert result.best_rate_type == "fta"
+        assert result.total_duty == Decimal("40.00")
+        assert result.total_gst == Decimal("204.00")
+        assert result.potential_savings == Decimal("60.00")
+
+    @pytest.mark.asyncio
+    async def test_calculation_with_dumping_and_gst_exemption(self, rate_book):
+        """Test dumping duty is added and GST exemptions apply."""
+        service = DutyCalculatorService(rate_book=rate_book)
+        result = await service.calculate_comprehensive_duty(
+            None,
+            DutyCalculationInput(
+                hs_code="72081000",
+                country_code="CHN",
+                customs_value=Decimal("1000.00"),
+                exporter_name="Acme Steel Co"
+            )
+        )
+
+        assert result.anti_dumping_duty.amount == Decimal("35.00")
+        assert result.total_duty == Decimal("85.00")
+
+        gst = await service.calculate_gst(None, "30049000", Decimal("5000.00"))
+        assert gst.amount == Decimal("0.00")
+        assert gst.basis == "Exemption"
+
+
+@pytest.mark.unit
+class TestBatchCalculation:
+    """Test suite for batch duty calculations."""
+
+    @pytest.mark.asyncio
+    async def test_batch_matches_single_calculations(self, rate_book):
+        """Test batch results match line-by-line calculations, in order."""
+        service = DutyCalculatorService(rate_book=rate_book)
+        inputs = [
+            DutyCalculationInput(hs_code="84714100", country_code="USA", customs_value=Decimal("2000.00")),
+            DutyCalculationInput(hs_code="72081000", country_code="CHN", customs_value=Decimal("1000.00")),
+            DutyCalculationInput(hs_code="84713000", country_code="JPN", customs_value=Decimal("500.00")),
+        ]
+
+        results = await service.calculate_batch(None, inputs)
+
+        assert [r.hs_code for r in results] == ["84714100", "72081000", "84713000"]
+        for calculation_input, result in zip(inputs, results):
+            single = await service.calculate_comprehensive_duty(None, calculation_input)
+            assert result.total_amount == single.total_amount
+
+    @pytest.mark.asyncio
+    async def test_batch_of_2000_lines(self, rate_book):
+        """Test a full-size declaration is calculated quickly."""
+        service = DutyCalculatorService(rate_book=rate_book)
+        inputs = [
+            DutyCalculationInput(hs_code="84714100", country_code="USA", customs_value=Decimal("1500.00"))
+            for _ in range(2000)
+        ]
+
+        start = time.perf_counter()
+        results = await service.calculate_batch(None, inputs)
+        elapsed = time.perf_counter() - start
+
+        assert len(results) == 2000
+        assert elapsed < 1.0
+
+
+@pytest.mark.unit
+class TestFtaPartnerRanking:
+    """Test suite for ranking FTA partner countries."""
+
+    @pytest.fixture
+    def partner_book(self):
+        """Create a rate book with several partners at different HS levels."""
+        today = date.today()
+        return RateBook.from_entries(
+            "partner-test",
+            general_rates=[GeneralRateEntry(1, "6403", Decimal("5.00"), "ad_valorem", "5%")],
+            fta_rates=[
+                _fta(1, "6403", Decimal("4.00"), fta_code="KAFTA", country_code="KOR"),
+                _fta(2, "640399", Decimal("1.00"), fta_code="KAFTA", country_code="KOR"),
+                _fta(3, "6403", Decimal("0.00"), fta_code="AANZFTA", country_code="VNM",
+                     agreement_name="ASEAN-Australia-New Zealand FTA"),
+                _fta(4, "6403", Decimal("3.00"), fta_code="JAEPA", country_code="JPN"),
+                _fta(5, "6403", Decimal("2.00"), fta_code="JAEPA", country_code="JPN",
+                     effective_date=today + timedelta(days=365)),
+            ]
+        )
+
+    def test_best_rate_per_country(self, partner_book):
+        """Test each country resolves its own most specific, lowest rate."""
+        best = partner_book.get_best_fta_rates_by_country("64039900", date.today())
+        assert {country: entry.id for country, entry in best.items()} == {"JPN": 4, "KOR": 2, "VNM": 3}
+
+    @pytest.mark.asyncio
+    async def test_partners_ranked_by_landed_duty(self, partner_book):
+        """Test partners are ordered by duty payable with savings against general."""
+        service = DutyCalculatorService(rate_book=partner_book)
+        general_duty, options = await service.rank_fta_partners(
+            None,
+            DutyCalculationInput(hs_code="64039900", country_code="", customs_value=Decimal("1000.00"))
+        )
+
+        assert general_duty.amount == Decimal("50.00")
+        assert [option.country_code for option in options] == ["VNM", "KOR", "JPN"]
+        assert [option.fta_duty.amount for option in options] == [
+            Decimal("0.00"), Decimal("10.00"), Decimal("30.00")
+        ]
+        assert options[0].savings_vs_general == Decimal("50.00")
+        assert options[0].agreement_name == "ASEAN-Australia-New Zealand FTA"
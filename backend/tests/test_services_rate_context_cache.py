@@ -0,0 +1,141 @@
+"""
+Tests for the resolved rate context cache.
+
+This module tests:
+- LRU eviction and TTL expiry
+- Invalidation when the rate data version changes
+- Duty calculations at different values sharing one resolved context
+- Use only by calculators without a rate book
+- Invalidation on in-place raw SQL updates of rate tables
+"""
+
+import pytest
+from datetime import date
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services import rate_context_cache as cache_module
+from services.duty_calculator import DutyCalculatorService, DutyCalculationInput, DutyRateContext
+from services.rate_book import GeneralRateEntry
+from services.rate_context_cache import RateContextCache, rate_context_key
+
+CALC_DATE = date(2024, 7, 1)
+
+
+def _context(rate="5.00"):
+    """Build a context with only a general rate."""
+    return DutyRateContext(
+        general_rate=GeneralRateEntry(1, "8471", Decimal(rate), "ad_valorem", f"{rate}%")
+    )
+
+
+@pytest.mark.unit
+class TestRateContextCache:
+    """Test suite for the rate context cache."""
+
+    def test_key_normalizes_exporter(self):
+        """Test exporter names differing in legal form share a key."""
+        assert rate_context_key("8471", "CHN", CALC_DATE, "Acme Steel Co., Ltd.") == \
+            rate_context_key("8471", "CHN", CALC_DATE, "ACME STEEL LIMITED")
+
+    def test_evicts_least_recently_used(self):
+        """Test the oldest untouched entry is evicted beyond the bound."""
+        cache = RateContextCache(max_entries=2, ttl=60, check_interval=60)
+        first, second, third = (rate_context_key(code, "USA", CALC_DATE) for code in ("01", "02", "03"))
+
+        cache.put(first, _context())
+        cache.put(second, _context())
+        cache.get(first)
+        cache.put(third, _context())
+
+        assert cache.get(first) is not None
+        assert cache.get(second) is None
+        assert len(cache) == 2
+
+    def test_expires_after_ttl(self):
+        """Test entries are not served after their TTL."""
+        cache = RateContextCache(max_entries=10, ttl=0, check_interval=60)
+        key = rate_context_key("8471", "USA", CALC_DATE)
+
+        cache.put(key, _context())
+
+        assert cache.get(key) is None
+
+    @pytest.mark.asyncio
+    async def test_version_change_drops_entries(self):
+        """Test a new data version discards every cached context."""
+        cache = RateContextCache(max_entries=10, ttl=60, check_interval=0)
+        key = rate_context_key("8471", "USA", CALC_DATE)
+        resolve = AsyncMock(side_effect=[_context("5.00"), _context("0.00")])
+
+        with patch.object(cache_module, "get_rate_data_version", AsyncMock(side_effect=["v1", "v1", "v2"])):
+            first = await cache.get_or_resolve(None, key, resolve)
+            cached = await cache.get_or_resolve(None, key, resolve)
+            refreshed = await cache.get_or_resolve(None, key, resolve)
+
+        assert cached is first
+        assert refreshed.general_rate.general_rate == Decimal("0.00")
+        assert resolve.await_count == 2
+
+
+@pytest.mark.unit
+class TestCalculatorContextCaching:
+    """Test suite for duty calculations on cached contexts."""
+
+    @pytest.mark.asyncio
+    async def test_values_share_resolved_context(self):
+        """Test calculations at different values resolve rates once."""
+        calculator = DutyCalculatorService(rate_book=None)
+        calculator.context_cache = RateContextCache(max_entries=10, ttl=60, check_interval=60)
+        calculator.context_cache._checked_at = float("inf")  # Skip the version check
+
+        with patch.object(
+            calculator, "_resolve_rate_context_from_database", AsyncMock(return_value=_context())
+        ) as resolve:
+            results = [
+                await calculator.calculate_comprehensive_duty(None, DutyCalculationInput(
+                    hs_code="84713000", country_code="USA",
+                    customs_value=Decimal(value), calculation_date=CALC_DATE
+                ))
+                for value in ("1000.00", "2500.00")
+            ]
+
+        assert resolve.await_count == 1
+        assert [result.general_duty.amount for result in results] == [Decimal("50.00"), Decimal("125.00")]
+
+    def test_rate_book_calculators_skip_cache(self):
+        """Test the cache is only a fallback for calculators without a rate book."""
+        with patch.object(cache_module, "is_database_initialized", return_value=True):
+            assert DutyCalculatorService(rate_book=None).context_cache is cache_module.rate_context_cache
+            assert DutyCalculatorService(rate_book=MagicMock()).context_cache is None
+
+
+@pytest.mark.database
+class TestRateContextCacheInvalidation:
+    """Test suite for invalidation on rate table writes."""
+
+    @pytest.mark.asyncio
+    async def test_in_place_update_drops_entries(self, test_session: AsyncSession):
+        """Test a scraper-style update by id drops cached contexts."""
+        from models.tariff import TariffCode
+        from models.fta import FtaRate
+
+        test_session.add_all([
+            TariffCode(hs_code="84713000", description="Portable computers", level=8),
+            FtaRate(hs_code="84713000", fta_code="AUSFTA", country_code="USA", preferential_rate=Decimal("5.00")),
+        ])
+        await test_session.commit()
+
+        cache = RateContextCache(max_entries=10, ttl=60, check_interval=0)
+        key = rate_context_key("84713000", "USA", CALC_DATE)
+        await cache.check_version(test_session)
+        cache.put(key, _context())
+
+        await test_session.execute(text("UPDATE fta_rates SET preferential_rate = 0 WHERE hs_code = '84713000'"))
+        await test_session.commit()
+        await cache.check_version(test_session)
+
+        assert cache.get(key) is None
@@ -0,0 +1,232 @@
+"""
+Tests for date-effective FTA rate timelines.
+
+This module tests:
+- Timeline lookups against a scan of the rate rows
+- Staged elimination projections
+- Per-agreement timelines in the rate book
+- Forward-dated calculations agreeing with projections
+- Overlapping agreements ranked by their staged rates
+"""
+
+import pytest
+import pytest_asyncio
+from datetime import date, timedelta
+from decimal import Decimal
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services.duty_calculator import DutyCalculatorService, DutyCalculationInput
+from services.rate_book import RateBook, FtaRateEntry
+from services.rate_timeline import RateTimeline, staged_rate, fta_rate_order, next_staging_date
+
+
+def _fta(id, rate, effective_date=None, elimination_date=None, **kwargs):
+    """Build an FTA rate entry with sensible defaults."""
+    values = dict(
+        id=id, hs_code="870321", fta_code="KAFTA", country_code="KOR",
+        preferential_rate=rate, rate_type="ad_valorem", staging_category="A",
+        effective_date=effective_date, elimination_date=elimination_date,
+        quota_quantity=None, quota_unit=None, safeguard_applicable=False,
+        rule_of_origin=None
+    )
+    values.update(kwargs)
+    return FtaRateEntry(**values)
+
+
+@pytest.mark.unit
+class TestRateTimeline:
+    """Test suite for the rate timeline interval index."""
+
+    def test_matches_scan_on_every_day(self):
+        """Test overlapping and staged rows resolve like a scan of the rows."""
+        entries = [
+            _fta(1, Decimal("5.00"), date(2024, 1, 1), date(2026, 1, 1)),
+            _fta(2, Decimal("2.50"), date(2026, 1, 1), date(2028, 1, 1)),
+            _fta(3, Decimal("4.00"), date(2025, 6, 1), None),
+            _fta(4, None, date(2023, 1, 1), date(2024, 6, 1)),
+        ]
+        timeline = RateTimeline(entries)
+        ranked = sorted(entries, key=fta_rate_order)
+
+        day = date(2022, 12, 1)
+        while day < date(2029, 1, 1):
+            expected = next((e for e in ranked if e.is_in_force(day)), None)
+            assert timeline.entry_on(day) is expected, day
+            day += timedelta(days=1)
+
+    def test_next_change_skips_boundaries_without_effect(self):
+        """Test only dates on which the best rate changes are boundaries."""
+        timeline = RateTimeline([
+            _fta(1, Decimal("1.00"), date(2024, 1, 1), None),
+            _fta(2, Decimal("5.00"), date(2025, 1, 1), date(2026, 1, 1)),
+        ])
+        assert timeline.next_change(date(2023, 6, 1)) == date(2024, 1, 1)
+        assert timeline.next_change(date(2024, 1, 1)) is None
+        assert timeline.elimination_date is None
+
+    def test_linear_staging_projection(self):
+        """Test category B rates fall in equal annual steps to zero."""
+        timeline = RateTimeline([
+            _fta(1, Decimal("5.00"), date(2024, 1, 1), date(2030, 1, 1), staging_category="B")
+        ])
+        projections = timeline.project(2024)
+        assert [p.year for p in projections] == list(range(2024, 2031))
+        assert [p.rate for p in projections] == [
+            Decimal("5.00"), Decimal("4.17"), Decimal("3.33"), Decimal("2.50"),
+            Decimal("1.67"), Decimal("0.83"), Decimal("0.00")
+        ]
+        assert projections[-1].eliminated
+        assert not any(p.eliminated for p in projections[:-1])
+
+    def test_next_staging_date(self):
+        """Test staged rates change on each anniversary before elimination."""
+        entry = _fta(1, Decimal("5.00"), date(2024, 1, 1), date(2030, 1, 1), staging_category="B")
+        assert next_staging_date(entry, date(2024, 1, 1)) == date(2025, 1, 1)
+        assert next_staging_date(entry, date(2026, 7, 1)) == date(2027, 1, 1)
+        assert next_staging_date(entry, date(2029, 1, 1)) is None
+        assert next_staging_date(_fta(2, Decimal("5.00"), date(2024, 1, 1), date(2030, 1, 1)), date(2025, 1, 1)) is None
+
+    def test_flat_staging_holds_until_elimination(self):
+        """Test other categories keep their rate until eliminated."""
+        entry = _fta(1, Decimal("7.50"), date(2024, 1, 1), date(2027, 7, 1), staging_category="D")
+        timeline = RateTimeline([entry])
+        assert [p.rate for p in timeline.project(2025)] == [
+            Decimal("7.50"), Decimal("7.50"), Decimal("7.50"), Decimal("0.00")
+        ]
+        assert staged_rate(entry, date(2027, 7, 1)) == Decimal("0.00")
+
+    def test_projection_without_elimination(self):
+        """Test rates that never reach zero project a default horizon."""
+        timeline = RateTimeline([_fta(1, Decimal("3.00"), date(2026, 1, 1))])
+        projections = timeline.project(2025)
+        assert len(projections) == 5
+        assert projections[0].rate is None
+        assert projections[1].rate == Decimal("3.00")
+        assert len(timeline.project(2025, years=2)) == 2
+
+
+@pytest.mark.unit
+class TestRateBookTimelines:
+    """Test suite for rate book timeline lookups."""
+
+    @pytest.fixture
+    def book(self):
+        """Rate book with two agreements recorded at different levels."""
+        return RateBook.from_entries(
+            "timeline-test",
+            fta_rates=[
+                _fta(1, Decimal("5.00"), date(2024, 1, 1), date(2030, 1, 1), hs_code="8703"),
+                _fta(2, Decimal("3.00"), date(2024, 1, 1), date(2028, 1, 1), hs_code="870321"),
+                _fta(3, Decimal("4.00"), date(2024, 1, 1), None, hs_code="8703", fta_code="RCEP"),
+            ]
+        )
+
+    def test_timelines_per_agreement_at_most_specific_level(self, book):
+        """Test each agreement uses its own most specific rates."""
+        timelines = book.get_fta_timelines("87032100", "KOR")
+        assert list(timelines) == ["KAFTA", "RCEP"]
+        assert timelines["KAFTA"].entry_on(date(2025, 1, 1)).id == 2
+        assert timelines["KAFTA"].elimination_date == date(2028, 1, 1)
+        assert timelines["RCEP"].entry_on(date(2025, 1, 1)).id == 3
+
+    def test_best_rate_and_next_change_use_timelines(self, book):
+        """Test forward-dated lookups fall back a level once a rate ends."""
+        assert book.get_best_fta_rate("87032100", "KOR", date(2025, 1, 1)).id == 2
+        assert book.get_best_fta_rate("87032100", "KOR", date(2029, 1, 1)).id == 3
+        assert book.next_rate_change("87032100", "KOR", date(2025, 1, 1)) == date(2028, 1, 1)
+
+    @pytest.mark.asyncio
+    async def test_forward_calculation_matches_projection(self):
+        """Test a forward-dated calculation applies the projected staged rate."""
+        book = RateBook.from_entries(
+            "staging-test",
+            fta_rates=[_fta(1, Decimal("5.00"), date(2024, 1, 1), date(2030, 1, 1), staging_category="B")]
+        )
+        calculator = DutyCalculatorService(rate_book=book)
+        on_date = date(2027, 1, 1)
+
+        result = await calculator.calculate_from_context(
+            DutyCalculationInput(
+                hs_code="87032100", country_code="KOR",
+                customs_value=Decimal("10000.00"), calculation_date=on_date
+            ),
+            book.resolve("87032100", "KOR", None, on_date)
+        )
+        projected = book.get_fta_timelines("87032100", "KOR")["KAFTA"].rate_on(on_date)
+
+        assert result.fta_duty.rate == projected.rate == Decimal("2.50")
+        assert result.fta_duty.amount == Decimal("250.00")
+
+
+def _overlapping():
+    """A flat 3% agreement and a 5% agreement staged to zero over five years."""
+    return [
+        _fta(1, Decimal("3.00"), date(2024, 1, 1), None),
+        _fta(2, Decimal("5.00"), date(2024, 1, 1), date(2029, 1, 1), fta_code="RCEP", staging_category="B"),
+    ]
+
+
+@pytest.mark.unit
+class TestStagedRanking:
+    """Test suite for ranking overlapping agreements by staged rate."""
+
+    def test_timeline_switches_when_staging_undercuts(self):
+        """Test the staged agreement becomes best once its staged rate is lower."""
+        timeline = RateTimeline(_overlapping())
+
+        assert timeline.entry_on(date(2024, 6, 1)).id == 1
+        assert timeline.entry_on(date(2026, 6, 1)).id == 1  # 3.00 each, lower id wins
+        assert timeline.entry_on(date(2027, 1, 1)).id == 2
+        assert timeline.rate_on(date(2027, 1, 1)).rate == Decimal("2.00")
+        assert timeline.next_change(date(2025, 1, 1)) == date(2027, 1, 1)
+        assert timeline.entry_on(date(2029, 1, 1)).id == 1
+
+    @pytest.mark.asyncio
+    async def test_calculation_applies_staged_best_agreement(self):
+        """Test the calculation applies the agreement cheapest after staging."""
+        book = RateBook.from_entries("staged-ranking", fta_rates=_overlapping())
+        on_date = date(2027, 1, 1)
+
+        result = await DutyCalculatorService(rate_book=book).calculate_from_context(
+            DutyCalculationInput(
+                hs_code="87032100", country_code="KOR",
+                customs_value=Decimal("10000.00"), calculation_date=on_date
+            ),
+            book.resolve("87032100", "KOR", None, on_date)
+        )
+
+        assert book.get_best_fta_rate("87032100", "KOR", on_date).fta_code == "RCEP"
+        assert result.fta_duty.rate == Decimal("2.00")
+
+
+@pytest.mark.database
+class TestStagedRankingDatabase:
+    """Test suite for ranking staged rates read from the database."""
+
+    @pytest_asyncio.fixture
+    async def rates(self, test_session: AsyncSession):
+        """Create the overlapping agreements as FTA rate rows."""
+        from models.tariff import TariffCode
+        from models.fta import FtaRate
+
+        test_session.add_all([
+            TariffCode(hs_code="870321", description="Spark-ignition vehicles", level=6),
+            FtaRate(hs_code="870321", fta_code="KAFTA", country_code="KOR", preferential_rate=Decimal("3.00"),
+                    staging_category="A", effective_date=date(2024, 1, 1)),
+            FtaRate(hs_code="870321", fta_code="RCEP", country_code="KOR", preferential_rate=Decimal("5.00"),
+                    staging_category="B", effective_date=date(2024, 1, 1), elimination_date=date(2029, 1, 1)),
+        ])
+        await test_session.commit()
+
+    @pytest.mark.asyncio
+    async def test_database_lookups_rank_by_staged_rate(self, test_session: AsyncSession, rates):
+        """Test the database lookups pick the same agreement as the timeline."""
+        calculator = DutyCalculatorService()
+
+        early = await calculator.get_best_fta_rate(test_session, "87032100", "KOR", date(2024, 6, 1))
+        late = await calculator.get_best_fta_rate(test_session, "87032100", "KOR", date(2027, 1, 1))
+        partners = await calculator.get_best_fta_rates_by_partner(test_session, "87032100", date(2027, 1, 1))
+
+        assert early.fta_code == "KAFTA"
+        assert late.fta_code == "RCEP"
+        assert partners["KOR"].fta_code == "RCEP"
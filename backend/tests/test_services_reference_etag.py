@@ -0,0 +1,151 @@
+"""
+Tests for conditional GET on the reference endpoints.
+
+This module tests:
+- Entity tag construction and If-None-Match matching
+- Which paths are tagged
+- 304 responses that never reach the route
+- Tags changing after in-place raw SQL updates of reference data
+"""
+
+import pytest
+import pytest_asyncio
+from contextlib import asynccontextmanager
+from datetime import date
+from decimal import Decimal
+from unittest.mock import AsyncMock, patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import main
+from services.data_version import get_reference_data_version
+from services.reference_etag import etag_matches, is_conditional_path, reference_etag
+
+ETAG = reference_etag("v1", date(2024, 7, 1))
+
+
+@pytest.mark.unit
+class TestReferenceEtag:
+    """Test suite for reference entity tags."""
+
+    def test_tag_changes_with_version_and_date(self):
+        """Test tags differ across data versions and days."""
+        assert reference_etag("v1", date(2024, 7, 1)) == ETAG
+        assert reference_etag("v2", date(2024, 7, 1)) != ETAG
+        assert reference_etag("v1", date(2024, 7, 2)) != ETAG
+
+    @pytest.mark.parametrize("header,expected", [
+        (None, False),
+        ("", False),
+        (ETAG, True),
+        (f"W/{ETAG}", True),
+        (f'"other", {ETAG}', True),
+        ("*", True),
+        ('"other"', False),
+    ])
+    def test_if_none_match(self, header, expected):
+        """Test If-None-Match uses weak comparison over a tag list."""
+        assert etag_matches(header, ETAG) is expected
+
+    @pytest.mark.parametrize("path,expected", [
+        ("/api/tariff/sections", True),
+        ("/api/export/ahecc-tree", True),
+        ("/api/duty/rates/8471", True),
+        ("/api/duty/metrics", False),
+        ("/api/news/latest", False),
+    ])
+    def test_conditional_paths(self, path, expected):
+        """Test only reference routes are tagged."""
+        assert is_conditional_path(path) is expected
+
+
+@pytest.mark.unit
+class TestConditionalGetMiddleware:
+    """Test suite for the conditional GET middleware."""
+
+    @pytest.fixture
+    def client(self):
+        """Client for an app with one reference route counting its calls."""
+        app = FastAPI()
+        app.add_middleware(main.ConditionalGetMiddleware)
+        app.state.calls = 0
+
+        @app.get("/api/tariff/sections")
+        async def sections():
+            app.state.calls += 1
+            return [{"id": 1}]
+
+        @asynccontextmanager
+        async def session():
+            yield None
+
+        with patch.object(main, "is_database_initialized", return_value=True), \
+                patch.object(main, "get_db_session", session), \
+                patch.object(main, "get_reference_etag", AsyncMock(return_value=ETAG)):
+            yield TestClient(app), app.state
+
+    def test_tags_response(self, client):
+        """Test a full response carries the ETag and Cache-Control."""
+        test_client, state = client
+        response = test_client.get("/api/tariff/sections")
+
+        assert response.status_code == 200
+        assert response.headers["etag"] == ETAG
+        assert "must-revalidate" in response.headers["cache-control"]
+        assert state.calls == 1
+
+    def test_matching_tag_skips_route(self, client):
+        """Test a current client copy gets an empty 304 without running the route."""
+        test_client, state = client
+        response = test_client.get("/api/tariff/sections", headers={"If-None-Match": ETAG})
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == ETAG
+        assert state.calls == 0
+
+    def test_stale_tag_gets_full_response(self, client):
+        """Test an outdated client copy gets the full response."""
+        test_client, state = client
+        response = test_client.get("/api/tariff/sections", headers={"If-None-Match": '"stale"'})
+
+        assert response.status_code == 200
+        assert response.json() == [{"id": 1}]
+        assert state.calls == 1
+
+
+@pytest.mark.database
+class TestReferenceVersionSource:
+    """Test suite for the data version behind reference tags."""
+
+    @pytest_asyncio.fixture
+    async def tco(self, test_session: AsyncSession):
+        """Create a tariff code with a TCO and a dumping duty."""
+        from models.tariff import TariffCode
+        from models.tco import Tco
+        from models.dumping import DumpingDuty
+
+        test_session.add_all([
+            TariffCode(hs_code="84713000", description="Portable computers", level=8),
+            Tco(tco_number="TCO2401", hs_code="84713000", description="Rugged tablets", is_current=True),
+            DumpingDuty(hs_code="84713000", country_code="CHN", duty_type="dumping", duty_rate=Decimal("10.00")),
+        ])
+        await test_session.commit()
+
+    @pytest.mark.parametrize("statement", [
+        "UPDATE tcos SET is_current = 0 WHERE tco_number = 'TCO2401'",
+        "UPDATE dumping_duties SET duty_rate = 15 WHERE hs_code = '84713000'",
+    ])
+    @pytest.mark.asyncio
+    async def test_in_place_update_changes_tag(self, test_session: AsyncSession, tco, statement):
+        """Test a scraper-style update by id changes the tag, so revalidation gets fresh data."""
+        on_date = date(2024, 7, 1)
+        before = reference_etag(await get_reference_data_version(test_session), on_date)
+
+        await test_session.execute(text(statement))
+        await test_session.commit()
+
+        assert reference_etag(await get_reference_data_version(test_session), on_date) != before
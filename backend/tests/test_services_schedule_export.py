@@ -0,0 +1,117 @@
+"""
+Tests for the streaming tariff schedule export.
+
+This module tests:
+- Reading the schedule in partitions with duty rates, FTA rates and TCO flags
+- Section, chapter and changed-since filters
+- NDJSON, CSV and Parquet encoding
+"""
+
+import csv
+import io
+import json
+import pytest
+import pytest_asyncio
+from datetime import date, timedelta
+from decimal import Decimal
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services.schedule_export import (
+    ScheduleExportFilter, iter_schedule, encode_schedule, EXPORT_COLUMNS
+)
+
+
+async def _collect(batches):
+    return [batch async for batch in batches]
+
+
+async def _encode(session, export_format, filters=ScheduleExportFilter(), batch_size=2):
+    return b"".join(await _collect(encode_schedule(iter_schedule(session, filters, batch_size), export_format)))
+
+
+@pytest.mark.database
+class TestScheduleExport:
+    """Test suite for exporting the schedule."""
+
+    @pytest_asyncio.fixture
+    async def schedule(self, test_session: AsyncSession):
+        """Create codes across two chapters with rates and a TCO."""
+        from models.tariff import TariffCode
+        from models.duty import DutyRate
+        from models.fta import FtaRate
+        from models.tco import Tco
+
+        test_session.add_all([
+            TariffCode(hs_code="7604", description="Aluminium bars", level=4, chapter_id=76),
+            TariffCode(hs_code="76041000", description="Non-alloy bars", level=8, parent_code="7604", chapter_id=76),
+            TariffCode(hs_code="76042100", description="Hollow profiles", level=8, parent_code="7604", chapter_id=76),
+            TariffCode(hs_code="8471", description="Computers", level=4, chapter_id=84),
+            DutyRate(hs_code="76041000", general_rate=Decimal("5.00"), rate_text="5%"),
+            FtaRate(hs_code="76041000", fta_code="KAFTA", country_code="KOR", preferential_rate=Decimal("0.00")),
+            FtaRate(hs_code="76041000", fta_code="AUSFTA", country_code="USA", preferential_rate=Decimal("0.00"),
+                    effective_date=date(2005, 1, 1)),
+            Tco(tco_number="TCO2401", hs_code="76042100", description="Extruded frames", is_current=True),
+        ])
+        await test_session.commit()
+
+    @pytest.mark.asyncio
+    async def test_partitions_in_code_order(self, test_session: AsyncSession, schedule):
+        """Test every code is read once, in order, in partitions of the batch size."""
+        batches = await _collect(iter_schedule(test_session, ScheduleExportFilter(), 3))
+
+        assert [len(batch) for batch in batches] == [3, 1]
+        rows = {row["hs_code"]: row for batch in batches for row in batch}
+        assert list(rows) == ["7604", "76041000", "76042100", "8471"]
+        assert rows["76041000"]["general_rate"] == 5.0
+        assert [rate["fta_code"] for rate in rows["76041000"]["fta_rates"]] == ["AUSFTA", "KAFTA"]
+        assert rows["76042100"]["has_current_tco"] is True
+        assert rows["7604"]["has_current_tco"] is False
+        assert rows["7604"]["fta_rates"] == []
+
+    @pytest.mark.asyncio
+    async def test_filters(self, test_session: AsyncSession, schedule):
+        """Test chapter and changed-since filters."""
+        chapter = await _collect(iter_schedule(test_session, ScheduleExportFilter(chapter_id=84), 10))
+        future = await _collect(iter_schedule(
+            test_session, ScheduleExportFilter(changed_since=date.today() + timedelta(days=1)), 10
+        ))
+
+        recent = await _collect(iter_schedule(
+            test_session, ScheduleExportFilter(changed_since=date.today() - timedelta(days=1)), 10
+        ))
+
+        assert [row["hs_code"] for batch in chapter for row in batch] == ["8471"]
+        assert future == []
+        assert [row["hs_code"] for batch in recent for row in batch] == ["7604", "76041000", "76042100", "8471"]
+
+    @pytest.mark.asyncio
+    async def test_ndjson(self, test_session: AsyncSession, schedule):
+        """Test NDJSON has one object per code with nested FTA rates."""
+        lines = (await _encode(test_session, "ndjson")).decode().splitlines()
+        records = [json.loads(line) for line in lines]
+
+        assert [record["hs_code"] for record in records] == ["7604", "76041000", "76042100", "8471"]
+        assert records[1]["fta_rates"][0]["effective_date"] == "2005-01-01"
+
+    @pytest.mark.asyncio
+    async def test_csv(self, test_session: AsyncSession, schedule):
+        """Test CSV has a header and one row per code with FTA rates as JSON."""
+        rows = list(csv.DictReader(io.StringIO((await _encode(test_session, "csv")).decode())))
+
+        assert len(rows) == 4
+        assert tuple(rows[0]) == EXPORT_COLUMNS
+        assert rows[1]["general_rate"] == "5.0"
+        assert len(json.loads(rows[1]["fta_rates"])) == 2
+        assert rows[0]["parent_code"] == ""
+
+    @pytest.mark.asyncio
+    async def test_parquet(self, test_session: AsyncSession, schedule):
+        """Test Parquet output reads back with one row group per partition."""
+        pq = pytest.importorskip("pyarrow.parquet")
+
+        parquet_file = pq.ParquetFile(io.BytesIO(await _encode(test_session, "parquet")))
+        table = parquet_file.read()
+
+        assert parquet_file.num_row_groups == 2
+        assert table.column("hs_code").to_pylist() == ["7604", "76041000", "76042100", "8471"]
+        assert table.column("has_current_tco").to_pylist() == [False, False, True, False]
@@ -0,0 +1,86 @@
+"""
+Tests for compiled special tax dispatch.
+
+This module tests the prefix trie against a linear scan of the registered
+prefixes, and that the tax calculators honour pre-resolved taxes.
+"""
+
+import pytest
+
+from services.special_taxes import (
+    SPECIAL_TAX_PREFIXES,
+    SpecialTaxTrie,
+    applicable_special_taxes,
+    LUXURY_CAR_TAX,
+    WINE_EQUALISATION_TAX,
+    CONTAINER_DEPOSIT,
+    QUARANTINE_CHARGE,
+    WINE_INDUSTRY_LEVY
+)
+
+
+def _linear_scan(hs_code):
+    """Resolve taxes the way the calculators used to, one prefix list at a time."""
+    return frozenset(
+        tax for tax, prefixes in SPECIAL_TAX_PREFIXES.items()
+        if any(hs_code.startswith(prefix) for prefix in prefixes)
+    )
+
+
+@pytest.mark.unit
+class TestSpecialTaxTrie:
+    """Test suite for the special tax prefix trie."""
+
+    def test_matches_linear_scan_for_every_heading(self):
+        """Test every 4-digit heading and a full code under it resolve alike."""
+        for heading in range(10000):
+            code = f"{heading:04d}"
+            assert applicable_special_taxes(code) == _linear_scan(code)
+            assert applicable_special_taxes(code + "1000") == _linear_scan(code + "1000")
+
+    def test_overlapping_prefixes_accumulate(self):
+        """Test wine picks up chapter and heading level taxes in one walk."""
+        assert applicable_special_taxes("22042100") == {
+            WINE_EQUALISATION_TAX, CONTAINER_DEPOSIT, QUARANTINE_CHARGE, WINE_INDUSTRY_LEVY
+        }
+
+    def test_separators_and_short_codes(self):
+        """Test separators are ignored and codes shorter than a prefix do not match."""
+        assert applicable_special_taxes("8703.23.10") == {LUXURY_CAR_TAX}
+        assert applicable_special_taxes("87") == frozenset()
+        assert applicable_special_taxes("") == frozenset()
+        assert applicable_special_taxes(None) == frozenset()
+
+    def test_custom_registry(self):
+        """Test new levy tables can be compiled alongside existing ones."""
+        trie = SpecialTaxTrie({"levy_a": ("12",), "levy_b": ("1234", "99")})
+        assert trie.match("12345678") == {"levy_a", "levy_b"}
+        assert trie.match("12990000") == {"levy_a"}
+        assert trie.match("99") == {"levy_b"}
+
+
+@pytest.mark.unit
+class TestSpecialTaxCalculators:
+    """Test suite for the route-level tax calculators."""
+
+    def test_resolved_taxes_match_lookup(self):
+        """Test passing pre-resolved taxes gives the same result as resolving."""
+        from routes.duty_calculator import calculate_lct, calculate_wet, calculate_other_levies
+
+        for hs_code in ("87032310", "22042100", "04021000", "85171200", "61091000"):
+            taxes = applicable_special_taxes(hs_code)
+            assert calculate_lct(hs_code, 100000.0) == calculate_lct(hs_code, 100000.0, None, taxes)
+            assert calculate_wet(hs_code, 500.0) == calculate_wet(hs_code, 500.0, None, taxes)
+            assert (
+                calculate_other_levies(hs_code, 8000.0)
+                == calculate_other_levies(hs_code, 8000.0, special_taxes=taxes)
+            )
+
+    def test_lct_applies_to_vehicles_only(self):
+        """Test LCT is charged on the excess over the threshold for vehicles."""
+        from routes.duty_calculator import calculate_lct
+
+        assert calculate_lct("84713000", 100000.0)["applicable"] is False
+        result = calculate_lct("87032310", 81849.0)
+        assert result["applicable"] is True
+        assert result["amount"] == pytest.approx(3300.0)
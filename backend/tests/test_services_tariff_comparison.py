@@ -0,0 +1,102 @@
+"""
+Tests for columnar bulk comparison of tariff codes.
+
+This module tests:
+- Normalizing requested codes
+- Columns aligned with the codes found, in request order
+- Aggregated rate, TCO and duty attributes with defaults for codes without rows
+- FTA attributes counting only rates in force
+"""
+
+import pytest
+import pytest_asyncio
+from datetime import date, timedelta
+from decimal import Decimal
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services.tariff_comparison import compare_codes_columnar, parse_comparison_codes
+
+
+@pytest.mark.unit
+class TestParseComparisonCodes:
+    """Test suite for requested code normalization."""
+
+    def test_normalizes_and_dedupes(self):
+        """Test codes are reduced to digits, keeping first occurrences in order."""
+        assert parse_comparison_codes(["8471.30", " ", "7604", "847130", "76 04"]) == ["847130", "7604"]
+
+
+@pytest.mark.database
+class TestColumnarComparison:
+    """Test suite for loading comparison columns."""
+
+    @pytest_asyncio.fixture
+    async def family(self, test_session: AsyncSession):
+        """Create a small product family with rates and a TCO."""
+        from models.tariff import TariffCode
+        from models.duty import DutyRate
+        from models.fta import FtaRate
+        from models.tco import Tco
+
+        test_session.add_all([
+            TariffCode(hs_code="76041000", description="Bars of non-alloy aluminium", level=8),
+            TariffCode(hs_code="76042100", description="Hollow profiles", level=8),
+            DutyRate(hs_code="76041000", general_rate=Decimal("5.00"), rate_text="5%"),
+            FtaRate(hs_code="76041000", fta_code="AUSFTA", country_code="USA", preferential_rate=Decimal("0.00")),
+            FtaRate(hs_code="76041000", fta_code="KAFTA", country_code="KOR", preferential_rate=Decimal("1.50")),
+            Tco(tco_number="TCO2401", hs_code="76042100", description="Extruded frames", is_current=True),
+        ])
+        await test_session.commit()
+
+    @pytest.mark.asyncio
+    async def test_columns_follow_request_order(self, test_session: AsyncSession, family):
+        """Test every column is aligned with the found codes in request order."""
+        comparison = await compare_codes_columnar(
+            test_session, ["76042100", "99999999", "76041000"],
+            ["level", "general_rate", "fta_agreements", "best_fta_rate", "current_tcos"]
+        )
+
+        assert comparison.hs_codes == ["76042100", "76041000"]
+        assert comparison.missing_codes == ["99999999"]
+        assert comparison.columns == {
+            "level": [8, 8],
+            "general_rate": [None, 5.0],
+            "fta_agreements": [0, 2],
+            "best_fta_rate": [None, 0.0],
+            "current_tcos": [1, 0],
+        }
+
+    @pytest.mark.asyncio
+    async def test_default_attributes(self, test_session: AsyncSession, family):
+        """Test the default attribute columns."""
+        comparison = await compare_codes_columnar(test_session, ["76041000"])
+
+        assert list(comparison.columns) == ["description", "level", "general_rate", "best_fta_rate"]
+
+    @pytest.mark.asyncio
+    async def test_unknown_attribute(self, test_session: AsyncSession, family):
+        """Test unknown attributes are rejected."""
+        with pytest.raises(ValueError, match="tariff_rate"):
+            await compare_codes_columnar(test_session, ["76041000"], ["tariff_rate"])
+
+    @pytest.mark.asyncio
+    async def test_fta_rates_not_in_force_are_ignored(self, test_session: AsyncSession, family):
+        """Test future and eliminated FTA rates count towards neither FTA attribute."""
+        from models.fta import FtaRate
+
+        today = date.today()
+        test_session.add_all([
+            FtaRate(hs_code="76042100", fta_code="KAFTA", country_code="KOR", preferential_rate=Decimal("2.00"),
+                    effective_date=today - timedelta(days=365)),
+            FtaRate(hs_code="76042100", fta_code="CPTPP", country_code="JPN", preferential_rate=Decimal("0.00"),
+                    effective_date=today + timedelta(days=30)),
+            FtaRate(hs_code="76042100", fta_code="AUSFTA", country_code="USA", preferential_rate=Decimal("0.50"),
+                    elimination_date=today),
+        ])
+        await test_session.commit()
+
+        comparison = await compare_codes_columnar(
+            test_session, ["76042100"], ["fta_agreements", "best_fta_rate"]
+        )
+
+        assert comparison.columns == {"fta_agreements": [1], "best_fta_rate": [2.0]}
@@ -0,0 +1,103 @@
+"""
+Tests for full-text tariff description search.
+
+This module tests:
+- Translation of web search syntax to FTS5 queries
+- Ranked matching and highlighting on the SQLite FTS5 fallback
+- The FTS5 table following inserts and updates of tariff codes
+"""
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services.tariff_fulltext import TariffFullTextSearch, websearch_to_fts5
+
+
+@pytest.mark.unit
+class TestWebsearchToFts5:
+    """Test suite for web search query translation."""
+
+    @pytest.mark.parametrize("query,expected", [
+        ("steel pipes", '{description} : (("steel" AND "pipes"))'),
+        ('"stainless steel" or aluminium', '{description} : (("stainless steel") OR ("aluminium"))'),
+        ("steel -scrap", '{description} : ((("steel")) NOT ("scrap"))'),
+        ("8471.30 NEAR(x)", '{description} : (("8471 30" AND "near x"))'),
+        ("or steel", '{description} : (("steel"))'),
+    ])
+    def test_translation(self, query, expected):
+        """Test words, phrases, OR and exclusions translate with operators quoted."""
+        assert websearch_to_fts5(query) == expected
+
+    def test_notes_drop_column_filter(self):
+        """Test including chapter notes searches every column."""
+        assert websearch_to_fts5("horses", include_notes=True) == '("horses")'
+
+    @pytest.mark.parametrize("query", ["", "-scrap", "!!"])
+    def test_nothing_to_match(self, query):
+        """Test queries without positive words match nothing."""
+        assert websearch_to_fts5(query) is None
+
+
+@pytest.mark.database
+class TestSqliteFullTextSearch:
+    """Test suite for full-text search on SQLite."""
+
+    @pytest_asyncio.fixture
+    async def codes(self, test_session: AsyncSession):
+        """Create codes to search."""
+        from models.tariff import TariffCode
+
+        test_session.add_all([
+            TariffCode(id=1, hs_code="0101", description="Live horses, asses, mules and hinnies", level=4),
+            TariffCode(id=2, hs_code="7306", description="Stainless steel tubes and pipes", level=4,
+                       chapter_notes="Excludes steel scrap"),
+            TariffCode(id=3, hs_code="7608", description="Aluminium tubes and pipes", level=4),
+            TariffCode(id=4, hs_code="7204", description="Ferrous waste and scrap", level=4),
+        ])
+        await test_session.commit()
+
+    async def _search(self, session, query, include_notes=False):
+        from models.tariff import TariffCode
+
+        search = TariffFullTextSearch(query, include_notes)
+        stmt, rank = await search.apply(session, select(TariffCode))
+        codes = (await session.execute(stmt.order_by(rank.desc(), TariffCode.id))).scalars().all()
+        return search, [code.id for code in codes]
+
+    @pytest.mark.asyncio
+    async def test_stemmed_match_with_highlight(self, test_session: AsyncSession, codes):
+        """Test stemmed words match and are highlighted."""
+        search, ids = await self._search(test_session, "horse")
+        highlights = await search.highlight(test_session, ids)
+
+        assert ids == [1]
+        rank, highlighted = highlights[1]
+        assert 0.0 < rank <= 1.0
+        assert highlighted == "Live <mark>horses</mark>, asses, mules and hinnies"
+
+    @pytest.mark.asyncio
+    async def test_web_search_syntax(self, test_session: AsyncSession, codes):
+        """Test phrases, OR and exclusions."""
+        assert sorted((await self._search(test_session, '"stainless steel" or aluminium'))[1]) == [2, 3]
+        assert (await self._search(test_session, "tubes -aluminium"))[1] == [2]
+
+    @pytest.mark.asyncio
+    async def test_chapter_notes(self, test_session: AsyncSession, codes):
+        """Test chapter notes only match when included."""
+        assert (await self._search(test_session, "scrap"))[1] == [4]
+        assert sorted((await self._search(test_session, "scrap", include_notes=True))[1]) == [2, 4]
+
+    @pytest.mark.asyncio
+    async def test_follows_writes(self, test_session: AsyncSession, codes):
+        """Test codes written after the index is built are searchable."""
+        from models.tariff import TariffCode
+
+        await self._search(test_session, "horse")
+        test_session.add(TariffCode(id=5, hs_code="0106", description="Live horses for racing", level=4))
+        code = await test_session.get(TariffCode, 1)
+        code.description = "Live asses"
+        await test_session.commit()
+
+        assert (await self._search(test_session, "horse"))[1] == [5]
@@ -0,0 +1,138 @@
+"""
+Tests for the in-memory tariff hierarchy index.
+
+This module tests:
+- Contiguous children ranges, child counts and hierarchy paths
+- Section roots and chapter counts
+- Trees built from the index matching trees built by the database
+"""
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services.tariff_hierarchy import ChapterEntry, HierarchyNode, SectionEntry, TariffHierarchy
+
+
+def _node(id, hs_code, parent_code=None, section_id=1, chapter_id=1, is_active=True):
+    """Build a node with its level taken from the code length."""
+    return HierarchyNode(id, hs_code, f"HS {hs_code}", len(hs_code), parent_code, section_id, chapter_id, is_active)
+
+
+CODES = [
+    _node(1, "01"),
+    _node(2, "0102", "01"),
+    _node(3, "0101", "01"),
+    _node(4, "010129", "0101", is_active=False),
+    _node(5, "010121", "0101"),
+    _node(6, "01012100", "010121"),
+    _node(7, "02", chapter_id=2, is_active=False),
+    _node(8, "03", section_id=2, chapter_id=3),
+]
+
+SECTIONS = [SectionEntry(2, 2, "Vegetable products", None, "06-14"), SectionEntry(1, 1, "Live animals", None, "01-05")]
+
+CHAPTERS = [
+    ChapterEntry(2, 2, "Meat", None, 1),
+    ChapterEntry(1, 1, "Live animals", None, 1),
+    ChapterEntry(3, 3, "Fish", None, 2),
+]
+
+
+@pytest.mark.unit
+class TestTariffHierarchy:
+    """Test suite for the hierarchy index."""
+
+    def test_children_are_contiguous_and_ordered(self):
+        """Test every node's children occupy one ordered range."""
+        hierarchy = TariffHierarchy(SECTIONS, CHAPTERS, CODES)
+
+        for position, node in enumerate(hierarchy.nodes):
+            children = [hierarchy.nodes[child] for child in hierarchy.children(position)]
+            expected = sorted(
+                (code for code in CODES if code.parent_code == node.hs_code), key=lambda c: c.hs_code
+            )
+            assert children == expected
+            assert hierarchy.child_count(position) == len(expected)
+            assert all(hierarchy.parent(child) == position for child in hierarchy.children(position))
+
+    def test_paths_run_from_root(self):
+        """Test hierarchy paths include every ancestor."""
+        hierarchy = TariffHierarchy(SECTIONS, CHAPTERS, CODES)
+
+        assert hierarchy.path(hierarchy.position("01012100")) == ("01", "0101", "010121", "01012100")
+        assert hierarchy.path(hierarchy.position("03")) == ("03",)
+        assert hierarchy.position("9999") is None
+        assert [node.hs_code for node in hierarchy.child_nodes("0101")] == ["010121", "010129"]
+        assert hierarchy.child_nodes("9999") == ()
+
+    def test_sections_and_chapters(self):
+        """Test sections, chapters and counts are indexed in order."""
+        hierarchy = TariffHierarchy(SECTIONS, CHAPTERS, CODES)
+
+        assert [section.section_number for section in hierarchy.sections] == [1, 2]
+        assert [chapter.chapter_number for chapter in hierarchy.chapters(1)] == [1, 2]
+        assert hierarchy.chapter_code_count(1) == 6
+        assert hierarchy.chapter_code_count(99) == 0
+        assert [hierarchy.nodes[p].hs_code for p in hierarchy.section_roots(1)] == ["01"]
+        assert hierarchy.section(3) is None
+
+    def test_parent_cycle_is_indexed(self):
+        """Test codes on a parent cycle are still indexed."""
+        hierarchy = TariffHierarchy([], [], [_node(1, "99", "9901"), _node(2, "9901", "99")])
+
+        assert len(hierarchy) == 2
+        assert hierarchy.get("9901").hs_code == "9901"
+
+
+@pytest.mark.database
+class TestHierarchyTrees:
+    """Test suite for trees built from the index."""
+
+    @pytest_asyncio.fixture
+    async def hierarchy(self, test_session: AsyncSession) -> TariffHierarchy:
+        """Store the test schedule and index it from the database."""
+        from models.tariff import TariffCode
+        from models.hierarchy import TariffSection, TariffChapter
+
+        test_session.add_all([
+            TariffSection(id=section.id, section_number=section.section_number, title=section.title)
+            for section in SECTIONS
+        ])
+        test_session.add_all([
+            TariffChapter(id=chapter.id, chapter_number=chapter.chapter_number, title=chapter.title,
+                          section_id=chapter.section_id)
+            for chapter in CHAPTERS
+        ])
+        test_session.add_all([
+            TariffCode(id=code.id, hs_code=code.hs_code, description=code.description, level=code.level,
+                       parent_code=code.parent_code, section_id=code.section_id, chapter_id=code.chapter_id,
+                       is_active=code.is_active)
+            for code in CODES
+        ])
+        await test_session.commit()
+        return await TariffHierarchy.load(test_session, "test")
+
+    @pytest.mark.asyncio
+    async def test_load(self, hierarchy):
+        """Test the index loads every row."""
+        assert len(hierarchy) == len(CODES)
+        assert hierarchy.version == "test"
+        assert hierarchy.get("010129").is_active is False
+
+    @pytest.mark.parametrize("parent_code,depth", [(None, 1), (None, 3), (None, 5), ("01", 2), ("0101", 1)])
+    @pytest.mark.asyncio
+    async def test_tree_matches_database(self, test_session: AsyncSession, hierarchy, parent_code, depth):
+        """Test trees from the index equal trees built by the database."""
+        from models.tariff import TariffCode
+        from routes.tariff import (
+            _assemble_tree, _build_tree_from_hierarchy, _get_ancestor_codes, _load_tree_rows
+        )
+
+        conditions = [TariffCode.section_id == 1, TariffCode.is_active == True]
+        conditions.append(TariffCode.parent_code == parent_code if parent_code else TariffCode.level == 2)
+        rows = await _load_tree_rows(test_session, conditions, depth)
+        root_path = await _get_ancestor_codes(parent_code, test_session) if parent_code else []
+
+        assert _build_tree_from_hierarchy(hierarchy, 1, parent_code, depth) == \
+            _assemble_tree(rows, root_path, depth)
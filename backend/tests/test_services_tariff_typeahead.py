@@ -0,0 +1,98 @@
+"""
+Tests for the tariff typeahead index.
+
+This module tests:
+- Splitting typed text into HS code prefixes and description words
+- Code prefix, word prefix and combined suggestions in suggestion order
+- Building the index from active tariff codes
+"""
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services.tariff_typeahead import TariffTypeahead, TypeaheadEntry, split_query
+
+ENTRIES = [
+    TypeaheadEntry(1, "76", "Aluminium and articles thereof", 2),
+    TypeaheadEntry(2, "7604", "Aluminium bars, rods and profiles", 4),
+    TypeaheadEntry(3, "760410", "Of aluminium, not alloyed", 6),
+    TypeaheadEntry(4, "76042100", "Hollow profiles, extruded", 8),
+    TypeaheadEntry(5, "7607", "Aluminium foil", 4),
+    TypeaheadEntry(6, "84", "Nuclear reactors, boilers, machinery", 2),
+    TypeaheadEntry(7, "8471", "Automatic data processing machines", 4),
+]
+
+
+def _codes(suggestions):
+    return [entry.hs_code for entry, _ in suggestions]
+
+
+@pytest.mark.unit
+class TestTariffTypeahead:
+    """Test suite for typeahead suggestions."""
+
+    @pytest.fixture
+    def typeahead(self):
+        """Index over the sample codes."""
+        return TariffTypeahead(ENTRIES)
+
+    @pytest.mark.parametrize("query,expected", [
+        ("8471.30", ("847130", [])),
+        ("alum 7604", ("7604", ["alum"])),
+        ("Extruded-profiles", ("", ["extruded", "profiles"])),
+    ])
+    def test_split_query(self, query, expected):
+        """Test digit tokens form the code prefix and the rest are words."""
+        assert split_query(query) == expected
+
+    def test_code_prefix(self, typeahead):
+        """Test code prefixes suggest matching codes, broader levels first."""
+        assert _codes(typeahead.suggest("7604", 10)) == ["7604", "760410", "76042100"]
+        assert _codes(typeahead.suggest("76.04", 2)) == ["7604", "760410"]
+        assert typeahead.suggest("9", 10) == []
+
+    def test_code_prefix_lists_sibling_headings_before_subheadings(self):
+        """Test code prefixes suggest broader levels first, not depth-first HS code order."""
+        typeahead = TariffTypeahead(ENTRIES)
+
+        assert _codes(typeahead.suggest("76", 10)) == ["76", "7604", "7607", "760410", "76042100"]
+        assert _codes(typeahead.suggest("76", 3)) == ["76", "7604", "7607"]
+
+    def test_word_prefixes(self, typeahead):
+        """Test word prefixes suggest broader codes first."""
+        suggestions = typeahead.suggest("alum", 10)
+
+        assert _codes(suggestions) == ["76", "7604", "7607", "760410"]
+        assert {match for _, match in suggestions} == {"description"}
+        assert _codes(typeahead.suggest("prof alu", 10)) == ["7604"]
+        assert _codes(typeahead.suggest("mach", 1)) == ["84"]
+
+    def test_code_and_words(self, typeahead):
+        """Test a code prefix narrowed by description words."""
+        assert _codes(typeahead.suggest("7604 hollow", 10)) == ["76042100"]
+
+    def test_nothing_to_match(self, typeahead):
+        """Test empty queries and unknown words suggest nothing."""
+        assert typeahead.suggest("  ", 10) == []
+        assert typeahead.suggest("zinc", 10) == []
+
+
+@pytest.mark.database
+class TestTariffTypeaheadLoading:
+    """Test suite for building the typeahead index from the database."""
+
+    @pytest.mark.asyncio
+    async def test_load_active_codes(self, test_session: AsyncSession):
+        """Test only active codes are indexed."""
+        from models.tariff import TariffCode
+
+        test_session.add_all([
+            TariffCode(hs_code="7604", description="Aluminium bars", level=4, is_active=True),
+            TariffCode(hs_code="7605", description="Aluminium wire", level=4, is_active=False),
+        ])
+        await test_session.commit()
+
+        typeahead = await TariffTypeahead.load(test_session, "v1")
+
+        assert typeahead.version == "v1"
+        assert _codes(typeahead.suggest("alu", 10)) == ["7604"]
@@ -117,6 +117,7 @@ CREATE TABLE dumping_duties (
     hs_code VARCHAR(10) NOT NULL,
     country_code VARCHAR(3) NOT NULL,
     exporter_name VARCHAR(200), -- Specific exporter if applicable
+    exporter_key VARCHAR(200), -- Normalized exporter name (case-folded, legal suffixes stripped)
     duty_type VARCHAR(20), -- dumping, countervailing, both
     duty_rate DECIMAL(8,4), -- Percentage rate
     duty_amount DECIMAL(8,2), -- Specific duty amount for per-unit duties
@@ -133,6 +134,7 @@ CREATE TABLE dumping_duties (
 
 COMMENT ON TABLE dumping_duties IS 'Anti-dumping and countervailing duties administered by Anti-Dumping Commission';
 COMMENT ON COLUMN dumping_duties.case_number IS 'Anti-Dumping Commission investigation case number';
+COMMENT ON COLUMN dumping_duties.exporter_key IS 'Exporter name normalized by the application for exact and trigram matching';
 COMMENT ON COLUMN dumping_duties.notice_number IS 'Commonwealth Government Gazette notice number';
 
 -- =====================================================
@@ -182,6 +184,48 @@ COMMENT ON TABLE gst_provisions IS 'GST exemptions and special provisions affect
 COMMENT ON COLUMN gst_provisions.schedule_reference IS 'Reference to specific GST Act schedule and item';
 COMMENT ON COLUMN gst_provisions.value_threshold IS 'Value threshold in AUD for exemption eligibility';
 
+-- =====================================================
+-- MATERIALIZED BEST RATES
+-- =====================================================
+
+-- Cheapest applicable rate per tariff code and FTA partner, derived from
+-- duty_rates, fta_rates and tcos by the application ('*' = all other origins)
+CREATE TABLE best_rates (
+    hs_code VARCHAR(10) NOT NULL,
+    country_code VARCHAR(3) NOT NULL,
+    general_rate_id INTEGER,
+    general_rate DECIMAL(8,4),
+    general_unit_type VARCHAR(20),
+    fta_rate_id INTEGER,
+    fta_code VARCHAR(10),
+    fta_rate DECIMAL(8,4), -- Effective preferential rate
+    tco_id INTEGER,
+    tco_number VARCHAR(20),
+    best_rate_type VARCHAR(20), -- tco_exemption, fta, general; NULL when quantity-dependent
+    best_rate DECIMAL(8,4),
+    computed_on DATE NOT NULL,
+    valid_until DATE, -- Next date a source rate starts or ends
+    refreshed_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (hs_code, country_code)
+);
+
+COMMENT ON TABLE best_rates IS 'Materialized best duty rate per tariff code and origin, refreshed incrementally on rate changes';
+
+-- =====================================================
+-- DATA VERSIONS
+-- =====================================================
+
+-- Write counter per reference table, bumped by triggers on every statement
+-- (including raw SQL from scrapers and populate scripts); in-memory caches
+-- fingerprint it to detect in-place updates
+CREATE TABLE data_versions (
+    table_name VARCHAR(63) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+COMMENT ON TABLE data_versions IS 'Per-table write counters used to invalidate application caches';
+
 -- =====================================================
 -- EXPORT CLASSIFICATIONS
 -- =====================================================
@@ -265,6 +309,11 @@ CREATE INDEX idx_tco_desc_fts ON tcos USING gin(to_tsvector('english', descripti
 CREATE INDEX idx_dumping_exporter_fts ON dumping_duties USING gin(to_tsvector('english', exporter_name));
 CREATE INDEX idx_export_desc_fts ON export_codes USING gin(to_tsvector('english', description));
 
+-- Trigram indexes for typo-tolerant similarity search (pg_trgm % operator)
+CREATE INDEX idx_tariff_codes_description_trgm ON tariff_codes USING gin(description gin_trgm_ops);
+CREATE INDEX idx_tco_desc_trgm ON tcos USING gin(description gin_trgm_ops);
+CREATE INDEX idx_export_desc_trgm ON export_codes USING gin(description gin_trgm_ops);
+
 -- =====================================================
 -- PERFORMANCE INDEXES
 -- =====================================================
@@ -290,6 +339,8 @@ CREATE INDEX idx_fta_rates_effective ON fta_rates(effective_date, elimination_da
 CREATE INDEX idx_dumping_active ON dumping_duties(hs_code, is_active, effective_date);
 CREATE INDEX idx_dumping_country ON dumping_duties(country_code, is_active);
 CREATE INDEX idx_dumping_expiry ON dumping_duties(expiry_date) WHERE expiry_date IS NOT NULL;
+CREATE INDEX idx_dumping_exporter_key ON dumping_duties(exporter_key, country_code) WHERE exporter_key IS NOT NULL;
+CREATE INDEX idx_dumping_exporter_key_trgm ON dumping_duties USING gin(exporter_key gin_trgm_ops);
 
 -- TCO lookup optimization
 CREATE INDEX idx_tcos_current ON tcos(hs_code, is_current);
@@ -349,6 +400,86 @@ CREATE TRIGGER update_tariff_codes_updated_at
     BEFORE UPDATE ON tariff_codes 
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+-- Drop best rates derived from a changed rate row, including rows written
+-- outside the application; lookups resolve live until the next refresh
+CREATE OR REPLACE FUNCTION invalidate_best_rates()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        DELETE FROM best_rates WHERE hs_code LIKE OLD.hs_code || '%';
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        DELETE FROM best_rates WHERE hs_code LIKE NEW.hs_code || '%';
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER invalidate_best_rates_duty_rates
+    AFTER INSERT OR UPDATE OR DELETE ON duty_rates
+    FOR EACH ROW EXECUTE FUNCTION invalidate_best_rates();
+
+CREATE TRIGGER invalidate_best_rates_fta_rates
+    AFTER INSERT OR UPDATE OR DELETE ON fta_rates
+    FOR EACH ROW EXECUTE FUNCTION invalidate_best_rates();
+
+CREATE TRIGGER invalidate_best_rates_tcos
+    AFTER INSERT OR UPDATE OR DELETE ON tcos
+    FOR EACH ROW EXECUTE FUNCTION invalidate_best_rates();
+
+-- Count writes to the reference tables so caches built from them are
+-- rebuilt after any change, whoever makes it
+CREATE OR REPLACE FUNCTION bump_data_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO data_versions (table_name, version, updated_at)
+    VALUES (TG_TABLE_NAME, 1, NOW())
+    ON CONFLICT (table_name) DO UPDATE
+        SET version = data_versions.version + 1, updated_at = NOW();
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER bump_data_version_tariff_sections
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON tariff_sections
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version();
+
+CREATE TRIGGER bump_data_version_tariff_chapters
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON tariff_chapters
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version();
+
+CREATE TRIGGER bump_data_version_tariff_codes
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON tariff_codes
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version();
+
+CREATE TRIGGER bump_data_version_trade_agreements
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON trade_agreements
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version();
+
+CREATE TRIGGER bump_data_version_duty_rates
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON duty_rates
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version();
+
+CREATE TRIGGER bump_data_version_fta_rates
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON fta_rates
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version();
+
+CREATE TRIGGER bump_data_version_tcos
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON tcos
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version();
+
+CREATE TRIGGER bump_data_version_dumping_duties
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON dumping_duties
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version();
+
+CREATE TRIGGER bump_data_version_gst_provisions
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON gst_provisions
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version();
+
+CREATE TRIGGER bump_data_version_export_codes
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON export_codes
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version();
+
 -- =====================================================
 -- VIEWS FOR COMMON QUERIES
 -- =====================================================